@@ -1,10 +1,13 @@
 import pandas as pd
 import psycopg2
-from psycopg2 import extras
+from psycopg2 import extras, sql
 import logging
 
 from src.data_access.database_connection import get_db_connection
 from src.utils.logging_config import setup_logging
+from src.utils.metrics import instrumented
+from src.utils.compact_dtypes import compact_frame, log_memory_report
+from src.utils.schema import encode_records, PERSISTED_COLUMNS
 
 setup_logging(log_file_prefix="property_repository_log")
 logger = logging.getLogger(__name__)
@@ -27,10 +30,63 @@ class PropertyRepository:
             port=self.port
         )
 
+    @staticmethod
+    def _upsert_properties(cur, df, columns) -> list:
+        """INSERT ... ON CONFLICT (id) DO UPDATE de las filas, con el cursor de una transacción abierta."""
+        # Codificación vectorizada a tipos nativos de Python (int, bool, None) sin iterar filas
+        data_to_insert = encode_records(df, columns)
+
+        update_columns = [col for col in columns if col not in ['id', 'fecha_alta']]
+        update_set_clause = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
+        update_set_clause += ", updated_at = CURRENT_TIMESTAMP"
+
+        insert_sql = f'''
+        INSERT INTO properties ({', '.join(columns)})
+        VALUES %s
+        ON CONFLICT (id) DO UPDATE SET
+            {update_set_clause}
+        '''
+
+        logger.info(f"[LOAD] Insertando/actualizando {len(data_to_insert)} registros en la tabla 'properties'.")
+        extras.execute_values(cur, insert_sql, data_to_insert, page_size=1000)
+        return data_to_insert
+
+    @staticmethod
+    def _insert_audit_entries(cur, entries: pd.DataFrame, changed_by: str, change_source: str) -> list:
+        """Inserta las entradas de auditoría con el cursor de una transacción abierta."""
+        records = encode_records(
+            entries.assign(changed_by=changed_by, change_source=change_source),
+            ['property_id', 'field_name', 'old_value', 'new_value', 'changed_by', 'change_source']
+        )
+        if records:
+            insert_sql = """
+            INSERT INTO audit_log (property_id, field_name, old_value, new_value, changed_by, change_source)
+            VALUES %s
+            """
+            extras.execute_values(cur, insert_sql, records, page_size=1000)
+        return records
+
+    @staticmethod
+    def _replace_duplicate_clusters(cur, clusters: pd.DataFrame) -> list:
+        """Sustituye el contenido de duplicate_clusters con el cursor de una transacción abierta."""
+        cur.execute("DELETE FROM duplicate_clusters")
+        records = encode_records(clusters, ['cluster_id', 'property_id', 'clave_oficina', 'score'])
+        if records:
+            insert_sql = """
+            INSERT INTO duplicate_clusters (cluster_id, property_id, clave_oficina, score)
+            VALUES %s
+            """
+            extras.execute_values(cur, insert_sql, records, page_size=1000)
+        return records
+
+    @instrumented('load')
     def load_properties(self, df, db_columns):
         """
         Carga un DataFrame de pandas a la tabla 'properties' en PostgreSQL.
         Utiliza INSERT ... ON CONFLICT (id) DO UPDATE para manejar duplicados.
+
+        Returns:
+            bool: True si la carga se confirmó, False en caso de error.
         """
         logger.info("[LOAD] Iniciando carga de datos a PostgreSQL.")
         conn = None
@@ -39,38 +95,10 @@ class PropertyRepository:
             cur = conn.cursor()
             logger.info("[LOAD] Conexión a la base de datos PostgreSQL exitosa.")
 
-            columns = db_columns
-
-            data_to_insert = []
-            for index, row in df[columns].iterrows():
-                processed_row = []
-                for col_name in columns:
-                    value = row[col_name]
-                    if pd.isna(value):
-                        processed_row.append(None)
-                    elif isinstance(value, pd.Int64Dtype.type):
-                        processed_row.append(int(value))
-                    elif isinstance(value, bool):
-                        processed_row.append(bool(value))
-                    else:
-                        processed_row.append(value)
-                data_to_insert.append(tuple(processed_row))
-
-            update_columns = [col for col in columns if col not in ['id', 'fecha_alta']]
-            update_set_clause = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
-            update_set_clause += ", updated_at = CURRENT_TIMESTAMP"
-
-            insert_sql = f'''
-            INSERT INTO properties ({', '.join(columns)})
-            VALUES %s
-            ON CONFLICT (id) DO UPDATE SET
-                {update_set_clause}
-            '''
-
-            logger.info(f"[LOAD] Insertando/actualizando {len(data_to_insert)} registros en la tabla 'properties'.")
-            extras.execute_values(cur, insert_sql, data_to_insert, page_size=1000)
+            data_to_insert = self._upsert_properties(cur, df, db_columns)
             conn.commit()
             logger.info(f"[LOAD] Carga de datos a PostgreSQL completada exitosamente. {len(data_to_insert)} registros procesados.")
+            return True
 
         except psycopg2.Error as e:
             logger.error(f"[LOAD] Error al cargar datos a PostgreSQL: {e}")
@@ -82,6 +110,7 @@ class PropertyRepository:
             if conn:
                 conn.close()
                 logger.info("[LOAD] Conexión a la base de datos cerrada.")
+        return False
 
     def get_property_details(self, property_id: str) -> pd.DataFrame or None:
         """
@@ -110,6 +139,42 @@ class PropertyRepository:
                 conn.close()
                 logger.info("[DB_RETRIEVE] Conexión a la base de datos cerrada.")
 
+    def get_property_columns(self, columns: list, property_ids: list = None) -> pd.DataFrame | None:
+        """
+        Obtiene sólo 'id' y las columnas pedidas de muchas propiedades en una sola consulta.
+
+        Args:
+            columns (list): Columnas de la tabla properties a leer.
+            property_ids (list, optional): Propiedades a leer. Por defecto, todo el catálogo.
+
+        Returns:
+            pd.DataFrame | None: Una fila por propiedad, o None si hubo un error.
+        """
+        unknown = [c for c in columns if c not in PERSISTED_COLUMNS]
+        if unknown:
+            logger.error(f"[DB_RETRIEVE] Columnas desconocidas en la proyección: {unknown}")
+            return None
+        conn = None
+        try:
+            conn = self._get_connection()
+            projection = ', '.join(['id'] + [c for c in dict.fromkeys(columns) if c != 'id'])
+            query = f"SELECT {projection} FROM properties"
+            params = {}
+            if property_ids is not None:
+                query += " WHERE id = ANY(%(property_ids)s)"
+                params['property_ids'] = [str(property_id) for property_id in property_ids]
+            df = pd.read_sql(query, conn, params=params)
+            logger.info(f"[DB_RETRIEVE] Proyección de {len(columns)} columnas: {len(df)} propiedades.")
+            return df
+        except psycopg2.Error as e:
+            logger.error(f"[DB_RETRIEVE] Error de PostgreSQL al leer la proyección de propiedades: {e}")
+        except Exception as e:
+            logger.error(f"[DB_RETRIEVE] Un error inesperado ocurrió al leer la proyección de propiedades: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return None
+
     def update_property_field(self, property_id: str, field_name: str, new_value):
         """
         Actualiza un campo específico de una propiedad en la base de datos.
@@ -162,15 +227,349 @@ class PropertyRepository:
             if conn:
                 conn.close()
 
+    def log_audit_entries(self, entries: pd.DataFrame, changed_by: str, change_source: str) -> bool:
+        """
+        Registra varias entradas en audit_log con una sola sentencia.
+
+        Args:
+            entries (pd.DataFrame): Columnas property_id, field_name, old_value, new_value.
+            changed_by (str): Usuario o proceso que originó los cambios.
+            change_source (str): Origen del cambio (p. ej. 'snapshot_diff').
+
+        Returns:
+            bool: True si las entradas se confirmaron, False en caso de error.
+        """
+        if entries.empty:
+            return True
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            records = self._insert_audit_entries(cur, entries, changed_by, change_source)
+            conn.commit()
+            logger.info(f"[AUDIT] {len(records)} entradas de auditoría registradas ({change_source}).")
+            return True
+        except psycopg2.Error as e:
+            logger.error(f"[AUDIT] Error al registrar entradas de auditoría en bloque: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[AUDIT] Error inesperado al registrar entradas de auditoría en bloque: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return False
+
+    def apply_field_updates(self, updates: pd.DataFrame, changed_by: str, change_source: str) -> pd.DataFrame | None:
+        """
+        Llena campos vacíos de muchas propiedades y registra la auditoría en una sola transacción.
+
+        Sólo se escriben los campos que siguen vacíos (NULL) en la base de datos, para no
+        pisar correcciones hechas mientras tanto; la auditoría incluye sólo lo que se escribió.
+
+        Args:
+            updates (pd.DataFrame): Columnas property_id, field_name, old_value, new_value.
+            changed_by (str): Usuario o proceso que originó los cambios.
+            change_source (str): Origen del cambio (p. ej. 'pdf_autofill').
+
+        Returns:
+            pd.DataFrame | None: Filas de 'updates' efectivamente aplicadas, o None si hubo un
+                                 error (en ese caso no se confirmó nada).
+        """
+        if updates.empty:
+            return updates
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            applied_ids = {}
+            for field_name, group in updates.groupby('field_name', sort=False):
+                update_sql = sql.SQL(
+                    "UPDATE properties AS p SET {field} = v.new_value, updated_at = CURRENT_TIMESTAMP "
+                    "FROM (VALUES %s) AS v(id, new_value) WHERE p.id = v.id AND p.{field} IS NULL RETURNING p.id"
+                ).format(field=sql.Identifier(field_name))
+                records = encode_records(group, ['property_id', 'new_value'])
+                rows = extras.execute_values(cur, update_sql, records, page_size=1000, fetch=True)
+                applied_ids[field_name] = {row[0] for row in rows}
+
+            applied = updates[[property_id in applied_ids.get(field_name, ())
+                               for property_id, field_name in zip(updates['property_id'], updates['field_name'])]]
+            if not applied.empty:
+                audit_records = encode_records(
+                    applied.assign(changed_by=changed_by, change_source=change_source),
+                    ['property_id', 'field_name', 'old_value', 'new_value', 'changed_by', 'change_source']
+                )
+                extras.execute_values(cur, """
+                INSERT INTO audit_log (property_id, field_name, old_value, new_value, changed_by, change_source)
+                VALUES %s
+                """, audit_records, page_size=1000)
+            conn.commit()
+            logger.info(f"[UPDATE] {len(applied)} de {len(updates)} campos aplicados en bloque y auditados ({change_source}).")
+            return applied
+        except psycopg2.Error as e:
+            logger.error(f"[UPDATE] Error al aplicar actualizaciones en bloque: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[UPDATE] Error inesperado al aplicar actualizaciones en bloque: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+        return None
+
+    def save_duplicate_clusters(self, clusters: pd.DataFrame) -> bool:
+        """
+        Reemplaza el contenido de la tabla duplicate_clusters con los clusters detectados,
+        en una sola transacción.
+
+        Args:
+            clusters (pd.DataFrame): Columnas cluster_id, property_id, clave_oficina y score.
+
+        Returns:
+            bool: True si los clusters se confirmaron, False en caso de error.
+        """
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            records = self._replace_duplicate_clusters(cur, clusters)
+            conn.commit()
+            logger.info(f"[DUPLICATES] {len(records)} propiedades guardadas en {clusters['cluster_id'].nunique()} clusters de duplicados.")
+            return True
+        except psycopg2.Error as e:
+            logger.error(f"[DUPLICATES] Error al guardar los clusters de duplicados: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[DUPLICATES] Error inesperado al guardar los clusters de duplicados: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return False
+
+    @instrumented('load')
+    def load_inventory_changes(self, rows: pd.DataFrame, db_columns, audit_entries: pd.DataFrame,
+                               clusters: pd.DataFrame, changed_by: str, change_source: str) -> bool:
+        """
+        Carga de una ejecución de ingesta en una sola transacción: upsert de las filas,
+        entradas de auditoría y reemplazo de los clusters de duplicados. Si algo falla no
+        se confirma nada, así que la etapa se puede volver a ejecutar sin duplicar la auditoría.
+
+        Args:
+            rows (pd.DataFrame): Filas a insertar o actualizar (puede estar vacío).
+            db_columns (list): Columnas de 'properties' a escribir.
+            audit_entries (pd.DataFrame): Columnas property_id, field_name, old_value, new_value.
+            clusters (pd.DataFrame): Columnas cluster_id, property_id, clave_oficina y score.
+            changed_by (str): Usuario o proceso que originó los cambios.
+            change_source (str): Origen del cambio (p. ej. 'snapshot_diff').
+
+        Returns:
+            bool: True si todo se confirmó, False en caso de error.
+        """
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            upserted = self._upsert_properties(cur, rows, db_columns) if not rows.empty else []
+            audited = self._insert_audit_entries(cur, audit_entries, changed_by, change_source)
+            clustered = self._replace_duplicate_clusters(cur, clusters)
+            conn.commit()
+            logger.info(f"[LOAD] Carga confirmada: {len(upserted)} propiedades, {len(audited)} entradas de "
+                        f"auditoría y {len(clustered)} propiedades en clusters de duplicados.")
+            return True
+        except psycopg2.Error as e:
+            logger.error(f"[LOAD] Error en la carga; no se confirmó ningún cambio: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[LOAD] Error inesperado en la carga; no se confirmó ningún cambio: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+        return False
+
+    def get_image_sources(self) -> dict | None:
+        """
+        PDF del que salieron las fotos ya analizadas de cada propiedad.
+
+        Returns:
+            dict | None: {property_id: pdf_sha256}, o None si hubo un error.
+        """
+        conn = None
+        try:
+            conn = self._get_connection()
+            df = pd.read_sql("SELECT property_id, pdf_sha256 FROM property_image_sources", conn)
+            return dict(zip(df['property_id'].astype(str), df['pdf_sha256']))
+        except psycopg2.Error as e:
+            logger.error(f"[IMAGES] Error de PostgreSQL al leer los PDFs ya analizados: {e}")
+        except Exception as e:
+            logger.error(f"[IMAGES] Error inesperado al leer los PDFs ya analizados: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return None
+
+    def save_property_images(self, sources: pd.DataFrame, images: pd.DataFrame) -> bool:
+        """
+        Guarda en una sola transacción las fotos analizadas de un lote de propiedades.
+
+        Las fotos que ya existían conservan su manual_score; las que ya no aparecen en el
+        PDF de la propiedad se eliminan.
+
+        Args:
+            sources (pd.DataFrame): Columnas property_id, pdf_sha256, image_count (una fila
+                                    por propiedad procesada, tenga fotos o no).
+            images (pd.DataFrame): Columnas property_id, image_sha256, page, width, height,
+                                   resolution_score, sharpness_score, brightness_score, auto_score
+                                   y phash.
+
+        Returns:
+            bool: True si el lote se confirmó, False en caso de error.
+        """
+        if sources.empty:
+            return True
+        image_columns = ['property_id', 'image_sha256', 'page', 'width', 'height',
+                         'resolution_score', 'sharpness_score', 'brightness_score', 'auto_score', 'phash']
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            if not images.empty:
+                extras.execute_values(cur, f"""
+                INSERT INTO property_visual_analysis ({', '.join(image_columns)})
+                VALUES %s
+                ON CONFLICT (property_id, image_sha256) DO UPDATE SET
+                    page = EXCLUDED.page, width = EXCLUDED.width, height = EXCLUDED.height,
+                    resolution_score = EXCLUDED.resolution_score, sharpness_score = EXCLUDED.sharpness_score,
+                    brightness_score = EXCLUDED.brightness_score, auto_score = EXCLUDED.auto_score,
+                    phash = EXCLUDED.phash, analyzed_at = CURRENT_TIMESTAMP
+                """, encode_records(images, image_columns), page_size=1000)
+            current_keys = [f"{property_id}:{sha}" for property_id, sha in zip(images.get('property_id', []),
+                                                                                images.get('image_sha256', []))]
+            cur.execute(
+                "DELETE FROM property_visual_analysis WHERE property_id = ANY(%s) "
+                "AND NOT (property_id || ':' || image_sha256 = ANY(%s))",
+                (sources['property_id'].astype(str).tolist(), current_keys)
+            )
+            extras.execute_values(cur, """
+            INSERT INTO property_image_sources (property_id, pdf_sha256, image_count)
+            VALUES %s
+            ON CONFLICT (property_id) DO UPDATE SET
+                pdf_sha256 = EXCLUDED.pdf_sha256, image_count = EXCLUDED.image_count, processed_at = CURRENT_TIMESTAMP
+            """, encode_records(sources, ['property_id', 'pdf_sha256', 'image_count']), page_size=1000)
+            conn.commit()
+            logger.info(f"[IMAGES] {len(images)} fotos de {len(sources)} propiedades guardadas.")
+            return True
+        except psycopg2.Error as e:
+            logger.error(f"[IMAGES] Error al guardar las fotos analizadas: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[IMAGES] Error inesperado al guardar las fotos analizadas: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+        return False
+
+    def get_property_images(self, property_id: str) -> pd.DataFrame | None:
+        """Fotos analizadas de una propiedad, de la mejor a la peor calificación automática."""
+        conn = None
+        try:
+            conn = self._get_connection()
+            query = """
+            SELECT image_sha256, page, width, height, resolution_score, sharpness_score,
+                   brightness_score, auto_score, manual_score, phash
+            FROM property_visual_analysis
+            WHERE property_id = %(property_id)s
+            ORDER BY auto_score DESC, page
+            """
+            return pd.read_sql(query, conn, params={'property_id': str(property_id)})
+        except psycopg2.Error as e:
+            logger.error(f"[IMAGES] Error de PostgreSQL al leer las fotos de la propiedad {property_id}: {e}")
+        except Exception as e:
+            logger.error(f"[IMAGES] Error inesperado al leer las fotos de la propiedad {property_id}: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return None
+
+    def get_photo_hashes(self) -> pd.DataFrame | None:
+        """Hash perceptual de todas las fotos analizadas (property_id, image_sha256, phash)."""
+        conn = None
+        try:
+            conn = self._get_connection()
+            query = """
+            SELECT property_id, image_sha256, phash
+            FROM property_visual_analysis
+            WHERE phash IS NOT NULL
+            """
+            return pd.read_sql(query, conn)
+        except psycopg2.Error as e:
+            logger.error(f"[IMAGES] Error de PostgreSQL al leer los hashes de las fotos: {e}")
+        except Exception as e:
+            logger.error(f"[IMAGES] Error inesperado al leer los hashes de las fotos: {e}")
+        finally:
+            if conn:
+                conn.close()
+        return None
+
+    def save_photo_clusters(self, clusters: pd.DataFrame) -> bool:
+        """
+        Reemplaza el contenido de la tabla shared_photo_clusters con los clusters de
+        propiedades que comparten fotos, en una sola transacción.
+
+        Args:
+            clusters (pd.DataFrame): Columnas cluster_id, property_id y shared_photos.
+
+        Returns:
+            bool: True si los clusters se confirmaron, False en caso de error.
+        """
+        conn = None
+        try:
+            conn = self._get_connection()
+            cur = conn.cursor()
+            cur.execute("DELETE FROM shared_photo_clusters")
+            records = encode_records(clusters, ['cluster_id', 'property_id', 'shared_photos'])
+            if records:
+                insert_sql = """
+                INSERT INTO shared_photo_clusters (cluster_id, property_id, shared_photos)
+                VALUES %s
+                """
+                extras.execute_values(cur, insert_sql, records, page_size=1000)
+            conn.commit()
+            logger.info(f"[IMAGES] {len(records)} propiedades guardadas en {clusters['cluster_id'].nunique()} clusters de fotos compartidas.")
+            return True
+        except psycopg2.Error as e:
+            logger.error(f"[IMAGES] Error al guardar los clusters de fotos compartidas: {e}")
+            if conn:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"[IMAGES] Error inesperado al guardar los clusters de fotos compartidas: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+        return False
+
     def get_properties_from_db(
         self, min_price=None, max_price=None, property_operation_type=None, property_type=None,
         min_bedrooms=None, min_bathrooms=None, max_age_years=None,
         min_construction_m2=None, min_land_m2=None, has_parking=None, keywords_description=None,
-        property_status=None, min_commission=None, contract_types_to_include=None, filter_missing_critical=False
+        property_status=None, min_commission=None, contract_types_to_include=None, filter_missing_critical=False,
+        compact=False
     ):
         """
         Obtiene propiedades de la base de datos PostgreSQL aplicando varios filtros.
         Si filter_missing_critical es True, solo retorna propiedades con gaps críticos.
+        Si compact es True, el DataFrame se devuelve con tipos compactos (categorías,
+        cadenas Arrow, float32 y enteros reducidos) según el esquema.
         """
         conn = None
         try:
@@ -238,6 +637,10 @@ class PropertyRepository:
             df = pd.read_sql(query, conn, params=params)
             logger.info(f"[DB_RETRIEVE] Consulta SQL ejecutada. Se encontraron {len(df)} propiedades.")
 
+            if compact:
+                compacted = compact_frame(df)
+                log_memory_report(df, compacted, "Propiedades desde la base de datos")
+                return compacted
             return df
 
         except psycopg2.Error as e:
@@ -0,0 +1,265 @@
+# src/data_collection/bulk_pdf_downloader.py
+
+"""
+Descarga masiva y concurrente de los PDFs (fichas técnicas) de las propiedades.
+
+download_property_pdf descarga un PDF por llamada; para precargar el catálogo completo
+este módulo reparte los ids entre un pool de hilos que comparten un único
+requests.Session (conexiones keep-alive con pool del tamaño del número de hilos).
+Cada petición pasa por un limitador de tasa por host, y los errores transitorios
+(conexión, timeout, 429, 5xx) se reintentan con backoff exponencial con jitter,
+respetando Retry-After. Las descargas pasan por PdfStore (pdf_store.py): se escriben
+en '.part', se reanudan con Range al reintentar y, con --refresh, los PDFs existentes
+se revalidan con GET condicional en lugar de omitirse.
+
+Uso:
+    python -m src.data_collection.bulk_pdf_downloader [--workers 8] [--rate 8] [--all] [--refresh] [--browserless]
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.metrics import instrumented
+from src.utils.constants import STATUS_EN_PROMOCION, PDF_BASE_URL
+from src.data_collection.portal_session import SessionExpiredError
+from src.data_collection.pdf_store import PdfStore, RetryableError, pdf_url_for, FETCH_NOT_MODIFIED
+
+load_dotenv()
+setup_logging(log_file_prefix="bulk_pdf_downloader_log")
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE_PER_HOST = 8.0  # Peticiones por segundo a un mismo host
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # Segundos; el intento n espera ~BACKOFF_BASE * 2**n
+BACKOFF_CAP = 30.0
+
+
+class HostRateLimiter:
+    """
+    Limitador de tasa por host, seguro entre hilos.
+
+    Reserva para cada petición el siguiente hueco libre del host (1/rate segundos
+    después del anterior) y espera fuera del candado, así que los hilos que van a
+    hosts distintos no se bloquean entre sí.
+    """
+
+    def __init__(self, rate_per_second: float = DEFAULT_RATE_PER_HOST):
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@dataclass
+class BulkDownloadResult:
+    """Resultado de una descarga masiva."""
+    downloaded: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)  # Ya existían localmente
+    not_modified: list = field(default_factory=list)  # Revalidados sin cambios (304)
+    failed: dict = field(default_factory=dict)  # id -> mensaje de error
+    bytes_downloaded: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.downloaded) + len(self.skipped) + len(self.not_modified) + len(self.failed)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP,
+                  retry_after: float = None) -> float:
+    """Espera antes del reintento 'attempt' (0 = primer reintento): exponencial con jitter o Retry-After."""
+    if retry_after is not None:
+        return min(retry_after, cap)
+    delay = min(cap, base * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def build_http_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """requests.Session con un pool de conexiones keep-alive del tamaño indicado."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+@instrumented('pdf_bulk_download')
+def download_pdfs(property_ids, session=None, store: PdfStore = None, max_workers: int = DEFAULT_WORKERS,
+                  rate_per_host: float = DEFAULT_RATE_PER_HOST, max_retries: int = DEFAULT_MAX_RETRIES,
+                  refresh: bool = False, overwrite: bool = False, progress=None,
+                  pdf_base_url: str = PDF_BASE_URL) -> BulkDownloadResult:
+    """
+    Descarga en paralelo los PDFs de una lista de propiedades.
+
+    Args:
+        property_ids (iterable): Ids de las propiedades.
+        session (optional): requests.Session o PortalSession compartido por todos los hilos.
+                            Por defecto se crea uno con un pool de 'max_workers' conexiones.
+        store (PdfStore, optional): Almacén de destino. Por defecto, data/pdfs.
+        max_workers (int): Número de descargas simultáneas.
+        rate_per_host (float): Máximo de peticiones por segundo a un mismo host (0 = sin límite).
+        max_retries (int): Reintentos por PDF ante errores transitorios.
+        refresh (bool): Si los PDFs existentes se revalidan con GET condicional (sólo se transfieren
+                        los que cambiaron) en lugar de omitirse.
+        overwrite (bool): Si se vuelven a descargar completos los PDFs que ya existen.
+        progress (callable, optional): progress(completados, total, property_id, estado), llamado
+                                       desde el hilo que invoca esta función. Estado: 'downloaded',
+                                       'skipped', 'not_modified' o 'failed'.
+        pdf_base_url (str): Prefijo de las URLs de los PDFs (p. ej. el portal simulado de mock_portal.py).
+
+    Returns:
+        BulkDownloadResult: Ids descargados, omitidos, sin cambios y fallidos, bytes y duración.
+    """
+    start = time.monotonic()
+    owns_store = store is None
+    store = store or PdfStore()
+    result = BulkDownloadResult()
+
+    pending = []
+    for property_id in dict.fromkeys(str(pid) for pid in property_ids):  # Sin repetidos, conservando el orden
+        if not (refresh or overwrite) and store.has(property_id):
+            result.skipped.append(property_id)
+        else:
+            pending.append(property_id)
+
+    total = len(pending) + len(result.skipped)
+    logger.info(f"[PDF_BULK] {len(pending)} PDFs por descargar, {len(result.skipped)} ya existentes "
+                f"({max_workers} hilos, {rate_per_host:g} peticiones/s por host).")
+    if progress and result.skipped:
+        progress(len(result.skipped), total, None, 'skipped')
+    if not pending:
+        if owns_store:
+            store.close()
+        result.elapsed = time.monotonic() - start
+        return result
+
+    owns_session = session is None
+    http = session or build_http_session(max_workers)
+    limiter = HostRateLimiter(rate_per_host)
+    session_expired = threading.Event()
+
+    def worker(property_id):
+        url = pdf_url_for(property_id, pdf_base_url)
+        for attempt in range(max_retries + 1):
+            if session_expired.is_set():
+                raise SessionExpiredError("La sesión del portal expiró durante la descarga masiva.")
+            limiter.acquire(url)
+            try:
+                return store.fetch(property_id, http, url=url, conditional=not overwrite)
+            except SessionExpiredError:
+                session_expired.set()
+                raise
+            except RetryableError as e:
+                if attempt == max_retries:
+                    raise
+                delay = backoff_delay(attempt, retry_after=e.retry_after)
+                logger.warning(f"[PDF_BULK] {property_id}: {e}; reintento {attempt + 1}/{max_retries} en {delay:.1f}s.")
+                time.sleep(delay)
+
+    done = len(result.skipped)
+    log_every = max(1, total // 20)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf') as executor:
+            futures = {executor.submit(worker, pid): pid for pid in pending}
+            for future in as_completed(futures):
+                property_id = futures[future]
+                try:
+                    fetched = future.result()
+                    result.bytes_downloaded += fetched.bytes_transferred
+                    if fetched.status == FETCH_NOT_MODIFIED:
+                        result.not_modified.append(property_id)
+                        status = 'not_modified'
+                    else:
+                        result.downloaded.append(property_id)
+                        status = 'downloaded'
+                except Exception as e:
+                    result.failed[property_id] = f"{type(e).__name__}: {e}"
+                    status = 'failed'
+                done += 1
+                if progress:
+                    progress(done, total, property_id, status)
+                if done % log_every == 0 or done == total:
+                    rate = len(result.downloaded) / max(time.monotonic() - start, 1e-9)
+                    logger.info(f"[PDF_BULK] {done}/{total} ({rate:.1f} PDFs/s, {len(result.failed)} fallidos).")
+    finally:
+        if owns_session:
+            http.close()
+        if owns_store:
+            store.close()
+
+    result.elapsed = time.monotonic() - start
+    if session_expired.is_set():
+        logger.error("[PDF_BULK] La sesión del portal expiró; los PDFs restantes se marcaron como fallidos.")
+    logger.info(f"[PDF_BULK] Terminado en {result.elapsed:.1f}s: {len(result.downloaded)} descargados "
+                f"({result.bytes_downloaded / 1_048_576:.1f} MB), {len(result.not_modified)} sin cambios, "
+                f"{len(result.skipped)} omitidos, {len(result.failed)} fallidos.")
+    return result
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga en paralelo los PDFs de las propiedades.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Descargas simultáneas (por defecto {DEFAULT_WORKERS}).")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_PER_HOST,
+                        help=f"Peticiones por segundo por host (por defecto {DEFAULT_RATE_PER_HOST:g}).")
+    parser.add_argument('--all', action='store_true',
+                        help=f"Incluye todas las propiedades, no sólo las de estatus '{STATUS_EN_PROMOCION}'.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Revalida los PDFs existentes con GET condicional y descarga sólo los que cambiaron.")
+    parser.add_argument('--overwrite', action='store_true', help="Vuelve a descargar completos los PDFs existentes.")
+    parser.add_argument('--browserless', action='store_true',
+                        help="Usa la sesión del portal guardada (ver portal_session.py).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Importaciones locales: el descargador no necesita la base de datos para usarse como librería
+    from src.data_access.property_repository import PropertyRepository
+    from src.data_collection.portal_session import open_portal_session
+
+    args = _parse_args(argv)
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+    properties = repo.get_properties_from_db(property_status=None if args.all else STATUS_EN_PROMOCION)
+    if properties.empty:
+        logger.error("[PDF_BULK] No se pudieron obtener propiedades de la base de datos.")
+        return 1
+
+    session = open_portal_session() if args.browserless else None
+    try:
+        result = download_pdfs(properties['id'], session=session, max_workers=args.workers,
+                               rate_per_host=args.rate, refresh=args.refresh, overwrite=args.overwrite)
+    finally:
+        if session is not None:
+            session.close()
+    return 0 if not result.failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
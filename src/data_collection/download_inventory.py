@@ -1,6 +1,8 @@
 import os
 import time
 import logging
+import argparse
+import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,6 +11,11 @@ from selenium.common.exceptions import TimeoutException, WebDriverException
 
 from src.utils.logging_config import setup_logging
 from src.utils.constants import LOGIN_URL, PROPERTIES_PAGE_URL
+from src.data_collection.download_watcher import wait_for_download, DownloadError
+from src.data_collection.scrape_artifacts import ScrapeRecorder
+from src.data_collection.portal_session import (
+    SessionCache, SessionExpiredError, harvest_session, open_portal_session, download_inventory_export,
+)
 
 # --- CONFIGURATION ---
 
@@ -18,23 +25,31 @@ DOWNLOAD_DIR = os.path.join(BASE_DIR, 'downloads')
 DOWNLOAD_FILE_NAME = 'inventario.xls'
 DOWNLOAD_FILE_PATH = os.path.join(DOWNLOAD_DIR, DOWNLOAD_FILE_NAME)
 SCREENSHOT_DIR = os.path.join(BASE_DIR, 'screenshots')
+CHROME_PROFILE_DIR = os.path.join(BASE_DIR, 'chrome_profile') # Persistent (warm) profile used in fast mode
 LOG_DIR = "logs"  # Added for test patching
 
 # Wait times
-DEFAULT_WAIT_TIME = 30 # Seconds
+DEFAULT_WAIT_TIME = 30 # Seconds (upper bound; waits return as soon as the condition holds)
+POLL_FREQUENCY = 0.1 # Seconds between WebDriverWait checks (Selenium's default is 0.5)
+DOWNLOAD_TIMEOUT = 180 # Seconds to wait for the inventory file after clicking download
 
 # --- LOGGING CONFIGURATION ---
 setup_logging(log_file_prefix="download_inventory_log")
 logger = logging.getLogger(__name__)
 
 # --- AUXILIARY FUNCTIONS ---
-def save_screenshot(driver, name):
-    timestamp = int(time.time())
-    filename = os.path.join(SCREENSHOT_DIR, f"{timestamp}_{name}.png")
-    driver.save_screenshot(filename)
-    logger.info(f"Screenshot saved: {filename}")
+def _wait(driver):
+    return WebDriverWait(driver, DEFAULT_WAIT_TIME, poll_frequency=POLL_FREQUENCY)
 
-def setup_webdriver(download_dir):
+def _is_logged_in_url(url):
+    return isinstance(url, str) and (url.startswith(PROPERTIES_PAGE_URL) or url == 'https://plus.21onlinemx.com/')
+
+def setup_webdriver(download_dir, fast=False):
+    """
+    Creates the Chrome driver. In fast mode it reuses a persistent profile (warm cache and
+    cookies), skips images, and returns from page loads at DOMContentLoaded. Stylesheets are
+    still loaded: the waits check element visibility, which depends on the CSS.
+    """
     options = webdriver.ChromeOptions()
     options.add_argument('--headless') # Run in headless mode (no GUI)
     options.add_argument('--start-maximized') # Start browser maximized
@@ -47,23 +62,31 @@ def setup_webdriver(download_dir):
              "download.directory_upgrade": True,
              "plugins.always_open_pdf_externally": True # To prevent Chrome from opening PDFs in the browser
             }
+    if fast:
+        options.page_load_strategy = 'eager'
+        options.add_argument(f'--user-data-dir={CHROME_PROFILE_DIR}')
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        prefs["profile.managed_default_content_settings.images"] = 2
     options.add_experimental_option("prefs", prefs)
     return webdriver.Chrome(options=options)
 
-def _perform_login(driver, username, password):
+def _perform_login(driver, username, password, recorder, reuse_session=False):
     logger.info("1. Initializing browser and navigating to login page...")
     driver.get(LOGIN_URL)
-    save_screenshot(driver, "1_initial_login_page")
+    recorder.screenshot(driver, "1_initial_login_page")
     logger.info(f"Current URL: {driver.current_url}")
+    if reuse_session and _is_logged_in_url(driver.current_url):
+        logger.info("Warm profile is still logged in; skipping the login form.")
+        return True
 
     logger.info("Waiting for login fields to be visible...")
-    username_input = WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+    username_input = _wait(driver).until(
         EC.visibility_of_element_located((By.NAME, '_username'))
     )
-    password_input = WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+    password_input = _wait(driver).until(
         EC.visibility_of_element_located((By.NAME, '_password'))
     )
-    csrf_token_input = WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+    csrf_token_input = _wait(driver).until(
         EC.presence_of_element_located((By.NAME, '_csrf_token'))
     )
     logger.info("Login fields found.")
@@ -77,11 +100,11 @@ def _perform_login(driver, username, password):
     login_form = driver.find_element(By.ID, 'kt_login_signin_form')
     logger.info("Submitting login form...")
     login_form.submit()
-    save_screenshot(driver, "2_after_login_submit")
+    recorder.screenshot(driver, "2_after_login_submit")
     logger.info(f"URL after form submission: {driver.current_url}")
 
     try:
-        WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+        _wait(driver).until(
             EC.any_of(
                 EC.url_contains(PROPERTIES_PAGE_URL),
                 EC.url_to_be('https://plus.21onlinemx.com/')
@@ -90,10 +113,9 @@ def _perform_login(driver, username, password):
         logger.info("Successful login URL condition met.")
     except TimeoutException:
         logger.error(f"Timeout while verifying login URL. Current URL: {driver.current_url}")
-        html_filename = os.path.join(SCREENSHOT_DIR, f"{int(time.time())}_login_failed_page_source.html")
+        recorder.screenshot(driver, "login_failed", force=True)
+        html_filename = recorder.page_source(driver, "login_failed_page_source")
         logger.error(f"Saving page content after login attempt to '{html_filename}'...")
-        with open(html_filename, "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
         return False
     
     if driver.current_url.startswith(PROPERTIES_PAGE_URL) or driver.current_url == 'https://plus.21onlinemx.com/':
@@ -102,46 +124,107 @@ def _perform_login(driver, username, password):
         return True
     else:
         logger.error(f"Final URL does not match successful login expectations: {driver.current_url}")
-        html_filename = os.path.join(SCREENSHOT_DIR, f"{int(time.time())}_unexpected_post_login_page_source.html")
+        recorder.screenshot(driver, "unexpected_post_login", force=True)
+        html_filename = recorder.page_source(driver, "unexpected_post_login_page_source")
         logger.error(f"Saving unexpected page content to '{html_filename}'...")
-        with open(html_filename, "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
         return False
 
-def _navigate_to_properties_page(driver):
+def _navigate_to_properties_page(driver, recorder):
     logger.info("2. Navigating to properties page...")
-    save_screenshot(driver, "3_before_properties_navigation")
+    recorder.screenshot(driver, "3_before_properties_navigation")
     driver.get(PROPERTIES_PAGE_URL)
-    save_screenshot(driver, "4_after_properties_navigation")
+    recorder.screenshot(driver, "4_after_properties_navigation")
     logger.info(f"Current URL after navigating to properties: {driver.current_url}")
     return True
 
-def _initiate_download(driver):
+def _initiate_download(driver, recorder):
     download_button_xpath = "//button[@type='button' and contains(@class, 'btn-seguimiento') and contains(., 'Descargar o Imprimir Inventario')]"
     logger.info("Waiting for the main download button to be clickable...")
-    download_button = WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+    download_button = _wait(driver).until(
         EC.element_to_be_clickable((By.XPATH, download_button_xpath))
     )
-    save_screenshot(driver, "5_before_main_download_button_click")
+    recorder.screenshot(driver, "5_before_main_download_button_click")
     logger.info("Main 'Download or Print Inventory' button found. Clicking...")
     download_button.click()
-    save_screenshot(driver, "6_after_main_download_button_click")
+    recorder.screenshot(driver, "6_after_main_download_button_click")
 
     logger.info("Waiting for the download submenu to appear...")
     download_option_xpath = "//a[contains(., 'Descargar Inventario')] | //button[contains(., 'Descargar Inventario')] | //li[contains(., 'Descargar Inventario')]"
-    download_option = WebDriverWait(driver, DEFAULT_WAIT_TIME).until(
+    download_option = _wait(driver).until(
         EC.element_to_be_clickable((By.XPATH, download_option_xpath))
     )
-    save_screenshot(driver, "7_before_submenu_download_click")
+    recorder.screenshot(driver, "7_before_submenu_download_click")
     logger.info("Submenu 'Download Inventory' option found. Clicking...")
+    clicked_at = time.time()
     download_option.click()
-    save_screenshot(driver, "8_after_submenu_download_click")
+    recorder.screenshot(driver, "8_after_submenu_download_click")
 
-    logger.info("Waiting a moment for the download to start...")
-    time.sleep(15)
+    logger.info(f"Waiting for the download to complete (timeout {DOWNLOAD_TIMEOUT}s)...")
+    downloaded_path = wait_for_download(DOWNLOAD_DIR, DOWNLOAD_FILE_NAME, timeout=DOWNLOAD_TIMEOUT,
+                                        started_after=clicked_at)
+    if os.path.abspath(downloaded_path) != os.path.abspath(DOWNLOAD_FILE_PATH):
+        # Chrome renames the file ('inventario (1).xls') when an older copy exists
+        logger.info(f"Replacing {DOWNLOAD_FILE_PATH} with the new download {downloaded_path}")
+        os.replace(downloaded_path, DOWNLOAD_FILE_PATH)
     return True
 
-def download_inventory_process():
+def _find_export_url(driver):
+    """Returns the href of the 'Descargar Inventario' link, if the menu exposes one."""
+    for element in driver.find_elements(By.XPATH, "//a[contains(., 'Descargar Inventario')]"):
+        href = element.get_attribute('href')
+        if isinstance(href, str) and href.startswith('http'):
+            return href
+    return None
+
+def _find_csrf_token(driver):
+    for element in driver.find_elements(By.CSS_SELECTOR, "meta[name='csrf-token']"):
+        token = element.get_attribute('content')
+        if isinstance(token, str) and token:
+            return token
+    return None
+
+def _save_browser_session(driver, cache):
+    """Stores the authenticated browser session so the next run can skip Selenium. Never raises."""
+    try:
+        state = harvest_session(driver, csrf_token=_find_csrf_token(driver),
+                                inventory_export_url=_find_export_url(driver))
+        if not state['inventory_export_url']:
+            logger.warning("Inventory export URL not found in the page; set C21_INVENTORY_EXPORT_URL "
+                           "to enable browser-free downloads.")
+        cache.save(state)
+    except Exception as e:
+        logger.warning(f"Could not save the portal session for browser-free downloads: {e}")
+
+def _try_browserless_download(cache):
+    """Downloads the inventory with the cached session. Returns True on success, False to fall back to Selenium."""
+    session = open_portal_session(cache)
+    if session is None:
+        logger.info("No valid cached portal session; using the browser.")
+        return False
+    try:
+        with session:
+            download_inventory_export(session, DOWNLOAD_FILE_PATH)
+        logger.info(f"✅ Inventory downloaded without a browser: {DOWNLOAD_FILE_PATH}")
+        return True
+    except SessionExpiredError as e:
+        logger.info(f"{e} Logging in again with the browser.")
+        cache.clear()
+    except (DownloadError, requests.exceptions.RequestException) as e:
+        logger.warning(f"Browser-free download failed ({e}); falling back to the browser.")
+    return False
+
+def download_inventory_process(browserless=False, fast=False):
+    """
+    Downloads the inventory workbook from the portal.
+
+    With browserless=True, a cached session (see portal_session.py) is tried first and
+    Selenium is only launched when there is none or it has expired; after a successful
+    browser run the session is cached for the next call.
+
+    With fast=True the browser uses a warm persistent profile without images and
+    eager page loads, and screenshots/HTML dumps are only taken when a step fails. Step
+    timings are logged in both modes.
+    """
     USERNAME = os.environ.get('C21_USERNAME')
     PASSWORD = os.environ.get('C21_PSW')
 
@@ -156,19 +239,28 @@ def download_inventory_process():
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
     os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
+    cache = SessionCache() if browserless else None
+    if cache is not None and _try_browserless_download(cache):
+        return True
+
     driver = None
+    recorder = ScrapeRecorder(SCREENSHOT_DIR, capture_steps=not fast)
 
     try:
-        driver = setup_webdriver(DOWNLOAD_DIR)
+        with recorder.step('start_browser'):
+            driver = setup_webdriver(DOWNLOAD_DIR, fast=fast)
 
-        if not _perform_login(driver, USERNAME, PASSWORD):
-            return False
-        
-        if not _navigate_to_properties_page(driver):
-            return False
+        with recorder.step('login', driver):
+            if not _perform_login(driver, USERNAME, PASSWORD, recorder, reuse_session=fast):
+                return False
 
-        if not _initiate_download(driver):
-            return False
+        with recorder.step('navigate', driver):
+            if not _navigate_to_properties_page(driver, recorder):
+                return False
+
+        with recorder.step('download', driver):
+            if not _initiate_download(driver, recorder):
+                return False
 
         logger.info(f"Listing contents of download directory: {DOWNLOAD_DIR}")
         downloaded_files = os.listdir(DOWNLOAD_DIR)
@@ -179,6 +271,8 @@ def download_inventory_process():
         if os.path.exists(DOWNLOAD_FILE_PATH):
             file_size_kb = round(os.path.getsize(DOWNLOAD_FILE_PATH) / 1024, 1)
             logger.info(f"✅ Inventory downloaded successfully: {DOWNLOAD_FILE_PATH} ({file_size_kb} KB)")
+            if cache is not None:
+                _save_browser_session(driver, cache)
             return True
         else:
             logger.error("X 'inventory.xls' was not generated.")
@@ -186,6 +280,9 @@ def download_inventory_process():
             logger.error("You can also check the browser console in non-headless mode for download errors.")
             return False
 
+    except DownloadError as e:
+        logger.error(f"X Download Error: {e}")
+        return False
     except TimeoutException as e:
         logger.error(f"X Timeout Error: {e}")
         logger.error("An element was not found or a page did not load in time.")
@@ -200,9 +297,16 @@ def download_inventory_process():
     finally:
         if driver:
             driver.quit()
+        recorder.close()
 
-def main():
-    download_inventory_process()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the inventory workbook from the portal.")
+    parser.add_argument('--browserless', action='store_true',
+                        help="Reuse the cached portal session and only launch the browser when it has expired.")
+    parser.add_argument('--fast', action='store_true',
+                        help="Warm profile, no images, eager page loads and screenshots only on failure.")
+    args = parser.parse_args(argv)
+    download_inventory_process(browserless=args.browserless, fast=args.fast)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+# src/data_collection/download_watcher.py
+
+"""
+Detección de fin de descarga en el directorio de descargas de Chrome.
+
+Chrome escribe primero un archivo parcial '<nombre>.crdownload' y lo renombra al
+terminar. En lugar de esperar un tiempo fijo, wait_for_download consulta el
+directorio con un intervalo adaptativo (empieza en 100 ms y crece hasta 1 s) y
+regresa en cuanto aparece un archivo nuevo, sin parciales pendientes y con tamaño
+estable. Si la descarga no termina dentro del tiempo límite, lanza una excepción
+en lugar de continuar en silencio.
+"""
+
+import os
+import time
+import logging
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Extensiones de archivos parciales (Chrome, Firefox, descargas temporales)
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.partial', '.tmp')
+
+# Firmas de los formatos de libro aceptados
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # .xls (BIFF)
+ZIP_SIGNATURE = b'PK\x03\x04'  # .xlsx
+
+DEFAULT_TIMEOUT = 120  # Segundos
+DEFAULT_STABLE_FOR = 1.0  # Segundos sin cambios de tamaño para considerar el archivo completo
+
+
+class DownloadError(Exception):
+    """La descarga no produjo un libro de inventario válido."""
+
+
+class DownloadTimeoutError(DownloadError):
+    """La descarga no terminó dentro del tiempo límite."""
+
+
+def _is_partial(file_name: str) -> bool:
+    return file_name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+def _matches_expected(file_name: str, expected_name: str) -> bool:
+    """Acepta el nombre esperado y las variantes que Chrome crea si ya existe ('inventario (1).xls')."""
+    if expected_name is None:
+        return True
+    stem, ext = os.path.splitext(expected_name)
+    name_stem, name_ext = os.path.splitext(file_name)
+    if name_ext.lower() != ext.lower():
+        return False
+    return name_stem == stem or (name_stem.startswith(f"{stem} (") and name_stem.endswith(')'))
+
+
+def _scan(directory: str, expected_name: str, started_after: float) -> tuple:
+    """Devuelve (parciales, {ruta: (tamaño, mtime)} de archivos completos nuevos)."""
+    partials, completed = [], {}
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return partials, completed
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:  # Renombrado entre scandir y stat
+            continue
+        if _is_partial(entry.name):
+            if stat.st_mtime >= started_after:
+                partials.append((entry.name, stat.st_size))
+        elif _matches_expected(entry.name, expected_name) and stat.st_mtime >= started_after:
+            completed[entry.path] = (stat.st_size, stat.st_mtime)
+    return partials, completed
+
+
+def wait_for_download(directory: str, expected_name: str = None, timeout: float = DEFAULT_TIMEOUT,
+                      started_after: float = None, stable_for: float = DEFAULT_STABLE_FOR,
+                      poll_initial: float = 0.1, poll_max: float = 1.0, verify: bool = True) -> str:
+    """
+    Espera a que termine una descarga en el directorio indicado.
+
+    Args:
+        directory (str): Directorio de descargas del navegador.
+        expected_name (str, optional): Nombre esperado del archivo ('inventario.xls'). Se aceptan
+                                       también las variantes 'inventario (N).xls'.
+        timeout (float): Tiempo máximo de espera en segundos.
+        started_after (float, optional): Marca de tiempo (time.time()) del inicio de la descarga;
+                                         los archivos anteriores se ignoran. Por defecto, ahora.
+        stable_for (float): Segundos que el tamaño debe mantenerse sin cambios.
+        poll_initial (float): Intervalo inicial de consulta en segundos.
+        poll_max (float): Intervalo máximo de consulta en segundos.
+        verify (bool): Si se comprueba que el archivo es un libro de Excel válido.
+
+    Returns:
+        str: Ruta del archivo descargado.
+
+    Raises:
+        DownloadTimeoutError: Si la descarga no termina a tiempo.
+        DownloadError: Si el archivo descargado no es un libro válido.
+    """
+    # Margen de 1 s por la resolución de mtime en algunos sistemas de archivos
+    started_after = (time.time() if started_after is None else started_after) - 1.0
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = poll_initial
+    last_seen = {}  # ruta -> ((tamaño, mtime), momento en que se observó por primera vez)
+    partials = []
+
+    while True:
+        now = time.monotonic()
+        partials, completed = _scan(directory, expected_name, started_after)
+        if not partials:
+            for path, signature in completed.items():
+                previous = last_seen.get(path)
+                if previous is None or previous[0] != signature:
+                    last_seen[path] = (signature, now)
+                elif signature[0] > 0 and now - previous[1] >= stable_for:
+                    logger.info(f"[DOWNLOAD_WATCHER] Descarga completa en {now - start:.1f}s: {path} "
+                                f"({signature[0] / 1024:.1f} KB)")
+                    if verify:
+                        verify_workbook(path)
+                    return path
+        else:
+            last_seen.clear()
+            interval = poll_initial  # Hay actividad: consultar con más frecuencia
+            logger.debug(f"[DOWNLOAD_WATCHER] Descarga en curso: {partials}")
+
+        if now >= deadline:
+            detail = f"parciales pendientes: {partials}" if partials else "no apareció ningún archivo nuevo"
+            raise DownloadTimeoutError(
+                f"La descarga en {directory} no terminó en {timeout:.0f}s ({detail})."
+            )
+        time.sleep(min(interval, max(deadline - now, 0.01)))
+        interval = min(interval * 1.5, poll_max)
+
+
+def verify_workbook(path: str) -> str:
+    """
+    Comprueba que el archivo sea un libro de Excel legible y no, por ejemplo, una página
+    de error HTML guardada con extensión .xls.
+
+    Returns:
+        str: Formato detectado: 'xls', 'xlsx' o 'html' (tabla HTML exportada como .xls).
+
+    Raises:
+        DownloadError: Si el archivo está vacío, truncado o no es un libro.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(65536)
+    if not header:
+        raise DownloadError(f"El archivo descargado está vacío: {path}")
+
+    if header.startswith(OLE2_SIGNATURE):
+        return 'xls'
+    if header.startswith(ZIP_SIGNATURE):
+        try:
+            with zipfile.ZipFile(path) as workbook:
+                if 'xl/workbook.xml' not in workbook.namelist():
+                    raise DownloadError(f"El archivo ZIP descargado no es un libro de Excel: {path}")
+        except zipfile.BadZipFile as e:
+            raise DownloadError(f"El libro descargado está incompleto o dañado: {path} ({e})") from e
+        return 'xlsx'
+
+    # Algunos portales exportan una tabla HTML con extensión .xls; Excel la abre sin problema
+    text = header.decode('utf-8', errors='ignore').lower()
+    if '<table' in text or 'urn:schemas-microsoft-com:office:excel' in text:
+        logger.warning(f"[DOWNLOAD_WATCHER] {path} es una tabla HTML con extensión de Excel.")
+        return 'html'
+    raise DownloadError(f"El archivo descargado no es un libro de Excel (¿página de error o sesión expirada?): {path}")
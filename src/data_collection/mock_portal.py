@@ -0,0 +1,298 @@
+# src/data_collection/mock_portal.py
+
+"""
+Servidor HTTP local que imita el portal plus.21onlinemx.com para pruebas y benchmarks.
+
+Reproduce lo que usan los módulos de recolección:
+    GET  /login2                     Formulario 'kt_login_signin_form' con _username,
+                                     _password y _csrf_token.
+    POST /login_check                Valida credenciales y token; fija la cookie de sesión
+                                     y redirige a /propiedades.
+    GET  /propiedades                Página con el botón 'Descargar o Imprimir Inventario'
+                                     y el enlace 'Descargar Inventario' (requiere sesión).
+    GET  /propiedades/exportar       Inventario como tabla HTML con extensión .xls.
+    GET  /ft/<id>/DTF/273/40120      Ficha técnica en PDF, con ETag, GET condicional y Range.
+
+Para medir el comportamiento del cliente ante un portal real, MockPortalConfig permite
+inyectar latencia por petición, limitar el ancho de banda, responder 429 por encima de
+una tasa máxima, devolver 503 con cierta probabilidad y cortar conexiones a mitad del
+cuerpo. Las fallas son reproducibles (semilla fija).
+
+Uso:
+    with MockPortalServer(MockPortalConfig(latency=0.05, failure_rate=0.05)) as portal:
+        portal.base_url  # 'http://127.0.0.1:<puerto>'
+"""
+
+import re
+import time
+import random
+import hashlib
+import logging
+import secrets
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = 'PHPSESSID'
+PDF_PATH_PATTERN = re.compile(r'^/ft/(?P<id>[^/]+)/DTF/273/40120$')
+STREAM_CHUNK = 16 * 1024
+
+
+@dataclass
+class MockPortalConfig:
+    """Comportamiento del portal simulado."""
+    username: str = 'test_user'
+    password: str = 'test_password'
+    inventory_rows: int = 500
+    pdf_size: int = 200 * 1024  # Bytes por ficha técnica
+    latency: float = 0.0  # Segundos añadidos a cada respuesta
+    bandwidth: float | None = None  # Bytes por segundo por respuesta (None = sin límite)
+    max_requests_per_second: float | None = None  # Por encima responde 429
+    failure_rate: float = 0.0  # Probabilidad de 503
+    drop_rate: float = 0.0  # Probabilidad de cortar la conexión a mitad del cuerpo
+    pdf_requires_session: bool = False
+    seed: int = 21
+
+
+@dataclass
+class PortalStats:
+    requests: int = 0
+    bytes_sent: int = 0
+    status_counts: dict = field(default_factory=dict)
+
+
+def render_pdf(property_id: str, size: int, version: int = 1) -> bytes:
+    """PDF sintético y determinista para una propiedad."""
+    header = (f"%PDF-1.4\n% Ficha tecnica propiedad {property_id} v{version}\n"
+              f"1 0 obj << /Type /Catalog >> endobj\n").encode('ascii')
+    seed = hashlib.sha256(f"{property_id}:{version}".encode('ascii')).digest()
+    body = (seed * (size // len(seed) + 1))[:max(size - len(header) - 6, 0)]
+    return header + body + b"\n%%EOF"
+
+
+def render_inventory(rows: int) -> bytes:
+    """Inventario como tabla HTML, igual que la exportación 'xls' del portal."""
+    lines = ['<html xmlns:x="urn:schemas-microsoft-com:office:excel"><body><table>',
+             '<tr><th>Clave</th><th>Precio</th><th>Colonia</th><th>Recamaras</th></tr>']
+    for i in range(rows):
+        lines.append(f"<tr><td>{100000 + i}</td><td>{1_500_000 + i * 1000}</td>"
+                     f"<td>Colonia {i % 37}</td><td>{1 + i % 4}</td></tr>")
+    lines.append('</table></body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, como el portal real
+
+    def log_message(self, *args):
+        pass
+
+    # --- utilidades ---
+
+    @property
+    def portal(self) -> 'MockPortalServer':
+        return self.server.portal
+
+    def _session_id(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == SESSION_COOKIE:
+                return value
+        return None
+
+    def _authenticated(self) -> bool:
+        return self._session_id() in self.portal.sessions
+
+    def _send(self, status: int, body: bytes = b'', headers: dict = None, drop: bool = False):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        sent = 0
+        config = self.portal.config
+        limit = len(body) // 2 if drop else len(body)
+        while sent < limit:
+            chunk = body[sent:min(sent + STREAM_CHUNK, limit)]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if config.bandwidth:
+                time.sleep(len(chunk) / config.bandwidth)
+        self.portal.record(status, sent)
+        if drop:
+            self.close_connection = True
+
+    def _redirect(self, location: str, headers: dict = None):
+        self._send(302, headers={'Location': location, **(headers or {})})
+
+    def _inject_faults(self) -> bool:
+        """Aplica latencia, 429 y 503. Devuelve True si ya se respondió."""
+        config = self.portal.config
+        if config.latency:
+            time.sleep(config.latency)
+        if not self.portal.admit():
+            self._send(429, b'Too Many Requests', {'Retry-After': '1'})
+            return True
+        if self.portal.roll(config.failure_rate):
+            self._send(503, b'Service Unavailable')
+            return True
+        return False
+
+    # --- rutas ---
+
+    def do_GET(self):
+        if self._inject_faults():
+            return
+        path = urlsplit(self.path).path
+        pdf_match = PDF_PATH_PATTERN.match(path)
+        if path == '/login2':
+            self._login_form()
+        elif path in ('/propiedades', '/'):
+            if not self._authenticated():
+                return self._redirect('/login2')
+            self._properties_page()
+        elif path == '/propiedades/exportar':
+            if not self._authenticated():
+                return self._redirect('/login2')
+            self._send(200, self.portal.inventory, {
+                'Content-Type': 'application/vnd.ms-excel',
+                'Content-Disposition': 'attachment; filename="inventario.xls"',
+            }, drop=self.portal.roll(self.portal.config.drop_rate))
+        elif pdf_match:
+            if self.portal.config.pdf_requires_session and not self._authenticated():
+                return self._redirect('/login2')
+            self._pdf(pdf_match.group('id'))
+        else:
+            self._send(404, b'Not Found')
+
+    def do_POST(self):
+        if self._inject_faults():
+            return
+        if urlsplit(self.path).path != '/login_check':
+            return self._send(404, b'Not Found')
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        config = self.portal.config
+        if (form.get('_username') != config.username or form.get('_password') != config.password
+                or form.get('_csrf_token') not in self.portal.csrf_tokens):
+            return self._redirect('/login2')
+        session_id = secrets.token_hex(16)
+        self.portal.sessions.add(session_id)
+        self._redirect('/propiedades', {'Set-Cookie': f'{SESSION_COOKIE}={session_id}; Path=/; HttpOnly'})
+
+    def _login_form(self):
+        token = secrets.token_hex(16)
+        self.portal.csrf_tokens.add(token)
+        html = f"""<html><body>
+<form id="kt_login_signin_form" method="post" action="/login_check">
+  <input type="text" name="_username">
+  <input type="password" name="_password">
+  <input type="hidden" name="_csrf_token" value="{token}">
+  <button type="submit">Iniciar sesión</button>
+</form></body></html>"""
+        self._send(200, html.encode('utf-8'), {'Content-Type': 'text/html; charset=utf-8'})
+
+    def _properties_page(self):
+        html = f"""<html><head><meta name="csrf-token" content="{secrets.token_hex(8)}"></head><body>
+<button type="button" class="btn btn-seguimiento">Descargar o Imprimir Inventario</button>
+<ul class="dropdown-menu"><li><a href="/propiedades/exportar">Descargar Inventario</a></li></ul>
+</body></html>"""
+        self._send(200, html.encode('utf-8'), {'Content-Type': 'text/html; charset=utf-8'})
+
+    def _pdf(self, property_id: str):
+        body, etag = self.portal.pdf(property_id)
+        headers = {'Content-Type': 'application/pdf', 'ETag': etag, 'Accept-Ranges': 'bytes'}
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, headers={'ETag': etag})
+        range_header = self.headers.get('Range', '')
+        if range_header.startswith('bytes=') and self.headers.get('If-Range', etag) == etag:
+            start = int(range_header[len('bytes='):].split('-')[0])
+            if start >= len(body):
+                return self._send(416, headers={'Content-Range': f"bytes */{len(body)}"})
+            headers['Content-Range'] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            return self._send(206, body[start:], headers, drop=self.portal.roll(self.portal.config.drop_rate))
+        self._send(200, body, headers, drop=self.portal.roll(self.portal.config.drop_rate))
+
+
+class MockPortalServer:
+    """Portal simulado en un hilo de fondo. Usar como context manager."""
+
+    def __init__(self, config: MockPortalConfig = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or MockPortalConfig()
+        self.stats = PortalStats()
+        self.sessions = set()
+        self.csrf_tokens = set()
+        self.pdf_versions = {}  # property_id -> versión (para simular folletos actualizados)
+        self.inventory = render_inventory(self.config.inventory_rows)
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._httpd = ThreadingHTTPServer((host, port), _PortalHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.portal = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def pdf_base_url(self) -> str:
+        return f"{self.base_url}/ft/"
+
+    def start(self) -> 'MockPortalServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-portal', daemon=True)
+        self._thread.start()
+        logger.info(f"[MOCK_PORTAL] Portal simulado escuchando en {self.base_url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # --- estado compartido entre hilos del servidor ---
+
+    def roll(self, probability: float) -> bool:
+        if not probability:
+            return False
+        with self._lock:
+            return self._random.random() < probability
+
+    def admit(self) -> bool:
+        """Ventana fija de un segundo para max_requests_per_second."""
+        limit = self.config.max_requests_per_second
+        if not limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count <= limit
+
+    def record(self, status: int, sent: int):
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_sent += sent
+            self.stats.status_counts[status] = self.stats.status_counts.get(status, 0) + 1
+
+    def pdf(self, property_id: str) -> tuple:
+        version = self.pdf_versions.get(property_id, 1)
+        body = render_pdf(property_id, self.config.pdf_size, version)
+        return body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+    def update_pdf(self, property_id: str):
+        """Simula que la oficina reemplazó el folleto de una propiedad."""
+        self.pdf_versions[property_id] = self.pdf_versions.get(property_id, 1) + 1
@@ -0,0 +1,420 @@
+# src/data_collection/pdf_store.py
+
+"""
+Almacén local de PDFs de propiedades: direccionado por contenido, particionado y
+con descargas condicionales y reanudables.
+
+Estructura de data/pdfs/:
+    blobs/ab/cd/<sha256>.pdf   PDF completo, nombrado por el hash de su contenido. Dos
+                               subniveles de 256 directorios mantienen cada directorio
+                               pequeño aunque haya decenas de miles de folletos, y dos
+                               propiedades con el mismo folleto comparten un único archivo.
+    partial/<id>.part          Descarga en curso o interrumpida de una propiedad.
+    pdf_index.sqlite3          Índice property_id -> sha256 con ETag, Last-Modified,
+                               tamaño y fechas de descarga y de última revisión.
+
+Un PDF sólo se publica en blobs/ cuando la transferencia terminó y el contenido
+empieza con la firma '%PDF'. La disponibilidad de PDFs se responde con el índice
+(una consulta para todo un resultado) sin consultar el sistema de archivos por fila.
+Los '<id>.pdf' del formato plano anterior se importan al abrir el almacén (PdfStore);
+load_pdf_paths, load_available_pdf_ids y resolve_pdf_path abren el índice en
+sólo lectura: no crean directorios ni mueven archivos.
+
+Con ese índice:
+    - Las revisiones usan GET condicional (If-None-Match / If-Modified-Since); un
+      PDF sin cambios responde 304 y no se transfiere ningún byte.
+    - Una descarga interrumpida se reanuda con 'Range: bytes=<tamaño>-' e 'If-Range'
+      (el validador de la respuesta original); si el archivo cambió en el servidor,
+      éste responde 200 completo y la descarga empieza de cero.
+"""
+
+import os
+import time
+import sqlite3
+import shutil
+import hashlib
+import logging
+import urllib.parse
+import threading
+from dataclasses import dataclass
+
+import requests
+
+from src.utils.constants import PDF_BASE_URL, PDF_SUFFIX, PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.portal_session import REQUEST_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+FULL_PDF_DOWNLOAD_DIR = os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR)
+INDEX_FILE_NAME = 'pdf_index.sqlite3'
+BLOBS_DIR_NAME = 'blobs'
+PARTIAL_DIR_NAME = 'partial'
+
+CHUNK_SIZE = 64 * 1024
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+PDF_SIGNATURE = b'%PDF'
+
+# Estados de FetchResult
+FETCH_DOWNLOADED = 'downloaded'
+FETCH_RESUMED = 'resumed'
+FETCH_NOT_MODIFIED = 'not_modified'  # 304: no se transfirió el cuerpo
+FETCH_UNCHANGED = 'unchanged'  # 200 con el mismo contenido (el servidor no soporta validadores)
+
+
+def _file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def pdf_url_for(property_id: str, base_url: str = PDF_BASE_URL) -> str:
+    return f"{base_url}{property_id}{PDF_SUFFIX}"
+
+
+class RetryableError(Exception):
+    """Error transitorio; la descarga se puede reintentar (y reanudar)."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value) -> float | None:
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class PdfRecord:
+    """Metadatos de un PDF almacenado."""
+    property_id: str
+    etag: str = None
+    last_modified: str = None
+    size: int = None
+    sha256: str = None
+    fetched_at: float = None
+    checked_at: float = None
+    partial_validator: str = None  # ETag/Last-Modified de la respuesta que originó el '.part'
+
+
+@dataclass
+class FetchResult:
+    property_id: str
+    status: str
+    bytes_transferred: int
+    path: str
+
+
+class PdfIndex:
+    """Índice SQLite de los PDFs descargados. Seguro entre hilos (una conexión con candado)."""
+
+    _COLUMNS = ('property_id', 'etag', 'last_modified', 'size', 'sha256', 'fetched_at', 'checked_at',
+                'partial_validator')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pdf_index (
+                    property_id TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER,
+                    sha256 TEXT,
+                    fetched_at REAL,
+                    checked_at REAL,
+                    partial_validator TEXT
+                )
+            """)
+
+    def get(self, property_id: str) -> PdfRecord | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM pdf_index WHERE property_id = ?", (property_id,)
+            ).fetchone()
+        return PdfRecord(*row) if row else None
+
+    def put(self, record: PdfRecord):
+        values = tuple(getattr(record, column) for column in self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO pdf_index ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self._COLUMNS))})", values
+            )
+
+    def blob_hashes(self) -> dict:
+        """{property_id: sha256} de todas las propiedades con un PDF completo, en una sola consulta."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT property_id, sha256 FROM pdf_index WHERE sha256 IS NOT NULL"
+            ).fetchall()
+        return dict(rows)
+
+    def update(self, property_id: str, **fields):
+        """Actualiza campos sueltos, creando la fila si no existe."""
+        record = self.get(property_id) or PdfRecord(property_id)
+        for key, value in fields.items():
+            setattr(record, key, value)
+        self.put(record)
+
+    def close(self):
+        self._conn.close()
+
+
+class PdfStore:
+    """PDFs de propiedades direccionados por contenido más su índice de metadatos."""
+
+    def __init__(self, root: str = None, index_path: str = None):
+        self.root = root or FULL_PDF_DOWNLOAD_DIR
+        self.blobs_dir = os.path.join(self.root, BLOBS_DIR_NAME)
+        self.partial_dir = os.path.join(self.root, PARTIAL_DIR_NAME)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.index = PdfIndex(index_path or os.path.join(self.root, INDEX_FILE_NAME))
+        self._import_flat_files()
+
+    def blob_path(self, sha256: str) -> str:
+        return _blob_path(self.blobs_dir, sha256)
+
+    def _part_path(self, property_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{property_id}.part")
+
+    def path_for(self, property_id: str) -> str | None:
+        """Ruta del PDF de la propiedad, o None si no hay uno completo en el índice."""
+        record = self.index.get(property_id)
+        return self.blob_path(record.sha256) if record and record.sha256 else None
+
+    def has(self, property_id: str) -> bool:
+        return self.path_for(property_id) is not None
+
+    def paths(self) -> dict:
+        """{property_id: ruta del PDF} de todo el almacén con una sola lectura del índice."""
+        return {property_id: self.blob_path(sha) for property_id, sha in self.index.blob_hashes().items()}
+
+    def close(self):
+        self.index.close()
+
+    def _publish(self, part_path: str, sha256: str) -> str:
+        """Mueve un archivo completo a su blob; si el contenido ya existe, lo reutiliza."""
+        blob = self.blob_path(sha256)
+        if os.path.exists(blob):
+            os.remove(part_path)  # Mismo contenido que otra propiedad (o que la versión anterior)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(part_path, blob)
+        return blob
+
+    def add_file(self, property_id: str, path: str, move: bool = False) -> str:
+        """Registra un PDF existente en el almacén. Devuelve la ruta del blob."""
+        sha256 = _file_sha256(path)
+        size = os.path.getsize(path)
+        fetched_at = os.path.getmtime(path)
+        staging = self._part_path(property_id)
+        if move:
+            os.replace(path, staging)
+        else:
+            shutil.copyfile(path, staging)
+        blob = self._publish(staging, sha256)
+        self.index.put(PdfRecord(property_id, size=size, sha256=sha256, fetched_at=fetched_at))
+        return blob
+
+    def _import_flat_files(self):
+        """Importa los '<id>.pdf' del formato plano anterior (data/pdfs/<id>.pdf)."""
+        with os.scandir(self.root) as entries:
+            legacy = [entry for entry in entries if entry.is_file() and entry.name.lower().endswith('.pdf')]
+        for entry in legacy:
+            self.add_file(entry.name[:-len('.pdf')], entry.path, move=True)
+        if legacy:
+            logger.info(f"[PDF_STORE] {len(legacy)} PDFs del formato plano importados al almacén por contenido.")
+
+    def prune_unreferenced_blobs(self) -> int:
+        """Elimina los blobs que ya no referencia ninguna propiedad. Devuelve cuántos se borraron."""
+        referenced = set(self.index.blob_hashes().values())
+        removed = 0
+        for directory, _, files in os.walk(self.blobs_dir):
+            for name in files:
+                if name[:-len('.pdf')] not in referenced:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        if removed:
+            logger.info(f"[PDF_STORE] {removed} blobs sin referencias eliminados.")
+        return removed
+
+    def _request_headers(self, record: PdfRecord | None, part_path: str, conditional: bool) -> tuple:
+        """Devuelve (headers, offset) para reanudar el '.part' o revalidar el PDF existente."""
+        if os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+            if record and record.partial_validator and offset > 0:
+                return {'Range': f'bytes={offset}-', 'If-Range': record.partial_validator}, offset
+            os.remove(part_path)  # Sin validador no se puede saber si el resto corresponde a este archivo
+        headers = {}
+        if conditional and record and record.sha256 and os.path.exists(self.blob_path(record.sha256)):
+            if record.etag:
+                headers['If-None-Match'] = record.etag
+            if record.last_modified:
+                headers['If-Modified-Since'] = record.last_modified
+        return headers, 0
+
+    def fetch(self, property_id: str, http=requests, url: str = None, conditional: bool = True) -> FetchResult:
+        """
+        Descarga, reanuda o revalida el PDF de una propiedad.
+
+        Args:
+            property_id (str): Id de la propiedad.
+            http: Objeto con un método get compatible con requests (requests, requests.Session o
+                  PortalSession).
+            url (str, optional): URL del PDF. Por defecto, la ficha técnica del portal.
+            conditional (bool): Si se revalida con GET condicional un PDF existente. Con False se
+                                descarga completo aunque no haya cambiado.
+
+        Returns:
+            FetchResult: Estado (FETCH_*), bytes transferidos y ruta del PDF.
+
+        Raises:
+            RetryableError: Errores de red, 429, 5xx o transferencia interrumpida (el '.part' se
+                            conserva para reanudar si el servidor envió un validador).
+            requests.exceptions.HTTPError: Otros códigos de error (p. ej. 404).
+            ValueError: Si el contenido no es un PDF.
+        """
+        url = url or pdf_url_for(property_id)
+        part_path = self._part_path(property_id)
+        record = self.index.get(property_id)
+        headers, offset = self._request_headers(record, part_path, conditional)
+
+        try:
+            response = http.get(url, stream=True, timeout=REQUEST_TIMEOUT, headers=headers)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
+
+        with response:
+            now = time.time()
+            if response.status_code == 304 and record and record.sha256:
+                self.index.update(property_id, checked_at=now)
+                return FetchResult(property_id, FETCH_NOT_MODIFIED, 0, self.blob_path(record.sha256))
+            if response.status_code == 416:
+                # El '.part' ya no corresponde al archivo del servidor; empezar de cero
+                os.remove(part_path)
+                self.index.update(property_id, partial_validator=None)
+                raise RetryableError("Rango no satisfacible; se descartó la descarga parcial")
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableError(f"HTTP {response.status_code}",
+                                     retry_after=_parse_retry_after(response.headers.get('Retry-After')))
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                if not response.headers.get('Content-Range', '').startswith(f"bytes {offset}-"):
+                    os.remove(part_path)
+                    self.index.update(property_id, partial_validator=None)
+                    raise RetryableError("Content-Range inesperado; se descartó la descarga parcial")
+            else:
+                offset = 0  # 200: el servidor envía el archivo completo (If-Range no coincidió o sin Range)
+
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            validator = etag or last_modified
+            self.index.update(property_id, partial_validator=validator)
+            written, sha256 = self._stream_to_part(response, part_path, offset, resumable=validator is not None)
+
+        size = offset + written
+        if size == 0:
+            os.remove(part_path)
+            raise RetryableError("Respuesta vacía")
+        blob = self._publish(part_path, sha256)
+
+        previous_sha = record.sha256 if record else None
+        self.index.put(PdfRecord(property_id, etag=etag, last_modified=last_modified, size=size, sha256=sha256,
+                                 fetched_at=now, checked_at=now))
+        if offset:
+            status = FETCH_RESUMED
+        elif previous_sha == sha256:
+            status = FETCH_UNCHANGED
+        else:
+            status = FETCH_DOWNLOADED
+        logger.debug(f"[PDF_STORE] {property_id}: {status} ({written} bytes transferidos).")
+        return FetchResult(property_id, status, written, blob)
+
+    def _stream_to_part(self, response, part_path: str, offset: int, resumable: bool) -> tuple:
+        """Escribe el cuerpo en el '.part' (añadiendo si offset > 0). Devuelve (bytes escritos, sha256)."""
+        hasher = hashlib.sha256()
+        if offset:
+            with open(part_path, 'rb') as existing:
+                head = existing.read(len(PDF_SIGNATURE))
+                if not head.startswith(PDF_SIGNATURE):
+                    existing.close()
+                    os.remove(part_path)
+                    raise ValueError("la descarga parcial no es un PDF")
+                hasher.update(head)
+                for block in iter(lambda: existing.read(CHUNK_SIZE), b''):
+                    hasher.update(block)
+        written = 0
+        try:
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if offset == 0 and written == 0 and chunk and not chunk.startswith(PDF_SIGNATURE):
+                        raise ValueError("la respuesta no es un PDF (¿página de error o de login?)")
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    written += len(chunk)
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            if not resumable:
+                os.remove(part_path)
+            raise RetryableError(f"Transferencia interrumpida tras {offset + written} bytes: {e}") from e
+        except Exception:
+            os.remove(part_path)
+            raise
+        return written, hasher.hexdigest()
+
+
+def _blob_path(blobs_dir: str, sha256: str) -> str:
+    return os.path.join(blobs_dir, sha256[:2], sha256[2:4], f"{sha256}.pdf")
+
+
+def _read_blob_hashes(root: str, property_id: str = None) -> dict:
+    """
+    {property_id: sha256} de las propiedades con PDF completo, consultando el índice en
+    modo de sólo lectura. Sin índice (almacén aún no creado), devuelve un diccionario vacío.
+    """
+    index_path = os.path.join(root, INDEX_FILE_NAME)
+    if not os.path.exists(index_path):
+        return {}
+    query = "SELECT property_id, sha256 FROM pdf_index WHERE sha256 IS NOT NULL"
+    params = ()
+    if property_id is not None:
+        query += " AND property_id = ?"
+        params = (str(property_id),)
+    try:
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(index_path))}?mode=ro", uri=True)
+        try:
+            return dict(conn.execute(query, params).fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"[PDF_STORE] No se pudo leer el índice de PDFs {index_path}: {e}")
+        return {}
+
+
+def load_pdf_paths(root: str = None) -> dict:
+    """{property_id: ruta del PDF} de todas las propiedades con PDF, leyendo el índice una vez."""
+    root = root or FULL_PDF_DOWNLOAD_DIR
+    blobs_dir = os.path.join(root, BLOBS_DIR_NAME)
+    return {property_id: _blob_path(blobs_dir, sha) for property_id, sha in _read_blob_hashes(root).items()}
+
+
+def load_available_pdf_ids(root: str = None) -> set:
+    """Ids de las propiedades con PDF descargado, leyendo el índice una vez (sin construir rutas)."""
+    return set(_read_blob_hashes(root or FULL_PDF_DOWNLOAD_DIR))
+
+
+def resolve_pdf_path(property_id: str, root: str = None) -> str | None:
+    """Ruta del PDF de una propiedad, o None si no se ha descargado."""
+    root = root or FULL_PDF_DOWNLOAD_DIR
+    sha256 = _read_blob_hashes(root, property_id).get(str(property_id))
+    return _blob_path(os.path.join(root, BLOBS_DIR_NAME), sha256) if sha256 else None
@@ -0,0 +1,218 @@
+# src/data_collection/portal_session.py
+
+"""
+Sesión autenticada del portal sin navegador.
+
+Selenium inicia sesión una vez; las cookies de sesión, el token CSRF y la URL de
+exportación del inventario se guardan cifrados en data/session/. Las descargas
+siguientes (inventario y PDFs) usan un requests.Session con pool de conexiones.
+Cuando el portal responde con la página de login o un 401/403, se lanza
+SessionExpiredError y el llamador vuelve a iniciar sesión con el navegador.
+
+El cifrado usa Fernet (paquete 'cryptography', opcional). La clave se deriva con
+PBKDF2 de REI_SESSION_KEY (o, si no existe, de C21_PSW) y una sal aleatoria por
+archivo. Sin 'cryptography' la sesión no se persiste y siempre se usa el navegador.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.utils.constants import LOGIN_URL, SESSION_CACHE_DIR
+from src.data_collection.download_watcher import verify_workbook, DownloadError
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # cryptography es opcional
+    Fernet = None
+    InvalidToken = Exception
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SESSION_CACHE_PATH = os.path.join(BASE_DIR, SESSION_CACHE_DIR, 'portal_session.enc')
+
+# Antigüedad máxima de una sesión guardada antes de descartarla sin intentar usarla
+SESSION_MAX_AGE_SECONDS = 8 * 3600
+KDF_ITERATIONS = 200_000
+POOL_SIZE = 16
+REQUEST_TIMEOUT = (10, 120)  # (conexión, lectura) en segundos
+
+
+class SessionExpiredError(requests.exceptions.RequestException):
+    """El portal rechazó la sesión guardada; hay que iniciar sesión de nuevo."""
+
+
+def _session_secret() -> str | None:
+    return os.environ.get('REI_SESSION_KEY') or os.environ.get('C21_PSW')
+
+
+def _derive_key(secret: str, salt: bytes) -> bytes:
+    raw = hashlib.pbkdf2_hmac('sha256', secret.encode('utf-8'), salt, KDF_ITERATIONS)
+    return base64.urlsafe_b64encode(raw)
+
+
+class SessionCache:
+    """Guarda y carga el estado de la sesión cifrado en disco."""
+
+    def __init__(self, path: str = None, secret: str = None):
+        self.path = path or SESSION_CACHE_PATH
+        self.secret = secret if secret is not None else _session_secret()
+
+    @property
+    def enabled(self) -> bool:
+        return Fernet is not None and bool(self.secret)
+
+    def save(self, state: dict) -> bool:
+        """Cifra y guarda el estado. Devuelve False si el cifrado no está disponible."""
+        if not self.enabled:
+            logger.warning("[SESSION] 'cryptography' o la clave de sesión no están disponibles; la sesión no se guarda.")
+            return False
+        salt = os.urandom(16)
+        token = Fernet(_derive_key(self.secret, salt)).encrypt(json.dumps(state).encode('utf-8'))
+        payload = {'salt': base64.b64encode(salt).decode('ascii'), 'token': token.decode('ascii')}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"[SESSION] Sesión del portal guardada en {self.path}.")
+        return True
+
+    def load(self) -> dict | None:
+        """Devuelve el estado guardado, o None si no existe, no se puede descifrar o es muy antiguo."""
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                payload = json.load(f)
+            key = _derive_key(self.secret, base64.b64decode(payload['salt']))
+            state = json.loads(Fernet(key).decrypt(payload['token'].encode('ascii')))
+        except (InvalidToken, ValueError, KeyError, OSError) as e:
+            logger.warning(f"[SESSION] No se pudo leer la sesión guardada ({type(e).__name__}); se ignora.")
+            return None
+        if time.time() - state.get('created_at', 0) > SESSION_MAX_AGE_SECONDS:
+            logger.info("[SESSION] La sesión guardada es demasiado antigua; se ignora.")
+            return None
+        return state
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+            logger.info("[SESSION] Sesión guardada eliminada.")
+
+
+def harvest_session(driver, csrf_token: str = None, inventory_export_url: str = None) -> dict:
+    """Extrae de un navegador autenticado el estado necesario para reutilizar la sesión."""
+    cookies = [
+        {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'expiry', 'secure') if key in cookie}
+        for cookie in driver.get_cookies()
+    ]
+    return {
+        'cookies': cookies,
+        'csrf_token': csrf_token,
+        'user_agent': driver.execute_script('return navigator.userAgent;'),
+        'inventory_export_url': inventory_export_url,
+        'created_at': time.time(),
+    }
+
+
+class PortalSession:
+    """requests.Session con pool de conexiones y reintentos, autenticada con cookies guardadas."""
+
+    def __init__(self, state: dict, pool_size: int = POOL_SIZE):
+        self.state = state
+        self.http = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=('GET', 'HEAD'))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        if state.get('user_agent'):
+            self.http.headers['User-Agent'] = state['user_agent']
+        if state.get('csrf_token'):
+            self.http.headers['X-CSRF-Token'] = state['csrf_token']
+        for cookie in state.get('cookies', []):
+            self.http.cookies.set(cookie['name'], cookie['value'],
+                                  domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    @property
+    def inventory_export_url(self) -> str | None:
+        return os.environ.get('C21_INVENTORY_EXPORT_URL') or self.state.get('inventory_export_url')
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET autenticado. Lanza SessionExpiredError si el portal pide iniciar sesión de nuevo."""
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        response = self.http.get(url, **kwargs)
+        if _is_login_response(response):
+            response.close()
+            raise SessionExpiredError(f"La sesión del portal expiró al solicitar {url}.")
+        return response
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _is_login_response(response: requests.Response) -> bool:
+    if response.status_code in (401, 403):
+        return True
+    login_path = urlsplit(LOGIN_URL).path
+    redirected = [r.headers.get('Location', '') for r in response.history] + [response.url]
+    return any(urlsplit(url).path.rstrip('/') in (login_path, '/login') for url in redirected if url)
+
+
+def open_portal_session(cache: SessionCache = None) -> PortalSession | None:
+    """Abre una sesión sin navegador a partir de la caché, si hay una sesión válida guardada."""
+    state = (cache or SessionCache()).load()
+    if not state or not state.get('cookies'):
+        return None
+    return PortalSession(state)
+
+
+def download_inventory_export(session: PortalSession, destination: str) -> str:
+    """
+    Descarga el inventario con la sesión guardada, sin navegador.
+
+    Returns:
+        str: Ruta del archivo descargado y verificado.
+
+    Raises:
+        SessionExpiredError: Si la sesión ya no es válida.
+        DownloadError: Si no hay URL de exportación o el archivo no es un libro válido.
+    """
+    url = session.inventory_export_url
+    if not url:
+        raise DownloadError("No se conoce la URL de exportación del inventario; se requiere el navegador.")
+
+    start = time.monotonic()
+    response = session.get(url, stream=True)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = destination + '.part'
+    with response, open(tmp_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+    try:
+        verify_workbook(tmp_path)
+    except DownloadError:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, destination)
+    logger.info(f"[SESSION] Inventario descargado sin navegador en {time.monotonic() - start:.1f}s: {destination}")
+    return destination
@@ -0,0 +1,125 @@
+# src/data_collection/scrape_artifacts.py
+
+"""
+Capturas, volcados HTML y tiempos por paso del scraper de Selenium.
+
+ScrapeRecorder centraliza lo que antes hacía save_screenshot en cada paso:
+
+    - En modo normal captura una pantalla por paso; en modo rápido sólo cuando un
+      paso falla (pantalla + HTML de la página).
+    - Los bytes se obtienen del navegador en el hilo principal (WebDriver no es
+      seguro entre hilos), pero la escritura a disco se hace en un hilo aparte.
+    - Al iniciar aplica la política de retención: borra capturas y volcados más
+      antiguos que retention_days y conserva como máximo max_files.
+    - Cada paso se mide con recorder.step(nombre) y se registra también como etapa
+      de la ejecución de métricas activa, si la hay.
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.metrics import stage as metrics_stage
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIXES = ('.png', '.html')
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_MAX_FILES = 200
+
+
+def prune_artifacts(directory: str, retention_days: float = DEFAULT_RETENTION_DAYS,
+                    max_files: int = DEFAULT_MAX_FILES) -> int:
+    """
+    Borra capturas y volcados HTML antiguos.
+
+    Returns:
+        int: Número de archivos eliminados.
+    """
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and entry.name.lower().endswith(ARTIFACT_SUFFIXES)]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    cutoff = time.time() - retention_days * 86400
+    removed = 0
+    for position, entry in enumerate(entries):
+        if position >= max_files or entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    if removed:
+        logger.info(f"[SCRAPE] {removed} old screenshots/HTML dumps pruned from {directory}.")
+    return removed
+
+
+class ScrapeRecorder:
+    """Capturas asíncronas, retención y tiempos por paso de una ejecución del scraper."""
+
+    def __init__(self, directory: str, capture_steps: bool = True,
+                 retention_days: float = DEFAULT_RETENTION_DAYS, max_files: int = DEFAULT_MAX_FILES):
+        self.directory = directory
+        self.capture_steps = capture_steps
+        self.timings = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scrape-artifacts')
+        self._writer.submit(prune_artifacts, directory, retention_days, max_files)
+
+    def _path(self, name: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{int(time.time())}_{name}{suffix}")
+
+    def _write(self, path: str, data, mode: str):
+        try:
+            with open(path, mode) as f:
+                f.write(data)
+            logger.info(f"Artifact saved: {path}")
+        except Exception as e:
+            logger.warning(f"Could not save artifact {path}: {e}")
+
+    def screenshot(self, driver, name: str, force: bool = False):
+        """Captura la pantalla (siempre en modo normal; en modo rápido sólo con force=True)."""
+        if not (self.capture_steps or force):
+            return
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            logger.warning(f"Could not capture screenshot '{name}': {e}")
+            return
+        self._writer.submit(self._write, self._path(name, '.png'), png, 'wb')
+
+    def page_source(self, driver, name: str) -> str:
+        """Guarda el HTML actual de la página en segundo plano. Devuelve la ruta destino."""
+        path = self._path(name, '.html')
+        try:
+            html = driver.page_source
+        except Exception as e:
+            logger.warning(f"Could not read page source for '{name}': {e}")
+            return path
+        self._writer.submit(self._write, path, html, 'w')
+        return path
+
+    @contextmanager
+    def step(self, name: str, driver=None):
+        """Mide un paso; si falla y hay navegador, guarda pantalla y HTML del fallo."""
+        start = time.perf_counter()
+        try:
+            with metrics_stage(f"scrape.{name}"):
+                yield
+        except Exception:
+            if driver is not None:
+                self.screenshot(driver, f"{name}_failed", force=True)
+                self.page_source(driver, f"{name}_failed_page_source")
+            raise
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def close(self):
+        """Espera a que terminen las escrituras pendientes y registra los tiempos por paso."""
+        self._writer.shutdown(wait=True)
+        if self.timings:
+            summary = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+            logger.info(f"[SCRAPE] Step timings: {summary} (total {sum(self.timings.values()):.2f}s)")
@@ -0,0 +1,149 @@
+# src/data_processing/brochure_search.py
+
+"""
+Búsqueda de texto libre dentro de las fichas técnicas (PDF).
+
+Los folletos mencionan amenidades y condiciones que no están en 'descripcion'. Este
+módulo mantiene un índice invertido local (SQLite) sobre el texto completo de cada
+PDF y ordena las propiedades por BM25:
+
+    documents  Una fila por propiedad: sha256 del PDF indexado y número de términos.
+    postings   (término, propiedad, frecuencia); la clave primaria empieza por el
+               término, así que una consulta sólo lee las listas de sus términos.
+
+Los términos salen de text_normalization.search_terms: minúsculas, sin acentos, sin
+palabras vacías y con plurales en singular, de modo que 'Jardín' encuentra 'jardines'.
+
+El índice se actualiza por propiedad: src/scripts/index_brochures.py sólo vuelve a leer
+los PDFs cuyo contenido cambió y sustituye sus listas; el resto no se toca. Como los
+totales de BM25 (número de documentos y longitud promedio) se calculan al consultar, no
+hay que reconstruir nada tras una actualización.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.utils.text_normalization import search_terms
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+BROCHURE_SEARCH_PATH = os.path.join(BASE_DIR, 'data', 'brochure_search.sqlite3')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_LIMIT = 20
+
+RESULT_COLUMNS = ['property_id', 'score']
+
+
+def term_counts(text: str) -> tuple:
+    """({término: frecuencia}, número de términos) del texto de un folleto."""
+    terms = search_terms(text)
+    return dict(Counter(terms)), len(terms)
+
+
+class BrochureSearchIndex:
+    """Índice invertido de los folletos en SQLite. Seguro entre hilos (una conexión con candado)."""
+
+    def __init__(self, path: str = BROCHURE_SEARCH_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    property_id TEXT PRIMARY KEY,
+                    sha256 TEXT,
+                    length INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT,
+                    property_id TEXT,
+                    tf INTEGER,
+                    PRIMARY KEY (term, property_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_postings_property_id ON postings (property_id);
+            """)
+
+    def indexed(self) -> dict:
+        """{property_id: sha256 del PDF indexado}."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT property_id, sha256 FROM documents").fetchall())
+
+    def add_documents(self, documents: list):
+        """
+        Indexa (o vuelve a indexar) folletos en una sola transacción.
+
+        Args:
+            documents (list): Tuplas (property_id, sha256, {término: frecuencia}, número de términos).
+        """
+        if not documents:
+            return
+        property_ids = [(str(property_id),) for property_id, _, _, _ in documents]
+        # Ordenadas por la clave primaria: SQLite escribe las páginas del árbol en secuencia
+        postings = sorted((term, str(property_id), tf)
+                          for property_id, _, counts, _ in documents for term, tf in counts.items())
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM postings WHERE property_id = ?", property_ids)
+            self._conn.executemany("INSERT OR REPLACE INTO documents (property_id, sha256, length) VALUES (?, ?, ?)",
+                                   [(str(property_id), sha256, length) for property_id, sha256, _, length in documents])
+            self._conn.executemany("INSERT INTO postings (term, property_id, tf) VALUES (?, ?, ?)", postings)
+        logger.info(f"[BROCHURE_SEARCH] {len(documents)} folletos indexados ({len(postings)} términos).")
+
+    def remove(self, property_ids):
+        """Quita del índice las propiedades indicadas (p. ej. cuyo PDF ya no existe)."""
+        rows = [(str(property_id),) for property_id in property_ids]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM postings WHERE property_id = ?", rows)
+            self._conn.executemany("DELETE FROM documents WHERE property_id = ?", rows)
+        logger.info(f"[BROCHURE_SEARCH] {len(rows)} folletos eliminados del índice.")
+
+    def search(self, query: str, limit: int | None = DEFAULT_LIMIT) -> pd.DataFrame:
+        """
+        Propiedades cuyos folletos mejor coinciden con la consulta, según BM25.
+
+        Args:
+            query (str): Texto libre ('alberca techada', 'Jardín y cuarto de servicio').
+            limit (int | None): Máximo de resultados; None devuelve todas las coincidencias.
+
+        Returns:
+            pd.DataFrame: property_id y score, de la mejor a la peor coincidencia.
+        """
+        terms = list(dict.fromkeys(search_terms(query)))
+        if not terms:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        with self._lock:
+            document_count, average_length = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM documents").fetchone()
+            rows = self._conn.execute(
+                "SELECT p.term, p.property_id, p.tf, d.length FROM postings p "
+                "JOIN documents d ON d.property_id = p.property_id "
+                f"WHERE p.term IN ({', '.join('?' * len(terms))})", terms).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        postings = pd.DataFrame(rows, columns=['term', 'property_id', 'tf', 'length'])
+        document_frequency = postings['term'].map(postings['term'].value_counts()).to_numpy(dtype=np.float64)
+        idf = np.log1p((document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+        tf = postings['tf'].to_numpy(dtype=np.float64)
+        norm = 1.0 - BM25_B + BM25_B * postings['length'].to_numpy(dtype=np.float64) / max(average_length or 0.0, 1.0)
+        postings['score'] = idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * norm)
+
+        scores = postings.groupby('property_id', sort=False)['score'].sum().reset_index()
+        scores = scores.sort_values(['score', 'property_id'], ascending=[False, True], ignore_index=True)
+        return scores if limit is None else scores.head(limit)
+
+    def close(self):
+        self._conn.close()
@@ -2,8 +2,12 @@
 import io
 import os
 import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Third-party imports
+import pandas as pd
 import psycopg2
 from dotenv import load_dotenv
 
@@ -13,7 +17,10 @@ from src.data_processing.excel_converter import convert_xls_to_xlsx
 from src.data_access.database_connection import get_db_connection
 from src.data_access.property_repository import PropertyRepository
 from src.data_processing.data_cleaner import clean_and_transform_data
+from src.data_processing.snapshot_diff import diff_snapshots, load_snapshot, save_snapshot
 from src.utils.logging_config import setup_logging
+from src.utils.metrics import PipelineRun
+from src.utils.compact_dtypes import compact_frame, log_memory_report
 
 # --- INITIALIZATION & CONFIGURATION ---
 load_dotenv()  # Cargar variables de entorno desde .env
@@ -35,21 +42,23 @@ def _find_xlsx_file(directory, excel_files):
             return target_file
     return None
 
+def _convert_xls_file(directory, xls_file_name):
+    """Converts one .xls file to .xlsx and returns the new path, or None on failure."""
+    xls_file_path = os.path.join(directory, xls_file_name)
+    xlsx_file_name = os.path.splitext(xls_file_name)[0] + '.xlsx'
+    xlsx_file_path = os.path.join(directory, xlsx_file_name)
+    logger.info(f"[MAIN] Encontrado archivo XLS: {xls_file_path}. Intentando convertir a {xlsx_file_path}...")
+    if convert_xls_to_xlsx(xls_file_path, xlsx_file_path):
+        logger.info(f"[MAIN] Conversión exitosa. El archivo a analizar es: {xlsx_file_path}")
+        return xlsx_file_path
+    logger.error(f"[MAIN] Falló la conversión de {xls_file_path}. No se puede proceder con el análisis.")
+    return None
+
 def _convert_xls_to_xlsx_if_exists(directory, excel_files):
     """Converts the first .xls file to .xlsx if no .xlsx file is found."""
     for f in excel_files:
         if f.endswith('.xls'):
-            xls_file_path = os.path.join(directory, f)
-            xlsx_file_name = os.path.splitext(os.path.basename(xls_file_path))[0] + '.xlsx'
-            xlsx_file_path = os.path.join(directory, xls_file_name)
-            logger.info(f"[MAIN] Encontrado archivo XLS: {xls_file_path}. Intentando convertir a {xlsx_file_path}...")
-            # Convert the found .xls file to a .xlsx file for processing.
-            if convert_xls_to_xlsx(xls_file_path, xlsx_file_path):
-                logger.info(f"[MAIN] Conversión exitosa. El archivo a analizar es: {xlsx_file_path}")
-                return xlsx_file_path
-            else:
-                logger.error(f"[MAIN] Falló la conversión de {xls_file_path}. No se puede proceder con el análisis.")
-                return None
+            return _convert_xls_file(directory, f)
     return None
 
 def find_target_excel_file(directory):
@@ -69,45 +78,233 @@ def find_target_excel_file(directory):
 
     return _convert_xls_to_xlsx_if_exists(directory, excel_files)
 
-def main():
+def find_inventory_files(directory):
+    """
+    Devuelve todos los libros de inventario (.xlsx) del directorio, ordenados por nombre.
+    Los .xls sin un .xlsx del mismo nombre se convierten primero; la conversión usa
+    Excel vía COM y por eso se hace de forma secuencial, antes de paralelizar la limpieza.
+    """
+    excel_files = sorted(_get_excel_files_in_directory(directory))
+    if not excel_files:
+        logger.warning(f"[MAIN] No se encontraron archivos Excel (.xls o .xlsx) en {directory}.")
+        return []
+
+    xlsx_stems = {os.path.splitext(f)[0] for f in excel_files if f.endswith('.xlsx')}
+    target_files = [os.path.join(directory, f) for f in excel_files if f.endswith('.xlsx')]
+    for f in excel_files:
+        if f.endswith('.xls') and os.path.splitext(f)[0] not in xlsx_stems:
+            converted = _convert_xls_file(directory, f)
+            if converted:
+                target_files.append(converted)
+
+    target_files.sort()
+    logger.info(f"[MAIN] {len(target_files)} libros de inventario encontrados: {target_files}")
+    return target_files
+
+def clean_inventory_files(file_paths, max_workers=None):
+    """
+    Limpia varios libros de inventario en paralelo con un pool de procesos.
+
+    Args:
+        file_paths (list): Rutas de los archivos .xlsx a limpiar.
+        max_workers (int, optional): Número máximo de procesos. Por defecto, uno por
+                                     archivo hasta el número de CPUs.
+
+    Returns:
+        dict: Ruta del archivo -> DataFrame limpio. Los archivos que fallan se omiten.
+    """
+    if not file_paths:
+        return {}
+    if max_workers is None:
+        max_workers = min(len(file_paths), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(file_paths) == 1:
+        results = {path: clean_and_transform_data(path) for path in file_paths}
+    else:
+        logger.info(f"[MAIN] Limpiando {len(file_paths)} archivos con {max_workers} procesos...")
+        results = {}
+        # 'spawn' evita heredar hilos del proceso padre (pyarrow, logging) y es el modo de Windows
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(clean_and_transform_data, path): path for path in file_paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    logger.error(f"[MAIN] Error al limpiar {path} en el proceso de trabajo: {e}")
+
+    cleaned = {}
+    for path in file_paths:
+        df = results.get(path)
+        if df is None or df.empty:
+            logger.error(f"[MAIN] No se pudo obtener un DataFrame limpio de {path}.")
+            continue
+        cleaned[path] = df
+    return cleaned
+
+def merge_inventories(frames_by_path):
+    """
+    Une los inventarios limpios y elimina propiedades duplicadas por 'id'.
+
+    Regla de precedencia (determinista): gana la fila del archivo modificado más
+    recientemente; a igual fecha de modificación gana el archivo con el nombre mayor
+    en orden alfabético. Dentro de un mismo archivo se conserva la última fila.
+    Las filas sin 'id' se descartan.
+
+    Returns:
+        pd.DataFrame: Inventario unificado con una fila por 'id'.
+    """
+    if not frames_by_path:
+        return pd.DataFrame(columns=DB_COLUMNS)
+
+    ranked_paths = sorted(frames_by_path, key=lambda p: (os.path.getmtime(p), os.path.basename(p)))
+    frames = [frames_by_path[path].assign(_precedence=rank) for rank, path in enumerate(ranked_paths)]
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged[merged['id'].notna()]
+
+    total_rows = len(merged)
+    merged = (
+        merged.sort_values('_precedence', kind='stable')
+        .drop_duplicates(subset='id', keep='last')
+        .drop(columns='_precedence')
+        .reset_index(drop=True)
+    )
+    logger.info(f"[MAIN] Inventarios unificados: {total_rows} filas, {total_rows - len(merged)} duplicados por 'id' eliminados, {len(merged)} propiedades únicas.")
+    return merged
+
+def _get_db_params():
+    """Lee los parámetros de conexión a la base de datos desde el entorno."""
+    return {
+        'db': os.environ.get('REI_DB_NAME'),
+        'user': os.environ.get('REI_DB_USER'),
+        'pwd': os.environ.get('REI_DB_PASSWORD'),
+        'host': os.environ.get('REI_DB_HOST'),
+        'port': os.environ.get('REI_DB_PORT'),
+    }
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Limpia el inventario descargado y lo carga en PostgreSQL.")
+    parser.add_argument('--all-files', action='store_true',
+                        help="Procesa todos los libros de inventario del directorio de descargas (uno por oficina).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número de procesos para la limpieza en paralelo (por defecto, número de CPUs).")
+    parser.add_argument('--compact', action='store_true',
+                        help="Usa tipos compactos (categorías, cadenas Arrow, float32) para el DataFrame limpio.")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="Carga el inventario completo en lugar de sólo los cambios respecto al snapshot anterior.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
     logger.info("--- Script clean_data.py iniciado ---")
+    with PipelineRun('clean_data') as run:
+        _run_pipeline(run, all_files=args.all_files, max_workers=args.workers,
+                      full_reload=args.full_reload, compact=args.compact)
+    logger.info("--- Script clean_data.py finalizado ---")
+
+def _clean_all_inventories(run, max_workers=None):
+    """Descubre, limpia en paralelo y unifica todos los inventarios del directorio de descargas."""
+    with run.stage('discover') as discover_stage:
+        target_files = find_inventory_files(DOWNLOAD_DIR)
+        discover_stage.rows = len(target_files)
+    if not target_files:
+        logger.info("[MAIN] No se encontró un archivo Excel para procesar.")
+        return None
+
+    with run.stage('clean_parallel') as clean_stage:
+        frames_by_path = clean_inventory_files(target_files, max_workers=max_workers)
+        clean_stage.rows = sum(len(df) for df in frames_by_path.values())
+        clean_stage.incr('files_failed', len(target_files) - len(frames_by_path))
+
+    with run.stage('merge') as merge_stage:
+        merged_df = merge_inventories(frames_by_path)
+        merge_stage.rows = len(merged_df)
+    return merged_df
+
+def _clean_single_inventory(run, compact=False):
+    """Limpia el primer inventario encontrado en el directorio de descargas."""
+    with run.stage('discover'):
+        target_file = find_target_excel_file(DOWNLOAD_DIR)
+    if not target_file:
+        logger.info("[MAIN] No se encontró un archivo Excel para procesar.")
+        return None
+    return clean_and_transform_data(target_file, compact=compact)
+
+def _run_pipeline(run, all_files=False, max_workers=None, full_reload=False, compact=False):
+    db_params = _get_db_params()
 
     # --- Verificación inicial de la conexión a la base de datos ---
     logger.info("[MAIN] Realizando verificación inicial de la conexión a la base de datos...")
-    conn_check = None
     try:
-        conn_check = get_db_connection()
+        with run.stage('db_check'):
+            conn_check = get_db_connection(**db_params)
+            conn_check.close()
         logger.info("[MAIN] Verificación de conexión a la base de datos exitosa.")
-        conn_check.close()
     except (psycopg2.Error, ValueError) as e:
         logger.error(f"[MAIN] No se pudo establecer conexión con la base de datos: {e}")
         logger.error("[MAIN] El script no continuará. Por favor, verifique la configuración de la base de datos y las variables de entorno.")
+        run.status = 'failed'
         return # Salir del script si la conexión falla
 
-    target_file = find_target_excel_file(DOWNLOAD_DIR)
-
-    if target_file:
-        cleaned_df = clean_and_transform_data(target_file)
-        if cleaned_df is not None:
-            logger.info("\n--- Primeras 5 filas del DataFrame limpio ---")
-            logger.info(cleaned_df.head().to_string())
-            logger.info("\n--- Información general del DataFrame limpio ---")
-            buffer = io.StringIO()
-            cleaned_df.info(buf=buffer)
-            logger.info(buffer.getvalue())
-            logger.info("\n--- Conteo de valores nulos del DataFrame limpio ---")
-            logger.info(cleaned_df.isnull().sum().to_string())
-
-            # --- Cargar datos a PostgreSQL ---
-            property_repo = PropertyRepository()
-            property_repo.load_properties(cleaned_df, DB_COLUMNS)
-
-        else:
-            logger.error("[MAIN] No se pudo obtener un DataFrame limpio.")
+    if all_files:
+        cleaned_df = _clean_all_inventories(run, max_workers=max_workers)
+        if compact and cleaned_df is not None and not cleaned_df.empty:
+            compacted = compact_frame(cleaned_df)
+            log_memory_report(cleaned_df, compacted, "Inventario unificado")
+            cleaned_df = compacted
     else:
-        logger.info("[MAIN] No se encontró un archivo Excel para procesar.")
+        cleaned_df = _clean_single_inventory(run, compact=compact)
 
-    logger.info("--- Script clean_data.py finalizado ---")
+    if cleaned_df is None:
+        return
+    if cleaned_df.empty:
+        logger.error("[MAIN] No se pudo obtener un DataFrame limpio.")
+        run.status = 'failed'
+        return
+
+    logger.info("\n--- Primeras 5 filas del DataFrame limpio ---")
+    logger.info(cleaned_df.head().to_string())
+    logger.info("\n--- Información general del DataFrame limpio ---")
+    buffer = io.StringIO()
+    cleaned_df.info(buf=buffer)
+    logger.info(buffer.getvalue())
+    logger.info("\n--- Conteo de valores nulos del DataFrame limpio ---")
+    logger.info(cleaned_df.isnull().sum().to_string())
+
+    # --- Cargar datos a PostgreSQL ---
+    property_repo = PropertyRepository(**db_params)
+    if full_reload:
+        loaded = property_repo.load_properties(cleaned_df, DB_COLUMNS)
+    else:
+        loaded = _load_incremental(property_repo, cleaned_df)
+
+    if loaded:
+        save_snapshot(cleaned_df)
+    else:
+        run.status = 'failed'
+
+def _load_incremental(property_repo, cleaned_df):
+    """
+    Compara el inventario limpio con el snapshot anterior y envía a la base de datos
+    sólo las altas y modificaciones, registrando el conjunto de cambios en audit_log.
+    Las bajas se registran en la auditoría pero no se borran de la tabla.
+
+    Sin snapshot anterior (primera ejecución) se cargan todas las filas sin auditoría:
+    las propiedades que ya estaban en la base de datos no son altas.
+    """
+    previous_df = load_snapshot()
+    if previous_df is None or previous_df.empty:
+        logger.info("[MAIN] Sin snapshot anterior; se carga el inventario completo sin auditoría de altas.")
+        return property_repo.load_properties(cleaned_df, DB_COLUMNS)
+    change_set = diff_snapshots(previous_df, cleaned_df)
+    if change_set.is_empty:
+        logger.info("[MAIN] El inventario no tiene cambios respecto al snapshot anterior. No se cargan datos.")
+        return True
+
+    rows_to_upsert = change_set.rows_to_upsert()
+    if not rows_to_upsert.empty and not property_repo.load_properties(rows_to_upsert, DB_COLUMNS):
+        return False
+    return property_repo.log_audit_entries(change_set.audit_entries(), changed_by='system', change_source='snapshot_diff')
 
 if __name__ == "__main__":
     main()
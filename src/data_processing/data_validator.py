@@ -6,41 +6,33 @@ import logging
 from datetime import datetime  # Added missing import
 
 from src.utils.logging_config import setup_logging
+from src.utils.metrics import instrumented
+from src.utils.schema import column_priority, blank_mask
+from src.data_processing.quality_rules import evaluate_rules, SEVERITY_ERROR
 
 setup_logging(log_file_prefix="data_validator_log")
 logger = logging.getLogger(__name__)
 
-# 1. Column-Priority Matrix (authoritative)
-COLUMN_PRIORITY = {
-    "critical": [
-        'id', 'precio', 'm2_construccion', 'm2_terreno', 'recamaras', 'banos_totales',
-        'descripcion', 'status', 'tipo_operacion', 'tipo_contrato', 'colonia',
-        'municipio', 'latitud', 'longitud', 'estacionamientos'
-    ],
-    "recommended": [
-        'codigo_postal', 'calle', 'numero', 'subtipo_propiedad', 'edad',
-        'estacionamientos', 'comision', 'nombre_agente', 'apellido_paterno_agente'
-    ],
-    "optional": [
-        'en_internet', 'clave', 'clave_oficina', 'cocina', 'niveles_construidos',
-        'apellido_materno_agente', 'comision_compartir_externas', 'fecha_alta'
-    ]
-}
+# 1. Column-Priority Matrix (authoritative), generada desde el esquema declarativo
+COLUMN_PRIORITY = column_priority()
 
 # Directorio para los reportes generados
 REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'reports')
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+@instrumented('validate')
 def validate_and_report_missing_data(properties_df: pd.DataFrame) -> pd.DataFrame:
     """
     Valida el DataFrame de propiedades, detecta datos faltantes según la matriz de prioridad,
+    evalúa las reglas de calidad (valores presentes pero inválidos) y
     genera missing_critical.csv y errors_and_fixes.md.
 
     Args:
         properties_df (pd.DataFrame): DataFrame de propiedades.
 
     Returns:
-        pd.DataFrame: DataFrame original con una columna adicional 'has_critical_gaps' si aplica.
+        pd.DataFrame: DataFrame original con las columnas adicionales 'has_critical_gaps'
+                      y 'has_quality_errors' (alguna regla de severidad 'error' violada).
     """
     if properties_df.empty:
         logger.info("DataFrame de propiedades vacío. No hay datos para validar.")
@@ -98,6 +90,21 @@ def validate_and_report_missing_data(properties_df: pd.DataFrame) -> pd.DataFram
                 f.write(f"- **Propiedad ID**: {gap['property_id']}, **Columna**: {gap['column']}, **Prioridad**: {gap['priority']}, **Estado**: {gap['status']}\n")
             f.write("\n")
 
+    # Evaluar reglas de calidad sobre valores presentes
+    quality_report = evaluate_rules(properties_df)
+    properties_df['has_quality_errors'] = quality_report.row_mask(SEVERITY_ERROR)
+    violated = quality_report.summary[quality_report.summary['violations'] > 0]
+    with open(errors_log_path, 'a', encoding='utf-8') as f:
+        f.write("## Reglas de Calidad\n\n")
+        if violated.empty:
+            f.write("No se detectaron valores inválidos.\n\n")
+        else:
+            for _, rule in violated.iterrows():
+                sample = ', '.join(str(i) for i in rule['sample_ids'])
+                f.write(f"- **Regla**: {rule['rule']} ({rule['severity']}), **Violaciones**: {rule['violations']} "
+                        f"({rule['violation_pct']}%), **Descripción**: {rule['description']}, **Ejemplos**: {sample}\n")
+            f.write("\n")
+
     logger.info(f"Log de errores y correcciones guardado en: {errors_log_path}")
 
     return properties_df
@@ -120,13 +127,10 @@ def get_incomplete_properties(properties_df):
     # Usar solo las columnas críticas para esta función de compatibilidad
     missing_check_columns = COLUMN_PRIORITY["critical"]
 
-    incomplete_properties_mask = pd.Series([False] * len(properties_df))
+    incomplete_properties_mask = pd.Series(False, index=properties_df.index)
     for col in missing_check_columns:
         if col in properties_df.columns:
-            if properties_df[col].dtype == 'object':
-                incomplete_properties_mask = incomplete_properties_mask | properties_df[col].isnull() | (properties_df[col] == '')
-            else:
-                incomplete_properties_mask = incomplete_properties_mask | properties_df[col].isnull()
+            incomplete_properties_mask |= blank_mask(properties_df, col)
 
     return properties_df[incomplete_properties_mask]
 
@@ -0,0 +1,388 @@
+# src/data_processing/duplicate_detector.py
+
+"""
+Detección de propiedades duplicadas entre oficinas.
+
+La misma casa suele aparecer con distintos 'id' publicada por varias oficinas.
+Comparar todas las parejas es O(n²); en su lugar se forman bloques de candidatos
+y sólo se comparan las propiedades de un mismo bloque (o de bloques vecinos):
+
+    1. Celda geográfica (latitud/longitud redondeadas) + banda de precio.
+    2. Colonia normalizada + banda de precio (cubre coordenadas faltantes o en 0).
+
+Cada pareja candidata recibe una puntuación ponderada de similitud de dirección,
+m², recámaras, descripción y distancia. Las parejas que superan el umbral se unen
+en clusters (componentes conexas). Como cada propiedad sólo se compara con las de
+su vecindad y los bloques demasiado grandes se descartan, el costo crece de forma
+casi lineal con el tamaño del inventario.
+
+Uso:
+    python -m src.data_processing.duplicate_detector [--threshold 0.75]
+"""
+
+import os
+import logging
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.metrics import instrumented
+from src.utils.text_normalization import address_tokens, normalize_text, tokenize
+
+load_dotenv()
+setup_logging(log_file_prefix="duplicate_detector_log")
+logger = logging.getLogger(__name__)
+
+# Tamaño de la celda geográfica en grados (~220 m de latitud)
+GRID_CELL_DEGREES = 0.002
+# Ancho relativo de la banda de precio; con las bandas vecinas tolera ~20% de diferencia
+PRICE_BAND_WIDTH = 0.10
+# Bloques más grandes que esto se omiten para mantener el costo acotado
+MAX_BLOCK_SIZE = 500
+DEFAULT_THRESHOLD = 0.75
+
+DEFAULT_WEIGHTS = {
+    'address': 0.30,
+    'm2_construccion': 0.20,
+    'm2_terreno': 0.10,
+    'recamaras': 0.10,
+    'description': 0.20,
+    'distance': 0.10,
+}
+
+# Tolerancias: diferencia relativa de m² y distancia (metros) a partir de las cuales la similitud es 0
+M2_TOLERANCE = 0.15
+DISTANCE_TOLERANCE_M = 300.0
+
+# Coordenadas válidas (México); fuera de este rango no se usa el bloque geográfico
+_LAT_RANGE = (14.0, 33.0)
+_LON_RANGE = (-118.5, -86.5)
+
+
+@dataclass
+class DuplicateResult:
+    """
+    Resultado de la detección.
+
+    Attributes:
+        pairs (pd.DataFrame): Parejas que superan el umbral: id_a, id_b, score y la
+                              similitud de cada componente.
+        clusters (pd.DataFrame): Una fila por propiedad duplicada: cluster_id, property_id,
+                                 clave_oficina y score (mejor puntuación dentro del cluster).
+        candidate_pairs (int): Parejas comparadas tras el bloqueo.
+        skipped_blocks (int): Bloques omitidos por exceder MAX_BLOCK_SIZE.
+    """
+    pairs: pd.DataFrame
+    clusters: pd.DataFrame
+    candidate_pairs: int = 0
+    skipped_blocks: int = 0
+
+    @property
+    def cluster_count(self) -> int:
+        return int(self.clusters['cluster_id'].nunique()) if not self.clusters.empty else 0
+
+
+def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _valid_geo(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    return (lat >= _LAT_RANGE[0]) & (lat <= _LAT_RANGE[1]) & (lon >= _LON_RANGE[0]) & (lon <= _LON_RANGE[1])
+
+
+def _price_bands(precio: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bands = np.floor(np.log(precio) / np.log1p(PRICE_BAND_WIDTH))
+    bands[~np.isfinite(bands) | (precio <= 0)] = np.nan
+    return bands
+
+
+def _block_pairs(keys: pd.DataFrame, offset_columns: list, offsets: list, max_block_size: int) -> tuple:
+    """
+    Genera parejas (pos_a, pos_b) de filas que comparten llave de bloque o cuya llave
+    difiere en alguno de los desplazamientos dados (bloques vecinos).
+
+    Sólo se usan desplazamientos "hacia adelante" (lexicográficamente >= 0): la pareja
+    con el vecino opuesto se obtiene desde el otro lado, así que cada pareja aparece una vez.
+    """
+    key_columns = [c for c in keys.columns if c != 'pos']
+    sizes = keys.groupby(key_columns, sort=False)['pos'].transform('size')
+    oversized = sizes > max_block_size
+    skipped = int(keys.loc[oversized, key_columns].drop_duplicates().shape[0])
+    keys = keys[~oversized]
+
+    frames = []
+    for offset in offsets:
+        shifted = keys.copy()
+        for column, delta in zip(offset_columns, offset):
+            shifted[column] = shifted[column] + delta
+        joined = keys.merge(shifted, on=key_columns, suffixes=('_a', '_b'))
+        if not any(offset):
+            joined = joined[joined['pos_a'] < joined['pos_b']]
+        frames.append(joined[['pos_a', 'pos_b']].to_numpy())
+    pairs = np.concatenate(frames) if frames else np.empty((0, 2), dtype=np.int64)
+    return pairs, skipped
+
+
+def _forward_offsets(dimensions: int) -> list:
+    grid = np.array(np.meshgrid(*[[-1, 0, 1]] * dimensions, indexing='ij')).reshape(dimensions, -1).T
+    return [tuple(int(v) for v in row) for row in grid if tuple(row) >= (0,) * dimensions]
+
+
+def candidate_pairs(df: pd.DataFrame, max_block_size: int = MAX_BLOCK_SIZE) -> tuple:
+    """
+    Parejas candidatas según los bloques geográfico y de colonia.
+
+    Returns:
+        tuple: (arreglo Nx2 de posiciones de fila con pos_a < pos_b, bloques omitidos)
+    """
+    positions = np.arange(len(df))
+    bands = _price_bands(_numeric(df, 'precio'))
+    lat, lon = _numeric(df, 'latitud'), _numeric(df, 'longitud')
+    valid_geo = _valid_geo(lat, lon) & ~np.isnan(bands)
+    geo_keys = pd.DataFrame({
+        'pos': positions[valid_geo],
+        'cell_x': np.floor(lon[valid_geo] / GRID_CELL_DEGREES).astype(np.int64),
+        'cell_y': np.floor(lat[valid_geo] / GRID_CELL_DEGREES).astype(np.int64),
+        'band': bands[valid_geo].astype(np.int64),
+    })
+    geo_pairs, geo_skipped = _block_pairs(geo_keys, ['cell_x', 'cell_y', 'band'], _forward_offsets(3), max_block_size)
+
+    if 'colonia' in df.columns:
+        raw_codes, raw_uniques = pd.factorize(df['colonia'], use_na_sentinel=True)
+        normalized = np.array([normalize_text(value) for value in raw_uniques] + [''], dtype=object)
+        colonia = normalized[raw_codes]  # el código -1 (nulo) apunta al '' final
+    else:
+        colonia = np.full(len(df), '', dtype=object)
+    colonia_codes, _ = pd.factorize(colonia)
+    valid_colonia = (colonia != '') & ~np.isnan(bands)
+    colonia_keys = pd.DataFrame({
+        'pos': positions[valid_colonia],
+        'colonia': colonia_codes[valid_colonia],
+        'band': bands[valid_colonia].astype(np.int64),
+    })
+    colonia_pairs, colonia_skipped = _block_pairs(colonia_keys, ['band'], [(0,), (1,)], max_block_size)
+
+    # Unir ambos pases sin repetir parejas: cada pareja se codifica como un solo entero
+    pairs = np.sort(np.concatenate([geo_pairs, colonia_pairs]).astype(np.int64), axis=1)
+    encoded = _unique_int(pairs[:, 0] * len(df) + pairs[:, 1])
+    pairs = np.column_stack([encoded // max(len(df), 1), encoded % max(len(df), 1)])
+    return pairs, geo_skipped + colonia_skipped
+
+
+def _unique_int(values: np.ndarray) -> np.ndarray:
+    """Valores únicos ordenados de un arreglo de enteros (ordenar es más rápido que np.unique por hash)."""
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _jaccard(sets: dict, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    scores = np.full(len(a), np.nan)
+    for i, (left, right) in enumerate(zip(a.tolist(), b.tolist())):
+        set_a, set_b = sets[left], sets[right]
+        if set_a and set_b:
+            scores[i] = len(set_a & set_b) / len(set_a | set_b)
+    return scores
+
+
+def _token_sets(df: pd.DataFrame, positions: np.ndarray, build, *columns) -> dict:
+    """Conjuntos de tokens sólo para las filas que aparecen en alguna pareja."""
+    values = [df[col].to_numpy()[positions] if col in df.columns else [None] * len(positions) for col in columns]
+    memo = {}  # direcciones y descripciones repetidas se tokenizan una sola vez
+    sets = {}
+    for pos, *parts in zip(positions.tolist(), *values):
+        key = tuple(parts)
+        if key not in memo:
+            memo[key] = build(*parts)
+        sets[pos] = memo[key]
+    return sets
+
+
+def _relative_similarity(values: np.ndarray, a: np.ndarray, b: np.ndarray, tolerance: float) -> np.ndarray:
+    left, right = values[a], values[b]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff = np.abs(left - right) / np.fmax(np.abs(left), np.abs(right))
+    diff[(left == 0) & (right == 0)] = 0.0
+    return np.clip(1 - diff / tolerance, 0.0, 1.0)
+
+
+def _haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6_371_000 * np.arcsin(np.sqrt(h))
+
+
+TEXT_COMPONENTS = ('address', 'description')
+
+
+def _weighted_score(components: pd.DataFrame, weights: dict) -> np.ndarray:
+    weight_vector = np.array([weights.get(col, 0.0) for col in components.columns])
+    values = components.to_numpy()
+    available = ~np.isnan(values)
+    weighted = np.where(available, values, 0.0) @ weight_vector
+    total_weight = available @ weight_vector
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_weight > 0, weighted / total_weight, 0.0)
+
+
+def score_pairs(df: pd.DataFrame, pairs: np.ndarray, weights: dict = None, min_score: float = None) -> pd.DataFrame:
+    """
+    Calcula la similitud de cada pareja candidata.
+
+    Cada componente está en [0, 1] o es NaN si falta el dato en alguna de las dos
+    propiedades; la puntuación final es el promedio ponderado de los componentes
+    disponibles.
+
+    Los componentes numéricos se calculan primero de forma vectorizada. Si se indica
+    min_score, las parejas que no podrían alcanzarlo aun con similitud de texto
+    perfecta se descartan antes de comparar direcciones y descripciones, que es la
+    parte costosa.
+
+    Returns:
+        pd.DataFrame: pos_a, pos_b, una columna por componente y 'score'.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    a, b = pairs[:, 0], pairs[:, 1]
+
+    recamaras = _numeric(df, 'recamaras')
+    rec_diff = np.abs(recamaras[a] - recamaras[b])
+    lat, lon = _numeric(df, 'latitud'), _numeric(df, 'longitud')
+    distance = _haversine_m(lat[a], lon[a], lat[b], lon[b])
+    has_geo = _valid_geo(lat[a], lon[a]) & _valid_geo(lat[b], lon[b])
+    components = pd.DataFrame({
+        'm2_construccion': _relative_similarity(_numeric(df, 'm2_construccion'), a, b, M2_TOLERANCE),
+        'm2_terreno': _relative_similarity(_numeric(df, 'm2_terreno'), a, b, M2_TOLERANCE),
+        'recamaras': np.where(np.isnan(rec_diff), np.nan, np.clip(1 - rec_diff / 2, 0.0, 1.0)),
+        'distance': np.where(has_geo, np.clip(1 - distance / DISTANCE_TOLERANCE_M, 0.0, 1.0), np.nan),
+    })
+
+    if min_score is not None:
+        # Cota superior: texto disponible y con similitud 1 en ambas propiedades
+        upper = _weighted_score(components.assign(**{col: 1.0 for col in TEXT_COMPONENTS}), weights)
+        keep = upper >= min_score
+        a, b, components = a[keep], b[keep], components[keep].reset_index(drop=True)
+
+    involved = _unique_int(np.concatenate([a, b]))
+    address_sets = _token_sets(df, involved, address_tokens, 'calle', 'numero')
+    description_sets = _token_sets(df, involved, lambda text: frozenset(tokenize(text)), 'descripcion')
+    components.insert(0, 'address', _jaccard(address_sets, a, b))
+    components.insert(4, 'description', _jaccard(description_sets, a, b))
+
+    score = _weighted_score(components, weights)
+    components.insert(0, 'pos_b', b)
+    components.insert(0, 'pos_a', a)
+    components['score'] = score
+    return components
+
+
+def _connected_components(a: np.ndarray, b: np.ndarray) -> dict:
+    """Raíz de la componente conexa de cada fila que aparece en alguna pareja (union-find)."""
+    parent = {x: x for x in np.concatenate([a, b]).tolist()}
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for left, right in zip(a.tolist(), b.tolist()):
+        root_a, root_b = find(left), find(right)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return {x: find(x) for x in parent}
+
+
+@instrumented('duplicates')
+def detect_duplicates(df: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD, weights: dict = None,
+                      max_block_size: int = MAX_BLOCK_SIZE) -> DuplicateResult:
+    """
+    Detecta propiedades duplicadas en el inventario.
+
+    Args:
+        df (pd.DataFrame): Inventario con 'id' y, en lo posible, latitud, longitud, colonia,
+                           precio, calle, numero, m2_construccion, m2_terreno, recamaras y descripcion.
+        threshold (float): Puntuación mínima para considerar duplicada una pareja.
+        weights (dict, optional): Peso de cada componente. Por defecto, DEFAULT_WEIGHTS.
+        max_block_size (int): Tamaño máximo de un bloque antes de omitirlo.
+
+    Returns:
+        DuplicateResult: Parejas y clusters de duplicados.
+    """
+    df = df[df['id'].notna()].drop_duplicates(subset='id', keep='last').reset_index(drop=True)
+    pairs, skipped = candidate_pairs(df, max_block_size=max_block_size)
+    scored = score_pairs(df, pairs, weights, min_score=threshold)
+    matches = scored[scored['score'] >= threshold]
+
+    ids = df['id'].astype(str).to_numpy()
+    pairs_df = matches.assign(id_a=ids[matches['pos_a']], id_b=ids[matches['pos_b']])
+    pairs_df = pairs_df.drop(columns=['pos_a', 'pos_b']).sort_values('score', ascending=False)
+    pairs_df = pairs_df[['id_a', 'id_b', 'score'] + [c for c in pairs_df.columns if c not in ('id_a', 'id_b', 'score')]]
+
+    if matches.empty:
+        clusters = pd.DataFrame(columns=['cluster_id', 'property_id', 'clave_oficina', 'score'])
+    else:
+        roots = _connected_components(matches['pos_a'].to_numpy(), matches['pos_b'].to_numpy())
+        best = pd.concat([
+            matches[['pos_a', 'score']].rename(columns={'pos_a': 'pos'}),
+            matches[['pos_b', 'score']].rename(columns={'pos_b': 'pos'}),
+        ]).groupby('pos')['score'].max()
+        members = best.index.to_numpy()
+        clusters = pd.DataFrame({
+            'property_id': ids[members],
+            'root': [roots[pos] for pos in members.tolist()],
+            'clave_oficina': (df['clave_oficina'].to_numpy()[members] if 'clave_oficina' in df.columns else None),
+            'score': best.to_numpy().round(4),
+        })
+        # El identificador del cluster es el menor 'id' de sus miembros: estable entre ejecuciones
+        clusters['cluster_id'] = clusters.groupby('root')['property_id'].transform('min')
+        clusters = clusters.drop(columns='root').sort_values(['cluster_id', 'property_id']).reset_index(drop=True)
+        clusters = clusters[['cluster_id', 'property_id', 'clave_oficina', 'score']]
+
+    result = DuplicateResult(
+        pairs=pairs_df.reset_index(drop=True), clusters=clusters,
+        candidate_pairs=len(pairs), skipped_blocks=skipped,
+    )
+    if skipped:
+        logger.warning(f"[DUPLICATES] {skipped} bloques omitidos por exceder {max_block_size} propiedades.")
+    logger.info(f"[DUPLICATES] {len(df)} propiedades, {len(pairs)} parejas candidatas, "
+                f"{len(matches)} parejas duplicadas en {result.cluster_count} clusters.")
+    return result
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detecta propiedades duplicadas entre oficinas y guarda los clusters.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Puntuación mínima para considerar duplicada una pareja (por defecto {DEFAULT_THRESHOLD}).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Importación local: el detector no necesita la base de datos para usarse como librería
+    from src.data_access.property_repository import PropertyRepository
+
+    args = _parse_args(argv)
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+    properties = repo.get_properties_from_db()
+    if properties.empty:
+        logger.error("[DUPLICATES] No se pudieron obtener propiedades de la base de datos.")
+        return 1
+    result = detect_duplicates(properties, threshold=args.threshold)
+    return 0 if repo.save_duplicate_clusters(result.clusters) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
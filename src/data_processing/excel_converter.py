@@ -1,7 +1,12 @@
-import win32com.client as win32
-import pythoncom
 import logging
 
+try:
+    import win32com.client as win32
+    import pythoncom
+except ImportError:  # pywin32 sólo está disponible en Windows
+    win32 = None
+    pythoncom = None
+
 from src.utils.logging_config import setup_logging
 
 setup_logging(log_file_prefix="excel_converter_log")
@@ -12,6 +17,10 @@ def convert_xls_to_xlsx(xls_path, xlsx_path):
     Convierte un archivo .xls a .xlsx usando pywin32 y Microsoft Excel.
     Requiere que Microsoft Excel esté instalado en el sistema.
     """
+    if win32 is None:
+        logger.error("[CONVERSION] pywin32 no está disponible; la conversión XLS -> XLSX requiere Windows con Microsoft Excel.")
+        return False
+
     excel = None
     workbook = None
     com_initialized = False
@@ -0,0 +1,133 @@
+# src/data_processing/pdf_batch.py
+
+"""
+Extracción de campos de muchos PDFs en un pool de procesos.
+
+La usan el auto-llenado masivo (batch_autofill.py) y la conciliación PDF vs. base de
+datos (pdf_reconciliation.py). Sólo hay MAX_IN_FLIGHT_PER_WORKER tareas pendientes por
+proceso y cada proceso se recicla tras MAX_TASKS_PER_CHILD PDFs, así que la memoria queda
+acotada aunque el inventario sea grande; cada proceso usa la caché de extracción.
+
+Con checkpoint_path, cada resultado se agrega a un archivo JSONL en cuanto llega y una
+ejecución interrumpida continúa con las tareas que faltaban.
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from src.data_processing.pdf_extraction import extract_from_pdf, PdfExtractionError
+from src.data_processing.pdf_extraction_cache import get_extraction_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_IN_FLIGHT_PER_WORKER = 4
+MAX_TASKS_PER_CHILD = 200
+
+
+def extract_task(task: tuple) -> dict:
+    """
+    Se ejecuta en un proceso del pool. Nunca lanza: los errores van en el resultado.
+
+    Args:
+        task (tuple): (property_id, ruta del PDF, columnas a extraer).
+
+    Returns:
+        dict: {'property_id', 'status': 'done', 'fields': {campo: [valor, confianza]}}
+              o {'property_id', 'status': 'failed', 'error'}.
+    """
+    property_id, pdf_path, columns = task
+    try:
+        fields = extract_from_pdf(pdf_path, columns, cache=get_extraction_cache())
+        return {'property_id': property_id, 'status': 'done',
+                'fields': {name: [field.value, field.confidence] for name, field in fields.items()}}
+    except PdfExtractionError as e:
+        return {'property_id': property_id, 'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        return {'property_id': property_id, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    {property_id: resultado} de una ejecución interrumpida.
+
+    Si la última línea quedó a medias (proceso terminado mientras escribía), se recorta
+    el archivo para que los resultados nuevos se agreguen en una línea propia.
+    """
+    results = {}
+    if not path or not os.path.exists(path):
+        return results
+    valid_bytes = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            results[record['property_id']] = record
+            valid_bytes += len(line)
+    if valid_bytes < os.path.getsize(path):
+        logger.warning(f"[PDF_BATCH] Se descarta una línea incompleta al final de {path}")
+        with open(path, 'r+b') as f:
+            f.truncate(valid_bytes)
+    return results
+
+
+def run_extraction(tasks: list, checkpoint_path: str = None, workers: int = None) -> dict:
+    """
+    Extrae en paralelo las tareas que no estén ya en el checkpoint.
+
+    Args:
+        tasks (list): Tuplas (property_id, ruta del PDF, columnas a extraer).
+        checkpoint_path (str, optional): Archivo JSONL para reanudar; sin él no se guarda nada.
+        workers (int, optional): Procesos del pool (por defecto, uno por núcleo).
+
+    Returns:
+        dict: {property_id: resultado} de todas las tareas (las reanudadas y las nuevas).
+    """
+    results = load_checkpoint(checkpoint_path)
+    pending = [task for task in tasks if task[0] not in results]
+    if results:
+        logger.info(f"[PDF_BATCH] Reanudando: {len(results)} propiedades ya procesadas en el checkpoint.")
+    if not pending:
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * MAX_IN_FLIGHT_PER_WORKER
+    if checkpoint_path:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+    start = time.monotonic()
+    done = 0
+    log_every = max(1, len(pending) // 20)
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=MAX_TASKS_PER_CHILD) as executor:
+            queue = iter(pending)
+            in_flight = set()
+            while True:
+                for task in queue:
+                    in_flight.add(executor.submit(extract_task, task))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    results[record['property_id']] = record
+                    if checkpoint:
+                        checkpoint.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    done += 1
+                if checkpoint:
+                    checkpoint.flush()
+                if done % log_every < len(finished) or done == len(pending):
+                    rate = done / max(time.monotonic() - start, 1e-9)
+                    logger.info(f"[PDF_BATCH] {done}/{len(pending)} PDFs procesados ({rate:.1f}/s).")
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    return results
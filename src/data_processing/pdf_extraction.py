@@ -0,0 +1,869 @@
+# src/data_processing/pdf_extraction.py
+
+"""
+Extracción de campos de las fichas técnicas (PDF) a partir de plantillas.
+
+Cada plantilla de src/pdf_templates/*.json define, por campo, una lista de expresiones
+regulares alternativas (con un grupo de captura) y un tipo:
+
+    - 'currency': '$1,250,000' -> 1250000.0 (se detecta la moneda; USD queda con baja confianza).
+    - 'number':   '250.5', '1,200', '1.200' -> 250.5, 1200, 1200 (entero si no tiene decimales).
+
+Las plantillas se cargan y sus expresiones se compilan una sola vez por proceso
+(load_templates está memoizada), y el texto del PDF se extrae una sola vez por
+documento; aplicar las expresiones sobre ese texto toma milisegundos.
+
+Cada valor se devuelve como ExtractedField con una confianza entre 0 y 1:
+    - La primera alternativa de la plantilla vale 1.0 y cada alternativa posterior
+      resta ALTERNATIVE_PENALTY.
+    - Si el documento contiene otros valores distintos para el mismo campo, la
+      confianza se multiplica por CONFLICT_FACTOR.
+    - Un precio en una moneda distinta de MXN se limita a FOREIGN_CURRENCY_CONFIDENCE.
+
+extract_from_pdf lee las páginas de forma perezosa: empieza por las que, según
+PageHints, suelen contener las columnas pedidas y se detiene en cuanto las tiene todas,
+así que llenar un hueco suele tocar una sola página. El texto se obtiene sin decodificar
+imágenes; el OCR sólo se usa para campos marcados con "ocr": true en la plantilla.
+
+Si no se indica la plantilla, se elige por la huella de diseño del PDF (LayoutFingerprint):
+productor del PDF, tamaño de página y palabras ancla de la primera página. Las plantillas
+declaran sus huellas en "fingerprints" y TemplateIndex las resuelve con una búsqueda en
+diccionario; las huellas sin plantilla se registran en data/pdf_unknown_layouts.json
+para escribir la plantilla que falta, y mientras tanto se usa la estándar.
+
+La extracción de texto usa PyMuPDF (fitz), dependencia opcional.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import atexit
+import contextlib
+import logging
+import threading
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # pragma: no cover - depende del entorno
+    fitz = None
+
+from src.utils.text_normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'src', 'pdf_templates')
+PAGE_HINTS_PATH = os.path.join(BASE_DIR, 'data', 'pdf_page_hints.json')
+UNKNOWN_LAYOUTS_PATH = os.path.join(BASE_DIR, 'data', 'pdf_unknown_layouts.json')
+DEFAULT_TEMPLATE = 'template_standard'
+EXTRACTOR_VERSION = 1
+
+ALTERNATIVE_PENALTY = 0.1
+CONFLICT_FACTOR = 0.75
+FOREIGN_CURRENCY_CONFIDENCE = 0.4
+MIN_CONFIDENCE = 0.5  # Por debajo, autofill no propone el valor
+
+PAGE_SIZE_BUCKET = 10  # Puntos; absorbe diferencias de redondeo entre generadores de PDF
+
+_CURRENCY_CODES = re.compile(r'(?<![A-Za-z])(US\$|USD|MXN|EUR|DLS)', re.IGNORECASE)
+_NUMBER_CHARS = re.compile(r'[^\d.,]')
+
+
+class PdfExtractionError(Exception):
+    """No se pudo leer el texto del PDF."""
+
+
+@dataclass(frozen=True)
+class ExtractedField:
+    """Valor tipado de un campo con su confianza y el texto del que salió."""
+    value: object
+    confidence: float
+    raw: str
+    pattern: str
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str
+    patterns: tuple  # re.Pattern compilados, en orden de preferencia
+    type: str = 'text'
+    required: bool = False
+    ocr: bool = False  # El valor puede venir sólo en imágenes; se permite OCR si el texto no lo trae
+
+
+@dataclass(frozen=True)
+class LayoutFingerprint:
+    """
+    Huella del diseño de un folleto. En una plantilla, producer o page_size en None
+    significan "cualquiera"; las anclas deben coincidir exactamente con las del vocabulario
+    (todas las anclas declaradas por las plantillas) presentes en la primera página.
+    """
+    producer: str = None  # Productor del PDF normalizado y sin números de versión
+    page_size: tuple = None  # (ancho, alto) en puntos, redondeados a PAGE_SIZE_BUCKET
+    anchors: frozenset = frozenset()  # Palabras ancla normalizadas
+
+    @property
+    def key(self) -> str:
+        size = 'x'.join(str(v) for v in self.page_size) if self.page_size else '*'
+        return f"{self.producer or '*'}|{size}|{'+'.join(sorted(self.anchors))}"
+
+    def lookup_keys(self) -> list:
+        """Claves a buscar en el índice, de la más a la menos específica."""
+        return [replace(self, producer=producer, page_size=size).key
+                for producer, size in ((self.producer, self.page_size), (None, self.page_size),
+                                       (self.producer, None), (None, None))]
+
+
+def normalize_producer(producer) -> str | None:
+    """'Adobe PDF Library 15.0' -> 'adobe pdf library' (las versiones cambian sin cambiar el diseño)."""
+    tokens = [token for token in normalize_text(producer).split() if not any(ch.isdigit() for ch in token)]
+    return ' '.join(tokens) or None
+
+
+def bucket_page_size(width: float, height: float) -> tuple:
+    return (int(round(width / PAGE_SIZE_BUCKET)) * PAGE_SIZE_BUCKET,
+            int(round(height / PAGE_SIZE_BUCKET)) * PAGE_SIZE_BUCKET)
+
+
+@dataclass(frozen=True)
+class Template:
+    name: str
+    title: str
+    fields: dict  # nombre del campo -> FieldSpec
+    matcher: 'MultiPatternMatcher' = None  # None si las expresiones no admiten la búsqueda combinada
+    page_hints: dict = field(default_factory=dict)  # campo -> páginas donde suele estar (negativas desde el final)
+    digest: str = ''  # Hash del JSON de la plantilla
+    fingerprints: tuple = ()  # LayoutFingerprint de los folletos con este diseño
+
+    @property
+    def cache_key(self) -> str:
+        """Versión del extractor + plantilla + hash de su definición (clave de ExtractionCache)."""
+        return f"{EXTRACTOR_VERSION}:{self.name}:{self.digest}"
+
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    Texto literal con el que empieza obligatoriamente la expresión ('Precio:\\s*(...)' -> 'Precio:').
+    Vacío si la expresión empieza con una clase, un grupo o tiene alternativas de primer nivel.
+    """
+    if '|' in pattern:
+        return ''
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum():  # \s, \d, \b, \1...
+                break
+            char, step = escaped, 2
+        elif char in '.^$[]()':
+            break
+        elif char in '*+?{':
+            if prefix:
+                prefix.pop()  # El cuantificador hace opcional el carácter anterior
+            break
+        else:
+            step = 1
+        if pattern[i + step:i + step + 1] in ('*', '?', '{'):
+            break
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+
+def _trie_pattern(prefixes: dict) -> str:
+    """
+    Expresión que reconoce cualquiera de los prefijos, factorizada como un trie
+    ('baños:' y 'baños completos:' -> 'baños(?:\\ completos:(?P<p1>)|:(?P<p0>))'). Cada
+    prefijo termina en un grupo vacío con nombre, así que match.lastgroup dice cuál coincidió.
+    """
+    trie = {}
+    for prefix, group in prefixes.items():
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = group
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char is not None]
+        if None in node:
+            branches.append(f"(?P<{node[None]}>)")
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Búsqueda de todas las alternativas de todos los campos en una sola pasada.
+
+    El motor de re de Python no optimiza una alternancia de muchas expresiones (probarlas
+    en cada posición es más lento que recorrer el texto una vez por expresión), así que
+    se combina sólo el prefijo literal de cada alternativa en un trie con grupos con
+    nombre, se recorre el texto en minúsculas una vez con él y, en cada coincidencia, se
+    confirma la expresión completa anclada en esa posición. Las alternativas sin prefijo
+    literal se recorren aparte, una por una.
+
+    El trie va dentro de una búsqueda hacia adelante, así que no consume texto: un prefijo
+    contenido en otro ('terreno:' dentro de 'superficie terreno:') también se encuentra.
+    El resultado es el mismo que con finditer por expresión (_per_pattern_hits).
+    """
+
+    MIN_PREFIX = 3
+
+    def __init__(self, fields: dict):
+        by_prefix = {}
+        self.residual = []  # (campo, rango, patrón) sin prefijo literal utilizable
+        for spec in fields.values():
+            for rank, pattern in enumerate(spec.patterns):
+                prefix = _literal_prefix(pattern.pattern).lower()
+                if len(prefix) >= self.MIN_PREFIX:
+                    by_prefix.setdefault(prefix, []).append((spec.name, rank, pattern))
+                else:
+                    self.residual.append((spec.name, rank, pattern))
+        groups = {prefix: f"p{i}" for i, prefix in enumerate(by_prefix)}
+        # El trie reporta el prefijo más largo en cada posición; los más cortos que también
+        # empiezan ahí ('precio' dentro de 'precio de venta:') se agregan a sus candidatos.
+        self.candidates = {
+            group: [entry for other, entries in by_prefix.items() if prefix.startswith(other) for entry in entries]
+            for prefix, group in groups.items()
+        }
+        trie = f"(?={_trie_pattern(groups)})" if groups else None
+        self.regex = re.compile(trie) if trie else None
+        self.regex_ignorecase = re.compile(trie, re.IGNORECASE) if trie else None
+
+    def scan(self, text: str, wanted):
+        """
+        Genera (campo, rango, match) para los campos pedidos: primero los de las
+        alternativas sin prefijo literal y luego, en orden de aparición, los demás.
+        """
+        wanted = set(wanted)
+        for name, rank, pattern in self.residual:
+            if name in wanted:
+                for match in pattern.finditer(text):
+                    yield name, rank, match
+        if self.regex is None:
+            return
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            hits = self.regex.finditer(lowered)
+        else:  # Algunos caracteres cambian de longitud al pasar a minúsculas; las posiciones no servirían
+            hits = self.regex_ignorecase.finditer(text)
+        ends = {}  # Como finditer, una expresión no vuelve a coincidir dentro de su coincidencia anterior
+        for hit in hits:
+            for name, rank, pattern in self.candidates[hit.lastgroup]:
+                if name in wanted and hit.start() >= ends.get((name, rank), 0):
+                    match = pattern.match(text, hit.start())
+                    if match:
+                        ends[(name, rank)] = max(match.end(), match.start() + 1)
+                        yield name, rank, match
+
+
+# --- Conversores ---
+
+def parse_number(raw: str):
+    """
+    Convierte un número escrito con separadores de miles y/o decimales.
+
+    Con ',' y '.' a la vez, el último separador es el decimal. Con un solo tipo de
+    separador, se toma como de miles si aparece varias veces o va seguido de
+    exactamente tres dígitos ('1,200' -> 1200; '2,5' -> 2.5).
+
+    Returns:
+        int | float | None: Entero si no tiene parte decimal; None si no hay dígitos.
+    """
+    digits = _NUMBER_CHARS.sub('', str(raw)).strip('.,')
+    if not any(ch.isdigit() for ch in digits):
+        return None
+    if ',' in digits and '.' in digits:
+        decimal = ',' if digits.rfind(',') > digits.rfind('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        digits = digits.replace(thousands, '').replace(decimal, '.')
+    elif ',' in digits or '.' in digits:
+        separator = ',' if ',' in digits else '.'
+        whole, _, fraction = digits.rpartition(separator)
+        if digits.count(separator) > 1 or len(fraction) == 3:
+            digits = digits.replace(separator, '')
+        else:
+            digits = f"{whole.replace(separator, '')}.{fraction}"
+    value = float(digits)
+    return int(value) if value.is_integer() else value
+
+
+def parse_currency(raw: str) -> tuple:
+    """
+    Convierte un importe ('$1,250,000', '95 000 USD').
+
+    Returns:
+        tuple: (valor float o None, código de moneda; 'MXN' si no se indica).
+    """
+    match = _CURRENCY_CODES.search(str(raw))
+    currency = match.group(1).upper() if match else 'MXN'
+    if currency in ('DLS', 'US$'):
+        currency = 'USD'
+    value = parse_number(re.sub(r'\s+', '', _CURRENCY_CODES.sub('', str(raw))))
+    return (float(value) if value is not None else None), currency
+
+
+def _convert(field: FieldSpec, raw: str) -> tuple:
+    """Devuelve (valor, factor de confianza) según el tipo del campo."""
+    if field.type == 'currency':
+        value, currency = parse_currency(raw)
+        return value, (1.0 if currency == 'MXN' else FOREIGN_CURRENCY_CONFIDENCE)
+    if field.type == 'number':
+        return parse_number(raw), 1.0
+    return raw.strip() or None, 1.0
+
+
+# --- Plantillas ---
+
+def _compile_template(name: str, data: dict, digest: str = '') -> Template:
+    fields = {}
+    for field_name, spec in data.get('fields', {}).items():
+        patterns = []
+        for pattern in spec.get('patterns', []):
+            try:
+                patterns.append(re.compile(pattern, re.IGNORECASE))
+            except re.error as e:
+                logger.error(f"[PDF_EXTRACT] Patrón inválido en la plantilla '{name}', campo '{field_name}': {pattern} ({e})")
+        fields[field_name] = FieldSpec(field_name, tuple(patterns), spec.get('type', 'text'),
+                                       spec.get('required', False), spec.get('ocr', False))
+    try:
+        matcher = MultiPatternMatcher(fields)
+    except re.error as e:
+        logger.warning(f"[PDF_EXTRACT] La plantilla '{name}' se aplicará expresión por expresión: {e}")
+        matcher = None
+    fingerprints = tuple(
+        LayoutFingerprint(normalize_producer(spec.get('producer')),
+                          bucket_page_size(*spec['page_size']) if spec.get('page_size') else None,
+                          frozenset(normalize_text(anchor) for anchor in spec.get('anchors', [])))
+        for spec in data.get('fingerprints', [])
+    )
+    return Template(name, data.get('name', name), fields, matcher, data.get('page_hints', {}), digest, fingerprints)
+
+
+@lru_cache(maxsize=None)
+def load_templates(directory: str = TEMPLATES_DIR) -> dict:
+    """
+    Carga y compila todas las plantillas JSON del directorio (una sola vez por proceso).
+
+    Returns:
+        dict: nombre del archivo sin extensión -> Template.
+    """
+    templates = {}
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith('.json'):
+            continue
+        name = os.path.splitext(file_name)[0]
+        try:
+            with open(os.path.join(directory, file_name), 'rb') as f:
+                content = f.read()
+            templates[name] = _compile_template(name, json.loads(content.decode('utf-8')),
+                                                hashlib.sha256(content).hexdigest()[:16])
+        except (OSError, ValueError) as e:
+            logger.error(f"[PDF_EXTRACT] No se pudo cargar la plantilla {file_name}: {e}")
+    logger.info(f"[PDF_EXTRACT] {len(templates)} plantillas cargadas desde {directory}.")
+    return templates
+
+
+def get_template(name: str = DEFAULT_TEMPLATE, directory: str = TEMPLATES_DIR) -> Template:
+    """
+    Raises:
+        KeyError: Si la plantilla no existe.
+    """
+    return load_templates(directory)[name]
+
+
+def template_fields(directory: str = TEMPLATES_DIR) -> list:
+    """Campos que alguna plantilla sabe extraer, sin repetir."""
+    return list(dict.fromkeys(name for template in load_templates(directory).values() for name in template.fields))
+
+
+# --- Selección de plantilla por huella de diseño ---
+
+class TemplateIndex:
+    """Índice huella -> plantilla. Cada búsqueda son a lo más cuatro consultas a un diccionario."""
+
+    def __init__(self, templates: dict, default: str = DEFAULT_TEMPLATE):
+        self.templates = templates
+        self.default = default
+        self.vocabulary = frozenset(anchor for template in templates.values()
+                                    for fingerprint in template.fingerprints for anchor in fingerprint.anchors)
+        self._by_key = {}
+        for template in templates.values():
+            for fingerprint in template.fingerprints:
+                owner = self._by_key.setdefault(fingerprint.key, template.name)
+                if owner != template.name:
+                    logger.warning(f"[PDF_EXTRACT] La huella {fingerprint.key} está en '{owner}' y en "
+                                   f"'{template.name}'; se usa '{owner}'.")
+
+    def fingerprint(self, producer, page_size, first_page_text: str) -> LayoutFingerprint:
+        """Huella de un documento a partir de los datos de su primera página."""
+        text = f" {normalize_text(first_page_text)} "
+        return LayoutFingerprint(normalize_producer(producer),
+                                 bucket_page_size(*page_size) if page_size else None,
+                                 frozenset(anchor for anchor in self.vocabulary if f" {anchor} " in text))
+
+    def lookup(self, fingerprint: LayoutFingerprint) -> Template | None:
+        for key in fingerprint.lookup_keys():
+            name = self._by_key.get(key)
+            if name is not None:
+                return self.templates[name]
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_template_index(directory: str = TEMPLATES_DIR) -> TemplateIndex:
+    return TemplateIndex(load_templates(directory))
+
+
+class UnknownLayouts:
+    """
+    Huellas de diseño sin plantilla, para escribir las plantillas que faltan.
+
+    Cada huella nueva se anota una vez por proceso en el log; el conteo y hasta
+    MAX_EXAMPLES rutas de ejemplo se acumulan en un JSON que se fusiona con el del disco
+    al guardar (varios procesos pueden registrar huellas a la vez).
+    """
+
+    MAX_EXAMPLES = 3
+
+    def __init__(self, path: str = UNKNOWN_LAYOUTS_PATH, save_interval: float = 30.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._pending = {}  # clave -> entrada con el conteo desde el último guardado
+        self._logged = set()
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: LayoutFingerprint, pdf_path: str):
+        key = fingerprint.key
+        with self._lock:
+            entry = self._pending.setdefault(key, {
+                'producer': fingerprint.producer,
+                'page_size': list(fingerprint.page_size) if fingerprint.page_size else None,
+                'anchors': sorted(fingerprint.anchors), 'count': 0, 'examples': [],
+            })
+            entry['count'] += 1
+            if pdf_path not in entry['examples'] and len(entry['examples']) < self.MAX_EXAMPLES:
+                entry['examples'].append(pdf_path)
+            first_time = key not in self._logged
+            self._logged.add(key)
+        if first_time:
+            logger.warning(f"[PDF_EXTRACT] Diseño de PDF sin plantilla ({key}) en {pdf_path}; "
+                           f"se usa '{DEFAULT_TEMPLATE}'. Huellas pendientes en {self.path}")
+
+    def load(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[PDF_EXTRACT] Se ignora el registro de diseños desconocidos {self.path}: {e}")
+            return {}
+
+    def save(self, force: bool = False):
+        """Fusiona los conteos pendientes con el archivo, como mucho cada save_interval segundos."""
+        with self._lock:
+            if not self.path or not self._pending or (not force and time.monotonic() - self._last_save < self.save_interval):
+                return
+            pending, self._pending = self._pending, {}
+            self._last_save = time.monotonic()
+        layouts = self.load()
+        for key, entry in pending.items():
+            stored = layouts.setdefault(key, {**entry, 'count': 0, 'examples': []})
+            stored['count'] += entry['count']
+            stored['examples'] = list(dict.fromkeys(stored['examples'] + entry['examples']))[:self.MAX_EXAMPLES]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(layouts, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[PDF_EXTRACT] No se pudieron guardar los diseños desconocidos en {self.path}: {e}")
+
+
+_unknown_layouts = None
+
+
+def get_unknown_layouts() -> UnknownLayouts:
+    """Registro de diseños desconocidos compartido por el proceso; se guarda también al salir."""
+    global _unknown_layouts
+    if _unknown_layouts is None:
+        _unknown_layouts = UnknownLayouts()
+        atexit.register(_unknown_layouts.save, force=True)
+    return _unknown_layouts
+
+
+def select_template(producer, page_size, first_page_text: str, pdf_path: str = '',
+                    index: TemplateIndex = None, unknown: UnknownLayouts = None) -> Template:
+    """Plantilla para el diseño descrito; la estándar si la huella no está en el índice."""
+    index = index or get_template_index()
+    fingerprint = index.fingerprint(producer, page_size, first_page_text)
+    template = index.lookup(fingerprint)
+    if template is None:
+        (unknown or get_unknown_layouts()).record(fingerprint, pdf_path)
+        template = index.templates[index.default]
+    return template
+
+
+# --- Pistas de páginas ---
+
+class PageHints:
+    """
+    Páginas en las que suele aparecer cada campo, por plantilla.
+
+    Parte de las pistas fijas de la plantilla ("page_hints" en el JSON) y aprende de
+    cada extracción en qué página se encontró cada campo. Se guarda como JSON, como
+    mucho cada save_interval segundos, para que la siguiente ejecución empiece por la
+    página correcta. Al guardar, los conteos nuevos de este proceso se suman a los del
+    archivo (varios procesos del pool aprenden a la vez).
+    """
+
+    STATIC_HINT_WEIGHT = 0.5  # Una sola observación real pesa más que la pista fija
+
+    def __init__(self, path: str = PAGE_HINTS_PATH, save_interval: float = 30.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.counts = self.load()  # plantilla -> campo -> {página: veces encontrado}
+        self._pending = {}  # Conteos desde el último guardado, con la misma forma
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _merge(target: dict, delta: dict):
+        for template, fields in delta.items():
+            for name, pages in fields.items():
+                stored = target.setdefault(template, {}).setdefault(name, {})
+                for page, count in pages.items():
+                    stored[page] = stored.get(page, 0) + count
+
+    def load(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return {template: {name: {int(page): count for page, count in pages.items()}
+                                   for name, pages in fields.items()}
+                        for template, fields in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"[PDF_EXTRACT] Se ignoran las pistas de páginas de {self.path}: {e}")
+            return {}
+
+    def page_order(self, template: Template, columns, page_count: int) -> list:
+        """Todas las páginas, primero las más probables para las columnas pedidas."""
+        scores = [0] * page_count
+        learned = self.counts.get(template.name, {})
+        for name in columns:
+            for page in template.page_hints.get(name, []):
+                if -page_count <= page < page_count:
+                    scores[page % page_count] += self.STATIC_HINT_WEIGHT
+            for page, count in learned.get(name, {}).items():
+                if page < page_count:
+                    scores[page] += count
+        return sorted(range(page_count), key=lambda page: (-scores[page], page))
+
+    def record(self, template_name: str, field_name: str, page: int):
+        with self._lock:
+            delta = {template_name: {field_name: {page: 1}}}
+            self._merge(self.counts, delta)
+            self._merge(self._pending, delta)
+
+    def save(self, force: bool = False):
+        """Suma los conteos nuevos a los del archivo, como mucho cada save_interval segundos."""
+        with self._lock:
+            if not self.path or not self._pending or (not force and time.monotonic() - self._last_save < self.save_interval):
+                return
+            pending, self._pending = self._pending, {}
+            self._last_save = time.monotonic()
+        counts = self.load()
+        self._merge(counts, pending)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(counts, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[PDF_EXTRACT] No se pudieron guardar las pistas de páginas en {self.path}: {e}")
+            with self._lock:
+                self._merge(self._pending, pending)  # Se reintenta en el siguiente guardado
+            return
+        with self._lock:
+            self._merge(counts, self._pending)  # Lo aprendido mientras se escribía
+            self.counts = counts
+
+
+_page_hints = None
+
+
+def get_page_hints() -> PageHints:
+    """Pistas de páginas compartidas por el proceso; se guardan también al salir."""
+    global _page_hints
+    if _page_hints is None:
+        _page_hints = PageHints()
+        atexit.register(_page_hints.save, force=True)
+    return _page_hints
+
+
+# --- Extracción ---
+
+def _text_flags() -> int:
+    """Banderas de get_text: sin TEXT_PRESERVE_IMAGES, así que las imágenes no se decodifican."""
+    return fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+
+def _open_document(pdf_path: str):
+    if fitz is None:
+        raise PdfExtractionError("PyMuPDF (fitz) no está instalado; no se puede leer el texto del PDF.")
+    try:
+        return fitz.open(pdf_path)
+    except Exception as e:
+        raise PdfExtractionError(f"No se pudo abrir el PDF {pdf_path}: {e}") from e
+
+
+def extract_pdf_text(pdf_path: str, cache=None) -> str:
+    """
+    Texto de todas las páginas del PDF, separadas por salto de línea.
+
+    Con una caché (ExtractionCache) el PDF sólo se abre si falta alguna página, y las
+    páginas leídas quedan guardadas para la siguiente vez.
+
+    Raises:
+        PdfExtractionError: Si PyMuPDF no está instalado o el archivo no se puede leer.
+    """
+    sha256 = None
+    pages = {}
+    if cache is not None:
+        try:
+            sha256 = cache.content_hash(pdf_path)
+        except OSError as e:
+            raise PdfExtractionError(f"No se pudo leer el PDF {pdf_path}: {e}") from e
+        page_count = cache.page_count(sha256)
+        if page_count is not None:
+            pages = cache.page_texts(sha256)
+            if all(number in pages for number in range(page_count)):
+                return '\n'.join(pages[number] for number in range(page_count))
+
+    with _open_document(pdf_path) as document:
+        try:
+            flags = _text_flags()
+            page_count = len(document)
+            new_pages = {number: document[number].get_text('text', flags=flags)
+                         for number in range(page_count) if number not in pages}
+        except Exception as e:
+            raise PdfExtractionError(f"No se pudo leer el PDF {pdf_path}: {e}") from e
+    if cache is not None and new_pages:
+        cache.put_pages(sha256, page_count, new_pages)
+    pages.update(new_pages)
+    return '\n'.join(pages[number] for number in range(page_count))
+
+
+def _per_pattern_hits(text: str, template: Template, wanted):
+    """Recorre el texto una vez por alternativa de cada campo (referencia para el benchmark)."""
+    for name in wanted:
+        for rank, pattern in enumerate(template.fields[name].patterns):
+            for match in pattern.finditer(text):
+                yield name, rank, match
+
+
+def extract_fields(text: str, template: Template, columns=None) -> dict:
+    """
+    Aplica las expresiones de la plantilla al texto.
+
+    El texto se recorre completo (en una sola pasada con el MultiPatternMatcher): una
+    alternativa preferida o un valor contradictorio pueden aparecer después del primer
+    valor encontrado. El corte temprano está entre páginas, en extract_from_pdf.
+
+    Args:
+        text (str): Texto del documento.
+        template (Template): Plantilla compilada.
+        columns (iterable, optional): Campos a extraer. Por defecto, todos los de la plantilla.
+
+    Returns:
+        dict: campo -> ExtractedField, sólo para los campos encontrados.
+    """
+    wanted = list(template.fields) if columns is None else [c for c in dict.fromkeys(columns) if c in template.fields]
+    if not wanted:
+        return {}
+    hits = (template.matcher.scan(text, wanted) if template.matcher is not None
+            else _per_pattern_hits(text, template, wanted))
+
+    best = {}  # campo -> (rango, ExtractedField)
+    seen_values = {}
+    for name, rank, match in hits:
+        raw = match.group(1) if match.re.groups else match.group(0)
+        value, factor = _convert(template.fields[name], raw)
+        if value is None:
+            continue
+        seen_values.setdefault(name, set()).add(value)
+        if name not in best or rank < best[name][0]:
+            confidence = max(0.0, 1.0 - ALTERNATIVE_PENALTY * rank) * factor
+            best[name] = (rank, ExtractedField(value, confidence, raw, match.re.pattern))
+
+    results = {}
+    for name, (_, found) in best.items():
+        confidence = found.confidence * (CONFLICT_FACTOR if len(seen_values[name]) > 1 else 1.0)
+        results[name] = ExtractedField(found.value, round(confidence, 3), found.raw, found.pattern)
+    return results
+
+
+def _ocr_page_text(page) -> str:
+    """Texto de la página con OCR (Tesseract vía PyMuPDF); decodifica las imágenes."""
+    textpage = page.get_textpage_ocr(full=False)
+    return page.get_text('text', textpage=textpage)
+
+
+def _document_layout(document) -> tuple:
+    """(productor, (ancho, alto) de la primera página, texto de la primera página)."""
+    metadata = getattr(document, 'metadata', None) or {}
+    if not len(document):
+        return metadata.get('producer'), None, ''
+    page = document[0]
+    flags = _text_flags() if fitz is not None else 0
+    return metadata.get('producer'), (page.rect.width, page.rect.height), page.get_text('text', flags=flags)
+
+
+def extract_from_pdf(pdf_path: str, columns=None, template: Template = None, hints: 'PageHints' = None,
+                     cache=None) -> dict:
+    """
+    Extrae las columnas pedidas leyendo las páginas del PDF una por una, empezando por
+    las que, según las pistas de la plantilla, suelen contenerlas, y se detiene en cuanto
+    todas tienen valor. Sólo si quedan columnas marcadas con 'ocr' en la plantilla se
+    decodifican las imágenes (OCR) de las páginas.
+
+    Sin plantilla, se elige por la huella de diseño de la primera página (select_template).
+
+    Con una caché (ExtractionCache) se consulta antes de abrir el PDF: la huella y los
+    campos ya buscados en este contenido se devuelven sin leer nada, y el texto de las
+    páginas ya leídas se reutiliza. El PDF sólo se abre si falta alguna página.
+
+    Args:
+        pdf_path (str): Ruta del PDF.
+        columns (iterable, optional): Columnas a extraer. Por defecto, todas las de la plantilla.
+        template (Template, optional): Plantilla. Por defecto, la que corresponde al diseño del PDF.
+        hints (PageHints, optional): Pistas de páginas. Por defecto, las compartidas del proceso.
+        cache (ExtractionCache, optional): Caché de texto y campos. Sin caché, siempre se lee el PDF.
+
+    Returns:
+        dict: campo -> ExtractedField.
+
+    Raises:
+        PdfExtractionError: Si no se puede leer el PDF.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+        if template is not None:
+            columns = [c for c in columns if c in template.fields]
+        if not columns:
+            return {}
+
+    with contextlib.ExitStack() as stack:
+        document = None
+
+        def open_document():
+            nonlocal document
+            if document is None:
+                document = stack.enter_context(_open_document(pdf_path))
+            return document
+
+        sha256 = None
+        page_count = None
+        new_pages = {}
+        if cache is not None:
+            try:
+                sha256 = cache.content_hash(pdf_path)
+            except OSError as e:
+                raise PdfExtractionError(f"No se pudo leer el PDF {pdf_path}: {e}") from e
+            page_count = cache.page_count(sha256)
+
+        if template is None:
+            layout = cache.get_layout(sha256) if cache is not None else None
+            if layout is None:
+                try:
+                    layout = _document_layout(open_document())
+                except PdfExtractionError:
+                    raise
+                except Exception as e:
+                    raise PdfExtractionError(f"No se pudo leer el PDF {pdf_path}: {e}") from e
+                page_count = len(document)
+                if page_count:
+                    new_pages[0] = layout[2]
+                if cache is not None:
+                    cache.put_layout(sha256, layout[0], layout[1])
+            template = select_template(*layout, pdf_path=pdf_path)
+
+        requested = list(template.fields) if columns is None else [c for c in columns if c in template.fields]
+        results = {}
+        pending = requested
+        cached_pages = None
+        if cache is not None and requested:
+            results, known_missing = cache.get_fields(sha256, template.cache_key, requested)
+            pending = [c for c in requested if c not in results and c not in known_missing]
+            if pending:
+                cached_pages = cache.page_texts(sha256)
+        if not pending:
+            if cache is not None and new_pages:
+                cache.put_pages(sha256, page_count, new_pages)
+            return results
+
+        hints = hints or get_page_hints()
+        if page_count is None:
+            page_count = len(open_document())
+        order = hints.page_order(template, pending, page_count)
+        ocr_failed = False
+        searched = list(pending)
+        try:
+            flags = _text_flags() if fitz is not None else 0
+            for number in order:
+                text = new_pages.get(number)
+                if text is None and cached_pages:
+                    text = cached_pages.get(number)
+                if text is None:
+                    text = new_pages[number] = open_document()[number].get_text('text', flags=flags)
+                found = extract_fields(text, template, pending)
+                for name, value in found.items():
+                    results[name] = value
+                    hints.record(template.name, name, number)
+                pending = [c for c in pending if c not in found]
+                if not pending:
+                    break
+
+            ocr_pending = [c for c in pending if template.fields[c].ocr]
+            for number in (order if ocr_pending else []):
+                try:
+                    found = extract_fields(_ocr_page_text(open_document()[number]), template, ocr_pending)
+                except PdfExtractionError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[PDF_EXTRACT] OCR no disponible para {pdf_path}: {e}")
+                    ocr_failed = True
+                    break
+                results.update(found)
+                ocr_pending = [c for c in ocr_pending if c not in found]
+                if not ocr_pending:
+                    break
+        except PdfExtractionError:
+            raise
+        except Exception as e:
+            raise PdfExtractionError(f"No se pudo leer el PDF {pdf_path}: {e}") from e
+
+    if cache is not None:
+        if new_pages:
+            cache.put_pages(sha256, page_count, new_pages)
+        # Un campo con OCR que falló por falta de Tesseract no se marca como ausente
+        missing = [c for c in searched if c not in results and not (ocr_failed and template.fields[c].ocr)]
+        cache.put_fields(sha256, template.cache_key, {c: results[c] for c in searched if c in results}, missing)
+    hints.save()
+    if _unknown_layouts is not None:
+        _unknown_layouts.save()
+    logger.debug(f"[PDF_EXTRACT] {os.path.basename(pdf_path)}: {len(new_pages)} páginas leídas del PDF "
+                 f"de {page_count}, {len(results)} campos encontrados.")
+    return results
@@ -0,0 +1,204 @@
+# src/data_processing/pdf_extraction_cache.py
+
+"""
+Caché persistente (SQLite) del texto y los campos extraídos de las fichas técnicas.
+
+Autofill, el corrector de huecos y la comparación PDF vs. base de datos vuelven a leer
+los mismos folletos. Esta caché guarda, por hash del contenido del PDF:
+
+    pages    Texto de cada página leída (por versión del extractor).
+    layouts  Productor y tamaño de la primera página, para calcular la huella de diseño
+             (con el texto de la página 0) sin abrir el PDF.
+    fields   Campos buscados con la plantilla: valor, confianza, texto y patrón, o la
+             constancia de que no se encontraron (para no volver a buscarlos).
+
+Las claves se invalidan solas:
+    - El hash del PDF se recalcula cuando cambian el tamaño o la fecha de modificación
+      del archivo (tabla files); un folleto nuevo tiene otro hash.
+    - Los campos se guardan con la versión del extractor y el hash del JSON de la
+      plantilla; editar la plantilla o cambiar EXTRACTOR_VERSION deja las filas viejas
+      sin uso.
+
+Los PDFs del almacén (blobs/ab/cd/<sha256>.pdf) ya se llaman por su hash, así que no
+se vuelven a leer para calcularlo.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from src.data_processing.pdf_extraction import ExtractedField, EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+EXTRACTION_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'pdf_extraction_cache.sqlite3')
+
+_SHA256_NAME = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ExtractionCache:
+    """Caché de extracción en SQLite. Segura entre hilos (una conexión con candado)."""
+
+    def __init__(self, path: str = EXTRACTION_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    sha256 TEXT
+                );
+                CREATE TABLE IF NOT EXISTS documents (
+                    sha256 TEXT,
+                    extractor_version INTEGER,
+                    page_count INTEGER,
+                    PRIMARY KEY (sha256, extractor_version)
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    sha256 TEXT,
+                    extractor_version INTEGER,
+                    page INTEGER,
+                    text TEXT,
+                    PRIMARY KEY (sha256, extractor_version, page)
+                );
+                CREATE TABLE IF NOT EXISTS layouts (
+                    sha256 TEXT PRIMARY KEY,
+                    producer TEXT,
+                    page_width REAL,
+                    page_height REAL
+                );
+                CREATE TABLE IF NOT EXISTS fields (
+                    sha256 TEXT,
+                    template_key TEXT,
+                    field TEXT,
+                    found INTEGER,
+                    value TEXT,
+                    confidence REAL,
+                    raw TEXT,
+                    pattern TEXT,
+                    PRIMARY KEY (sha256, template_key, field)
+                );
+            """)
+
+    # --- Hash del contenido ---
+
+    def content_hash(self, pdf_path: str) -> str:
+        """sha256 del PDF; sólo se lee el archivo si cambió desde la última vez."""
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        if _SHA256_NAME.match(stem):
+            return stem  # Blob del almacén direccionado por contenido
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                               (path, stat.st_size, stat.st_mtime_ns, sha256))
+        return sha256
+
+    # --- Texto por página ---
+
+    def page_count(self, sha256: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute("SELECT page_count FROM documents WHERE sha256 = ? AND extractor_version = ?",
+                                     (sha256, EXTRACTOR_VERSION)).fetchone()
+        return row[0] if row else None
+
+    def page_texts(self, sha256: str) -> dict:
+        """{página: texto} de las páginas ya leídas de este PDF."""
+        with self._lock:
+            rows = self._conn.execute("SELECT page, text FROM pages WHERE sha256 = ? AND extractor_version = ?",
+                                      (sha256, EXTRACTOR_VERSION)).fetchall()
+        return dict(rows)
+
+    def put_pages(self, sha256: str, page_count: int, texts: dict):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO documents (sha256, extractor_version, page_count) VALUES (?, ?, ?)",
+                               (sha256, EXTRACTOR_VERSION, page_count))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (sha256, extractor_version, page, text) VALUES (?, ?, ?, ?)",
+                [(sha256, EXTRACTOR_VERSION, page, text) for page, text in texts.items()])
+
+    # --- Diseño ---
+
+    def get_layout(self, sha256: str) -> tuple | None:
+        """(productor, (ancho, alto), texto de la página 0), o None si falta alguno de los datos."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT l.producer, l.page_width, l.page_height, p.text FROM layouts l "
+                "JOIN pages p ON p.sha256 = l.sha256 AND p.extractor_version = ? AND p.page = 0 "
+                "WHERE l.sha256 = ?", (EXTRACTOR_VERSION, sha256)).fetchone()
+        if row is None:
+            return None
+        producer, width, height, text = row
+        return producer, (width, height) if width is not None else None, text
+
+    def put_layout(self, sha256: str, producer, page_size):
+        width, height = page_size if page_size else (None, None)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO layouts (sha256, producer, page_width, page_height) "
+                               "VALUES (?, ?, ?, ?)", (sha256, producer, width, height))
+
+    # --- Campos ---
+
+    def get_fields(self, sha256: str, template_key: str, columns) -> tuple:
+        """
+        Returns:
+            tuple: ({campo: ExtractedField} encontrados, set de campos ya buscados sin éxito).
+        """
+        columns = list(columns)
+        if not columns:
+            return {}, set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT field, found, value, confidence, raw, pattern FROM fields "
+                f"WHERE sha256 = ? AND template_key = ? AND field IN ({', '.join('?' * len(columns))})",
+                (sha256, template_key, *columns)).fetchall()
+        found, missing = {}, set()
+        for name, was_found, value, confidence, raw, pattern in rows:
+            if was_found:
+                found[name] = ExtractedField(json.loads(value), confidence, raw, pattern)
+            else:
+                missing.add(name)
+        return found, missing
+
+    def put_fields(self, sha256: str, template_key: str, found: dict, missing=()):
+        rows = [(sha256, template_key, name, 1, json.dumps(item.value), item.confidence, item.raw, item.pattern)
+                for name, item in found.items()]
+        rows += [(sha256, template_key, name, 0, None, None, None, None) for name in missing]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fields (sha256, template_key, field, found, value, confidence, raw, pattern) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self._conn.close()
+
+
+_shared_cache = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Caché compartida del proceso (se abre una nueva en cada proceso hijo)."""
+    global _shared_cache
+    if _shared_cache is None or _shared_cache[0] != os.getpid():
+        _shared_cache = (os.getpid(), ExtractionCache())
+    return _shared_cache[1]
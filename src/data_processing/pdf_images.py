@@ -0,0 +1,240 @@
+# src/data_processing/pdf_images.py
+
+"""
+Fotos de las fichas técnicas: extracción, miniaturas y calificación visual.
+
+Etapa fuera de línea (src/scripts/extract_brochure_images.py); el dashboard sólo lee las
+miniaturas ya generadas y las calificaciones guardadas en property_visual_analysis.
+
+    1. Se recorren las imágenes de cada página (page.get_images) y se descartan, sólo con
+       las dimensiones declaradas en el PDF y sin decodificarlas, las pequeñas (logos,
+       íconos) y las muy alargadas (bandas y separadores).
+    2. Cada foto se guarda como miniatura WebP de a lo más THUMBNAIL_MAX_SIDE píxeles por
+       lado y THUMBNAIL_MAX_BYTES en thumbnails/ab/cd/<sha256>.webp, nombrada por el hash
+       de los bytes de la imagen original. Una foto repetida en varios folletos se
+       procesa una vez; si la miniatura ya existe, la imagen original no se decodifica.
+    3. Las calificaciones se calculan con NumPy sobre la miniatura en escala de grises
+       (un tamaño uniforme hace comparables las fotos):
+         resolución  raíz de píxeles originales / TARGET_PIXELS, hasta 1.
+         nitidez     varianza del laplaciano / SHARPNESS_REFERENCE, hasta 1.
+         brillo      1 en IDEAL_BRIGHTNESS, baja linealmente hacia negro o blanco.
+       auto_score combina las tres con SCORE_WEIGHTS en la escala de 1 a 10 del plan.
+    4. Sobre la misma miniatura se calcula un hash perceptual (dHash de 64 bits) para
+       encontrar fotos casi idénticas en otros folletos (photo_index.py).
+
+Usa PyMuPDF (fitz) y Pillow, dependencias opcionales.
+"""
+
+import io
+import os
+import hashlib
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # pragma: no cover - depende del entorno
+    fitz = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depende del entorno
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+THUMBNAILS_DIR = os.path.join(BASE_DIR, 'data', 'thumbnails')
+
+MIN_IMAGE_SIDE = 200  # Píxeles; por debajo se considera logo o ícono
+MAX_ASPECT_RATIO = 4.0
+THUMBNAIL_MAX_SIDE = 480
+THUMBNAIL_MAX_BYTES = 64 * 1024
+THUMBNAIL_QUALITIES = (80, 65, 50, 35)  # Se baja la calidad hasta caber en THUMBNAIL_MAX_BYTES
+
+TARGET_PIXELS = 1920 * 1080
+SHARPNESS_REFERENCE = 400.0  # Varianza del laplaciano (escala 0-255) de una foto nítida en miniatura
+IDEAL_BRIGHTNESS = 0.55
+SCORE_WEIGHTS = {'resolution': 0.3, 'sharpness': 0.45, 'brightness': 0.25}
+HASH_SIZE = 8  # dHash de HASH_SIZE x HASH_SIZE bits
+
+
+class ImageExtractionError(Exception):
+    """No se pudieron leer las imágenes del PDF."""
+
+
+@dataclass(frozen=True)
+class BrochureImage:
+    """Foto de un folleto con su miniatura y calificaciones (0 a 1; auto_score de 1 a 10)."""
+    image_sha256: str
+    page: int
+    width: int
+    height: int
+    resolution_score: float
+    sharpness_score: float
+    brightness_score: float
+    auto_score: float
+    phash: str = None  # dHash en hexadecimal
+
+
+def is_photo(width: int, height: int) -> bool:
+    """Filtro por dimensiones declaradas: descarta logos, íconos y bandas decorativas."""
+    if min(width, height) < MIN_IMAGE_SIDE:
+        return False
+    return max(width, height) / min(width, height) <= MAX_ASPECT_RATIO
+
+
+def thumbnail_path(image_sha256: str, root: str = THUMBNAILS_DIR) -> str:
+    return os.path.join(root, image_sha256[:2], image_sha256[2:4], f"{image_sha256}.webp")
+
+
+# --- Calificaciones ---
+
+def resolution_score(width: int, height: int) -> float:
+    return float(min(1.0, np.sqrt(width * height / TARGET_PIXELS)))
+
+
+def sharpness_score(gray: np.ndarray) -> float:
+    """Varianza del laplaciano de 4 vecinos: las fotos borrosas tienen pocos bordes."""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    gray = gray.astype(np.float32, copy=False)
+    laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+                 - 4.0 * gray[1:-1, 1:-1])
+    return float(min(1.0, laplacian.var() / SHARPNESS_REFERENCE))
+
+
+def brightness_score(gray: np.ndarray) -> float:
+    mean = float(gray.mean()) / 255.0
+    distance = mean - IDEAL_BRIGHTNESS
+    span = IDEAL_BRIGHTNESS if distance < 0 else 1.0 - IDEAL_BRIGHTNESS
+    return max(0.0, 1.0 - abs(distance) / span)
+
+
+def auto_score(resolution: float, sharpness: float, brightness: float) -> float:
+    weighted = (SCORE_WEIGHTS['resolution'] * resolution + SCORE_WEIGHTS['sharpness'] * sharpness
+                + SCORE_WEIGHTS['brightness'] * brightness)
+    return round(1.0 + 9.0 * weighted, 1)
+
+
+def _area_resize(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Reducción por promedio de bloques (sin Pillow)."""
+    height, width = gray.shape
+    row_edges = np.arange(rows) * height // rows
+    col_edges = np.arange(cols) * width // cols
+    sums = np.add.reduceat(np.add.reduceat(gray.astype(np.float64), row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, height)), np.diff(np.append(col_edges, width)))
+    return sums / counts
+
+
+def perceptual_hash(gray: np.ndarray) -> str | None:
+    """
+    dHash: la imagen reducida a HASH_SIZE x (HASH_SIZE + 1) y un bit por cada par de
+    píxeles vecinos (1 si el derecho es más claro). Resiste recompresión, cambios de
+    tamaño y ajustes leves de brillo; fotos casi idénticas difieren en pocos bits.
+    """
+    if gray.shape[0] < HASH_SIZE or gray.shape[1] < HASH_SIZE + 1:
+        return None
+    small = _area_resize(gray, HASH_SIZE, HASH_SIZE + 1)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+
+def score_image(image_sha256: str, page: int, width: int, height: int, gray: np.ndarray) -> BrochureImage:
+    resolution = resolution_score(width, height)
+    sharpness = sharpness_score(gray)
+    brightness = brightness_score(gray)
+    return BrochureImage(image_sha256, page, width, height, round(resolution, 3), round(sharpness, 3),
+                         round(brightness, 3), auto_score(resolution, sharpness, brightness), perceptual_hash(gray))
+
+
+# --- Miniaturas ---
+
+def write_thumbnail(data: bytes, path: str) -> np.ndarray:
+    """
+    Guarda la miniatura WebP de la imagen y devuelve la miniatura en escala de grises,
+    decodificada del WebP ya comprimido: las calificaciones y el hash se calculan sobre
+    los mismos píxeles que load_thumbnail_gray leerá del caché en la siguiente ejecución.
+
+    Raises:
+        ImageExtractionError: Si Pillow no está instalado o la imagen no se puede decodificar.
+    """
+    if Image is None:
+        raise ImageExtractionError("Pillow no está instalado; no se pueden generar miniaturas.")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft('RGB', (THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE))  # JPEG: decodifica ya reducido
+            thumbnail = image.convert('RGB')
+        thumbnail.thumbnail((THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE), Image.LANCZOS)
+        for quality in THUMBNAIL_QUALITIES:
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, 'WEBP', quality=quality, method=4)
+            if buffer.tell() <= THUMBNAIL_MAX_BYTES:
+                break
+        buffer.seek(0)
+        with Image.open(buffer) as encoded:
+            gray = np.asarray(encoded.convert('L'), dtype=np.float32)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageExtractionError(f"No se pudo decodificar la imagen: {e}") from e
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+    return gray
+
+
+def load_thumbnail_gray(path: str) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert('L'), dtype=np.float32)
+
+
+# --- Extracción ---
+
+def extract_images(pdf_path: str, thumbnails_dir: str = THUMBNAILS_DIR) -> list:
+    """
+    Fotos del folleto, con miniatura en el caché y calificaciones.
+
+    Returns:
+        list: BrochureImage en orden de aparición, sin repetir contenido.
+
+    Raises:
+        ImageExtractionError: Si faltan PyMuPDF o Pillow, o el PDF no se puede abrir.
+    """
+    if fitz is None or Image is None:
+        raise ImageExtractionError("Se necesitan PyMuPDF y Pillow para extraer las imágenes de los PDFs.")
+    try:
+        document = fitz.open(pdf_path)
+    except Exception as e:
+        raise ImageExtractionError(f"No se pudo abrir el PDF {pdf_path}: {e}") from e
+
+    images = []
+    seen_xrefs, seen_hashes = set(), set()
+    skipped = 0
+    with document:
+        for page_number in range(len(document)):
+            for info in document[page_number].get_images(full=True):
+                xref, width, height = info[0], info[2], info[3]
+                if xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
+                if not is_photo(width, height):
+                    skipped += 1
+                    continue
+                try:
+                    data = document.extract_image(xref)['image']
+                    image_sha256 = hashlib.sha256(data).hexdigest()
+                    if image_sha256 in seen_hashes:
+                        continue
+                    path = thumbnail_path(image_sha256, thumbnails_dir)
+                    gray = load_thumbnail_gray(path) if os.path.exists(path) else write_thumbnail(data, path)
+                except (ImageExtractionError, OSError, RuntimeError, KeyError, TypeError) as e:
+                    logger.warning(f"[PDF_IMAGES] Se omite la imagen {xref} de {pdf_path} (página {page_number}): {e}")
+                    continue
+                seen_hashes.add(image_sha256)
+                images.append(score_image(image_sha256, page_number, width, height, gray))
+    logger.debug(f"[PDF_IMAGES] {os.path.basename(pdf_path)}: {len(images)} fotos, {skipped} logos o íconos descartados.")
+    return images
@@ -0,0 +1,123 @@
+# src/data_processing/pdf_reconciliation.py
+
+"""
+Conciliación de los valores de las fichas técnicas (PDF) contra la base de datos.
+
+Los campos extraídos de todo el catálogo (formato largo: property_id, field_name,
+pdf_value, confidence) se unen con una sola lectura proyectada de la tabla properties y
+se comparan de forma vectorizada:
+
+    - Columnas numéricas: iguales dentro de una tolerancia relativa/absoluta por columna
+      (NUMERIC_TOLERANCES), p. ej. '$3,250,000' en el folleto vs. 3250000.00 en la base.
+    - Columnas de texto: iguales si coinciden tras normalize_text (minúsculas, sin acentos
+      ni puntuación).
+
+Sólo se reportan diferencias entre valores presentes en ambos lados; los campos vacíos en
+la base los llena el auto-llenado. La tabla resultante se ordena para revisión: primero
+las propiedades con la mayor diferencia de precio y, dentro de cada una, el precio y
+luego los demás campos por diferencia relativa.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.utils.schema import SCHEMA_BY_NAME, KIND_TEXT, blank_mask
+from src.utils.text_normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMN = 'precio'
+
+# Tolerancia (relativa, absoluta) por columna; el resto se compara con DEFAULT_TOLERANCE
+NUMERIC_TOLERANCES = {
+    'precio': (0.005, 1.0),
+    'm2_construccion': (0.02, 0.5),
+    'm2_terreno': (0.02, 0.5),
+}
+DEFAULT_TOLERANCE = (0.0, 1e-6)
+
+DISCREPANCY_COLUMNS = ['property_id', 'field_name', 'db_value', 'pdf_value', 'abs_diff', 'rel_diff',
+                       'confidence', 'price_gap']
+
+
+def extraction_frame(results: dict) -> pd.DataFrame:
+    """
+    Convierte los resultados de pdf_batch.run_extraction al formato largo
+    property_id, field_name, pdf_value, confidence.
+    """
+    rows = [(property_id, field_name, value, confidence)
+            for property_id, record in results.items()
+            for field_name, (value, confidence) in record.get('fields', {}).items()]
+    return pd.DataFrame(rows, columns=['property_id', 'field_name', 'pdf_value', 'confidence'])
+
+
+def _is_text(field_names: pd.Series) -> np.ndarray:
+    kinds = field_names.map(lambda name: SCHEMA_BY_NAME[name].kind if name in SCHEMA_BY_NAME else KIND_TEXT)
+    return (kinds == KIND_TEXT).to_numpy()
+
+
+def reconcile(extracted: pd.DataFrame, db_values: pd.DataFrame, min_confidence: float = 0.0) -> pd.DataFrame:
+    """
+    Compara los campos extraídos de los PDFs con los valores de la base de datos.
+
+    Args:
+        extracted (pd.DataFrame): Columnas property_id, field_name, pdf_value, confidence.
+        db_values (pd.DataFrame): Lectura proyectada de properties: 'id' y una columna por campo.
+        min_confidence (float): Se ignoran los valores extraídos con menor confianza.
+
+    Returns:
+        pd.DataFrame: Una fila por discrepancia (DISCREPANCY_COLUMNS), ordenada por la
+                      diferencia de precio de la propiedad; dentro de ella, el precio primero
+                      y los demás campos por diferencia relativa.
+    """
+    fields = [c for c in extracted['field_name'].unique() if c in db_values.columns and c != 'id']
+    if extracted.empty or not fields:
+        return pd.DataFrame(columns=DISCREPANCY_COLUMNS)
+
+    # Formato largo de la base de datos sin los campos vacíos
+    db = db_values.assign(id=db_values['id'].astype(str))
+    db_wide = db[['id'] + fields].astype({c: object for c in fields})
+    db_wide[fields] = db_wide[fields].where(pd.DataFrame({c: ~blank_mask(db, c) for c in fields}))
+    db_long = (db_wide.melt(id_vars='id', var_name='field_name', value_name='db_value')
+               .dropna(subset=['db_value'])
+               .rename(columns={'id': 'property_id'}))
+
+    pdf = extracted[(extracted['confidence'] >= min_confidence) & extracted['field_name'].isin(fields)]
+    pdf = pdf.assign(property_id=pdf['property_id'].astype(str)).dropna(subset=['pdf_value'])
+    joined = pdf.merge(db_long, on=['property_id', 'field_name'], how='inner').reset_index(drop=True)
+
+    is_text = _is_text(joined['field_name'])
+    db_number = pd.to_numeric(joined['db_value'].where(~is_text), errors='coerce').to_numpy(dtype='float64')
+    pdf_number = pd.to_numeric(joined['pdf_value'].where(~is_text), errors='coerce').to_numpy(dtype='float64')
+    rtol = joined['field_name'].map(lambda name: NUMERIC_TOLERANCES.get(name, DEFAULT_TOLERANCE)[0]).to_numpy()
+    atol = joined['field_name'].map(lambda name: NUMERIC_TOLERANCES.get(name, DEFAULT_TOLERANCE)[1]).to_numpy()
+
+    abs_diff = np.abs(pdf_number - db_number)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rel_diff = np.where(db_number != 0, abs_diff / np.abs(db_number), np.where(abs_diff > 0, np.inf, 0.0))
+    numeric_mismatch = ~np.isclose(pdf_number, db_number, rtol=rtol, atol=atol)
+
+    text_rows = np.flatnonzero(is_text)
+    text_mismatch = np.zeros(len(joined), dtype=bool)
+    if len(text_rows):
+        db_text = joined['db_value'].iloc[text_rows].map(normalize_text).to_numpy()
+        pdf_text = joined['pdf_value'].iloc[text_rows].map(normalize_text).to_numpy()
+        text_mismatch[text_rows] = db_text != pdf_text
+        rel_diff[text_rows] = np.where(text_mismatch[text_rows], 1.0, 0.0)
+
+    # Filas numéricas que no se pudieron convertir (NaN) cuentan como discrepancia
+    mismatch = np.where(is_text, text_mismatch, numeric_mismatch)
+    discrepancies = joined.assign(abs_diff=np.where(is_text, np.nan, abs_diff), rel_diff=rel_diff)[mismatch]
+
+    price_gap = (discrepancies.loc[discrepancies['field_name'] == PRICE_COLUMN]
+                 .set_index('property_id')['abs_diff'])
+    discrepancies = discrepancies.assign(
+        price_gap=discrepancies['property_id'].map(price_gap).fillna(0.0).astype('float64'))
+    ranked = (discrepancies.assign(_is_price=discrepancies['field_name'] == PRICE_COLUMN)
+              .sort_values(['price_gap', 'property_id', '_is_price', 'rel_diff'],
+                           ascending=[False, True, False, False], kind='stable'))
+    logger.info(f"[RECONCILE] {len(ranked)} discrepancias en {ranked['property_id'].nunique()} propiedades "
+                f"de {joined['property_id'].nunique()} comparadas ({len(joined)} campos).")
+    return ranked[DISCREPANCY_COLUMNS].reset_index(drop=True)
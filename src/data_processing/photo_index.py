@@ -0,0 +1,275 @@
+# src/data_processing/photo_index.py
+
+"""
+Índice de fotos casi idénticas entre folletos.
+
+Las oficinas reutilizan las mismas fotos en varias publicaciones; que dos propiedades
+compartan fotos es una señal fuerte de duplicado o de anuncio fraudulento. Cada foto
+tiene un hash perceptual de 64 bits (dHash, ver pdf_images.py) y dos fotos casi
+idénticas (recomprimidas, reescaladas, con brillo ajustado) difieren en pocos bits.
+
+Los hashes se guardan en un árbol BK con distancia de Hamming: cada nodo agrupa a sus
+hijos por la distancia a él y, por la desigualdad del triángulo, una búsqueda con radio
+r sólo visita los hijos a distancia d - r .. d + r. Con radios pequeños la búsqueda
+recorre una fracción mínima del árbol en lugar de comparar contra todas las fotos.
+
+    - add / add_frame insertan fotos nuevas a medida que llegan PDFs (incremental).
+    - replace_property descarta las fotos anteriores de una propiedad reprocesada; el
+      árbol conserva el hash, pero deja de devolverlo si ninguna foto vigente lo usa.
+    - shared_photos responde qué otras propiedades tienen fotos casi idénticas.
+    - cluster_shared_photos agrupa todo el catálogo (src/scripts/cluster_shared_photos.py).
+
+Se ignoran los hashes poco informativos (imágenes lisas o degradados, con casi todos los
+bits iguales) y las fotos que comparten más de MAX_PROPERTIES_PER_PHOTO propiedades
+(fachada de la oficina, fotos de catálogo), que unirían medio inventario en un cluster.
+"""
+
+import os
+import pickle
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PHOTO_INDEX_PATH = os.path.join(BASE_DIR, 'data', 'photo_index.pkl')
+
+DEFAULT_RADIUS = 6  # Bits distintos (de 64) para considerar dos fotos casi idénticas
+MIN_HASH_BITS = 8  # Hashes con menos de 8 unos o de 8 ceros son imágenes sin detalle
+MAX_PROPERTIES_PER_PHOTO = 25
+
+SHARED_COLUMNS = ['property_id', 'shared_photos', 'min_distance']
+CLUSTER_COLUMNS = ['cluster_id', 'property_id', 'shared_photos']
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_informative(value: int) -> bool:
+    return MIN_HASH_BITS <= value.bit_count() <= 64 - MIN_HASH_BITS
+
+
+class BKTree:
+    """Árbol BK de enteros con distancia de Hamming. Cada nodo es [valor, {distancia: nodo}]."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int) -> bool:
+        """Inserta el valor; False si ya estaba."""
+        if self._root is None:
+            self._root = [value, {}]
+            self._size = 1
+            return True
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                return False
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [value, {}]
+                self._size += 1
+                return True
+            node = child
+
+    def search(self, value: int, radius: int) -> list:
+        """Valores a distancia <= radius, como (valor, distancia)."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_value, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                found.append((node_value, distance))
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class PhotoIndex:
+    """Fotos de todas las propiedades indexadas por hash perceptual."""
+
+    def __init__(self):
+        self._tree = BKTree()
+        self._photos = {}  # hash -> {(property_id, image_sha256)}
+        self._by_property = {}  # property_id -> {(image_sha256, hash)}
+
+    def __len__(self) -> int:
+        return sum(len(photos) for photos in self._by_property.values())
+
+    @property
+    def property_count(self) -> int:
+        return len(self._by_property)
+
+    def add(self, property_id: str, image_sha256: str, phash: str) -> bool:
+        """Agrega una foto; False si no tiene hash o el hash es poco informativo."""
+        if not isinstance(phash, str) or not phash:
+            return False
+        value = int(phash, 16)
+        if not is_informative(value):
+            return False
+        property_id = str(property_id)
+        self._tree.add(value)
+        self._photos.setdefault(value, set()).add((property_id, image_sha256))
+        self._by_property.setdefault(property_id, set()).add((image_sha256, value))
+        return True
+
+    def add_frame(self, images: pd.DataFrame) -> int:
+        """Agrega las fotos de un DataFrame con property_id, image_sha256 y phash."""
+        added = 0
+        for property_id, image_sha256, phash in images[['property_id', 'image_sha256', 'phash']].itertuples(index=False):
+            added += self.add(property_id, image_sha256, phash)
+        return added
+
+    def replace_property(self, property_id: str, images: pd.DataFrame) -> None:
+        """Sustituye las fotos de una propiedad por las de su PDF actual."""
+        property_id = str(property_id)
+        for image_sha256, value in self._by_property.pop(property_id, ()):
+            photos = self._photos.get(value)
+            if photos is not None:
+                photos.discard((property_id, image_sha256))
+                if not photos:
+                    del self._photos[value]
+        self.add_frame(images.assign(property_id=property_id))
+
+    def similar(self, phash: str, radius: int = DEFAULT_RADIUS) -> list:
+        """Fotos vigentes casi idénticas al hash: (property_id, image_sha256, distancia)."""
+        matches = []
+        for value, distance in self._tree.search(int(phash, 16), radius):
+            for property_id, image_sha256 in self._photos.get(value, ()):
+                matches.append((property_id, image_sha256, distance))
+        return matches
+
+    def _neighbors(self, value: int, radius: int, max_properties: int) -> dict:
+        """{property_id: distancia mínima} de las propiedades con una foto cercana al hash."""
+        neighbors = {}
+        for match_value, distance in self._tree.search(value, radius):
+            for property_id, _ in self._photos.get(match_value, ()):
+                if distance < neighbors.get(property_id, 65):
+                    neighbors[property_id] = distance
+        if len(neighbors) > max_properties:
+            return {}  # Foto genérica de la oficina o de catálogo
+        return neighbors
+
+    def _shared_counts(self, property_id: str, radius: int, max_properties: int) -> tuple:
+        """({otra propiedad: [fotos compartidas, distancia mínima]}, fotos propias con coincidencias)."""
+        shared = {}
+        matched = 0
+        for _, value in self._by_property.get(property_id, ()):
+            neighbors = self._neighbors(value, radius, max_properties)
+            neighbors.pop(property_id, None)
+            matched += bool(neighbors)
+            for other_id, distance in neighbors.items():
+                entry = shared.setdefault(other_id, [0, distance])
+                entry[0] += 1
+                entry[1] = min(entry[1], distance)
+        return shared, matched
+
+    def shared_photos(self, property_id: str, radius: int = DEFAULT_RADIUS,
+                      max_properties: int = MAX_PROPERTIES_PER_PHOTO) -> pd.DataFrame:
+        """
+        Otras propiedades con fotos casi idénticas a las de property_id.
+
+        Returns:
+            pd.DataFrame: property_id, shared_photos (fotos de property_id que aparecen en la
+                          otra propiedad) y min_distance, de la que más comparte a la que menos.
+        """
+        shared, _ = self._shared_counts(str(property_id), radius, max_properties)
+        result = pd.DataFrame([(other_id, count, distance) for other_id, (count, distance) in shared.items()],
+                              columns=SHARED_COLUMNS)
+        return result.sort_values(['shared_photos', 'min_distance', 'property_id'],
+                                  ascending=[False, True, True], ignore_index=True)
+
+    def save(self, path: str = PHOTO_INDEX_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = PHOTO_INDEX_PATH) -> 'PhotoIndex | None':
+        """Índice guardado, o None si no existe o no se puede leer."""
+        try:
+            with open(path, 'rb') as f:
+                index = pickle.load(f)
+            if isinstance(index, cls):
+                return index
+            logger.warning(f"[PHOTO_INDEX] {path} no contiene un índice de fotos.")
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.warning(f"[PHOTO_INDEX] No se pudo leer {path}: {e}")
+        return None
+
+    @classmethod
+    def from_frame(cls, images: pd.DataFrame) -> 'PhotoIndex':
+        index = cls()
+        added = index.add_frame(images)
+        logger.info(f"[PHOTO_INDEX] {added} fotos de {index.property_count} propiedades indexadas "
+                    f"({len(index._tree)} hashes distintos).")
+        return index
+
+
+def load_photo_index(get_hashes, path: str = PHOTO_INDEX_PATH) -> PhotoIndex | None:
+    """
+    Índice guardado en path; si no existe o está dañado, se reconstruye con las fotos ya
+    analizadas.
+
+    Args:
+        get_hashes: Función sin argumentos que devuelve el DataFrame de
+                    PropertyRepository.get_photo_hashes (o None si falló).
+    """
+    index = PhotoIndex.load(path)
+    if index is not None:
+        return index
+    images = get_hashes()
+    return None if images is None else PhotoIndex.from_frame(images)
+
+
+def cluster_shared_photos(index: PhotoIndex, radius: int = DEFAULT_RADIUS,
+                          max_properties: int = MAX_PROPERTIES_PER_PHOTO) -> pd.DataFrame:
+    """
+    Agrupa el catálogo en clusters de propiedades unidas por fotos casi idénticas
+    (componentes conexas, recorridas con consultas al índice).
+
+    Returns:
+        pd.DataFrame: Una fila por propiedad que comparte fotos: cluster_id (menor
+                      property_id del cluster), property_id y shared_photos (sus fotos
+                      que aparecen en otra propiedad del cluster).
+    """
+    rows = []
+    visited = set()
+    for start in sorted(index._by_property):
+        if start in visited:
+            continue
+        visited.add(start)
+        members = {}
+        pending = [start]
+        while pending:
+            property_id = pending.pop()
+            shared, matched = index._shared_counts(property_id, radius, max_properties)
+            if shared:
+                members[property_id] = matched
+            for other_id in shared:
+                if other_id not in visited:
+                    visited.add(other_id)
+                    pending.append(other_id)
+        if len(members) > 1:
+            cluster_id = min(members)
+            rows.extend((cluster_id, property_id, count) for property_id, count in members.items())
+
+    clusters = pd.DataFrame(rows, columns=CLUSTER_COLUMNS)
+    logger.info(f"[PHOTO_INDEX] {len(clusters)} propiedades en {clusters['cluster_id'].nunique()} "
+                f"clusters de fotos compartidas.")
+    return clusters.sort_values(['cluster_id', 'property_id'], ignore_index=True)
@@ -0,0 +1,305 @@
+# src/data_processing/quality_rules.py
+
+"""
+Motor de reglas de calidad de datos.
+
+El validador de faltantes sólo detecta celdas nulas o vacías; este módulo detecta
+valores presentes pero inválidos (latitud 0, precio de 1 peso, baños_totales > 20...).
+Las reglas se declaran una sola vez y cada una se compila a una máscara booleana
+vectorizada sobre todo el DataFrame. Los valores nulos nunca cuentan como violación:
+de eso se encarga la matriz de prioridad del validador.
+
+Tipos de regla:
+    - range_rule: valor numérico dentro de [min_value, max_value].
+    - compare_rule: comparación entre dos columnas (o columna y factor).
+    - regex_rule: el texto debe cumplir un patrón completo.
+    - allowed_values_rule: el valor debe pertenecer a un conjunto de referencia.
+    - predicate_rule: cualquier condición vectorizada sobre el DataFrame.
+
+Uso:
+    report = evaluate_rules(df)
+    report.summary      # una fila por regla: violaciones, % y ids de muestra
+"""
+
+import logging
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.utils.schema import PROPERTY_SCHEMA, KIND_TEXT
+from src.utils.metrics import instrumented
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+SAMPLE_SIZE = 5
+
+_OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+
+class FrameView:
+    """
+    Vista de sólo lectura sobre el DataFrame que convierte cada columna a un arreglo
+    de NumPy una única vez, aunque varias reglas la consulten.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._numeric = {}
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def has(self, *columns) -> bool:
+        return all(col in self.df.columns for col in columns)
+
+    def numeric(self, column: str) -> np.ndarray:
+        """Columna como float64 con NaN para nulos y valores no numéricos."""
+        if column not in self._numeric:
+            values = pd.to_numeric(self.df[column], errors='coerce')
+            self._numeric[column] = values.to_numpy(dtype='float64', na_value=np.nan)
+        return self._numeric[column]
+
+    def codes(self, column: str) -> tuple:
+        """
+        Columna factorizada: (códigos, valores únicos), con código -1 para nulos.
+        Las reglas de texto y de referencia se evalúan sobre los valores únicos y se
+        proyectan a las filas con los códigos, lo que es mucho más barato en columnas
+        de baja cardinalidad (colonia, status, código postal...).
+        """
+        if column not in self._codes:
+            self._codes[column] = pd.factorize(self.df[column], use_na_sentinel=True)
+        return self._codes[column]
+
+    def map_uniques(self, column: str, unique_mask: np.ndarray) -> np.ndarray:
+        """Proyecta una máscara calculada sobre los valores únicos a todas las filas (nulos: False)."""
+        codes, _ = self.codes(column)
+        return np.append(np.asarray(unique_mask, dtype=bool), False)[codes]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Regla de calidad compilada.
+
+    Attributes:
+        name (str): Identificador único de la regla.
+        columns (tuple): Columnas que necesita; si falta alguna, la regla se omite.
+        check (Callable): Recibe un FrameView y devuelve un arreglo booleano con True
+                          en las filas que violan la regla.
+        description (str): Texto legible para el reporte.
+        severity (str): 'error' o 'warning'.
+    """
+    name: str
+    columns: tuple
+    check: Callable[[FrameView], np.ndarray]
+    description: str = ''
+    severity: str = SEVERITY_ERROR
+
+
+def range_rule(name, column, min_value=None, max_value=None, description='', severity=SEVERITY_ERROR) -> Rule:
+    """Viola la regla un valor numérico fuera de [min_value, max_value]."""
+    def check(view):
+        values = view.numeric(column)
+        bad = np.zeros(len(values), dtype=bool)
+        if min_value is not None:
+            bad |= values < min_value
+        if max_value is not None:
+            bad |= values > max_value
+        return bad  # NaN compara como False: los nulos no violan la regla
+
+    if not description:
+        low = f">= {min_value:g}" if min_value is not None else None
+        high = f"<= {max_value:g}" if max_value is not None else None
+        description = f"{column} debe ser " + ' y '.join(part for part in (low, high) if part)
+    return Rule(name, (column,), check, description, severity)
+
+
+def compare_rule(name, left, op, right, factor=1.0, description='', severity=SEVERITY_ERROR) -> Rule:
+    """Viola la regla una fila donde no se cumple `left <op> right * factor` (ambos no nulos)."""
+    compare = _OPERATORS[op]
+
+    def check(view):
+        lhs, rhs = view.numeric(left), view.numeric(right) * factor
+        with np.errstate(invalid='ignore'):
+            return ~np.isnan(lhs) & ~np.isnan(rhs) & ~compare(lhs, rhs)
+
+    if not description:
+        description = f"{left} debe ser {op} {right}" + (f" x {factor:g}" if factor != 1.0 else '')
+    return Rule(name, (left, right), check, description, severity)
+
+
+def regex_rule(name, column, pattern, description='', severity=SEVERITY_ERROR) -> Rule:
+    """Viola la regla un texto no vacío que no cumple el patrón completo."""
+    compiled = re.compile(pattern)
+
+    def check(view):
+        _, uniques = view.codes(column)
+        text = [str(value).strip() for value in uniques]
+        invalid = [value != '' and compiled.fullmatch(value) is None for value in text]
+        return view.map_uniques(column, invalid)
+
+    return Rule(name, (column,), check, description or f"{column} debe cumplir {pattern}", severity)
+
+
+def allowed_values_rule(name, column, allowed, description='', severity=SEVERITY_ERROR) -> Rule:
+    """Viola la regla un valor no nulo que no pertenece al conjunto de referencia."""
+    allowed = frozenset(allowed)
+
+    def check(view):
+        _, uniques = view.codes(column)
+        return view.map_uniques(column, ~pd.Index(uniques).isin(allowed))
+
+    if not description:
+        description = f"{column} debe ser uno de {sorted(map(str, allowed))}"
+    return Rule(name, (column,), check, description, severity)
+
+
+def predicate_rule(name, columns, is_valid, description='', severity=SEVERITY_ERROR) -> Rule:
+    """
+    Regla libre: `is_valid(view)` devuelve True en las filas válidas. Las filas donde
+    alguna de las columnas es nula no se consideran violaciones.
+    """
+    def check(view):
+        valid = np.asarray(is_valid(view), dtype=bool)
+        present = np.logical_and.reduce([view.df[col].notna().to_numpy() for col in columns])
+        return present & ~valid
+
+    return Rule(name, tuple(columns), check, description or name, severity)
+
+
+def schema_rules(specs=PROPERTY_SCHEMA) -> list:
+    """Reglas derivadas de las restricciones del esquema (valores permitidos y mínimos)."""
+    rules = []
+    for spec in specs:
+        if spec.db_type is None:
+            continue
+        if spec.allowed_values:
+            rules.append(allowed_values_rule(f"{spec.name}_allowed", spec.name, spec.allowed_values))
+        elif spec.min_value is not None and spec.kind != KIND_TEXT:
+            rules.append(range_rule(f"{spec.name}_min", spec.name, min_value=spec.min_value))
+    return rules
+
+
+def _construction_fits_levels(view):
+    # Un departamento o casa de varios niveles puede superar el terreno; se compara
+    # contra terreno x niveles (mínimo 1) en lugar de contra el terreno solo.
+    levels = np.fmax(np.nan_to_num(view.numeric('niveles_construidos'), nan=1.0), 1.0) \
+        if view.has('niveles_construidos') else 1.0
+    terreno = view.numeric('m2_terreno')
+    construccion = view.numeric('m2_construccion')
+    with np.errstate(invalid='ignore'):
+        return (terreno <= 0) | (construccion <= terreno * levels)
+
+
+# Reglas de dominio del inventario (Chihuahua / México)
+DOMAIN_RULES = [
+    range_rule('latitud_mexico', 'latitud', 14.0, 33.0,
+               description="latitud fuera de México (incluye 0)"),
+    range_rule('longitud_mexico', 'longitud', -118.5, -86.5,
+               description="longitud fuera de México (incluye 0)"),
+    range_rule('precio_minimo', 'precio', min_value=10_000,
+               description="precio menor a $10,000 (probable captura errónea)"),
+    range_rule('precio_maximo', 'precio', max_value=500_000_000, severity=SEVERITY_WARNING,
+               description="precio mayor a $500 millones"),
+    range_rule('banos_totales_maximo', 'banos_totales', max_value=20),
+    range_rule('recamaras_maximo', 'recamaras', max_value=30),
+    range_rule('estacionamientos_maximo', 'estacionamientos', max_value=50, severity=SEVERITY_WARNING),
+    range_rule('niveles_maximo', 'niveles_construidos', max_value=60, severity=SEVERITY_WARNING),
+    range_rule('edad_rango', 'edad', 0, 200, severity=SEVERITY_WARNING),
+    range_rule('comision_porcentaje', 'comision', 0, 100),
+    range_rule('comision_externas_porcentaje', 'comision_compartir_externas', 0, 100),
+    predicate_rule('construccion_vs_terreno', ('m2_construccion', 'm2_terreno'), _construction_fits_levels,
+                   severity=SEVERITY_WARNING,
+                   description="m2_construccion mayor que m2_terreno x niveles_construidos"),
+    regex_rule('codigo_postal_formato', 'codigo_postal', r'\d{5}',
+               description="codigo_postal debe tener 5 dígitos"),
+]
+
+DEFAULT_RULES = schema_rules() + DOMAIN_RULES
+
+
+@dataclass
+class QualityReport:
+    """
+    Resultado de evaluar un conjunto de reglas.
+
+    Attributes:
+        summary (pd.DataFrame): Una fila por regla evaluada con rule, severity, description,
+                                violations, violation_pct y sample_ids.
+        masks (dict): Nombre de la regla -> arreglo booleano de violaciones.
+        skipped (list): Reglas omitidas porque faltan columnas.
+        index (pd.Index): Índice del DataFrame evaluado.
+    """
+    summary: pd.DataFrame
+    masks: dict
+    skipped: list = field(default_factory=list)
+    index: pd.Index = None
+
+    def row_mask(self, severity: str = None) -> pd.Series:
+        """Filas que violan al menos una regla (opcionalmente, sólo de una severidad)."""
+        severities = dict(zip(self.summary['rule'], self.summary['severity']))
+        masks = [mask for name, mask in self.masks.items() if severity is None or severities[name] == severity]
+        combined = np.logical_or.reduce(masks) if masks else np.zeros(len(self.index), dtype=bool)
+        return pd.Series(combined, index=self.index)
+
+    @property
+    def total_violations(self) -> int:
+        return int(self.summary['violations'].sum()) if not self.summary.empty else 0
+
+
+@instrumented('quality_rules')
+def evaluate_rules(df: pd.DataFrame, rules=None, id_column: str = 'id', sample_size: int = SAMPLE_SIZE) -> QualityReport:
+    """
+    Evalúa las reglas de calidad sobre el DataFrame de forma vectorizada.
+
+    Args:
+        df (pd.DataFrame): Propiedades a evaluar.
+        rules (list, optional): Reglas a evaluar. Por defecto, DEFAULT_RULES.
+        id_column (str): Columna con el identificador usado en las muestras.
+        sample_size (int): Número máximo de ids de muestra por regla.
+
+    Returns:
+        QualityReport: Conteo de violaciones por regla y máscaras por fila.
+    """
+    rules = DEFAULT_RULES if rules is None else rules
+    view = FrameView(df)
+    ids = df[id_column].to_numpy() if id_column in df.columns else df.index.to_numpy()
+
+    rows, masks, skipped = [], {}, []
+    for rule in rules:
+        if not view.has(*rule.columns):
+            skipped.append(rule.name)
+            continue
+        mask = rule.check(view)
+        masks[rule.name] = mask
+        violations = int(mask.sum())
+        rows.append({
+            'rule': rule.name,
+            'severity': rule.severity,
+            'description': rule.description,
+            'violations': violations,
+            'violation_pct': round(100 * violations / len(df), 2) if len(df) else 0.0,
+            'sample_ids': ids[np.flatnonzero(mask)[:sample_size]].tolist(),
+        })
+
+    summary = pd.DataFrame(rows, columns=['rule', 'severity', 'description', 'violations',
+                                          'violation_pct', 'sample_ids'])
+    if skipped:
+        logger.info(f"[QUALITY] Reglas omitidas por columnas faltantes: {skipped}")
+    violated = summary[summary['violations'] > 0]
+    logger.info(f"[QUALITY] {len(summary)} reglas evaluadas sobre {len(df)} filas; {len(violated)} con violaciones.")
+    for _, row in violated.iterrows():
+        logger.warning(f"[QUALITY] {row['rule']} ({row['severity']}): {row['violations']} violaciones. "
+                       f"Ejemplos: {row['sample_ids']}")
+    return QualityReport(summary=summary, masks=masks, skipped=skipped, index=df.index)
@@ -0,0 +1,227 @@
+# src/data_processing/snapshot_diff.py
+
+import os
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.utils.constants import DB_COLUMNS, SNAPSHOT_DIR
+from src.utils.logging_config import setup_logging
+from src.utils.metrics import instrumented
+
+setup_logging(log_file_prefix="snapshot_diff_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SNAPSHOT_PATH = os.path.join(BASE_DIR, SNAPSHOT_DIR, 'inventory_snapshot.pkl')
+
+# Llave de unión entre snapshots
+KEY_COLUMN = 'id'
+
+# Valores de field_name/new_value usados en audit_log para altas y bajas de propiedades
+LISTING_FIELD = '__listing__'
+LISTING_ADDED = 'added'
+LISTING_REMOVED = 'removed'
+
+# Columnas de las entradas de auditoría (ChangeSet.audit_entries)
+AUDIT_COLUMNS = ['property_id', 'field_name', 'old_value', 'new_value']
+
+@dataclass
+class ChangeSet:
+    """
+    Resultado de comparar dos inventarios consecutivos.
+
+    Attributes:
+        added (pd.DataFrame): Filas nuevas (no existían en el snapshot anterior).
+        removed (pd.DataFrame): Filas del snapshot anterior que ya no aparecen.
+        modified (pd.DataFrame): Filas nuevas cuyo contenido cambió, con la columna
+                                 adicional 'changed_columns' (lista de columnas).
+        changes (pd.DataFrame): Formato largo de las modificaciones: id, field_name,
+                                old_value, new_value (una fila por celda cambiada).
+        unchanged_count (int): Número de propiedades sin cambios.
+    """
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    modified: pd.DataFrame
+    changes: pd.DataFrame
+    unchanged_count: int
+
+    @property
+    def is_empty(self) -> bool:
+        return self.added.empty and self.removed.empty and self.modified.empty
+
+    def rows_to_upsert(self) -> pd.DataFrame:
+        """Filas a insertar o actualizar en la base de datos (altas + modificaciones)."""
+        modified = self.modified.drop(columns='changed_columns')
+        return pd.concat([self.added, modified], ignore_index=True)
+
+    def summary(self) -> dict:
+        return {
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'modified': len(self.modified),
+            'unchanged': self.unchanged_count,
+        }
+
+    def audit_entries(self) -> pd.DataFrame:
+        """
+        Entradas de auditoría en formato largo (property_id, field_name, old_value, new_value).
+        Las altas y bajas se registran con field_name '__listing__'.
+        """
+        frames = [self.changes.rename(columns={KEY_COLUMN: 'property_id'})]
+        if not self.added.empty:
+            frames.append(pd.DataFrame({
+                'property_id': self.added[KEY_COLUMN].values,
+                'field_name': LISTING_FIELD, 'old_value': None, 'new_value': LISTING_ADDED,
+            }))
+        if not self.removed.empty:
+            frames.append(pd.DataFrame({
+                'property_id': self.removed[KEY_COLUMN].values,
+                'field_name': LISTING_FIELD, 'old_value': None, 'new_value': LISTING_REMOVED,
+            }))
+        entries = pd.concat(frames, ignore_index=True)
+        return entries[AUDIT_COLUMNS]
+
+
+def _values_differ(old: pd.Series, new: pd.Series) -> np.ndarray:
+    """Compara dos columnas alineadas tratando nulo == nulo como igual."""
+    old_na = old.isna().to_numpy()
+    new_na = new.isna().to_numpy()
+    if pd.api.types.is_numeric_dtype(old.dtype) and pd.api.types.is_numeric_dtype(new.dtype):
+        # Tolerancia relativa para que float32 (modo compacto) y float64 se consideren iguales
+        old_float = old.to_numpy(dtype='float64', na_value=np.nan)
+        new_float = new.to_numpy(dtype='float64', na_value=np.nan)
+        equal = np.isclose(old_float, new_float, rtol=1e-6, atol=0.0)
+        return ~((old_na & new_na) | (~old_na & ~new_na & equal))
+    old_values = old.to_numpy(dtype=object, na_value=None)
+    new_values = new.to_numpy(dtype=object, na_value=None)
+    equal = np.asarray(old_values == new_values, dtype=bool)
+    return ~((old_na & new_na) | (~old_na & ~new_na & equal))
+
+
+def _stringify(series: pd.Series) -> pd.Series:
+    return series.astype(str).astype(object).where(series.notna(), None)
+
+
+def _row_hashes(df: pd.DataFrame, columns: list) -> pd.Series:
+    return pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+
+
+@instrumented('diff')
+def diff_snapshots(previous_df: pd.DataFrame, current_df: pd.DataFrame, columns: list = None) -> ChangeSet:
+    """
+    Compara el inventario limpio actual contra el snapshot anterior mediante un hash join
+    sobre 'id' y clasifica cada propiedad como alta, baja, modificada o sin cambios.
+
+    La comparación es vectorizada: primero se calcula un hash por fila de cada DataFrame
+    y sólo las filas con hash distinto se comparan columna por columna.
+
+    Args:
+        previous_df (pd.DataFrame): Snapshot anterior (puede estar vacío o ser None).
+        current_df (pd.DataFrame): Inventario limpio actual.
+        columns (list, optional): Columnas a comparar. Por defecto, DB_COLUMNS presentes
+                                  en ambos DataFrames.
+
+    Returns:
+        ChangeSet: Conjunto de cambios compacto.
+    """
+    current_df = current_df[current_df[KEY_COLUMN].notna()].drop_duplicates(subset=KEY_COLUMN, keep='last')
+    if previous_df is None or previous_df.empty:
+        logger.info(f"[DIFF] Sin snapshot anterior: las {len(current_df)} propiedades se consideran altas.")
+        empty = current_df.iloc[0:0]
+        return ChangeSet(
+            added=current_df.reset_index(drop=True), removed=empty.copy(),
+            modified=empty.assign(changed_columns=pd.Series(dtype=object)),
+            changes=pd.DataFrame(columns=[KEY_COLUMN, 'field_name', 'old_value', 'new_value']),
+            unchanged_count=0,
+        )
+    previous_df = previous_df[previous_df[KEY_COLUMN].notna()].drop_duplicates(subset=KEY_COLUMN, keep='last')
+
+    if columns is None:
+        columns = DB_COLUMNS
+    compare_cols = [c for c in columns if c != KEY_COLUMN and c in current_df.columns and c in previous_df.columns]
+
+    prev_keyed = previous_df[[KEY_COLUMN] + compare_cols].assign(
+        _hash=_row_hashes(previous_df, compare_cols).values)
+    curr_keyed = current_df[[KEY_COLUMN] + compare_cols].assign(
+        _hash=_row_hashes(current_df, compare_cols).values)
+
+    # Normalizar la llave a texto para que '123' y 123 coincidan
+    prev_keyed[KEY_COLUMN] = prev_keyed[KEY_COLUMN].astype(str)
+    curr_keyed[KEY_COLUMN] = curr_keyed[KEY_COLUMN].astype(str)
+
+    joined = curr_keyed.merge(prev_keyed, on=KEY_COLUMN, how='outer', suffixes=('', '_prev'), indicator=True)
+
+    added_ids = joined.loc[joined['_merge'] == 'left_only', KEY_COLUMN]
+    removed_ids = joined.loc[joined['_merge'] == 'right_only', KEY_COLUMN]
+    both = joined[joined['_merge'] == 'both']
+    candidates = both[both['_hash'] != both['_hash_prev']]
+
+    # Comparación columna por columna sólo sobre las filas con hash distinto
+    changed_matrix = pd.DataFrame(
+        {col: _values_differ(candidates[f"{col}_prev"], candidates[col]) for col in compare_cols},
+        index=candidates.index,
+    )
+    is_modified = changed_matrix.any(axis=1) if compare_cols else pd.Series(False, index=candidates.index)
+    changed_matrix = changed_matrix[is_modified]
+    modified_ids = candidates.loc[is_modified, KEY_COLUMN]
+
+    current_by_id = current_df.assign(_key=current_df[KEY_COLUMN].astype(str)).set_index('_key')
+    previous_by_id = previous_df.assign(_key=previous_df[KEY_COLUMN].astype(str)).set_index('_key')
+
+    added = current_by_id.loc[added_ids.values].reset_index(drop=True)
+    removed = previous_by_id.loc[removed_ids.values].reset_index(drop=True)
+    modified = current_by_id.loc[modified_ids.values].reset_index(drop=True)
+    changed_lists = [list(np.array(compare_cols)[row]) for row in changed_matrix.to_numpy()]
+    modified['changed_columns'] = pd.Series(changed_lists, dtype=object)
+
+    # Formato largo de las celdas cambiadas: una fila por (id, columna)
+    long_frames = []
+    for col in compare_cols:
+        col_mask = changed_matrix[col].to_numpy() if col in changed_matrix else np.zeros(0, dtype=bool)
+        if not col_mask.any():
+            continue
+        rows = candidates.loc[changed_matrix.index[col_mask]]
+        long_frames.append(pd.DataFrame({
+            KEY_COLUMN: rows[KEY_COLUMN].values,
+            'field_name': col,
+            'old_value': _stringify(rows[f"{col}_prev"]).values,
+            'new_value': _stringify(rows[col]).values,
+        }))
+    changes = (pd.concat(long_frames, ignore_index=True) if long_frames
+               else pd.DataFrame(columns=[KEY_COLUMN, 'field_name', 'old_value', 'new_value']))
+
+    change_set = ChangeSet(
+        added=added, removed=removed, modified=modified, changes=changes,
+        unchanged_count=len(both) - len(modified),
+    )
+    logger.info(f"[DIFF] Resultado de la comparación de inventarios: {change_set.summary()}")
+    return change_set
+
+
+def load_snapshot(path: str = None) -> pd.DataFrame | None:
+    """Carga el último snapshot del inventario limpio, si existe."""
+    path = path or SNAPSHOT_PATH
+    if not os.path.exists(path):
+        logger.info(f"[DIFF] No existe snapshot anterior en {path}.")
+        return None
+    try:
+        df = pd.read_pickle(path)
+        logger.info(f"[DIFF] Snapshot anterior cargado desde {path} ({len(df)} propiedades).")
+        return df
+    except Exception as e:
+        logger.error(f"[DIFF] No se pudo leer el snapshot {path}: {e}")
+        return None
+
+
+def save_snapshot(df: pd.DataFrame, path: str = None) -> str:
+    """Guarda el inventario limpio como snapshot de referencia para la próxima ejecución."""
+    path = path or SNAPSHOT_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"[DIFF] Snapshot guardado en {path} ({len(df)} propiedades).")
+    return path
@@ -3,48 +3,14 @@ import logging
 import os
 from src.utils.logging_config import setup_logging
 from src.data_access.database_connection import get_db_connection
+from src.utils.schema import build_table_ddl
 
 setup_logging(log_file_prefix="create_db_table_log")
 logger = logging.getLogger(__name__)
 
 # --- SQL para crear la tabla properties ---
-create_table_sql = """
-CREATE TABLE IF NOT EXISTS properties (
-    id VARCHAR(255) PRIMARY KEY,
-    fecha_alta DATE,
-    status VARCHAR(50) NOT NULL CHECK (status IN ('enPromocion', 'conIntencion', 'vendidas')),
-    tipo_operacion VARCHAR(50) NOT NULL CHECK (tipo_operacion IN ('venta', 'renta', 'traspaso', 'opcion')),
-    tipo_contrato VARCHAR(50) NOT NULL CHECK (tipo_contrato IN ('exclusiva', 'opcion', 'abierta')),
-    en_internet BOOLEAN,
-    clave VARCHAR(255),
-    clave_oficina VARCHAR(255),
-    subtipo_propiedad VARCHAR(255),
-    calle VARCHAR(255),
-    numero VARCHAR(50),
-    colonia VARCHAR(255) NOT NULL,
-    municipio VARCHAR(255) NOT NULL,
-    latitud DECIMAL(10, 8) NOT NULL,
-    longitud DECIMAL(11, 8) NOT NULL,
-    codigo_postal VARCHAR(10),
-    precio DECIMAL(18, 2) NOT NULL CHECK (precio >= 0),
-    comision DECIMAL(5, 2),
-    comision_compartir_externas DECIMAL(5, 2),
-    m2_construccion DECIMAL(10, 2) NOT NULL CHECK (m2_construccion >= 0),
-    m2_terreno DECIMAL(10, 2) NOT NULL CHECK (m2_terreno >= 0),
-    recamaras INTEGER NOT NULL CHECK (recamaras >= 0),
-    banos_totales DECIMAL(4, 1) NOT NULL CHECK (banos_totales >= 0),
-    cocina BOOLEAN,
-    niveles_construidos INTEGER,
-    edad INTEGER,
-    estacionamientos INTEGER,
-    descripcion TEXT NOT NULL,
-    nombre_agente VARCHAR(255),
-    apellido_paterno_agente VARCHAR(255),
-    apellido_materno_agente VARCHAR(255),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-
+# La definición de 'properties' se genera desde el esquema declarativo (src/utils/schema.py).
+create_table_sql = build_table_ddl('properties') + """
 CREATE TABLE IF NOT EXISTS audit_log (
     log_id SERIAL PRIMARY KEY,
     property_id VARCHAR(255) NOT NULL REFERENCES properties(id),
@@ -55,6 +21,51 @@ CREATE TABLE IF NOT EXISTS audit_log (
     changed_by VARCHAR(255),
     change_source VARCHAR(50) -- e.g., 'autofill', 'manual', 'system'
 );
+
+CREATE TABLE IF NOT EXISTS duplicate_clusters (
+    property_id VARCHAR(255) PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    cluster_id VARCHAR(255) NOT NULL, -- menor 'id' entre los miembros del cluster
+    clave_oficina VARCHAR(255),
+    score DECIMAL(5, 4),
+    detected_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_duplicate_clusters_cluster_id ON duplicate_clusters (cluster_id);
+
+-- Fotos de las fichas técnicas (src/scripts/extract_brochure_images.py); la miniatura está en
+-- data/thumbnails/ab/cd/<image_sha256>.webp
+CREATE TABLE IF NOT EXISTS property_visual_analysis (
+    property_id VARCHAR(255) NOT NULL REFERENCES properties(id) ON DELETE CASCADE,
+    image_sha256 CHAR(64) NOT NULL,
+    page INTEGER,
+    width INTEGER,
+    height INTEGER,
+    resolution_score DECIMAL(4, 3),
+    sharpness_score DECIMAL(4, 3),
+    brightness_score DECIMAL(4, 3),
+    auto_score DECIMAL(3, 1), -- 1 a 10
+    manual_score DECIMAL(3, 1),
+    phash CHAR(16), -- hash perceptual (dHash) en hexadecimal
+    analyzed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (property_id, image_sha256)
+);
+ALTER TABLE property_visual_analysis ADD COLUMN IF NOT EXISTS phash CHAR(16);
+
+-- PDF del que salieron las fotos de cada propiedad; sólo se reprocesa si el PDF cambia
+CREATE TABLE IF NOT EXISTS property_image_sources (
+    property_id VARCHAR(255) PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    pdf_sha256 CHAR(64) NOT NULL,
+    image_count INTEGER NOT NULL,
+    processed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Propiedades que comparten fotos casi idénticas (src/scripts/cluster_shared_photos.py)
+CREATE TABLE IF NOT EXISTS shared_photo_clusters (
+    property_id VARCHAR(255) PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    cluster_id VARCHAR(255) NOT NULL, -- menor 'id' entre los miembros del cluster
+    shared_photos INTEGER NOT NULL,
+    detected_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_shared_photo_clusters_cluster_id ON shared_photo_clusters (cluster_id);
 """
 
 def create_properties_table():
@@ -79,7 +90,8 @@ def create_properties_table():
         logger.info("Ejecutando sentencia CREATE TABLE...")
         cur.execute(create_table_sql)
         conn.commit()
-        logger.info("Tabla 'properties' y 'audit_log' creadas o ya existentes en la base de datos.")
+        logger.info("Tablas 'properties', 'audit_log', 'duplicate_clusters', 'property_visual_analysis', "
+                    "'property_image_sources' y 'shared_photo_clusters' creadas o ya existentes en la base de datos.")
 
         cur.close()
 
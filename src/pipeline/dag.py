@@ -0,0 +1,227 @@
+# src/pipeline/dag.py
+
+"""
+Motor mínimo de ejecución de DAGs con checkpoints en disco.
+
+Cada etapa declara de qué etapas depende. Las etapas cuyas dependencias ya
+terminaron se ejecutan en paralelo (hilos), y la salida de cada etapa se guarda
+como checkpoint (pickle) junto con un manifiesto JSON. Al reanudar una ejecución,
+las etapas con checkpoint válido no se vuelven a ejecutar.
+"""
+
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from src.utils.metrics import get_active_run, stage as metrics_stage
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+
+class PipelineError(Exception):
+    """Error al ejecutar una etapa del pipeline."""
+
+
+class PipelinePaused(PipelineError):
+    """Una etapa detuvo el pipeline a propósito (p. ej. demasiados gaps críticos)."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Etapa del DAG.
+
+    Attributes:
+        name (str): Nombre único de la etapa.
+        func (Callable): Recibe un dict {nombre_dependencia: salida} y devuelve la salida de la etapa.
+        depends_on (tuple): Nombres de las etapas de las que depende.
+        checkpoint (bool): Si la salida se persiste para poder reanudar.
+    """
+    name: str
+    func: Callable[[dict], object]
+    depends_on: tuple = ()
+    checkpoint: bool = True
+
+
+class CheckpointStore:
+    """Guarda la salida y el estado de cada etapa en <runs_dir>/<run_id>/."""
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, runs_dir: str, run_id: str):
+        self.runs_dir = runs_dir
+        self.run_id = run_id
+        self.run_dir = os.path.join(runs_dir, run_id)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    @classmethod
+    def latest_run_id(cls, runs_dir: str) -> str | None:
+        """Devuelve el identificador de la ejecución más reciente, si existe."""
+        if not os.path.isdir(runs_dir):
+            return None
+        run_ids = sorted(d for d in os.listdir(runs_dir)
+                         if os.path.isfile(os.path.join(runs_dir, d, cls.MANIFEST)))
+        return run_ids[-1] if run_ids else None
+
+    def _read_manifest(self) -> dict:
+        path = os.path.join(self.run_dir, self.MANIFEST)
+        if not os.path.exists(path):
+            return {'run_id': self.run_id, 'stages': {}}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        path = os.path.join(self.run_dir, self.MANIFEST)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _output_path(self, stage_name: str) -> str:
+        return os.path.join(self.run_dir, f"{stage_name}.pkl")
+
+    def status(self, stage_name: str) -> str:
+        return self.manifest['stages'].get(stage_name, {}).get('status', STATUS_PENDING)
+
+    def has_output(self, stage_name: str) -> bool:
+        return self.status(stage_name) == STATUS_DONE and os.path.exists(self._output_path(stage_name))
+
+    def load(self, stage_name: str):
+        with open(self._output_path(stage_name), 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, stage_name: str, output, persist: bool = True):
+        if persist:
+            path = self._output_path(stage_name)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        self.mark(stage_name, STATUS_DONE if persist else STATUS_SKIPPED)
+
+    def mark(self, stage_name: str, status: str, error: str = None):
+        self.manifest['stages'][stage_name] = {
+            'status': status,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'error': error,
+        }
+        self._write_manifest()
+
+    def invalidate(self, stage_names):
+        """Marca las etapas como pendientes para que se vuelvan a ejecutar."""
+        for name in stage_names:
+            if name in self.manifest['stages']:
+                self.manifest['stages'][name]['status'] = STATUS_PENDING
+        self._write_manifest()
+
+
+class Dag:
+    """Conjunto de etapas con dependencias, validado al construirse."""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Los nombres de las etapas deben ser únicos.")
+        for stage in stages:
+            unknown = [dep for dep in stage.depends_on if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"La etapa '{stage.name}' depende de etapas inexistentes: {unknown}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list:
+        order, visiting, visited = [], set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo detectado en el DAG en la etapa '{name}'.")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def downstream_of(self, stage_name: str) -> list:
+        """Devuelve la etapa indicada y todas las que dependen de ella, en orden topológico."""
+        affected = {stage_name}
+        for name in self.order:
+            if any(dep in affected for dep in self.stages[name].depends_on):
+                affected.add(name)
+        return [name for name in self.order if name in affected]
+
+    def run(self, store: CheckpointStore, max_workers: int = 4) -> dict:
+        """
+        Ejecuta el DAG reanudando desde los checkpoints existentes.
+
+        Returns:
+            dict: Salida de cada etapa por nombre.
+
+        Raises:
+            PipelineError: Si alguna etapa falla. Las etapas ya terminadas conservan su checkpoint.
+        """
+        outputs = {}
+        pending = []
+        for name in self.order:
+            if self.stages[name].checkpoint and store.has_output(name):
+                outputs[name] = store.load(name)
+                logger.info(f"[DAG] Etapa '{name}' reanudada desde checkpoint.")
+            else:
+                pending.append(name)
+
+        failures = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                if not failures:
+                    for name in list(pending):
+                        stage = self.stages[name]
+                        if all(dep in outputs for dep in stage.depends_on):
+                            pending.remove(name)
+                            inputs = {dep: outputs[dep] for dep in stage.depends_on}
+                            logger.info(f"[DAG] Iniciando etapa '{name}'.")
+                            running[executor.submit(self._run_stage, stage, inputs)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    try:
+                        outputs[name] = future.result()
+                        store.save(name, outputs[name], persist=stage.checkpoint)
+                        logger.info(f"[DAG] Etapa '{name}' completada.")
+                    except Exception as e:
+                        failures[name] = e
+                        store.mark(name, STATUS_FAILED, error=f"{type(e).__name__}: {e}")
+                        logger.error(f"[DAG] Etapa '{name}' falló: {e}")
+
+        if failures:
+            name, error = next(iter(failures.items()))
+            if isinstance(error, PipelineError):
+                raise error
+            raise PipelineError(f"La etapa '{name}' falló: {error}") from error
+        return outputs
+
+    @staticmethod
+    def _run_stage(stage: Stage, inputs: dict):
+        if get_active_run() is None:
+            return stage.func(inputs)
+        with metrics_stage(stage.name):
+            return stage.func(inputs)
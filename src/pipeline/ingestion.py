@@ -0,0 +1,243 @@
+# src/pipeline/ingestion.py
+
+"""
+Pipeline de ingesta del inventario como DAG reanudable:
+
+    download -> convert -> clean -> {validate, diff, duplicates} -> load
+
+validate, diff y duplicates son independientes y se ejecutan en paralelo. La salida de cada
+etapa se guarda en data/pipeline_runs/<run_id>/, de modo que una ejecución que
+falla (p. ej. en la carga a PostgreSQL) puede reanudarse sin volver a descargar
+ni a limpiar el inventario:
+
+    python -m src.pipeline.ingestion
+    python -m src.pipeline.ingestion --resume
+    python -m src.pipeline.ingestion --resume 20250101_120000_ab12cd34 --rerun-from clean
+"""
+
+import os
+import logging
+import argparse
+from dataclasses import dataclass
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.utils.constants import DB_COLUMNS, PIPELINE_RUNS_DIR
+from src.utils.logging_config import setup_logging
+from src.utils.metrics import PipelineRun
+from src.utils.compact_dtypes import compact_frame, log_memory_report
+from src.data_collection.download_inventory import download_inventory_process
+from src.data_processing.clean_data import (
+    DOWNLOAD_DIR, find_inventory_files, clean_inventory_files, merge_inventories, _get_db_params,
+)
+from src.data_processing.data_validator import validate_and_report_missing_data
+from src.data_processing.snapshot_diff import diff_snapshots, load_snapshot, save_snapshot, AUDIT_COLUMNS
+from src.data_processing.duplicate_detector import detect_duplicates
+from src.data_access.property_repository import PropertyRepository
+from src.pipeline.dag import Dag, Stage, CheckpointStore, PipelineError, PipelinePaused
+
+load_dotenv()
+setup_logging(log_file_prefix="ingestion_pipeline_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RUNS_DIR = os.path.join(BASE_DIR, PIPELINE_RUNS_DIR)
+
+STAGE_NAMES = ('download', 'convert', 'clean', 'validate', 'diff', 'duplicates', 'load')
+
+
+@dataclass
+class IngestionOptions:
+    """Opciones de una ejecución del pipeline de ingesta."""
+    skip_download: bool = False
+    browserless: bool = False
+    fast_scrape: bool = False
+    max_workers: int | None = None
+    full_reload: bool = False
+    compact: bool = False
+    pause_on_gaps: float | None = None
+    download_dir: str = DOWNLOAD_DIR
+
+
+def _download(options, inputs):
+    if options.skip_download:
+        logger.info("[PIPELINE] Descarga omitida; se usarán los archivos existentes.")
+        return False
+    if not download_inventory_process(browserless=options.browserless, fast=options.fast_scrape):
+        raise PipelineError("La descarga del inventario falló.")
+    return True
+
+
+def _convert(options, inputs):
+    target_files = find_inventory_files(options.download_dir)
+    if not target_files:
+        raise PipelineError(f"No se encontraron libros de inventario en {options.download_dir}.")
+    return target_files
+
+
+def _clean(options, inputs):
+    frames_by_path = clean_inventory_files(inputs['convert'], max_workers=options.max_workers)
+    cleaned_df = merge_inventories(frames_by_path)
+    if cleaned_df.empty:
+        raise PipelineError("No se pudo obtener un DataFrame limpio.")
+    if options.compact:
+        compacted = compact_frame(cleaned_df)
+        log_memory_report(cleaned_df, compacted, "Inventario unificado")
+        cleaned_df = compacted
+    return cleaned_df
+
+
+def _validate(options, inputs):
+    # Se valida una copia: el validador agrega 'has_critical_gaps' y 'has_quality_errors'
+    validated = validate_and_report_missing_data(inputs['clean'].copy())
+
+    def flagged(column):
+        return int(validated[column].fillna(False).astype(bool).sum()) if column in validated else 0
+
+    return {'rows': len(validated), 'critical_gaps': flagged('has_critical_gaps'),
+            'quality_errors': flagged('has_quality_errors')}
+
+
+def _diff(options, inputs):
+    if options.full_reload:
+        return None
+    previous_df = load_snapshot()
+    if previous_df is None or previous_df.empty:
+        # Primera ejecución incremental: carga completa sin registrar cada propiedad como alta
+        logger.info("[PIPELINE] Sin snapshot anterior; se cargará el inventario completo sin auditoría de altas.")
+        return None
+    return diff_snapshots(previous_df, inputs['clean'])
+
+
+def _duplicates(options, inputs):
+    return detect_duplicates(inputs['clean']).clusters
+
+
+def _load(options, inputs):
+    cleaned_df = inputs['clean']
+    validation = inputs['validate']
+    if options.pause_on_gaps is not None and validation['rows']:
+        ratio = validation['critical_gaps'] / validation['rows']
+        if ratio > options.pause_on_gaps:
+            raise PipelinePaused(
+                f"{ratio:.1%} de las propiedades tienen gaps críticos (umbral {options.pause_on_gaps:.1%}). "
+                "Revise reports/missing_critical.csv y reanude la ejecución con --resume."
+            )
+
+    change_set = inputs['diff']
+    if change_set is None:
+        rows, audit_entries = cleaned_df, pd.DataFrame(columns=AUDIT_COLUMNS)
+        summary = {'upserted': len(cleaned_df)}
+    else:
+        if change_set.is_empty:
+            logger.info("[PIPELINE] El inventario no tiene cambios respecto al snapshot anterior.")
+        rows, audit_entries = change_set.rows_to_upsert(), change_set.audit_entries()
+        summary = change_set.summary()
+
+    # Propiedades, auditoría y clusters en una sola transacción: si la etapa falla no queda
+    # nada confirmado y --resume puede repetirla sin duplicar la auditoría.
+    property_repo = PropertyRepository(**_get_db_params())
+    if not property_repo.load_inventory_changes(rows, DB_COLUMNS, audit_entries, inputs['duplicates'],
+                                                changed_by='system', change_source='snapshot_diff'):
+        raise PipelineError("La carga a la base de datos falló.")
+
+    save_snapshot(cleaned_df)
+    return summary
+
+
+def build_ingestion_dag(options: IngestionOptions) -> Dag:
+    """Construye el DAG de ingesta con las opciones dadas."""
+    def bind(func):
+        return lambda inputs: func(options, inputs)
+
+    return Dag([
+        Stage('download', bind(_download)),
+        Stage('convert', bind(_convert), depends_on=('download',)),
+        Stage('clean', bind(_clean), depends_on=('convert',)),
+        Stage('validate', bind(_validate), depends_on=('clean',)),
+        Stage('diff', bind(_diff), depends_on=('clean',)),
+        Stage('duplicates', bind(_duplicates), depends_on=('clean',)),
+        Stage('load', bind(_load), depends_on=('clean', 'validate', 'diff', 'duplicates')),
+    ])
+
+
+def run_ingestion(options: IngestionOptions, resume: str = None, rerun_from: str = None,
+                  runs_dir: str = None) -> dict:
+    """
+    Ejecuta (o reanuda) el pipeline de ingesta.
+
+    Args:
+        options (IngestionOptions): Opciones de la ejecución.
+        resume (str, optional): run_id a reanudar, o 'latest' para la ejecución más reciente.
+        rerun_from (str, optional): Etapa a partir de la cual se descartan los checkpoints.
+        runs_dir (str, optional): Directorio de checkpoints. Por defecto, data/pipeline_runs.
+
+    Returns:
+        dict: Salida de cada etapa por nombre.
+
+    Raises:
+        PipelineError: Si alguna etapa falla o el pipeline se pausa.
+    """
+    runs_dir = runs_dir or RUNS_DIR
+    dag = build_ingestion_dag(options)
+    with PipelineRun('ingestion') as run:
+        run_id = run.run_id
+        if resume:
+            run_id = CheckpointStore.latest_run_id(runs_dir) if resume == 'latest' else resume
+            if run_id is None:
+                raise PipelineError(f"No hay ejecuciones para reanudar en {runs_dir}.")
+            logger.info(f"[PIPELINE] Reanudando la ejecución {run_id}.")
+        store = CheckpointStore(runs_dir, run_id)
+        if rerun_from:
+            store.invalidate(dag.downstream_of(rerun_from))
+        return dag.run(store, max_workers=len(dag.stages))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta el pipeline de ingesta del inventario de punta a punta.")
+    parser.add_argument('--resume', nargs='?', const='latest', default=None, metavar='RUN_ID',
+                        help="Reanuda una ejecución anterior (por defecto, la más reciente).")
+    parser.add_argument('--rerun-from', choices=STAGE_NAMES, default=None,
+                        help="Al reanudar, vuelve a ejecutar esta etapa y las que dependen de ella.")
+    parser.add_argument('--skip-download', action='store_true',
+                        help="Usa los archivos ya presentes en el directorio de descargas.")
+    parser.add_argument('--browserless', action='store_true',
+                        help="Descarga con la sesión del portal guardada y sólo abre el navegador si expiró.")
+    parser.add_argument('--fast-scrape', action='store_true',
+                        help="Navegador en modo rápido: perfil persistente, sin imágenes y capturas sólo ante fallos.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número de procesos para la limpieza en paralelo (por defecto, número de CPUs).")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="Carga el inventario completo en lugar de sólo los cambios respecto al snapshot anterior.")
+    parser.add_argument('--compact', action='store_true',
+                        help="Usa tipos compactos (categorías, cadenas Arrow, float32) para el DataFrame limpio.")
+    parser.add_argument('--pause-on-gaps', type=float, default=None, metavar='RATIO',
+                        help="Detiene el pipeline antes de la carga si la proporción de propiedades con gaps críticos supera RATIO.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    options = IngestionOptions(
+        skip_download=args.skip_download, browserless=args.browserless,
+        fast_scrape=args.fast_scrape, max_workers=args.workers, full_reload=args.full_reload,
+        compact=args.compact, pause_on_gaps=args.pause_on_gaps,
+    )
+    logger.info("--- Pipeline de ingesta iniciado ---")
+    try:
+        outputs = run_ingestion(options, resume=args.resume, rerun_from=args.rerun_from)
+        logger.info(f"[PIPELINE] Pipeline completado. Resultado de la carga: {outputs.get('load')}")
+        return 0
+    except PipelinePaused as e:
+        logger.warning(f"[PIPELINE] Pipeline en pausa: {e}")
+        return 2
+    except PipelineError as e:
+        logger.error(f"[PIPELINE] {e}")
+        return 1
+    finally:
+        logger.info("--- Pipeline de ingesta finalizado ---")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+# src/scripts/batch_autofill.py
+
+"""
+Auto-llenado masivo desde los PDFs de todas las propiedades con gaps críticos.
+
+    1. Una sola consulta trae 'id' y las columnas críticas de todo el catálogo y se calcula,
+       de forma vectorizada, qué columnas críticas faltan que la plantilla sabe extraer.
+    2. La extracción se reparte en un pool de procesos (pdf_batch.py): memoria acotada,
+       un núcleo por proceso y la caché de extracción compartida en disco.
+    3. Cada resultado se agrega al checkpoint (JSONL) en cuanto llega; si el proceso se
+       interrumpe, la siguiente ejecución continúa con las propiedades que faltaban.
+    4. Los valores con confianza suficiente se escriben con una sola transacción
+       (PropertyRepository.apply_field_updates): actualización en bloque y auditoría.
+       Después se archiva el checkpoint.
+
+Pensado para correr cada noche sin supervisión, p. ej. con cron:
+    0 3 * * * cd /ruta/al/proyecto && python -m src.scripts.batch_autofill
+
+Uso:
+    python -m src.scripts.batch_autofill [--workers N] [--min-confidence 0.5] [--restart] [--dry-run]
+"""
+
+import os
+import logging
+import argparse
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.schema import blank_mask
+from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import load_pdf_paths
+from src.data_processing.data_validator import COLUMN_PRIORITY
+from src.data_processing.pdf_extraction import template_fields, MIN_CONFIDENCE
+from src.data_processing.pdf_batch import run_extraction
+
+load_dotenv()
+setup_logging(log_file_prefix="batch_autofill_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CHECKPOINT_PATH = os.path.join(BASE_DIR, 'data', 'pipeline_runs', 'batch_autofill_checkpoint.jsonl')
+CHANGED_BY = 'Sistema'
+CHANGE_SOURCE = 'pdf_autofill'
+
+
+def select_gap_tasks(properties: pd.DataFrame, pdf_paths: dict, extractable: list) -> list:
+    """
+    Tareas (property_id, ruta del PDF, columnas faltantes) para las propiedades con PDF
+    y al menos una columna crítica vacía que la plantilla puede extraer.
+    """
+    columns = [c for c in extractable if c in properties.columns]
+    if properties.empty or not columns:
+        return []
+    missing = pd.DataFrame({c: blank_mask(properties, c) for c in columns}, index=properties.index)
+    ids = properties['id'].astype(str)
+    has_pdf = ids.isin(pdf_paths.keys())
+    selected = missing[missing.any(axis=1) & has_pdf]
+    return [(ids[index], pdf_paths[ids[index]], [c for c in columns if row[c]])
+            for index, row in selected.iterrows()]
+
+
+def build_updates(results: dict, properties: pd.DataFrame, min_confidence: float = MIN_CONFIDENCE) -> pd.DataFrame:
+    """Filas property_id, field_name, old_value, new_value, confidence con los valores aceptados."""
+    current = properties.assign(id=properties['id'].astype(str)).set_index('id')
+    rows = []
+    for property_id, record in results.items():
+        for field_name, (value, confidence) in record.get('fields', {}).items():
+            if confidence < min_confidence:
+                continue
+            old_value = current.at[property_id, field_name] if property_id in current.index else None
+            rows.append({'property_id': property_id, 'field_name': field_name,
+                         'old_value': None if pd.isna(old_value) else old_value,
+                         'new_value': value, 'confidence': confidence})
+    return pd.DataFrame(rows, columns=['property_id', 'field_name', 'old_value', 'new_value', 'confidence'])
+
+
+def _archive_checkpoint(path: str):
+    if os.path.exists(path):
+        archived = f"{os.path.splitext(path)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        os.replace(path, archived)
+        logger.info(f"[BATCH_AUTOFILL] Checkpoint archivado en {archived}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Auto-llena desde los PDFs todas las propiedades con gaps críticos.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de extracción (por defecto, uno por núcleo).")
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE,
+                        help=f"Confianza mínima para aceptar un valor (por defecto {MIN_CONFIDENCE}).")
+    parser.add_argument('--restart', action='store_true', help="Descarta el checkpoint y empieza de cero.")
+    parser.add_argument('--dry-run', action='store_true', help="Extrae y reporta, pero no escribe en la base de datos.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from src.data_access.property_repository import PropertyRepository
+
+    args = _parse_args(argv)
+    if args.restart and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+    critical = COLUMN_PRIORITY['critical']
+    properties = repo.get_property_columns(critical)
+    if properties is None or properties.empty:
+        logger.error("[BATCH_AUTOFILL] No se pudieron obtener las propiedades de la base de datos.")
+        return 1
+
+    gaps = pd.concat([blank_mask(properties, c) for c in critical if c in properties.columns], axis=1).any(axis=1)
+    properties = properties[gaps]
+    extractable = [c for c in critical if c in template_fields()]
+    tasks = select_gap_tasks(properties, load_pdf_paths(os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR)), extractable)
+    logger.info(f"[BATCH_AUTOFILL] {len(properties)} propiedades con gaps críticos; {len(tasks)} con PDF y columnas extraíbles.")
+
+    results = run_extraction(tasks, CHECKPOINT_PATH, workers=args.workers)
+    failed = sum(1 for record in results.values() if record['status'] == 'failed')
+    updates = build_updates(results, properties, args.min_confidence)
+    logger.info(f"[BATCH_AUTOFILL] {len(updates)} valores aceptados en {updates['property_id'].nunique()} propiedades; "
+                f"{failed} PDFs no se pudieron leer.")
+    if args.dry_run:
+        print(updates.to_string(index=False) if not updates.empty else "Sin valores para aplicar.")
+        return 0
+
+    applied = repo.apply_field_updates(updates.drop(columns='confidence'), CHANGED_BY, CHANGE_SOURCE)
+    if applied is None:
+        logger.error("[BATCH_AUTOFILL] La actualización en bloque falló; el checkpoint se conserva para reintentar.")
+        return 1
+    _archive_checkpoint(CHECKPOINT_PATH)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
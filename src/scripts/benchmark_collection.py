@@ -0,0 +1,163 @@
+# src/scripts/benchmark_collection.py
+
+"""
+Benchmark de la recolección (inventario y PDFs) contra el portal simulado, sin red.
+
+Para cada escenario levanta un MockPortalServer (mock_portal.py) con la latencia,
+el límite de ancho de banda, el límite de peticiones y la tasa de fallas indicados, y
+mide con los mismos módulos que usa la recolección real:
+
+    login        GET /login2 + POST del formulario con _username/_password/_csrf_token.
+    inventory    download_inventory_export con la sesión obtenida (sin navegador).
+    pdf_bulk     download_pdfs de N fichas técnicas a un PdfStore temporal.
+    pdf_refresh  Segunda pasada con refresh=True (GET condicional; sólo 304).
+
+El resumen se imprime como tabla y se guarda como JSON en reports/metrics/.
+
+Uso:
+    python -m src.scripts.benchmark_collection [--pdfs 200] [--workers 8] [--scenario local faulty]
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+from src.utils.logging_config import setup_logging
+from src.utils.metrics import METRICS_DIR
+from src.data_collection.mock_portal import MockPortalServer, MockPortalConfig
+from src.data_collection.portal_session import PortalSession, download_inventory_export
+from src.data_collection.pdf_store import PdfStore
+from src.data_collection.bulk_pdf_downloader import download_pdfs, build_http_session
+
+setup_logging(log_file_prefix="benchmark_collection_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+SCENARIOS = {
+    'local': {},
+    'latency': {'latency': 0.05},
+    'throttled': {'latency': 0.02, 'bandwidth': 2 * 1_048_576, 'max_requests_per_second': 40},
+    'faulty': {'latency': 0.02, 'failure_rate': 0.05, 'drop_rate': 0.05},
+}
+CSRF_PATTERN = re.compile(r'name="_csrf_token" value="([^"]+)"')
+EXPORT_LINK_PATTERN = re.compile(r'<a href="([^"]+)">Descargar Inventario</a>')
+
+
+def login_to_portal(base_url: str, username: str, password: str) -> PortalSession:
+    """
+    Inicia sesión con el formulario del portal (sin navegador) y devuelve una PortalSession.
+
+    Raises:
+        RuntimeError: Si el formulario no trae token o las credenciales no se aceptan.
+    """
+    session = PortalSession({})
+    form = session.http.get(f"{base_url}/login2", timeout=10)
+    match = CSRF_PATTERN.search(form.text)
+    if not match:
+        session.close()
+        raise RuntimeError("El formulario de inicio de sesión no contiene _csrf_token.")
+    response = session.http.post(f"{base_url}/login_check", timeout=10, data={
+        '_username': username, '_password': password, '_csrf_token': match.group(1)})
+    export_link = EXPORT_LINK_PATTERN.search(response.text)
+    if not export_link:
+        session.close()
+        raise RuntimeError("El portal no aceptó las credenciales.")
+    session.state['inventory_export_url'] = base_url + export_link.group(1)
+    return session
+
+
+def run_scenario(name: str, overrides: dict, pdf_count: int, workers: int, pdf_size: int,
+                 work_dir: str) -> dict:
+    """Ejecuta un escenario completo y devuelve sus mediciones."""
+    config = MockPortalConfig(pdf_size=pdf_size, **overrides)
+    property_ids = [str(200000 + i) for i in range(pdf_count)]
+    results = {'scenario': name, 'config': overrides, 'pdfs': pdf_count, 'workers': workers}
+
+    with MockPortalServer(config) as portal:
+        start = time.perf_counter()
+        session = login_to_portal(portal.base_url, config.username, config.password)
+        results['login_seconds'] = time.perf_counter() - start
+
+        destination = os.path.join(work_dir, name, 'inventario.xls')
+        start = time.perf_counter()
+        try:
+            download_inventory_export(session, destination)
+            results['inventory_seconds'] = time.perf_counter() - start
+            results['inventory_mb_per_s'] = os.path.getsize(destination) / 1_048_576 / results['inventory_seconds']
+        except Exception as e:
+            logger.warning(f"[BENCHMARK] {name}: la descarga del inventario falló: {e}")
+            results['inventory_error'] = f"{type(e).__name__}: {e}"
+        finally:
+            session.close()
+
+        store = PdfStore(os.path.join(work_dir, name, 'pdfs'))
+        http = build_http_session(workers)
+        try:
+            for phase, refresh in (('pdf_bulk', False), ('pdf_refresh', True)):
+                bulk = download_pdfs(property_ids, session=http, store=store, max_workers=workers,
+                                     rate_per_host=0, refresh=refresh, pdf_base_url=portal.pdf_base_url)
+                results[phase] = {
+                    'seconds': bulk.elapsed,
+                    'pdfs_per_s': (len(bulk.downloaded) + len(bulk.not_modified)) / max(bulk.elapsed, 1e-9),
+                    'mb_per_s': bulk.bytes_downloaded / 1_048_576 / max(bulk.elapsed, 1e-9),
+                    'downloaded': len(bulk.downloaded),
+                    'not_modified': len(bulk.not_modified),
+                    'failed': len(bulk.failed),
+                }
+        finally:
+            http.close()
+            store.close()
+        results['server'] = {'requests': portal.stats.requests, 'bytes_sent': portal.stats.bytes_sent,
+                             'status_counts': {str(k): v for k, v in sorted(portal.stats.status_counts.items())}}
+    return results
+
+
+def _format_row(result: dict) -> str:
+    bulk, refresh = result['pdf_bulk'], result['pdf_refresh']
+    inventory = (f"{result['inventory_seconds']:.2f}s" if 'inventory_seconds' in result else 'falló')
+    return (f"{result['scenario']:<10} {result['login_seconds']:>7.2f}s {inventory:>10} "
+            f"{bulk['pdfs_per_s']:>9.1f} {bulk['mb_per_s']:>8.1f} {bulk['failed']:>7} "
+            f"{refresh['pdfs_per_s']:>11.1f}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la recolección contra el portal simulado.")
+    parser.add_argument('--pdfs', type=int, default=200, help="PDFs por escenario (por defecto 200).")
+    parser.add_argument('--workers', type=int, default=8, help="Descargas simultáneas (por defecto 8).")
+    parser.add_argument('--pdf-size', type=int, default=200, help="Tamaño de cada PDF en KB (por defecto 200).")
+    parser.add_argument('--scenario', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help="Escenarios a ejecutar (por defecto todos).")
+    parser.add_argument('--output-dir', default=os.path.join(BASE_DIR, METRICS_DIR),
+                        help="Directorio del JSON de resultados.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='benchmark_collection_') as work_dir:
+        for name in args.scenario:
+            logger.info(f"[BENCHMARK] Escenario '{name}': {SCENARIOS[name] or 'sin fallas'}")
+            results.append(run_scenario(name, SCENARIOS[name], args.pdfs, args.workers,
+                                        args.pdf_size * 1024, work_dir))
+
+    print(f"{'escenario':<10} {'login':>8} {'inventario':>10} {'PDFs/s':>9} {'MB/s':>8} {'fallos':>7} {'304/s':>11}")
+    for result in results:
+        print(_format_row(result))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"benchmark_collection_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"[BENCHMARK] Resultados guardados en {output_path}")
+    return 0 if all(not r['pdf_bulk']['failed'] and 'inventory_error' not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+# src/scripts/benchmark_pdf_extraction.py
+
+"""
+Micro-benchmark de la aplicación de plantillas sobre el texto de las fichas técnicas.
+
+Genera un folleto sintético de varias páginas (texto de relleno y los campos en la
+última página, el peor caso) y compara:
+
+    per_pattern   Un recorrido del texto por cada alternativa de cada campo.
+    single_pass   MultiPatternMatcher con todos los campos de la plantilla.
+    columns       MultiPatternMatcher sólo con las columnas pedidas.
+
+Uso:
+    python -m src.scripts.benchmark_pdf_extraction [--pages 20] [--repeat 50] [--columns precio recamaras]
+"""
+
+import random
+import argparse
+import dataclasses
+import timeit
+
+from src.data_processing.pdf_extraction import get_template, extract_fields
+
+FILLER_WORDS = ("casa amplia con jardín cocina integral excelente ubicación cerca de escuelas "
+                "y centros comerciales vigilancia las 24 horas alberca área de juegos roof garden "
+                "acabados de lujo calentador solar cisterna").split()
+FIELDS_PAGE = ("Precio: $3,250,000\nm² de construcción: 180\nSuperficie terreno: 220\n"
+               "Recámaras: 3\nBaños: 2\nCajones: 2\n")
+
+
+def build_brochure(pages: int, lines_per_page: int = 60, seed: int = 21) -> str:
+    """Texto sintético de un folleto con los campos al final."""
+    rng = random.Random(seed)
+    page_texts = ['\n'.join(' '.join(rng.choice(FILLER_WORDS) for _ in range(12)) for _ in range(lines_per_page))
+                  for _ in range(pages)]
+    page_texts[-1] = FIELDS_PAGE + page_texts[-1]
+    return '\n'.join(page_texts)
+
+
+def run(pages: int, repeat: int, columns: list) -> dict:
+    """Devuelve milisegundos por documento de cada estrategia."""
+    template = get_template()
+    per_pattern_template = dataclasses.replace(template, matcher=None)
+    text = build_brochure(pages)
+    strategies = {
+        'per_pattern': lambda: extract_fields(text, per_pattern_template),
+        'single_pass': lambda: extract_fields(text, template),
+        'columns': lambda: extract_fields(text, template, columns),
+    }
+    expected = strategies['per_pattern']()
+    assert strategies['single_pass']() == expected  # Mismos valores, confianzas y expresiones
+    return {name: min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1000
+            for name, func in strategies.items()}
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark de la extracción por plantillas.")
+    parser.add_argument('--pages', type=int, default=20, help="Páginas del folleto sintético (por defecto 20).")
+    parser.add_argument('--repeat', type=int, default=50, help="Repeticiones por medición (por defecto 50).")
+    parser.add_argument('--columns', nargs='+', default=['precio', 'recamaras'],
+                        help="Columnas pedidas para la variante 'columns'.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    timings = run(args.pages, args.repeat, args.columns)
+    baseline = timings['per_pattern']
+    print(f"Folleto sintético de {args.pages} páginas; columnas pedidas: {', '.join(args.columns)}")
+    print(f"{'estrategia':<14} {'ms/doc':>9} {'aceleración':>12}")
+    for name, milliseconds in timings.items():
+        print(f"{name:<14} {milliseconds:>9.2f} {baseline / milliseconds:>11.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
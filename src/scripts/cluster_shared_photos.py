@@ -0,0 +1,76 @@
+# src/scripts/cluster_shared_photos.py
+
+"""
+Propiedades que comparten fotos casi idénticas.
+
+Sin argumentos, reconstruye el índice de fotos (photo_index.py) con los hashes de todas
+las fotos analizadas, agrupa el catálogo completo en clusters de propiedades unidas por
+fotos compartidas y reemplaza con ellos la tabla shared_photo_clusters. El índice
+reconstruido se guarda en data/photo_index.pkl, descartando las fotos de PDFs que ya
+cambiaron, y extract_brochure_images.py le sigue agregando los PDFs nuevos.
+
+Con --property, consulta el índice guardado y muestra las propiedades que comparten
+fotos con la indicada, sin recorrer el catálogo.
+
+Uso:
+    python -m src.scripts.cluster_shared_photos [--radius 6] [--property ID]
+"""
+
+import os
+import logging
+import argparse
+
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.data_processing.photo_index import (
+    PhotoIndex, load_photo_index, cluster_shared_photos, DEFAULT_RADIUS, PHOTO_INDEX_PATH,
+)
+
+load_dotenv()
+setup_logging(log_file_prefix="cluster_shared_photos_log")
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Encuentra propiedades que comparten fotos casi idénticas.")
+    parser.add_argument('--radius', type=int, default=DEFAULT_RADIUS,
+                        help=f"Bits distintos (de 64) entre dos fotos casi idénticas (por defecto {DEFAULT_RADIUS}).")
+    parser.add_argument('--property', default=None, help="Sólo muestra las propiedades que comparten fotos con este 'id'.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from src.data_access.property_repository import PropertyRepository
+
+    args = _parse_args(argv)
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+
+    if args.property is not None:
+        index = load_photo_index(repo.get_photo_hashes)
+        if index is None:
+            logger.error("[PHOTO_INDEX] No se pudieron leer los hashes de las fotos.")
+            return 1
+        shared = index.shared_photos(args.property, radius=args.radius)
+        if shared.empty:
+            print(f"La propiedad {args.property} no comparte fotos con otras propiedades.")
+        else:
+            print(shared.to_string(index=False))
+        return 0
+
+    images = repo.get_photo_hashes()
+    if images is None:
+        logger.error("[PHOTO_INDEX] No se pudieron leer los hashes de las fotos.")
+        return 1
+    index = PhotoIndex.from_frame(images)
+    index.save(PHOTO_INDEX_PATH)
+    clusters = cluster_shared_photos(index, radius=args.radius)
+    return 0 if repo.save_photo_clusters(clusters) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
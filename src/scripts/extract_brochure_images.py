@@ -0,0 +1,135 @@
+# src/scripts/extract_brochure_images.py
+
+"""
+Etapa fuera de línea de fotos de las fichas técnicas.
+
+Para cada propiedad cuyo PDF cambió desde el último análisis (según
+property_image_sources), extrae las fotos, genera sus miniaturas en
+data/thumbnails/ y guarda las calificaciones en property_visual_analysis
+(ver src/data_processing/pdf_images.py). Los PDFs se reparten en un pool de procesos y
+los resultados se guardan en lotes de SAVE_BATCH_SIZE propiedades, así que una
+ejecución interrumpida no pierde lo ya procesado. Cada lote guardado se agrega también
+al índice de fotos compartidas (photo_index.py), que se guarda al terminar.
+
+Uso:
+    python -m src.scripts.extract_brochure_images [--workers N] [--all]
+"""
+
+import os
+import logging
+import argparse
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import load_pdf_paths
+from src.data_processing.pdf_images import extract_images, ImageExtractionError
+from src.data_processing.pdf_extraction_cache import get_extraction_cache
+from src.data_processing.photo_index import load_photo_index, PHOTO_INDEX_PATH
+
+load_dotenv()
+setup_logging(log_file_prefix="extract_brochure_images_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SAVE_BATCH_SIZE = 200
+MAX_TASKS_PER_CHILD = 100
+
+
+def select_pending(pdf_paths: dict, processed: dict, content_hash) -> list:
+    """Tareas (property_id, ruta del PDF, sha256 del PDF) de los PDFs nuevos o cambiados."""
+    tasks = []
+    for property_id, pdf_path in pdf_paths.items():
+        pdf_sha256 = content_hash(pdf_path)
+        if processed.get(property_id) != pdf_sha256:
+            tasks.append((property_id, pdf_path, pdf_sha256))
+    return tasks
+
+
+def _process_task(task: tuple) -> tuple:
+    """Se ejecuta en un proceso del pool: (property_id, sha256 del PDF, fotos o None si falló)."""
+    property_id, pdf_path, pdf_sha256 = task
+    try:
+        return property_id, pdf_sha256, [asdict(image) for image in extract_images(pdf_path)]
+    except ImageExtractionError as e:
+        logger.warning(f"[IMAGES] Propiedad {property_id}: {e}")
+    except Exception as e:
+        logger.error(f"[IMAGES] Error inesperado con el PDF de la propiedad {property_id}: {e}")
+    return property_id, pdf_sha256, None
+
+
+def build_batch(results: list) -> tuple:
+    """DataFrames (sources, images) para PropertyRepository.save_property_images."""
+    results = [(property_id, pdf_sha256, images) for property_id, pdf_sha256, images in results if images is not None]
+    sources = pd.DataFrame([(property_id, pdf_sha256, len(images)) for property_id, pdf_sha256, images in results],
+                           columns=['property_id', 'pdf_sha256', 'image_count'])
+    images = pd.DataFrame([{'property_id': property_id, **image} for property_id, _, images in results for image in images],
+                          columns=['property_id', 'image_sha256', 'page', 'width', 'height', 'resolution_score',
+                                   'sharpness_score', 'brightness_score', 'auto_score', 'phash'])
+    return sources, images
+
+
+def update_photo_index(index, sources: pd.DataFrame, images: pd.DataFrame) -> None:
+    """Sustituye en el índice de fotos las de cada propiedad de un lote ya guardado."""
+    by_property = dict(tuple(images.groupby('property_id')))
+    for property_id in sources['property_id']:
+        index.replace_property(property_id, by_property.get(property_id, images.iloc[0:0]))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extrae y califica las fotos de las fichas técnicas.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de extracción (por defecto, uno por núcleo).")
+    parser.add_argument('--all', action='store_true', help="Reprocesa todos los PDFs aunque no hayan cambiado.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from src.data_access.property_repository import PropertyRepository
+
+    args = _parse_args(argv)
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+    processed = {} if args.all else repo.get_image_sources()
+    if processed is None:
+        logger.error("[IMAGES] No se pudo leer qué PDFs ya se analizaron.")
+        return 1
+
+    pdf_paths = load_pdf_paths(os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR))
+    tasks = select_pending(pdf_paths, processed, get_extraction_cache().content_hash)
+    logger.info(f"[IMAGES] {len(tasks)} de {len(pdf_paths)} PDFs por analizar.")
+    if not tasks:
+        return 0
+
+    photo_index = load_photo_index(repo.get_photo_hashes)
+    if photo_index is None:
+        logger.warning("[IMAGES] Sin índice de fotos; se reconstruirá con src.scripts.cluster_shared_photos.")
+
+    failed_batches = 0
+    batch = []
+    done = 0
+    with ProcessPoolExecutor(max_workers=args.workers, max_tasks_per_child=MAX_TASKS_PER_CHILD) as executor:
+        for result in executor.map(_process_task, tasks, chunksize=4):
+            batch.append(result)
+            done += 1
+            if len(batch) >= SAVE_BATCH_SIZE or done == len(tasks):
+                sources, images = build_batch(batch)
+                if not repo.save_property_images(sources, images):
+                    failed_batches += 1
+                elif photo_index is not None:
+                    update_photo_index(photo_index, sources, images)
+                batch = []
+                logger.info(f"[IMAGES] {done}/{len(tasks)} PDFs analizados.")
+    if photo_index is not None:
+        photo_index.save(PHOTO_INDEX_PATH)
+    return 1 if failed_batches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
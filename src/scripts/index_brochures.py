@@ -0,0 +1,126 @@
+# src/scripts/index_brochures.py
+
+"""
+Índice de búsqueda de texto libre sobre las fichas técnicas (ver
+src/data_processing/brochure_search.py).
+
+Sin --query, actualiza el índice: lee el texto de los PDFs nuevos o cuyo contenido
+cambió desde la última indexación (con la caché de extracción, así que los folletos ya
+leídos por autofill o la conciliación no se vuelven a abrir), los indexa en lotes de
+SAVE_BATCH_SIZE y quita las propiedades cuyo PDF ya no está en el almacén.
+
+Con --query, muestra las propiedades mejor ordenadas por BM25 para la consulta.
+
+Uso:
+    python -m src.scripts.index_brochures [--workers N] [--all]
+    python -m src.scripts.index_brochures --query "alberca techada" [--limit 20]
+"""
+
+import os
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import load_pdf_paths
+from src.data_processing.pdf_extraction import extract_pdf_text, PdfExtractionError
+from src.data_processing.pdf_extraction_cache import get_extraction_cache
+from src.data_processing.brochure_search import BrochureSearchIndex, term_counts, DEFAULT_LIMIT
+
+load_dotenv()
+setup_logging(log_file_prefix="index_brochures_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SAVE_BATCH_SIZE = 500
+MAX_TASKS_PER_CHILD = 200
+
+
+def select_pending(pdf_paths: dict, indexed: dict, content_hash) -> list:
+    """Tareas (property_id, ruta del PDF, sha256 del PDF) de los PDFs nuevos o cambiados."""
+    tasks = []
+    for property_id, pdf_path in pdf_paths.items():
+        pdf_sha256 = content_hash(pdf_path)
+        if indexed.get(property_id) != pdf_sha256:
+            tasks.append((property_id, pdf_path, pdf_sha256))
+    return tasks
+
+
+def _index_task(task: tuple) -> tuple | None:
+    """Se ejecuta en un proceso del pool: (property_id, sha256, términos, longitud) o None si falló."""
+    property_id, pdf_path, pdf_sha256 = task
+    try:
+        counts, length = term_counts(extract_pdf_text(pdf_path, cache=get_extraction_cache()))
+        return property_id, pdf_sha256, counts, length
+    except PdfExtractionError as e:
+        logger.warning(f"[BROCHURE_SEARCH] Propiedad {property_id}: {e}")
+    except Exception as e:
+        logger.error(f"[BROCHURE_SEARCH] Error inesperado con el PDF de la propiedad {property_id}: {e}")
+    return None
+
+
+def update_index(index: BrochureSearchIndex, pdf_paths: dict, workers: int = None, reindex_all: bool = False) -> int:
+    """
+    Sincroniza el índice con los PDFs del almacén.
+
+    Returns:
+        int: PDFs que no se pudieron leer.
+    """
+    indexed = index.indexed()
+    index.remove([property_id for property_id in indexed if property_id not in pdf_paths])
+    tasks = select_pending(pdf_paths, {} if reindex_all else indexed, get_extraction_cache().content_hash)
+    logger.info(f"[BROCHURE_SEARCH] {len(tasks)} de {len(pdf_paths)} PDFs por indexar.")
+    if not tasks:
+        return 0
+
+    failed = 0
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=MAX_TASKS_PER_CHILD) as executor:
+        for done, document in enumerate(executor.map(_index_task, tasks, chunksize=8), start=1):
+            if document is None:
+                failed += 1
+            else:
+                batch.append(document)
+            if len(batch) >= SAVE_BATCH_SIZE or done == len(tasks):
+                index.add_documents(batch)
+                batch = []
+                logger.info(f"[BROCHURE_SEARCH] {done}/{len(tasks)} PDFs procesados.")
+    return failed
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Indexa el texto de las fichas técnicas y busca en él.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de extracción (por defecto, uno por núcleo).")
+    parser.add_argument('--all', action='store_true', help="Vuelve a indexar todos los PDFs aunque no hayan cambiado.")
+    parser.add_argument('--query', default=None, help="Busca en el índice en lugar de actualizarlo.")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f"Resultados a mostrar con --query (por defecto {DEFAULT_LIMIT}).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    index = BrochureSearchIndex()
+    try:
+        if args.query is not None:
+            results = index.search(args.query, limit=args.limit)
+            if results.empty:
+                print(f"Ningún folleto coincide con '{args.query}'.")
+            else:
+                print(results.to_string(index=False))
+            return 0
+
+        pdf_paths = load_pdf_paths(os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR))
+        failed = update_index(index, pdf_paths, workers=args.workers, reindex_all=args.all)
+        if failed:
+            logger.warning(f"[BROCHURE_SEARCH] {failed} PDFs no se pudieron leer; se reintentarán en la próxima ejecución.")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
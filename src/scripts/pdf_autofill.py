@@ -1,6 +1,9 @@
 import logging
 import os
 from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import resolve_pdf_path
+from src.data_processing.pdf_extraction import extract_from_pdf, MIN_CONFIDENCE
+from src.data_processing.pdf_extraction_cache import get_extraction_cache
 
 from src.utils.logging_config import setup_logging
 
@@ -9,26 +12,32 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 setup_logging(log_file_prefix="pdf_autofill_log")
 logger = logging.getLogger(__name__)
 
-def _extract_data_from_pdf_placeholder(pdf_path: str, missing_columns: list) -> dict:
+def _extract_data_from_pdf(pdf_path: str, missing_columns: list) -> dict:
     """
-    Internal placeholder for data extraction from a PDF.
-    This should be replaced with actual OCR/regex logic.
-    In its current state, it returns no data, forcing mocks in tests.
+    Extracts the requested columns from the PDF with the standard template. Results are
+    cached by PDF content hash, so repeated requests for the same brochure skip parsing.
+
+    Returns:
+        dict: column -> ExtractedField, only for fields found with at least MIN_CONFIDENCE.
     """
-    # NOTE: This is a placeholder. The actual implementation will involve
-    # using a library like PyMuPDF to extract and parse text.
-    # Returning an empty dict makes the placeholder inert, which is better for testing,
-    # as it forces tests to mock this function's return value explicitly.
-    logger.info("Using placeholder for PDF data extraction. No real data will be extracted.")
-    return {}
+    extracted = extract_from_pdf(pdf_path, missing_columns, cache=get_extraction_cache())
+    accepted = {}
+    for column, field in extracted.items():
+        if field.confidence >= MIN_CONFIDENCE:
+            accepted[column] = field
+        else:
+            logger.info(f"[PDF_AUTOFILL] Valor descartado para '{column}': {field.raw!r} (confianza {field.confidence:.2f})")
+    return accepted
 
-def autofill_from_pdf(property_id: str, missing_columns: list) -> dict:
+def autofill_from_pdf(property_id: str, missing_columns: list, with_confidence: bool = False) -> dict:
     """
     Attempts to autofill specific missing data for a given property_id from its PDF.
 
     Args:
         property_id (str): The ID of the property.
         missing_columns (list): A list of column names that are missing for this property.
+        with_confidence (bool): If True, values are ExtractedField objects (value, confidence,
+                                raw text and matching pattern) instead of plain values.
 
     Returns:
         dict: A dictionary where keys are column names and values are the autofilled data.
@@ -36,14 +45,16 @@ def autofill_from_pdf(property_id: str, missing_columns: list) -> dict:
     """
     logger.info(f"[PDF_AUTOFILL] Iniciando auto-llenado para propiedad {property_id} y columnas: {missing_columns}")
 
-    pdf_local_path = os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR, f"{property_id}.pdf")
+    pdf_store_dir = os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR)
+    pdf_local_path = resolve_pdf_path(property_id, pdf_store_dir)
 
-    if not os.path.exists(pdf_local_path):
-        logger.warning(f"[PDF_AUTOFILL] PDF no encontrado para la propiedad {property_id} en {pdf_local_path}. No se puede auto-llenar.")
+    if not pdf_local_path:
+        logger.warning(f"[PDF_AUTOFILL] PDF no encontrado para la propiedad {property_id} en {pdf_store_dir}. No se puede auto-llenar.")
         return {}
 
     try:
-        autofilled_data = _extract_data_from_pdf_placeholder(pdf_local_path, missing_columns)
+        extracted = _extract_data_from_pdf(pdf_local_path, missing_columns)
+        autofilled_data = extracted if with_confidence else {column: field.value for column, field in extracted.items()}
         if autofilled_data:
             logger.info(f"[PDF_AUTOFILL] Proceso de auto-llenado completado para {property_id}. Datos encontrados: {autofilled_data}")
         else:
@@ -0,0 +1,85 @@
+# src/scripts/reconcile_pdfs.py
+
+"""
+Conciliación masiva de las fichas técnicas (PDF) contra la base de datos.
+
+Recorre todo el catálogo en una pasada: extrae los campos de la plantilla de cada PDF
+del almacén en un pool de procesos (pdf_batch.py, con la caché de extracción, así que una
+segunda ejecución casi no vuelve a leer PDFs), lee de la base de datos sólo 'id' y esas
+columnas en una sola consulta y compara ambos lados de forma vectorizada
+(pdf_reconciliation.py). El resultado, ordenado por la mayor diferencia de precio, se
+guarda en reports/pdf_discrepancies.csv para revisión.
+
+Uso:
+    python -m src.scripts.reconcile_pdfs [--workers N] [--min-confidence 0.5] [--top 20] [--output ruta.csv]
+"""
+
+import os
+import logging
+import argparse
+
+from dotenv import load_dotenv
+
+from src.utils.logging_config import setup_logging
+from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import load_pdf_paths
+from src.data_processing.pdf_extraction import template_fields, MIN_CONFIDENCE
+from src.data_processing.pdf_batch import run_extraction
+from src.data_processing.pdf_reconciliation import extraction_frame, reconcile
+
+load_dotenv()
+setup_logging(log_file_prefix="reconcile_pdfs_log")
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DISCREPANCIES_PATH = os.path.join(BASE_DIR, 'reports', 'pdf_discrepancies.csv')
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compara los datos de los PDFs con los de la base de datos.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos de extracción (por defecto, uno por núcleo).")
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE,
+                        help=f"Confianza mínima de un valor extraído para compararlo (por defecto {MIN_CONFIDENCE}).")
+    parser.add_argument('--top', type=int, default=20, help="Discrepancias a mostrar en consola (por defecto 20).")
+    parser.add_argument('--output', default=DISCREPANCIES_PATH, help="Ruta del CSV de discrepancias.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from src.data_access.property_repository import PropertyRepository
+
+    args = _parse_args(argv)
+    fields = template_fields()
+    pdf_paths = load_pdf_paths(os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR))
+    if not pdf_paths:
+        logger.warning("[RECONCILE] No hay PDFs en el almacén; nada que comparar.")
+        return 0
+
+    repo = PropertyRepository(
+        db=os.environ.get('REI_DB_NAME'), user=os.environ.get('REI_DB_USER'),
+        pwd=os.environ.get('REI_DB_PASSWORD'), host=os.environ.get('REI_DB_HOST'),
+        port=os.environ.get('REI_DB_PORT'),
+    )
+    db_values = repo.get_property_columns(fields, property_ids=list(pdf_paths))
+    if db_values is None:
+        logger.error("[RECONCILE] No se pudieron leer las propiedades de la base de datos.")
+        return 1
+
+    # Sólo se extraen los PDFs de propiedades que siguen en la base de datos
+    tasks = [(property_id, pdf_paths[property_id], fields) for property_id in db_values['id'].astype(str)]
+    logger.info(f"[RECONCILE] Extrayendo {len(fields)} campos de {len(tasks)} PDFs.")
+    results = run_extraction(tasks, workers=args.workers)
+    discrepancies = reconcile(extraction_frame(results), db_values, args.min_confidence)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    discrepancies.to_csv(args.output, index=False)
+    logger.info(f"[RECONCILE] {len(discrepancies)} discrepancias guardadas en {args.output}")
+    if discrepancies.empty:
+        print("Sin discrepancias entre los PDFs y la base de datos.")
+    else:
+        print(discrepancies.head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+# src/utils/compact_dtypes.py
+
+"""
+Modo de tipos compactos para DataFrames de propiedades.
+
+A partir del esquema declarativo (src/utils/schema.py) convierte:
+    - enumeraciones y columnas de baja cardinalidad a 'category';
+    - el resto de columnas de texto a cadenas respaldadas por Arrow;
+    - flotantes marcados con compact_float a float32;
+    - enteros nulables al tipo entero más pequeño que contiene sus valores
+      (Arrow si pyarrow está disponible, nullable de pandas si no).
+
+pyarrow es opcional: sin él se usan los tipos 'string' e 'Int8/16/32' de pandas.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.utils.schema import PROPERTY_SCHEMA, KIND_TEXT, KIND_FLOAT, KIND_INTEGER
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow es opcional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+_INTEGER_CANDIDATES = (
+    (np.iinfo(np.int8), 'Int8', 'int8'),
+    (np.iinfo(np.int16), 'Int16', 'int16'),
+    (np.iinfo(np.int32), 'Int32', 'int32'),
+)
+
+
+def string_dtype():
+    """Tipo de cadena compacto: Arrow si está disponible."""
+    return pd.StringDtype('pyarrow') if pa is not None else pd.StringDtype('python')
+
+
+def _smallest_integer_dtype(series: pd.Series):
+    values = series.dropna()
+    low, high = (values.min(), values.max()) if not values.empty else (0, 0)
+    for info, pandas_name, arrow_name in _INTEGER_CANDIDATES:
+        if info.min <= low and high <= info.max:
+            return pd.ArrowDtype(getattr(pa, arrow_name)()) if pa is not None else pandas_name
+    return pd.ArrowDtype(pa.int64()) if pa is not None else 'Int64'
+
+
+def _compact_column(series: pd.Series, spec):
+    if spec.kind == KIND_TEXT:
+        if spec.categorical:
+            return series.astype('category')
+        return series.astype(string_dtype())
+    if spec.kind == KIND_FLOAT and spec.compact_float:
+        return pd.to_numeric(series, errors='coerce').astype('float32')
+    if spec.kind == KIND_INTEGER:
+        numeric = pd.to_numeric(series, errors='coerce')
+        return numeric.astype(_smallest_integer_dtype(numeric))
+    return series
+
+
+def compact_frame(df: pd.DataFrame, specs=PROPERTY_SCHEMA) -> pd.DataFrame:
+    """
+    Devuelve una copia del DataFrame con tipos compactos según el esquema.
+    Las columnas que no están en el esquema se conservan sin cambios.
+    """
+    if df.empty:
+        return df
+    specs_by_name = {spec.name: spec for spec in specs}
+    columns = {
+        col: _compact_column(df[col], specs_by_name[col]) if col in specs_by_name else df[col]
+        for col in df.columns
+    }
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compara el uso de memoria (deep) por columna antes y después de compactar.
+
+    Returns:
+        pd.DataFrame: Columnas dtype_before, dtype_after, bytes_before, bytes_after y
+                      reduction_pct, con una fila 'TOTAL' al final.
+    """
+    bytes_before = before.memory_usage(deep=True, index=False)
+    bytes_after = after.memory_usage(deep=True, index=False).reindex(bytes_before.index)
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+    })
+    report.loc['TOTAL'] = ['', '', bytes_before.sum(), bytes_after.sum()]
+    report['reduction_pct'] = (
+        100 * (1 - report['bytes_after'].astype(float) / report['bytes_before'].replace(0, np.nan).astype(float))
+    ).round(1)
+    return report
+
+
+def log_memory_report(before: pd.DataFrame, after: pd.DataFrame, label: str) -> pd.DataFrame:
+    """Calcula el reporte de memoria y lo registra en el log."""
+    report = memory_report(before, after)
+    total = report.loc['TOTAL']
+    logger.info(
+        f"[COMPACT] {label}: {total['bytes_before'] / 1024:.1f} KiB -> {total['bytes_after'] / 1024:.1f} KiB "
+        f"({total['reduction_pct']}% menos)\n{report.to_string()}"
+    )
+    return report
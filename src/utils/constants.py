@@ -1,5 +1,7 @@
 # src/utils/constants.py
 
+from src.utils.schema import PERSISTED_COLUMNS
+
 # --- Estatus de Propiedad ---
 STATUS_EN_PROMOCION = 'enPromocion'
 STATUS_CON_INTENCION = 'conIntencion'
@@ -30,15 +32,17 @@ DEFAULT_IS_EXCLUSIVE_FILTER = True
 DEFAULT_HAS_OPTION_FILTER = False
 
 # --- Columnas de Base de Datos ---
-DB_COLUMNS = [
-    'id', 'fecha_alta', 'status', 'tipo_operacion', 'tipo_contrato', 'en_internet',
-    'clave', 'clave_oficina', 'subtipo_propiedad', 'calle', 'numero',
-    'colonia', 'municipio', 'latitud', 'longitud', 'codigo_postal',
-    'precio', 'comision', 'comision_compartir_externas', 'm2_construccion',
-    'm2_terreno', 'recamaras', 'banos_totales', 'cocina',
-    'niveles_construidos', 'edad', 'estacionamientos', 'descripcion',
-    'nombre_agente', 'apellido_paterno_agente', 'apellido_materno_agente'
-]
+# Generadas a partir del esquema declarativo (src/utils/schema.py)
+DB_COLUMNS = list(PERSISTED_COLUMNS)
 
 # --- PDF Download Directory ---
-PDF_DOWNLOAD_BASE_DIR = "data/pdfs"  # Directory for downloaded PDFs
\ No newline at end of file
+PDF_DOWNLOAD_BASE_DIR = "data/pdfs"  # Directory for downloaded PDFs
+
+# --- Snapshot del inventario limpio (para cargas incrementales) ---
+SNAPSHOT_DIR = "data/snapshots"
+
+# --- Checkpoints del pipeline de ingesta (src/pipeline) ---
+PIPELINE_RUNS_DIR = "data/pipeline_runs"
+
+# --- Sesión del portal cifrada (descargas sin navegador) ---
+SESSION_CACHE_DIR = "data/session"
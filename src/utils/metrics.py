@@ -0,0 +1,287 @@
+# src/utils/metrics.py
+
+"""
+Instrumentación de etapas del pipeline.
+
+Un PipelineRun agrupa las etapas de una ejecución (limpieza, validación, carga, ...)
+y registra para cada una su duración, filas procesadas, filas por segundo y el pico
+de memoria medido con tracemalloc. Al finalizar se emite un registro JSON legible por
+máquina y un archivo en formato de texto de Prometheus (textfile collector).
+
+Uso:
+    with PipelineRun('clean_data') as run:
+        with run.stage('read') as stage:
+            df = ...
+            stage.rows = len(df)
+
+    @instrumented('clean')
+    def clean(...): ...
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'reports', 'metrics'))
+METRIC_PREFIX = 'rei_pipeline'
+
+_active_runs = []
+
+
+@dataclass
+class StageRecord:
+    """Métricas de una etapa individual."""
+    name: str
+    started_at: str
+    duration_seconds: float = 0.0
+    rows: int | None = None
+    peak_memory_bytes: int | None = None
+    status: str = 'ok'
+    error: str | None = None
+    counters: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.rows is None or self.duration_seconds <= 0:
+            return None
+        return self.rows / self.duration_seconds
+
+    def incr(self, counter: str, value: int = 1):
+        """Incrementa un contador libre de la etapa (p. ej. 'rows_rejected')."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['rows_per_second'] = self.rows_per_second
+        return data
+
+
+class PipelineRun:
+    """
+    Ejecución instrumentada del pipeline. Se usa como context manager; mientras está
+    activa, las funciones decoradas con @instrumented registran sus etapas en ella.
+    """
+
+    def __init__(self, pipeline: str, metrics_dir: str = None, trace_memory: bool = True):
+        self.pipeline = pipeline
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.metrics_dir = metrics_dir or METRICS_DIR
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_at = None
+        self.duration_seconds = 0.0
+        self.status = 'ok'
+        self._start = None
+        self._owns_tracemalloc = False
+        self._open_peaks = {}
+        self._lock = threading.Lock()
+
+    # --- Ciclo de vida ---
+    def __enter__(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        _active_runs.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_seconds = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.status = 'failed'
+        if self in _active_runs:
+            _active_runs.remove(self)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        try:
+            self.write()
+        except OSError as e:
+            logger.error(f"[METRICS] No se pudo escribir el registro de la ejecución {self.run_id}: {e}")
+        return False
+
+    # --- Etapas ---
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        """
+        Mide una etapa. El registro devuelto permite fijar `rows` e incrementar
+        contadores dentro del bloque.
+        """
+        record = StageRecord(name=name, started_at=datetime.now(timezone.utc).isoformat(), rows=rows)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Acumular el pico actual en las etapas abiertas (anidadas o concurrentes)
+            # antes de reiniciarlo para medir esta etapa.
+            with self._lock:
+                self._fold_peak_into_open_stages()
+                self._open_peaks[id(record)] = 0
+                tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.status = 'failed'
+            record.error = f"{type(e).__name__}: {e}"
+            self.status = 'failed'
+            raise
+        finally:
+            record.duration_seconds = time.perf_counter() - start
+            if tracing:
+                with self._lock:
+                    self._fold_peak_into_open_stages()
+                    record.peak_memory_bytes = self._open_peaks.pop(id(record))
+            self.stages.append(record)
+            logger.info(
+                f"[METRICS] Etapa '{name}' {record.status} en {record.duration_seconds:.3f}s"
+                f" - filas: {record.rows if record.rows is not None else 'n/d'}"
+                f" - pico de memoria: {_format_bytes(record.peak_memory_bytes)}"
+            )
+
+    def _fold_peak_into_open_stages(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for key, value in self._open_peaks.items():
+            self._open_peaks[key] = max(value, peak)
+
+    # --- Exportación ---
+    def to_dict(self) -> dict:
+        return {
+            'pipeline': self.pipeline,
+            'run_id': self.run_id,
+            'started_at': self.started_at,
+            'duration_seconds': self.duration_seconds,
+            'status': self.status,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def to_prometheus(self) -> str:
+        """Devuelve las métricas de la ejecución en formato de texto de Prometheus."""
+        pipeline = _escape_label(self.pipeline)
+        lines = []
+
+        def metric(name, help_text, metric_type, samples):
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in samples:
+                label_str = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{full_name}{{{label_str}}} {value}")
+
+        base = {'pipeline': pipeline}
+        metric('run_duration_seconds', 'Duración total de la ejecución.', 'gauge',
+               [(base, f"{self.duration_seconds:.6f}")])
+        metric('run_success', '1 si la última ejecución terminó sin errores.', 'gauge',
+               [(base, 1 if self.status == 'ok' else 0)])
+        metric('run_timestamp_seconds', 'Marca de tiempo Unix del fin de la ejecución.', 'gauge',
+               [(base, f"{time.time():.0f}")])
+
+        # Si una etapa se repite, se reporta la suma de duraciones y filas
+        totals = {}
+        for stage in self.stages:
+            entry = totals.setdefault(stage.name, {'duration': 0.0, 'rows': None, 'peak': None})
+            entry['duration'] += stage.duration_seconds
+            if stage.rows is not None:
+                entry['rows'] = (entry['rows'] or 0) + stage.rows
+            if stage.peak_memory_bytes is not None:
+                entry['peak'] = max(entry['peak'] or 0, stage.peak_memory_bytes)
+
+        def stage_samples(key, fmt=str):
+            return [({**base, 'stage': _escape_label(name)}, fmt(values[key]))
+                    for name, values in totals.items() if values[key] is not None]
+
+        metric('stage_duration_seconds', 'Duración de la etapa.', 'gauge',
+               stage_samples('duration', lambda v: f"{v:.6f}"))
+        metric('stage_rows', 'Filas procesadas por la etapa.', 'gauge', stage_samples('rows'))
+        metric('stage_rows_per_second', 'Throughput de la etapa en filas por segundo.', 'gauge',
+               [({**base, 'stage': _escape_label(name)}, f"{values['rows'] / values['duration']:.3f}")
+                for name, values in totals.items() if values['rows'] is not None and values['duration'] > 0])
+        metric('stage_peak_memory_bytes', 'Pico de memoria de Python (tracemalloc) durante la etapa.', 'gauge',
+               stage_samples('peak'))
+        return '\n'.join(lines) + '\n'
+
+    def write(self) -> tuple:
+        """
+        Escribe <run_id>.json y <pipeline>.prom en el directorio de métricas.
+        El archivo .prom se sobrescribe en cada ejecución, como espera el textfile collector.
+        """
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        json_path = os.path.join(self.metrics_dir, f"{self.pipeline}_{self.run_id}.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+        prom_path = os.path.join(self.metrics_dir, f"{self.pipeline}.prom")
+        tmp_path = prom_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, prom_path)
+
+        logger.info(f"[METRICS] Registro de ejecución guardado en {json_path} y {prom_path}")
+        return json_path, prom_path
+
+
+def get_active_run() -> PipelineRun | None:
+    """Devuelve la ejecución instrumentada activa más interna, si existe."""
+    return _active_runs[-1] if _active_runs else None
+
+
+@contextmanager
+def stage(name: str, rows: int = None):
+    """
+    Mide una etapa en la ejecución activa. Sin ejecución activa no registra nada,
+    de modo que las funciones instrumentadas siguen funcionando de forma aislada.
+    """
+    run = get_active_run()
+    if run is None:
+        yield StageRecord(name=name, started_at=datetime.now(timezone.utc).isoformat(), rows=rows)
+        return
+    with run.stage(name, rows=rows) as record:
+        yield record
+
+
+def _count_rows(result, args, kwargs) -> int | None:
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return len(value)
+    return None
+
+
+def instrumented(stage_name: str):
+    """
+    Decorador que registra la función como etapa de la ejecución activa.
+    Las filas se toman del DataFrame devuelto o, si no devuelve uno, del primer
+    DataFrame recibido como argumento.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                record.rows = _count_rows(result, args, kwargs)
+                return result
+        return wrapper
+    return decorator
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bytes(value: int | None) -> str:
+    if value is None:
+        return 'n/d'
+    return f"{value / (1024 * 1024):.1f} MiB"
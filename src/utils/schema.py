@@ -0,0 +1,259 @@
+# src/utils/schema.py
+
+"""
+Esquema declarativo de la tabla 'properties'.
+
+Cada columna se describe una sola vez (alias en el Excel de origen, tipo de pandas,
+tipo en PostgreSQL, nulabilidad, valor por defecto y prioridad de validación).
+El limpiador, el validador, el codificador del repositorio y el DDL se generan a
+partir de PROPERTY_SCHEMA, de modo que no existan definiciones duplicadas.
+"""
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Tipos lógicos soportados por el coercionador
+KIND_TEXT = 'text'
+KIND_INTEGER = 'integer'
+KIND_FLOAT = 'float'
+KIND_BOOLEAN = 'boolean'
+KIND_DATE = 'date'
+
+# Valores de texto que se interpretan como verdadero en columnas booleanas
+TRUE_TOKENS = ('si', 'sí', 's', 'true', 'verdadero', 'yes', 'y', 'x')
+
+# Prioridades de validación, en el orden en que se reportan
+PRIORITIES = ('critical', 'recommended', 'optional')
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """Definición declarativa de una columna del inventario."""
+    name: str
+    kind: str
+    db_type: str | None = None  # None: columna sólo de origen, no se persiste
+    aliases: tuple = ()
+    nullable: bool = True
+    default: object = None
+    primary_key: bool = False
+    allowed_values: tuple = ()
+    min_value: float | None = None
+    priority: str | None = 'optional'
+    strip_thousands: bool = False
+    categorical: bool = False  # Enumeración o columna de baja cardinalidad
+    compact_float: bool = False  # float32 (~7 dígitos significativos) representa todo el rango del tipo en DB
+
+    @property
+    def source_names(self) -> tuple:
+        """Nombres aceptados en el archivo de origen, empezando por el canónico."""
+        return (self.name,) + tuple(a for a in self.aliases if a != self.name)
+
+    @property
+    def pandas_dtype(self) -> str:
+        return {
+            KIND_TEXT: 'object',
+            KIND_INTEGER: 'Int64',
+            KIND_FLOAT: 'float64',
+            KIND_BOOLEAN: 'bool',
+            KIND_DATE: 'datetime64[ns]',
+        }[self.kind]
+
+    def ddl(self) -> str:
+        """Devuelve la definición SQL de la columna."""
+        parts = [self.name, self.db_type]
+        if self.primary_key:
+            parts.append('PRIMARY KEY')
+        elif not self.nullable:
+            parts.append('NOT NULL')
+        if self.allowed_values:
+            values = ', '.join(f"'{v}'" for v in self.allowed_values)
+            parts.append(f"CHECK ({self.name} IN ({values}))")
+        elif self.min_value is not None:
+            parts.append(f"CHECK ({self.name} >= {self.min_value:g})")
+        return ' '.join(parts)
+
+
+PROPERTY_SCHEMA = (
+    ColumnSpec('id', KIND_TEXT, 'VARCHAR(255)', primary_key=True, nullable=False, priority='critical'),
+    ColumnSpec('fecha_alta', KIND_DATE, 'DATE', aliases=('fechaAlta',)),
+    ColumnSpec('status', KIND_TEXT, 'VARCHAR(50)', nullable=False, priority='critical', categorical=True,
+               allowed_values=('enPromocion', 'conIntencion', 'vendidas')),
+    ColumnSpec('tipo_operacion', KIND_TEXT, 'VARCHAR(50)', aliases=('tipoOperacion',), nullable=False,
+               priority='critical', categorical=True, allowed_values=('venta', 'renta', 'traspaso', 'opcion')),
+    ColumnSpec('tipo_contrato', KIND_TEXT, 'VARCHAR(50)', aliases=('tipoDeContrato',), nullable=False,
+               priority='critical', categorical=True, allowed_values=('exclusiva', 'opcion', 'abierta')),
+    ColumnSpec('en_internet', KIND_BOOLEAN, 'BOOLEAN', aliases=('enInternet',), default=False),
+    ColumnSpec('clave', KIND_TEXT, 'VARCHAR(255)'),
+    ColumnSpec('clave_oficina', KIND_TEXT, 'VARCHAR(255)', aliases=('claveOficina',), categorical=True),
+    ColumnSpec('subtipo_propiedad', KIND_TEXT, 'VARCHAR(255)', aliases=('subtipoPropiedad',),
+               priority='recommended', categorical=True),
+    ColumnSpec('calle', KIND_TEXT, 'VARCHAR(255)', priority='recommended'),
+    ColumnSpec('numero', KIND_TEXT, 'VARCHAR(50)', default='', priority='recommended'),
+    ColumnSpec('colonia', KIND_TEXT, 'VARCHAR(255)', nullable=False, priority='critical', categorical=True),
+    ColumnSpec('municipio', KIND_TEXT, 'VARCHAR(255)', nullable=False, priority='critical', categorical=True),
+    ColumnSpec('latitud', KIND_FLOAT, 'DECIMAL(10, 8)', nullable=False, priority='critical'),
+    ColumnSpec('longitud', KIND_FLOAT, 'DECIMAL(11, 8)', nullable=False, priority='critical'),
+    ColumnSpec('codigo_postal', KIND_TEXT, 'VARCHAR(10)', aliases=('codigoPostal',), default='',
+               priority='recommended'),
+    ColumnSpec('precio', KIND_FLOAT, 'DECIMAL(18, 2)', nullable=False, min_value=0, priority='critical',
+               strip_thousands=True),
+    ColumnSpec('comision', KIND_FLOAT, 'DECIMAL(5, 2)', priority='recommended', compact_float=True),
+    ColumnSpec('comision_compartir_externas', KIND_FLOAT, 'DECIMAL(5, 2)',
+               aliases=('comisionACompartirInmobiliariasExternas',), compact_float=True),
+    ColumnSpec('m2_construccion', KIND_FLOAT, 'DECIMAL(10, 2)', aliases=('m2C',), nullable=False,
+               min_value=0, priority='critical', strip_thousands=True),
+    ColumnSpec('m2_terreno', KIND_FLOAT, 'DECIMAL(10, 2)', aliases=('m2T',), nullable=False,
+               min_value=0, priority='critical', strip_thousands=True),
+    ColumnSpec('recamaras', KIND_INTEGER, 'INTEGER', nullable=False, min_value=0, priority='critical'),
+    ColumnSpec('banos_totales', KIND_FLOAT, 'DECIMAL(4, 1)', nullable=False, min_value=0,
+               priority='critical', compact_float=True),
+    ColumnSpec('cocina', KIND_BOOLEAN, 'BOOLEAN', default=False),
+    ColumnSpec('niveles_construidos', KIND_INTEGER, 'INTEGER', aliases=('nivelesConstruidos',)),
+    ColumnSpec('edad', KIND_INTEGER, 'INTEGER', priority='recommended'),
+    ColumnSpec('estacionamientos', KIND_INTEGER, 'INTEGER', priority='critical'),
+    ColumnSpec('descripcion', KIND_TEXT, 'TEXT', nullable=False, priority='critical'),
+    ColumnSpec('nombre_agente', KIND_TEXT, 'VARCHAR(255)', aliases=('nombre',), priority='recommended',
+               categorical=True),
+    ColumnSpec('apellido_paterno_agente', KIND_TEXT, 'VARCHAR(255)', aliases=('apellidoP',),
+               priority='recommended', categorical=True),
+    ColumnSpec('apellido_materno_agente', KIND_TEXT, 'VARCHAR(255)', aliases=('apellidoM',),
+               categorical=True),
+    # Columnas sólo de origen: se usan para derivar banos_totales y no se persisten.
+    ColumnSpec('banos', KIND_FLOAT, aliases=('Banos', 'Banio', 'Banios', 'banios'), default=0.0,
+               priority=None, strip_thousands=True),
+    ColumnSpec('medios_banos', KIND_FLOAT, aliases=('mediosbanos', 'MediosBanos', 'MediosBanios', 'mediosBanios'),
+               default=0.0, priority=None, strip_thousands=True),
+)
+
+SCHEMA_BY_NAME = {spec.name: spec for spec in PROPERTY_SCHEMA}
+
+# Columnas persistidas en la tabla 'properties', en el orden del DDL
+PERSISTED_COLUMNS = [spec.name for spec in PROPERTY_SCHEMA if spec.db_type is not None]
+
+# Columnas que se calculan en el limpiador en lugar de leerse del Excel
+DERIVED_COLUMNS = ('banos_totales',)
+
+
+def column_priority() -> dict:
+    """Genera la matriz de prioridad de columnas usada por el validador."""
+    return {
+        priority: [spec.name for spec in PROPERTY_SCHEMA if spec.priority == priority]
+        for priority in PRIORITIES
+    }
+
+
+def build_read_dtypes() -> dict:
+    """
+    Tipos a pasar a pd.read_excel: las columnas de texto se leen como str para no
+    perder ceros a la izquierda ni convertir códigos postales en '12345.0'.
+    """
+    return {
+        source: str
+        for spec in PROPERTY_SCHEMA if spec.kind == KIND_TEXT
+        for source in spec.source_names
+    }
+
+
+def build_table_ddl(table_name: str = 'properties') -> str:
+    """Genera la sentencia CREATE TABLE para la tabla de propiedades."""
+    column_lines = [spec.ddl() for spec in PROPERTY_SCHEMA if spec.db_type is not None]
+    column_lines += [
+        'created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP',
+        'updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP',
+    ]
+    body = ',\n    '.join(column_lines)
+    return f"CREATE TABLE IF NOT EXISTS {table_name} (\n    {body}\n);\n"
+
+
+def _pick_source_column(df: pd.DataFrame, spec: ColumnSpec):
+    for source in spec.source_names:
+        if source in df.columns:
+            return df[source]
+    return None
+
+
+def _to_numeric(series: pd.Series, spec: ColumnSpec) -> pd.Series:
+    if series.dtype == object:
+        text = series.astype('string').str.strip()
+        if spec.strip_thousands:
+            text = text.str.replace(r'[,$\s]', '', regex=True)
+        series = text.replace('', pd.NA)
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _coerce_column(series: pd.Series, spec: ColumnSpec) -> pd.Series:
+    if spec.kind == KIND_TEXT:
+        if spec.default is not None:
+            series = series.fillna(spec.default)
+        return series.astype(object)
+
+    if spec.kind == KIND_DATE:
+        return pd.to_datetime(series, errors='coerce')
+
+    if spec.kind == KIND_BOOLEAN:
+        tokens = series.astype('string').str.strip().str.lower()
+        numeric = pd.to_numeric(series, errors='coerce')
+        truthy = tokens.isin(TRUE_TOKENS).fillna(False) | numeric.fillna(0).ne(0)
+        return truthy.astype(bool)
+
+    numeric = _to_numeric(series, spec)
+    if spec.default is not None:
+        numeric = numeric.fillna(spec.default)
+    if spec.kind == KIND_INTEGER:
+        return numeric.round().astype('Int64')
+    return numeric.astype('float64')
+
+
+def _default_column(spec: ColumnSpec, index: pd.Index) -> pd.Series:
+    if spec.default is not None:
+        return pd.Series(spec.default, index=index, dtype=spec.pandas_dtype)
+    return pd.Series(index=index, dtype=spec.pandas_dtype)
+
+
+def coerce_frame(raw_df: pd.DataFrame, specs=PROPERTY_SCHEMA) -> pd.DataFrame:
+    """
+    Convierte un DataFrame crudo al esquema en una sola pasada vectorizada.
+
+    Resuelve alias, aplica el tipo destino y los valores por defecto de cada columna
+    y construye el DataFrame resultante de una vez. Las columnas ausentes en el
+    origen se crean con su valor por defecto (o nulo); las columnas desconocidas
+    se descartan.
+
+    Returns:
+        pd.DataFrame: DataFrame con una columna por especificación, en orden de esquema.
+    """
+    columns = {}
+    for spec in specs:
+        if spec.name in DERIVED_COLUMNS:
+            continue
+        source = _pick_source_column(raw_df, spec)
+        if source is None:
+            columns[spec.name] = _default_column(spec, raw_df.index)
+        else:
+            columns[spec.name] = _coerce_column(source, spec)
+    return pd.DataFrame(columns, index=raw_df.index)
+
+
+def _encode_column(series: pd.Series) -> list:
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+def encode_records(df: pd.DataFrame, columns) -> list:
+    """
+    Codifica las columnas indicadas como tuplas de tipos nativos de Python
+    (int, float, bool, datetime, None) aptas para psycopg2, sin iterar filas en pandas.
+    """
+    encoded = [_encode_column(df[col]) for col in columns]
+    return list(zip(*encoded)) if encoded else []
+
+
+def blank_mask(df: pd.DataFrame, column: str) -> pd.Series:
+    """Máscara de celdas vacías: nulos o cadenas en blanco."""
+    series = df[column]
+    mask = series.isna()
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        mask |= series.astype('string').str.strip().eq('').fillna(False)
+    return mask.astype(bool)
+
@@ -0,0 +1,80 @@
+# src/utils/text_normalization.py
+
+"""
+Normalización de texto en español para comparar direcciones y descripciones:
+minúsculas, sin acentos, sin puntuación y con abreviaturas comunes unificadas.
+Para la búsqueda en texto libre, además, sin palabras vacías y con plurales reducidos
+a singular.
+"""
+
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Abreviaturas frecuentes en direcciones del inventario
+ADDRESS_ABBREVIATIONS = {
+    'av': 'avenida', 'ave': 'avenida', 'avda': 'avenida',
+    'blvd': 'boulevard', 'blvr': 'boulevard', 'bulevar': 'boulevard',
+    'c': 'calle', 'cll': 'calle',
+    'priv': 'privada', 'pvda': 'privada',
+    'prol': 'prolongacion', 'fracc': 'fraccionamiento', 'col': 'colonia',
+    'cda': 'cerrada', 'cjon': 'callejon', 'carr': 'carretera',
+    'pte': 'poniente', 'ote': 'oriente', 'nte': 'norte',
+}
+
+# Palabras que no aportan para distinguir una dirección de otra
+ADDRESS_STOPWORDS = frozenset({'de', 'del', 'la', 'las', 'el', 'los', 'y', 'no', 'num', 'numero', 'calle', 'colonia', 'sn'})
+
+# Palabras vacías del español (ya sin acentos) que no sirven para buscar
+SEARCH_STOPWORDS = frozenset({
+    'a', 'al', 'ante', 'con', 'como', 'cual', 'de', 'del', 'desde', 'donde', 'e', 'el', 'ella', 'en', 'entre',
+    'es', 'esta', 'este', 'esto', 'hay', 'la', 'las', 'le', 'lo', 'los', 'mas', 'muy', 'ni', 'no', 'o', 'para',
+    'pero', 'por', 'que', 'se', 'sin', 'sobre', 'son', 'su', 'sus', 'tiene', 'u', 'un', 'una', 'uno', 'y', 'ya',
+})
+
+
+def fold_accents(text: str) -> str:
+    """Elimina acentos y diacríticos ('Peñasco' -> 'Penasco')."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_text(text) -> str:
+    """Minúsculas, sin acentos y con cualquier carácter no alfanumérico como espacio."""
+    if text is None or text != text:  # None o NaN
+        return ''
+    return _NON_ALNUM.sub(' ', fold_accents(str(text)).lower()).strip()
+
+
+def tokenize(text) -> list:
+    """Tokens alfanuméricos del texto normalizado."""
+    normalized = normalize_text(text)
+    return normalized.split() if normalized else []
+
+
+def address_tokens(*parts) -> frozenset:
+    """Conjunto de tokens de una dirección con abreviaturas expandidas y sin palabras vacías."""
+    tokens = set()
+    for part in parts:
+        for token in tokenize(part):
+            token = ADDRESS_ABBREVIATIONS.get(token, token)
+            if token not in ADDRESS_STOPWORDS:
+                tokens.add(token)
+    return frozenset(tokens)
+
+
+def singular(token: str) -> str:
+    """Plural español a singular con reglas simples ('jardines' -> 'jardin', 'luces' -> 'luz')."""
+    if len(token) > 4 and token.endswith('ces'):
+        return token[:-3] + 'z'
+    if len(token) > 4 and token.endswith('es') and token[-3] in 'dlnrj' and token[-4] != token[-3]:
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss') and not token[-2].isdigit():
+        return token[:-1]
+    return token
+
+
+def search_terms(text) -> list:
+    """Términos para búsqueda en texto libre: tokens normalizados, sin palabras vacías y en singular."""
+    return [singular(token) for token in tokenize(text) if token not in SEARCH_STOPWORDS]
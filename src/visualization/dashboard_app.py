@@ -21,14 +21,17 @@ from src.utils.constants import (
     DEFAULT_MIN_PRICE, DEFAULT_MAX_PRICE, DEFAULT_PROPERTY_OPERATION_TYPE,
     DEFAULT_MIN_BEDROOMS, DEFAULT_MIN_BATHROOMS, DEFAULT_MAX_AGE_YEARS,
     DEFAULT_MIN_CONSTRUCTION_M2, DEFAULT_MIN_LAND_M2, DEFAULT_KEYWORDS_DESCRIPTION, DEFAULT_IS_EXCLUSIVE_FILTER, DEFAULT_HAS_OPTION_FILTER,
-    PDF_DOWNLOAD_BASE_DIR
 )
 from src.data_access.property_repository import PropertyRepository
 from src.visualization.dashboard_logic import apply_dashboard_transformations
 from src.data_processing.data_validator import get_incomplete_properties, COLUMN_PRIORITY
 from src.data_collection.download_pdf import download_property_pdf
+from src.data_collection.bulk_pdf_downloader import download_pdfs
+from src.data_collection.pdf_store import load_pdf_paths
 from src.scripts.pdf_autofill import autofill_from_pdf
 from src.scripts.apply_manual_fixes import apply_manual_fixes
+from src.data_processing.pdf_images import thumbnail_path
+from src.data_processing.brochure_search import BrochureSearchIndex
 
 # Initialize PropertyRepository with environment variables
 property_repo = PropertyRepository(
@@ -168,6 +171,9 @@ selected_has_parking = st.sidebar.radio('¿Tiene Estacionamiento?',
 # Palabras Clave en Descripción
 keywords_description_input = st.sidebar.text_input('Palabras Clave en Descripción (separadas por coma)', value=DEFAULT_KEYWORDS_DESCRIPTION)
 
+# Búsqueda dentro de las fichas técnicas (índice de src/scripts/index_brochures.py)
+brochure_query_input = st.sidebar.text_input('Buscar en las Fichas Técnicas (PDF)', value='')
+
 # Filtro para propiedades con datos faltantes críticos
 filter_missing_critical = st.sidebar.checkbox('Mostrar solo propiedades con datos críticos faltantes', value=False)
 
@@ -190,6 +196,17 @@ properties_df = property_repo.get_properties_from_db(
     filter_missing_critical=filter_missing_critical
 )
 
+if brochure_query_input.strip() and not properties_df.empty:
+    # Sólo las propiedades cuyo folleto coincide, de la mejor a la peor coincidencia (BM25)
+    brochure_index = BrochureSearchIndex()
+    try:
+        brochure_matches = brochure_index.search(brochure_query_input, limit=None)
+    finally:
+        brochure_index.close()
+    brochure_rank = {property_id: rank for rank, property_id in enumerate(brochure_matches['property_id'])}
+    properties_df = properties_df[properties_df['id'].astype(str).isin(brochure_rank)]
+    properties_df = properties_df.sort_values('id', key=lambda ids: ids.astype(str).map(brochure_rank))
+
 if not properties_df.empty:
     st.subheader('Propiedades Seleccionadas')
 
@@ -197,6 +214,21 @@ if not properties_df.empty:
 
     st.write(f"Total de propiedades encontradas: {len(properties_df)}")
 
+    # Descarga en paralelo de los PDFs que faltan en el resultado actual
+    missing_pdf_ids = properties_df.loc[~properties_df['pdf_available'].astype(bool), 'id'].tolist()
+    if missing_pdf_ids and st.button(f"Descargar PDFs faltantes ({len(missing_pdf_ids)})", key="bulk_pdf_download"):
+        bulk_bar = st.progress(0, text="Descargando PDFs...")
+        bulk_result = download_pdfs(
+            missing_pdf_ids,
+            progress=lambda done, total, _pid, _status: bulk_bar.progress(
+                done / total, text=f"Descargando PDFs... {done}/{total}"),
+        )
+        if bulk_result.failed:
+            st.warning(f"{len(bulk_result.downloaded)} PDFs descargados, {len(bulk_result.failed)} fallidos.")
+        else:
+            st.success(f"{len(bulk_result.downloaded)} PDFs descargados en {bulk_result.elapsed:.0f}s.")
+        st.rerun()
+
     # Custom display for properties with PDF download/view buttons
     # Ajustar el ancho de las columnas dinámicamente
     num_cols = len(columns_to_display) + 1 # +1 para el botón de PDF o indicador
@@ -226,10 +258,13 @@ if not properties_df.empty:
     for col_idx, header in enumerate(headers):
         cols_header[col_idx].write(f"**{header}**")
 
+    # Rutas de los PDFs descargados: una sola lectura del índice del almacén para todo el resultado
+    pdf_paths = load_pdf_paths()
+
     for index, row in properties_df.iterrows():
         cols_data = st.columns(col_widths)
         property_id = row['id']
-        pdf_local_path = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), PDF_DOWNLOAD_BASE_DIR, f"{property_id}.pdf")
+        pdf_local_path = pdf_paths.get(str(property_id))
 
         for col_idx, col_name in enumerate(columns_to_display):
             try:
@@ -260,7 +295,7 @@ if not properties_df.empty:
 
         # Lógica para el botón de PDF (o indicador)
         if selected_view_name != "Inversión": # Si no es la vista de inversión, mostrar el botón
-            if os.path.exists(pdf_local_path):
+            if pdf_local_path:
                 button_label = "Ver PDF"
                 button_type = "primary"
             else:
@@ -373,6 +408,25 @@ if not properties_df.empty:
                                     else:
                                         st.warning("No se detectaron cambios o valores válidos para guardar.")
 
+    # Galería: sólo lee miniaturas y calificaciones precalculadas (src/scripts/extract_brochure_images.py)
+    st.subheader('Galería de Fotos')
+    gallery_property_id = st.selectbox("Propiedad", properties_df['id'].astype(str).tolist(), key="gallery_property")
+    gallery_images = property_repo.get_property_images(gallery_property_id) if gallery_property_id else None
+    if gallery_images is None:
+        st.warning("No se pudieron cargar las fotos de la propiedad.")
+    elif gallery_images.empty:
+        st.info("Sin fotos analizadas para esta propiedad. Ejecute 'python -m src.scripts.extract_brochure_images'.")
+    else:
+        st.write(f"{len(gallery_images)} fotos; calificación visual promedio "
+                 f"{gallery_images['auto_score'].astype(float).mean():.1f}/10")
+        gallery_cols = st.columns(4)
+        for image_idx, image in enumerate(gallery_images.itertuples(index=False)):
+            image_file = thumbnail_path(image.image_sha256)
+            if os.path.exists(image_file):
+                gallery_cols[image_idx % 4].image(
+                    image_file, use_container_width=True,
+                    caption=f"{float(image.auto_score):.1f}/10 · {image.width}x{image.height} · pág. {image.page + 1}")
+
     # Tabla adicional para propiedades con campos faltantes
     st.subheader('Propiedades con Campos Faltantes')
 
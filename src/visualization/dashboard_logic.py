@@ -3,6 +3,7 @@
 import pandas as pd
 import os
 from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import load_available_pdf_ids
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 FULL_PDF_DOWNLOAD_DIR = os.path.join(BASE_DIR, PDF_DOWNLOAD_BASE_DIR)
@@ -38,11 +39,10 @@ def apply_dashboard_transformations(properties_df):
     else:
         properties_df['m2_terreno'] = pd.NA # Usar pd.NA para valores faltantes
 
-    # Añadir columna para indicar si el PDF está disponible localmente
+    # Añadir columna para indicar si el PDF está disponible localmente (una lectura del índice, sin stat por fila)
     if 'id' in properties_df.columns:
-        properties_df['pdf_available'] = properties_df['id'].apply(
-            lambda x: os.path.exists(os.path.join(FULL_PDF_DOWNLOAD_DIR, f"{x}.pdf"))
-        )
+        available_ids = load_available_pdf_ids(FULL_PDF_DOWNLOAD_DIR)
+        properties_df['pdf_available'] = properties_df['id'].astype(str).isin(available_ids)
     else:
         properties_df['pdf_available'] = False
 
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+
+class FakePage:
+    def __init__(self, document, number, text):
+        self.document, self.number, self.text = document, number, text
+        self.rect = SimpleNamespace(width=document.page_size[0], height=document.page_size[1])
+
+    def get_text(self, kind='text', flags=None, textpage=None):
+        self.document.text_reads.append(self.number)
+        return textpage if textpage is not None else self.text
+
+    def get_textpage_ocr(self, full=False):
+        self.document.ocr_reads.append(self.number)
+        return self.document.ocr_texts.get(self.number, '')
+
+
+class FakeDocument:
+    """Documento de PyMuPDF simulado que registra qué páginas se leyeron."""
+
+    def __init__(self, pages, ocr_texts=None, producer=None, page_size=(612, 792)):
+        self.pages = pages
+        self.ocr_texts = ocr_texts or {}
+        self.metadata = {'producer': producer}
+        self.page_size = page_size
+        self.text_reads, self.ocr_reads = [], []
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, number):
+        return FakePage(self, number, self.pages[number])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+@pytest.fixture
+def fake_fitz():
+    """
+    Sustituye PyMuPDF por un módulo simulado. fake_fitz.add_document(páginas) encola el
+    documento que devolverá el siguiente fitz.open() (producer y page_size opcionales).
+    """
+    fitz = SimpleNamespace(TEXT_PRESERVE_LIGATURES=1, TEXT_PRESERVE_WHITESPACE=2, TEXT_MEDIABOX_CLIP=64,
+                           documents=[], opened=[])
+
+    def open_document(path):
+        fitz.opened.append(path)
+        return fitz.documents.pop(0)
+
+    def add_document(pages, ocr_texts=None, **layout):
+        document = FakeDocument(pages, ocr_texts, **layout)
+        fitz.documents.append(document)
+        return document
+
+    fitz.open = open_document
+    fitz.add_document = add_document
+    with patch('src.data_processing.pdf_extraction.fitz', fitz):
+        yield fitz
+
+
+@pytest.fixture(autouse=True)
+def unknown_layouts():
+    """Registro de diseños de PDF desconocidos en memoria, para no escribir en data/."""
+    from src.data_processing.pdf_extraction import UnknownLayouts
+    registry = UnknownLayouts(None)
+    with patch('src.data_processing.pdf_extraction._unknown_layouts', registry):
+        yield registry
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.scripts import batch_autofill
+from src.scripts.batch_autofill import select_gap_tasks, build_updates
+
+
+def test_select_gap_tasks_only_includes_properties_with_pdf_and_missing_columns():
+    # Arrange
+    properties = pd.DataFrame({
+        'id': ['1', '2', '3', '4'],
+        'precio': [None, 100.0, None, 200.0],
+        'recamaras': [3, None, None, 2],
+        'colonia': ['', 'Centro', 'Centro', 'Centro'],
+    })
+    pdf_paths = {'1': 'a.pdf', '2': 'b.pdf', '4': 'd.pdf'}
+
+    # Act
+    tasks = select_gap_tasks(properties, pdf_paths, ['precio', 'recamaras'])
+
+    # Assert: la 3 no tiene PDF y a la 4 no le falta nada que la plantilla sepa extraer
+    assert tasks == [('1', 'a.pdf', ['precio']), ('2', 'b.pdf', ['recamaras'])]
+
+
+def test_build_updates_filters_by_confidence():
+    # Arrange
+    properties = pd.DataFrame({'id': ['1', '2'], 'precio': [None, None], 'recamaras': [None, 2]})
+    results = {
+        '1': {'property_id': '1', 'status': 'done', 'fields': {'precio': [100.0, 0.9], 'recamaras': [3, 0.3]}},
+        '2': {'property_id': '2', 'status': 'failed', 'error': 'PDF dañado'},
+    }
+
+    # Act
+    updates = build_updates(results, properties, min_confidence=0.5)
+
+    # Assert
+    assert updates.to_dict('records') == [
+        {'property_id': '1', 'field_name': 'precio', 'old_value': None, 'new_value': 100.0, 'confidence': 0.9}
+    ]
+
+
+def test_main_applies_updates_once_and_archives_checkpoint(tmp_path):
+    # Arrange
+    checkpoint = tmp_path / 'batch_autofill_checkpoint.jsonl'
+    properties = pd.DataFrame({'id': ['1', '2'], 'precio': [None, 100.0]})
+    results = {'1': {'property_id': '1', 'status': 'done', 'fields': {'precio': [100.0, 1.0]}}}
+
+    with patch.object(batch_autofill, 'CHECKPOINT_PATH', str(checkpoint)), \
+         patch('src.data_access.property_repository.PropertyRepository') as mock_repo_cls, \
+         patch('src.scripts.batch_autofill.load_pdf_paths', return_value={'1': 'a.pdf'}), \
+         patch('src.scripts.batch_autofill.run_extraction', return_value=results) as mock_run:
+        mock_repo = mock_repo_cls.return_value
+        mock_repo.get_property_columns.return_value = properties
+        mock_repo.apply_field_updates.return_value = pd.DataFrame({'property_id': ['1']})
+        checkpoint.write_text('{}\n', encoding='utf-8')
+
+        # Act
+        exit_code = batch_autofill.main([])
+
+    # Assert
+    assert exit_code == 0
+    assert mock_repo.get_property_columns.call_args[0][0] == batch_autofill.COLUMN_PRIORITY['critical']
+    assert mock_run.call_args[0][0] == [('1', 'a.pdf', ['precio'])]
+    mock_repo.apply_field_updates.assert_called_once()
+    updates = mock_repo.apply_field_updates.call_args[0][0]
+    assert updates.to_dict('records') == [{'property_id': '1', 'field_name': 'precio', 'old_value': None, 'new_value': 100.0}]
+    assert not checkpoint.exists()
+    assert len(list(tmp_path.glob('batch_autofill_checkpoint_*.jsonl'))) == 1
+
+
+def test_main_fails_when_properties_cannot_be_read():
+    with patch('src.data_access.property_repository.PropertyRepository') as mock_repo_cls, \
+         patch('src.scripts.batch_autofill.run_extraction') as mock_run:
+        mock_repo_cls.return_value.get_property_columns.return_value = pd.DataFrame()
+
+        exit_code = batch_autofill.main([])
+
+    assert exit_code == 1
+    mock_run.assert_not_called()
@@ -0,0 +1,49 @@
+from src.utils.text_normalization import search_terms
+from src.data_processing.brochure_search import BrochureSearchIndex, term_counts
+
+
+def _index(tmp_path, brochures):
+    index = BrochureSearchIndex(str(tmp_path / 'search.sqlite3'))
+    index.add_documents([(property_id, f"sha-{property_id}", *term_counts(text))
+                         for property_id, text in brochures.items()])
+    return index
+
+
+def test_search_terms_fold_accents_drop_stopwords_and_plurals():
+    assert search_terms("Jardines con ALBERCA, luces y 3 Recámaras") == ['jardin', 'alberca', 'luz', '3', 'recamara']
+
+
+def test_search_ranks_properties_by_bm25(tmp_path):
+    # Arrange
+    index = _index(tmp_path, {
+        '1': "Casa con jardín y alberca techada. Alberca climatizada.",
+        '2': "Departamento con roof garden, gimnasio y alberca.",
+        '3': "Casa con jardines amplios y cuarto de servicio.",
+        '4': "Terreno plano en esquina.",
+    })
+
+    # Act
+    pool = index.search("albercas")
+    garden_pool = index.search("Jardín alberca")
+
+    # Assert
+    assert pool['property_id'].tolist() == ['1', '2']  # Más menciones, más puntuación
+    assert garden_pool['property_id'].tolist()[0] == '1'  # Único folleto con ambos términos
+    assert set(garden_pool['property_id']) == {'1', '2', '3'}
+    assert index.search("de la y").empty
+    index.close()
+
+
+def test_reindexing_replaces_terms_and_remove_drops_properties(tmp_path):
+    # Arrange
+    index = _index(tmp_path, {'1': "Casa con alberca", '2': "Casa con jardín"})
+
+    # Act: el PDF de la propiedad 1 cambió y la 2 ya no tiene PDF
+    index.add_documents([('1', 'sha-nuevo', *term_counts("Casa con cisterna"))])
+    index.remove(['2'])
+
+    # Assert
+    assert index.search("alberca").empty
+    assert index.search("cisterna")['property_id'].tolist() == ['1']
+    assert index.indexed() == {'1': 'sha-nuevo'}
+    index.close()
@@ -0,0 +1,111 @@
+import time
+import threading
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from src.data_collection import bulk_pdf_downloader
+from src.data_collection.bulk_pdf_downloader import HostRateLimiter, download_pdfs, pdf_url_for
+from src.data_collection.pdf_store import PdfStore
+from src.data_collection.portal_session import SessionExpiredError
+
+PDF_BYTES = b'%PDF-1.4 contenido de prueba'
+
+
+class FakeSession:
+    """Sesión HTTP falsa: responde según un guion por URL y registra la concurrencia."""
+
+    def __init__(self, script=None, delay=0.0):
+        self.script = script or {}
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            steps = self.script.get(url)
+            outcome = steps.pop(0) if steps else 200
+        finally:
+            with self._lock:
+                self.active -= 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = MagicMock()
+        response.status_code = outcome
+        response.headers = {}
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [PDF_BYTES]
+        if outcome >= 400:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"HTTP {outcome}")
+        return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    with patch.object(bulk_pdf_downloader, 'backoff_delay', return_value=0.0):
+        yield
+
+
+def test_download_pdfs_concurrent_with_retries_and_skips(tmp_path):
+    # Arrange
+    (tmp_path / 'existing.pdf').write_bytes(PDF_BYTES)
+    session = FakeSession(script={
+        pdf_url_for('flaky'): [503, requests.exceptions.ConnectionError("reset"), 200],
+        pdf_url_for('missing'): [404],
+    }, delay=0.02)
+    ids = [f"p{i}" for i in range(12)] + ['flaky', 'missing', 'existing', 'p0']
+    progress = []
+
+    # Act
+    store = PdfStore(str(tmp_path))
+    result = download_pdfs(ids, session=session, store=store, max_workers=6,
+                           rate_per_host=0, progress=lambda *args: progress.append(args))
+
+    # Assert
+    assert sorted(result.downloaded) == sorted([f"p{i}" for i in range(12)] + ['flaky'])
+    assert result.skipped == ['existing']
+    assert list(result.failed) == ['missing']
+    assert session.calls.count(pdf_url_for('flaky')) == 3
+    assert session.calls.count(pdf_url_for('missing')) == 1  # 404 no se reintenta
+    assert session.max_active > 1
+    assert open(store.path_for('flaky'), 'rb').read() == PDF_BYTES
+    assert len(list((tmp_path / 'blobs').rglob('*.pdf'))) == 1  # Mismo contenido: un solo blob
+    assert not list(tmp_path.rglob('*.part'))
+    assert progress[-1][:2] == (15, 15)
+
+
+def test_download_pdfs_stops_on_expired_session(tmp_path):
+    # Arrange
+    session = FakeSession(script={pdf_url_for('a'): [SessionExpiredError("login")]})
+
+    # Act
+    store = PdfStore(str(tmp_path))
+    result = download_pdfs(['a', 'b', 'c'], session=session, store=store,
+                           max_workers=1, rate_per_host=0)
+
+    # Assert
+    assert set(result.failed) == {'a', 'b', 'c'}
+    assert len(session.calls) == 1
+    assert store.paths() == {}
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    # Arrange
+    limiter = HostRateLimiter(rate_per_second=50)
+    start = time.monotonic()
+
+    # Act
+    for _ in range(6):
+        limiter.acquire('https://plus.21onlinemx.com/ft/1')
+    limiter.acquire('https://otro-host.example/ft/1')
+    elapsed = time.monotonic() - start
+
+    # Assert: 5 intervalos de 20 ms en el mismo host; el otro host no espera
+    assert 0.09 <= elapsed < 0.5
@@ -0,0 +1,82 @@
+import os
+import time
+import pandas as pd
+from unittest.mock import MagicMock, patch
+from src.data_processing.clean_data import find_inventory_files, clean_inventory_files, merge_inventories, _load_incremental
+
+def _write_inventory(path, ids, precios):
+    pd.DataFrame({
+        'id': ids,
+        'precio': precios,
+        'status': ['enPromocion'] * len(ids),
+        'banos': [1] * len(ids)
+    }).to_excel(path, index=False)
+
+def test_find_inventory_files_returns_all_workbooks(tmp_path):
+    # Arrange
+    _write_inventory(tmp_path / "oficina_b.xlsx", ['1'], [100])
+    _write_inventory(tmp_path / "oficina_a.xlsx", ['2'], [200])
+    (tmp_path / "oficina_a.xls").touch()  # Ya tiene su .xlsx, no se convierte
+    (tmp_path / "notas.txt").touch()
+
+    # Act
+    with patch('src.data_processing.clean_data.convert_xls_to_xlsx') as mock_convert:
+        files = find_inventory_files(str(tmp_path))
+
+    # Assert
+    mock_convert.assert_not_called()
+    assert [os.path.basename(f) for f in files] == ['oficina_a.xlsx', 'oficina_b.xlsx']
+
+def test_clean_inventory_files_in_parallel_and_merge(tmp_path):
+    # Arrange
+    old_file = tmp_path / "oficina_norte.xlsx"
+    new_file = tmp_path / "oficina_sur.xlsx"
+    _write_inventory(old_file, ['1', '2'], [100, 200])
+    _write_inventory(new_file, ['2', '3'], [250, 300])
+    now = time.time()
+    os.utime(old_file, (now - 60, now - 60))
+    os.utime(new_file, (now, now))
+
+    # Act
+    frames = clean_inventory_files([str(old_file), str(new_file)], max_workers=2)
+    merged = merge_inventories(frames)
+
+    # Assert
+    assert set(frames) == {str(old_file), str(new_file)}
+    assert sorted(merged['id']) == ['1', '2', '3']
+    # El archivo más reciente tiene precedencia para el id duplicado
+    assert merged.set_index('id').loc['2', 'precio'] == 250.0
+
+def test_merge_inventories_tie_breaks_by_file_name(tmp_path):
+    # Arrange
+    path_a = tmp_path / "a.xlsx"
+    path_b = tmp_path / "b.xlsx"
+    for path in (path_a, path_b):
+        path.touch()
+        os.utime(path, (1000, 1000))
+    frames = {
+        str(path_b): pd.DataFrame({'id': ['1'], 'precio': [2.0]}),
+        str(path_a): pd.DataFrame({'id': ['1', None], 'precio': [1.0, 5.0]}),
+    }
+
+    # Act
+    merged = merge_inventories(frames)
+
+    # Assert
+    assert merged['id'].tolist() == ['1']
+    assert merged['precio'].tolist() == [2.0]
+
+def test_first_incremental_load_without_snapshot_upserts_everything_without_audit():
+    # Arrange
+    cleaned_df = pd.DataFrame({'id': ['1', '2'], 'precio': [100.0, 200.0]})
+    property_repo = MagicMock()
+    property_repo.load_properties.return_value = True
+
+    # Act
+    with patch('src.data_processing.clean_data.load_snapshot', return_value=None):
+        loaded = _load_incremental(property_repo, cleaned_df)
+
+    # Assert
+    assert loaded is True
+    assert property_repo.load_properties.call_args[0][0] is cleaned_df
+    property_repo.log_audit_entries.assert_not_called()
@@ -0,0 +1,56 @@
+import pandas as pd
+from src.utils.compact_dtypes import compact_frame, memory_report
+from src.utils.schema import encode_records
+
+def _properties_frame(n=200):
+    return pd.DataFrame({
+        'id': [f"P{i}" for i in range(n)],
+        'status': ['enPromocion', 'vendidas'] * (n // 2),
+        'colonia': ['Centro', 'Norte', 'Sur', 'Oriente'] * (n // 4),
+        'descripcion': [f"Casa número {i}" for i in range(n)],
+        'precio': [1500000.0 + i for i in range(n)],
+        'comision': [3.5] * n,
+        'm2_construccion': [150000.37] * n,
+        'recamaras': pd.Series([3, None] * (n // 2), dtype='Int64'),
+        'latitud': [19.43261234] * n,
+        'extra': ['sin esquema'] * n
+    })
+
+def test_compact_frame_applies_schema_dtypes():
+    # Arrange
+    df = _properties_frame()
+
+    # Act
+    compacted = compact_frame(df)
+
+    # Assert
+    assert isinstance(compacted['status'].dtype, pd.CategoricalDtype)
+    assert isinstance(compacted['colonia'].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_string_dtype(compacted['descripcion'].dtype)
+    assert str(compacted['comision'].dtype) == 'float32'
+    # precio, latitud y m² (DECIMAL(10, 2)) no caben en float32 sin perder decimales
+    assert str(compacted['m2_construccion'].dtype) == 'float64'
+    assert str(compacted['precio'].dtype) == 'float64'
+    assert str(compacted['latitud'].dtype) == 'float64'
+    assert str(compacted['recamaras'].dtype) in ('int8[pyarrow]', 'Int8')
+    assert compacted['recamaras'].isna().sum() == df['recamaras'].isna().sum()
+    assert compacted['extra'].dtype == df['extra'].dtype
+
+def test_memory_report_shows_reduction():
+    df = _properties_frame()
+    compacted = compact_frame(df)
+
+    report = memory_report(df, compacted)
+
+    assert report.loc['TOTAL', 'bytes_after'] < report.loc['TOTAL', 'bytes_before']
+    assert report.loc['status', 'reduction_pct'] > 50
+
+def test_encode_records_from_compact_frame_returns_native_types():
+    df = compact_frame(_properties_frame(4))
+
+    records = encode_records(df, ['id', 'status', 'recamaras', 'm2_construccion'])
+
+    assert records[0] == ('P0', 'enPromocion', 3, 150000.37)
+    assert records[1][2] is None
+    assert type(records[0][1]) is str
+    assert type(records[0][2]) is int
@@ -64,6 +64,12 @@ def mock_os_functions(tmp_path):
 
         yield mock_makedirs, mock_exists, mock_listdir, mock_getsize
 
+@pytest.fixture(autouse=True)
+def mock_download_watcher():
+    with patch('src.data_collection.download_inventory.wait_for_download',
+               side_effect=lambda *args, **kwargs: download_inventory.DOWNLOAD_FILE_PATH) as mock_wait:
+        yield mock_wait
+
 @pytest.fixture
 def mock_file_operations():
     with patch('builtins.open', MagicMock()) as mock_open:
@@ -173,4 +179,42 @@ def test_download_inventory_missing_env_vars(mock_selenium_components, mock_os_f
         mock_makedirs.assert_not_called()
         mock_exists.assert_not_called()
         mock_listdir.assert_not_called()
-        mock_getsize.assert_not_called()
\ No newline at end of file
+        mock_getsize.assert_not_called()
+def test_download_inventory_download_timeout(mock_selenium_components, mock_env_vars, mock_os_functions,
+                                             mock_file_operations, mock_download_watcher):
+    mock_driver, mock_chrome, mock_webdriver_wait = mock_selenium_components
+    mock_makedirs, mock_exists, mock_listdir, mock_getsize = mock_os_functions
+
+    # Arrange
+    mock_download_watcher.side_effect = download_inventory.DownloadError("timeout")
+
+    # Act
+    result = download_inventory_process()
+
+    # Assert
+    assert result is False
+    mock_download_watcher.assert_called_once()
+    assert mock_download_watcher.call_args[0][:2] == (download_inventory.DOWNLOAD_DIR, 'inventario.xls')
+    mock_exists.assert_not_called()
+    mock_driver.quit.assert_called_once()
+
+def test_download_inventory_fast_mode(mock_selenium_components, mock_env_vars, mock_os_functions, mock_file_operations):
+    mock_driver, mock_chrome, mock_webdriver_wait = mock_selenium_components
+
+    # Arrange
+    mock_webdriver_wait.return_value.until.side_effect = [
+        MagicMock(), MagicMock(), MagicMock(get_attribute=MagicMock(return_value="tok")),
+        MagicMock(), MagicMock(), MagicMock(),
+    ]
+
+    # Act
+    result = download_inventory_process(fast=True)
+
+    # Assert
+    assert result is True
+    options = mock_chrome.call_args.kwargs['options']
+    assert options.page_load_strategy == 'eager'
+    assert '--blink-settings=imagesEnabled=false' in options.arguments
+    assert f'--user-data-dir={download_inventory.CHROME_PROFILE_DIR}' in options.arguments
+    mock_driver.get_screenshot_as_png.assert_not_called()  # Sin capturas si ningún paso falla
+    mock_driver.quit.assert_called_once()
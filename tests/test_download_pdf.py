@@ -1,8 +1,11 @@
 import os
+import hashlib
 import pytest
 import requests
+from src.data_collection import download_pdf
 from src.data_collection.download_pdf import download_property_pdf
-from src.utils.constants import PDF_BASE_URL, PDF_SUFFIX, PDF_DOWNLOAD_BASE_DIR
+from src.data_collection.pdf_store import PdfStore
+from src.utils.constants import PDF_DOWNLOAD_BASE_DIR
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 
@@ -11,52 +14,58 @@ def mock_requests_get(monkeypatch):
     """Fixture to mock requests.get."""
     def mock_get(*args, **kwargs):
         class MockResponse:
+            status_code = 200
+            headers = {'ETag': '"v1"'}
+            def __enter__(self):
+                return self
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                pass
             def raise_for_status(self):
                 pass
             def iter_content(self, chunk_size=1):
-                return [b'pdf-content-chunk-1', b'pdf-content-chunk-2']
+                return [b'%PDF-content-chunk-1', b'pdf-content-chunk-2']
         return MockResponse()
     monkeypatch.setattr(requests, "get", mock_get)
 
-@pytest.fixture
-def mock_os_path_exists(monkeypatch):
-    """Fixture to mock os.path.exists."""
-    monkeypatch.setattr(os.path, "exists", lambda x: False)
+@pytest.fixture(autouse=True)
+def tmp_pdf_store(monkeypatch, tmp_path):
+    """Fixture to keep the PDF store (and its index) inside a temporary directory."""
+    (tmp_path / PDF_DOWNLOAD_BASE_DIR).mkdir(parents=True)
+    monkeypatch.setattr(download_pdf, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(download_pdf, "PdfStore", lambda: PdfStore(str(tmp_path / PDF_DOWNLOAD_BASE_DIR)))
+    return tmp_path / PDF_DOWNLOAD_BASE_DIR
 
-@pytest.fixture
-def mock_open(monkeypatch):
-    """Fixture to mock the built-in open function."""
-    class MockFile:
-        def __enter__(self):
-            return self
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            pass
-        def write(self, data):
-            pass
-    monkeypatch.setattr("builtins.open", lambda x, y: MockFile())
+def _blob_relpath(content):
+    sha = hashlib.sha256(content).hexdigest()
+    return os.path.join(PDF_DOWNLOAD_BASE_DIR, "blobs", sha[:2], sha[2:4], f"{sha}.pdf")
 
-def test_download_property_pdf_success(mock_requests_get, mock_os_path_exists, mock_open):
+def test_download_property_pdf_success(mock_requests_get, tmp_pdf_store):
     """
     Tests successful download of a PDF when the file does not exist locally.
     """
     # Arrange
     property_id = "12345"
-    expected_path = os.path.join(PDF_DOWNLOAD_BASE_DIR, f"{property_id}.pdf")
+    content = b'%PDF-content-chunk-1pdf-content-chunk-2'
+    expected_path = _blob_relpath(content)
 
     # Act
     result_path = download_property_pdf(property_id)
 
     # Assert
     assert result_path == expected_path
+    assert (tmp_pdf_store.parent.parent / expected_path).read_bytes() == content
+    assert not list(tmp_pdf_store.rglob("*.part"))
 
-def test_download_property_pdf_already_exists(monkeypatch):
+def test_download_property_pdf_already_exists(monkeypatch, tmp_pdf_store):
     """
     Tests that the download is skipped if the PDF file already exists.
     """
     # Arrange
     property_id = "67890"
-    expected_path = os.path.join(PDF_DOWNLOAD_BASE_DIR, f"{property_id}.pdf")
-    monkeypatch.setattr(os.path, "exists", lambda x: True)
+    content = b'%PDF-already-downloaded'
+    (tmp_pdf_store / f"{property_id}.pdf").write_bytes(content)  # Formato plano anterior; se importa al abrir
+    expected_path = _blob_relpath(content)
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: pytest.fail("No debe descargarse de nuevo"))
 
     # Act
     result_path = download_property_pdf(property_id)
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+import zipfile
+import pytest
+from src.data_collection.download_watcher import (
+    wait_for_download, verify_workbook, DownloadError, DownloadTimeoutError, OLE2_SIGNATURE,
+)
+
+def _write_xls(path, size=2048):
+    with open(path, 'wb') as f:
+        f.write(OLE2_SIGNATURE + b'\x00' * (size - len(OLE2_SIGNATURE)))
+
+def test_wait_for_download_waits_for_crdownload_to_finish(tmp_path):
+    # Arrange: Chrome escribe un parcial y lo renombra al terminar
+    started = time.time()
+    partial = tmp_path / 'inventario.xls.crdownload'
+
+    def simulate_chrome():
+        _write_xls(partial, size=1024)
+        time.sleep(0.3)
+        with open(partial, 'ab') as f:
+            f.write(b'\x00' * 1024)
+        time.sleep(0.2)
+        os.replace(partial, tmp_path / 'inventario.xls')
+
+    writer = threading.Thread(target=simulate_chrome)
+    writer.start()
+
+    # Act
+    path = wait_for_download(str(tmp_path), 'inventario.xls', timeout=10, started_after=started, stable_for=0.2)
+    elapsed = time.time() - started
+    writer.join()
+
+    # Assert: regresa en cuanto el archivo está completo, no tras un tiempo fijo
+    assert path == str(tmp_path / 'inventario.xls')
+    assert os.path.getsize(path) == 2048
+    assert elapsed < 5
+
+def test_wait_for_download_ignores_stale_files_and_times_out(tmp_path):
+    # Arrange: un inventario de una ejecución anterior no cuenta como descarga nueva
+    stale = tmp_path / 'inventario.xls'
+    _write_xls(stale)
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+
+    # Act / Assert
+    start = time.monotonic()
+    with pytest.raises(DownloadTimeoutError):
+        wait_for_download(str(tmp_path), 'inventario.xls', timeout=0.5, poll_max=0.1)
+    assert time.monotonic() - start < 3
+
+def test_wait_for_download_accepts_chrome_renamed_copy(tmp_path):
+    # Arrange
+    _write_xls(tmp_path / 'inventario (1).xls')
+    _write_xls(tmp_path / 'otro.xls')
+
+    # Act
+    path = wait_for_download(str(tmp_path), 'inventario.xls', timeout=5, stable_for=0.1)
+
+    # Assert
+    assert path == str(tmp_path / 'inventario (1).xls')
+
+def test_verify_workbook_formats(tmp_path):
+    # Arrange
+    xls = tmp_path / 'a.xls'
+    _write_xls(xls)
+    xlsx = tmp_path / 'b.xlsx'
+    with zipfile.ZipFile(xlsx, 'w') as z:
+        z.writestr('xl/workbook.xml', '<workbook/>')
+    html_table = tmp_path / 'c.xls'
+    html_table.write_text('<html><body><table><tr><td>id</td></tr></table></body></html>', encoding='utf-8')
+    login_page = tmp_path / 'd.xls'
+    login_page.write_text('<html><form id="kt_login_signin_form"></form></html>', encoding='utf-8')
+    truncated = tmp_path / 'e.xlsx'
+    truncated.write_bytes(b'PK\x03\x04' + b'\x00' * 10)
+
+    # Act / Assert
+    assert verify_workbook(str(xls)) == 'xls'
+    assert verify_workbook(str(xlsx)) == 'xlsx'
+    assert verify_workbook(str(html_table)) == 'html'
+    with pytest.raises(DownloadError):
+        verify_workbook(str(login_page))
+    with pytest.raises(DownloadError):
+        verify_workbook(str(truncated))
@@ -0,0 +1,79 @@
+import time
+import numpy as np
+import pandas as pd
+from src.data_processing.duplicate_detector import detect_duplicates, candidate_pairs
+
+def _inventory():
+    return pd.DataFrame({
+        'id': ['A1', 'B7', 'C3', 'D4', 'E5'],
+        'clave_oficina': ['OF1', 'OF2', 'OF3', 'OF1', 'OF2'],
+        'latitud': [28.63500, 28.63510, 28.63505, 28.70000, 0.0],
+        'longitud': [-106.07000, -106.07010, -106.07005, -106.10000, 0.0],
+        'colonia': ['San Felipe', 'SAN FELIPE', 'San Felipe', 'Campestre', 'San Felipe'],
+        'precio': [2_500_000.0, 2_450_000.0, 2_500_000.0, 2_500_000.0, 2_480_000.0],
+        'calle': ['Av. Reforma', 'Avenida Reforma', 'Av. Reforma', 'Calle Pino', 'Avenida Reforma'],
+        'numero': ['123', '123', '123', '9', '123'],
+        'm2_construccion': [180.0, 182.0, 180.0, 180.0, 181.0],
+        'm2_terreno': [200.0, 200.0, 200.0, 200.0, 200.0],
+        'recamaras': [3, 3, 3, 3, 3],
+        'descripcion': ['Casa con jardín y cochera', 'Casa con jardin y cochera doble',
+                        'Casa con jardín y cochera', 'Casa en esquina', 'Casa con jardín y cochera'],
+    })
+
+def test_detect_duplicates_clusters_same_listing_across_offices():
+    # Act
+    result = detect_duplicates(_inventory())
+
+    # Assert: A1, B7 y C3 por bloque geográfico; E5 (sin coordenadas) por colonia
+    clusters = result.clusters
+    assert set(clusters['property_id']) == {'A1', 'B7', 'C3', 'E5'}
+    assert set(clusters['cluster_id']) == {'A1'}
+    assert 'D4' not in set(result.pairs['id_a']) | set(result.pairs['id_b'])
+    assert result.pairs['score'].between(0.75, 1.0).all()
+
+def test_candidate_pairs_skip_distant_prices_and_oversized_blocks():
+    # Arrange
+    df = _inventory()
+    df.loc[1, 'precio'] = 6_000_000.0  # fuera de las bandas de precio vecinas
+
+    # Act
+    pairs, skipped = candidate_pairs(df)
+    _, skipped_small = candidate_pairs(df, max_block_size=1)
+
+    # Assert
+    assert not any(1 in pair for pair in pairs.tolist())
+    assert skipped == 0
+    assert skipped_small > 0
+
+def test_detect_duplicates_scales_near_linearly():
+    # Arrange: inventario sintético con 1% de duplicados; al crecer el inventario crece
+    # también el área cubierta (más oficinas y colonias), con densidad constante
+    def build(n, seed=0):
+        rng = np.random.default_rng(seed)
+        df = pd.DataFrame({
+            'id': np.arange(n).astype(str),
+            'latitud': rng.uniform(28.55, 28.55 + 0.05 * n / 10_000, n),
+            'longitud': rng.uniform(-106.20, -105.95, n),
+            'colonia': rng.integers(0, n // 100, n).astype(str),
+            'precio': rng.uniform(500_000, 8_000_000, n).round(-3),
+            'calle': rng.integers(0, 2000, n).astype(str),
+            'numero': rng.integers(1, 999, n).astype(str),
+            'm2_construccion': rng.uniform(60, 400, n).round(),
+            'm2_terreno': rng.uniform(90, 600, n).round(),
+            'recamaras': rng.integers(1, 5, n),
+        })
+        dupes = df.sample(frac=0.01, random_state=seed).assign(id=lambda d: 'dup_' + d['id'])
+        return pd.concat([df, dupes], ignore_index=True)
+
+    # Act
+    start = time.perf_counter()
+    small = detect_duplicates(build(10_000))
+    small_time = time.perf_counter() - start
+    start = time.perf_counter()
+    large = detect_duplicates(build(40_000))
+    large_time = time.perf_counter() - start
+
+    # Assert: los duplicados sembrados se encuentran y 4x filas no cuesta ~16x
+    assert large.cluster_count >= 400
+    assert large.candidate_pairs < small.candidate_pairs * 6
+    assert large_time < max(small_time, 0.5) * 10
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from src.data_processing.photo_index import PhotoIndex
+from src.scripts.extract_brochure_images import select_pending, build_batch, update_photo_index
+
+
+def test_select_pending_only_includes_new_or_changed_pdfs():
+    pdf_paths = {'1': '/pdfs/aaa.pdf', '2': '/pdfs/bbb.pdf', '3': '/pdfs/ccc.pdf'}
+    processed = {'1': 'aaa', '2': 'viejo'}
+
+    tasks = select_pending(pdf_paths, processed, lambda path: path.split('/')[-1][:3])
+
+    assert tasks == [('2', '/pdfs/bbb.pdf', 'bbb'), ('3', '/pdfs/ccc.pdf', 'ccc')]
+
+
+def test_build_batch_records_properties_without_photos_and_skips_failures():
+    image = {'image_sha256': 'f' * 64, 'page': 0, 'width': 1600, 'height': 1200, 'resolution_score': 0.73,
+             'sharpness_score': 0.9, 'brightness_score': 0.8, 'auto_score': 8.0}
+
+    sources, images = build_batch([('1', 'aaa', [image]), ('2', 'bbb', []), ('3', 'ccc', None)])
+
+    assert sources.values.tolist() == [['1', 'aaa', 1], ['2', 'bbb', 0]]
+    assert images[['property_id', 'image_sha256', 'auto_score']].values.tolist() == [['1', 'f' * 64, 8.0]]
+
+
+def test_update_photo_index_replaces_each_saved_property():
+    index = PhotoIndex()
+    index.add('2', 'viejo', '0f0f0f0f0f0f0f0f')
+    sources = pd.DataFrame({'property_id': ['1', '2'], 'pdf_sha256': ['aaa', 'bbb'], 'image_count': [1, 0]})
+    images = pd.DataFrame({'property_id': ['1'], 'image_sha256': ['f' * 64], 'phash': ['0f0f0f0f0f0f0f0f']})
+
+    update_photo_index(index, sources, images)
+
+    assert [match[:2] for match in index.similar('0f0f0f0f0f0f0f0f')] == [('1', 'f' * 64)]
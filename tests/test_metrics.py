@@ -0,0 +1,57 @@
+import json
+import os
+import pandas as pd
+import pytest
+from src.utils.metrics import PipelineRun, instrumented, get_active_run
+
+@instrumented('double')
+def _double_rows(df):
+    return pd.concat([df, df])
+
+def test_pipeline_run_records_stages_and_writes_outputs(tmp_path):
+    # Arrange
+    df = pd.DataFrame({'id': range(10)})
+
+    # Act
+    with PipelineRun('test_pipeline', metrics_dir=str(tmp_path)) as run:
+        with run.stage('read') as stage:
+            stage.rows = len(df)
+            stage.incr('rows_rejected', 2)
+        result = _double_rows(df)
+
+    # Assert
+    assert len(result) == 20
+    assert get_active_run() is None
+    names = [s.name for s in run.stages]
+    assert names == ['read', 'double']
+    assert run.stages[1].rows == 20
+    assert run.stages[0].counters == {'rows_rejected': 2}
+    assert all(s.peak_memory_bytes is not None for s in run.stages)
+
+    json_files = [f for f in os.listdir(tmp_path) if f.endswith('.json')]
+    assert len(json_files) == 1
+    with open(tmp_path / json_files[0], encoding='utf-8') as f:
+        record = json.load(f)
+    assert record['status'] == 'ok'
+    assert record['stages'][1]['rows_per_second'] > 0
+
+    prom = (tmp_path / 'test_pipeline.prom').read_text(encoding='utf-8')
+    assert '# TYPE rei_pipeline_stage_duration_seconds gauge' in prom
+    assert 'rei_pipeline_stage_rows{pipeline="test_pipeline",stage="double"} 20' in prom
+    assert 'rei_pipeline_run_success{pipeline="test_pipeline"} 1' in prom
+
+def test_pipeline_run_marks_failed_stage(tmp_path):
+    with pytest.raises(ValueError):
+        with PipelineRun('failing', metrics_dir=str(tmp_path)) as run:
+            with run.stage('explode'):
+                raise ValueError("boom")
+
+    assert run.status == 'failed'
+    assert run.stages[0].status == 'failed'
+    assert 'boom' in run.stages[0].error
+    prom = (tmp_path / 'failing.prom').read_text(encoding='utf-8')
+    assert 'rei_pipeline_run_success{pipeline="failing"} 0' in prom
+
+def test_instrumented_function_without_active_run():
+    df = pd.DataFrame({'id': [1]})
+    assert len(_double_rows(df)) == 2
@@ -0,0 +1,71 @@
+import pytest
+import requests
+
+from src.data_collection.mock_portal import MockPortalServer, MockPortalConfig, render_pdf
+from src.data_collection.portal_session import SessionExpiredError, download_inventory_export
+from src.data_collection.pdf_store import PdfStore
+from src.data_collection.bulk_pdf_downloader import download_pdfs
+from src.data_collection.download_watcher import verify_workbook
+from src.scripts.benchmark_collection import login_to_portal
+
+
+def test_login_form_session_and_inventory_export(tmp_path):
+    # Arrange
+    with MockPortalServer(MockPortalConfig(inventory_rows=20)) as portal:
+        anonymous = requests.get(f"{portal.base_url}/propiedades", timeout=5)
+
+        # Act
+        session = login_to_portal(portal.base_url, 'test_user', 'test_password')
+        path = download_inventory_export(session, str(tmp_path / 'inventario.xls'))
+        session.http.cookies.clear()
+        with pytest.raises(SessionExpiredError):
+            session.get(session.inventory_export_url)
+        with pytest.raises(RuntimeError):
+            login_to_portal(portal.base_url, 'test_user', 'incorrecta')
+        session.close()
+
+    # Assert
+    assert anonymous.url.endswith('/login2')
+    assert 'name="_csrf_token"' in anonymous.text
+    assert verify_workbook(path) == 'html'
+
+
+def test_pdf_endpoint_supports_conditional_get_and_range():
+    # Arrange
+    with MockPortalServer(MockPortalConfig(pdf_size=4096)) as portal:
+        url = f"{portal.pdf_base_url}123/DTF/273/40120"
+
+        # Act
+        full = requests.get(url, timeout=5)
+        cached = requests.get(url, headers={'If-None-Match': full.headers['ETag']}, timeout=5)
+        partial = requests.get(url, headers={'Range': 'bytes=1000-', 'If-Range': full.headers['ETag']}, timeout=5)
+        portal.update_pdf('123')
+        changed = requests.get(url, headers={'If-None-Match': full.headers['ETag']}, timeout=5)
+
+    # Assert
+    assert full.status_code == 200 and full.content == render_pdf('123', 4096)
+    assert cached.status_code == 304
+    assert partial.status_code == 206 and partial.content == full.content[1000:]
+    assert changed.status_code == 200 and changed.content != full.content
+
+
+def test_bulk_download_survives_injected_failures(tmp_path, monkeypatch):
+    # Arrange: 503, conexiones cortadas y 429 por encima de la tasa máxima
+    monkeypatch.setattr('src.data_collection.bulk_pdf_downloader.backoff_delay', lambda *args, **kwargs: 0.01)
+    config = MockPortalConfig(pdf_size=20_000, failure_rate=0.15, drop_rate=0.15, max_requests_per_second=200)
+    store = PdfStore(str(tmp_path))
+    ids = [str(i) for i in range(40)]
+
+    # Act
+    with MockPortalServer(config) as portal:
+        result = download_pdfs(ids, store=store, max_workers=4, rate_per_host=0, max_retries=8,
+                               pdf_base_url=portal.pdf_base_url)
+        status_counts = dict(portal.stats.status_counts)
+
+    # Assert
+    assert not result.failed
+    assert sorted(result.downloaded, key=int) == ids
+    assert status_counts.get(503, 0) > 0
+    for pid in ('0', '39'):
+        assert open(store.path_for(pid), 'rb').read() == render_pdf(pid, 20_000)
+    store.close()
@@ -2,6 +2,8 @@ import pytest
 import os
 from unittest.mock import patch
 from src.scripts.pdf_autofill import autofill_from_pdf
+from src.data_processing.pdf_extraction import ExtractedField
+from src.data_collection.pdf_store import PdfStore
 
 # Fix: Remove unnecessary src prefix in tests
 # Now we can directly use autofill_from_pdf since we imported it directly
@@ -19,6 +21,9 @@ def dummy_pdf_file(tmp_path):
 
     with open(pdf_path, "w") as f:
         f.write("This is a dummy PDF content.")
+    store = PdfStore(str(pdf_dir))  # El almacén importa el PDF del formato plano
+    pdf_path = store.path_for(dummy_id)
+    store.close()
 
     with patch('src.scripts.pdf_autofill.PDF_DOWNLOAD_BASE_DIR', str(pdf_dir)):
         yield dummy_id, str(pdf_path)
@@ -27,13 +32,13 @@ def dummy_pdf_file(tmp_path):
 autofill_from_pdf = autofill_from_pdf
 
 # Test para auto-llenado exitoso
-@patch('src.scripts.pdf_autofill._extract_data_from_pdf_placeholder')
+@patch('src.scripts.pdf_autofill._extract_data_from_pdf')
 def test_pdf_autofill_success(mock_extract, dummy_pdf_file):
     property_id, pdf_path = dummy_pdf_file
     missing_columns = ['precio', 'm2_construccion']
     mock_extract.return_value = {
-        'precio': 1234567.0,
-        'm2_construccion': 250.0
+        'precio': ExtractedField(1234567.0, 1.0, '$1,234,567', 'Precio'),
+        'm2_construccion': ExtractedField(250.0, 0.9, '250', 'Construcción')
     }
 
     with patch('src.scripts.pdf_autofill.logger') as mock_logger:
@@ -60,7 +65,7 @@ def test_pdf_autofill_no_pdf():
             assert f"[PDF_AUTOFILL] PDF no encontrado para la propiedad {property_id}" in args[0]
 
 # Test para cuando no hay coincidencia de datos en el PDF (simulado)
-@patch('src.scripts.pdf_autofill._extract_data_from_pdf_placeholder')
+@patch('src.scripts.pdf_autofill._extract_data_from_pdf')
 def test_pdf_autofill_no_match(mock_extract, dummy_pdf_file):
     property_id, pdf_path = dummy_pdf_file
     missing_columns = ['precio', 'm2_terreno']
@@ -72,7 +77,7 @@ def test_pdf_autofill_no_match(mock_extract, dummy_pdf_file):
         mock_logger.info.assert_called()
 
 # Test para manejo de errores de OCR (simulado)
-@patch('src.scripts.pdf_autofill._extract_data_from_pdf_placeholder')
+@patch('src.scripts.pdf_autofill._extract_data_from_pdf')
 def test_ocr_error_handling(mock_extract, dummy_pdf_file):
     property_id, pdf_path = dummy_pdf_file
     missing_columns = ['precio']
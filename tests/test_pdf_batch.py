@@ -0,0 +1,51 @@
+import json
+from unittest.mock import patch
+
+from src.data_processing.pdf_extraction import ExtractedField, PdfExtractionError
+from src.data_processing.pdf_batch import extract_task, run_extraction, load_checkpoint
+
+
+def test_extract_task_reports_errors_instead_of_raising():
+    with patch('src.data_processing.pdf_batch.get_extraction_cache'), \
+         patch('src.data_processing.pdf_batch.extract_from_pdf', side_effect=PdfExtractionError("PDF dañado")):
+        record = extract_task(('1', 'a.pdf', ['precio']))
+
+    assert record == {'property_id': '1', 'status': 'failed', 'error': 'PDF dañado'}
+
+
+def test_run_extraction_resumes_from_checkpoint(tmp_path):
+    # Arrange: la propiedad 1 ya se procesó en una ejecución interrumpida (con una línea a medias)
+    checkpoint = tmp_path / 'checkpoint.jsonl'
+    checkpoint.write_text(json.dumps({'property_id': '1', 'status': 'done', 'fields': {'precio': [100.0, 1.0]}})
+                          + '\n{"property_id": "2", "sta', encoding='utf-8')
+    tasks = [('1', 'a.pdf', ['precio']), ('2', 'b.pdf', ['recamaras'])]
+    extracted = {'recamaras': ExtractedField(3, 0.9, '3', r'Recámaras:\s*(\d+)')}
+
+    # Act: el pool de procesos se sustituye por uno de hilos para poder simular la extracción
+    with patch('src.data_processing.pdf_batch.ProcessPoolExecutor', _ThreadPool), \
+         patch('src.data_processing.pdf_batch.get_extraction_cache'), \
+         patch('src.data_processing.pdf_batch.extract_from_pdf', return_value=extracted) as mock_extract:
+        results = run_extraction(tasks, str(checkpoint), workers=2)
+
+    # Assert
+    mock_extract.assert_called_once()
+    assert mock_extract.call_args[0][:2] == ('b.pdf', ['recamaras'])
+    assert results['2'] == {'property_id': '2', 'status': 'done', 'fields': {'recamaras': [3, 0.9]}}
+    assert set(load_checkpoint(str(checkpoint))) == {'1', '2'}
+
+
+class _ThreadPool:
+    """Sustituto de ProcessPoolExecutor que acepta max_tasks_per_child."""
+
+    def __init__(self, max_workers=None, max_tasks_per_child=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._executor.shutdown()
@@ -0,0 +1,226 @@
+import dataclasses
+from unittest.mock import patch
+
+import pytest
+
+from src.data_processing.pdf_extraction import (
+    parse_number, parse_currency, get_template, extract_fields, extract_from_pdf, extract_pdf_text,
+    PdfExtractionError, PageHints, TemplateIndex, UnknownLayouts, select_template, _compile_template, ALTERNATIVE_PENALTY, CONFLICT_FACTOR, FOREIGN_CURRENCY_CONFIDENCE,
+)
+
+BROCHURE_TEXT = """
+CENTURY 21 - Ficha técnica
+Casa en venta en Colonia Del Valle
+Precio: $3,250,000
+m² de construcción: 180.5
+Superficie terreno: 1,200
+Recámaras: 3
+Baños: 2
+Cajones: 2
+"""
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('1,200', 1200), ('1.200', 1200), ('1,234,567', 1234567), ('250.5', 250.5),
+    ('2,5', 2.5), ('1.234.567,89', 1234567.89), ('180.', 180), ('sin dato', None),
+])
+def test_parse_number(raw, expected):
+    assert parse_number(raw) == expected
+
+
+def test_parse_currency_detects_currency():
+    assert parse_currency('$3,250,000') == (3250000.0, 'MXN')
+    assert parse_currency('95 000 USD') == (95000.0, 'USD')
+
+
+def test_standard_template_patterns_match_brochure_text():
+    # Arrange
+    template = get_template()
+
+    # Act
+    fields = extract_fields(BROCHURE_TEXT, template)
+
+    # Assert
+    assert fields['precio'].value == 3250000.0 and fields['precio'].confidence == 1.0
+    assert fields['m2_construccion'].value == 180.5
+    assert fields['m2_terreno'].value == 1200
+    assert fields['m2_terreno'].confidence == 1.0  # 'Terreno:' también coincide dentro de 'Superficie terreno:'
+    assert fields['recamaras'].value == 3
+    assert fields['banos_totales'].value == 2
+    assert fields['estacionamientos'].value == 2
+    half_bath = extract_fields("Baños: 2.5", template, ['banos_totales'])['banos_totales']
+    assert half_bath.value == 2.5 and half_bath.confidence == 1.0
+    assert extract_fields("Estacionamientos: 3", template, ['estacionamientos'])['estacionamientos'].value == 3
+
+
+def test_confidence_drops_on_conflicts_and_foreign_currency():
+    template = get_template()
+
+    conflicting = extract_fields("Recámaras: 3\nHabitaciones: 4", template, ['recamaras'])
+    dollars = extract_fields("Valor: 250 000 USD", template, ['precio', 'no_existe'])
+
+    assert extract_fields("Dormitorios: 2", template)['recamaras'].confidence == pytest.approx(1.0 - 2 * ALTERNATIVE_PENALTY)
+    assert conflicting['recamaras'].value == 3
+    assert conflicting['recamaras'].confidence == pytest.approx(CONFLICT_FACTOR)
+    assert dollars['precio'].value == 250000.0
+    assert dollars['precio'].confidence == pytest.approx((1.0 - ALTERNATIVE_PENALTY) * FOREIGN_CURRENCY_CONFIDENCE)
+    assert set(dollars) == {'precio'}
+
+
+def test_preferred_alternative_and_conflicts_after_the_first_match_are_seen():
+    # Arrange
+    template = get_template()
+    text = "Recámaras: 3\n" + "relleno " * 5000 + "\nHabitaciones: 4\nPrecio: $2,000,000"
+
+    # Act
+    preferred = extract_fields("Dormitorios: 2\nRecámaras: 3", template, ['recamaras'])
+    repeated = extract_fields("Recámaras: 3\nRecámaras: 4", template, ['recamaras'])
+    far_conflict = extract_fields(text, template, ['recamaras', 'precio'])
+
+    # Assert
+    assert preferred['recamaras'].value == 3 and preferred['recamaras'].confidence == pytest.approx(CONFLICT_FACTOR)
+    assert repeated['recamaras'].value == 3 and repeated['recamaras'].confidence == pytest.approx(CONFLICT_FACTOR)
+    assert far_conflict['recamaras'].confidence == pytest.approx(CONFLICT_FACTOR)
+    assert far_conflict['precio'].value == 2000000.0
+
+
+def test_single_pass_matches_per_pattern_scan_on_nested_prefixes():
+    # Arrange: prefijos contenidos en otros ('terreno:' en 'superficie terreno:', 'precio' en 'precio de venta:')
+    template = _compile_template('anidada', {'fields': {
+        'm2_terreno': {'patterns': [r'Superficie terreno:\s*(\d+)', r'Terreno:\s*(\d+)'], 'type': 'number'},
+        'm2_construccion': {'patterns': [r'Construcción:\s*(\d+)', r'm² de construcción:\s*(\d+)'],
+                            'type': 'number'},
+        'precio': {'patterns': [r'Precio\s*(\d+)', r'Precio de venta:\s*(\d+)'], 'type': 'number'},
+    }})
+    texts = ["Superficie terreno: 220\nTerreno: 300", "m² de construcción: 180", "Precio de venta: 5\nPrecio 7"]
+
+    for text in texts:
+        # Act
+        single_pass = extract_fields(text, template)
+        per_pattern = extract_fields(text, dataclasses.replace(template, matcher=None))
+
+        # Assert
+        assert single_pass == per_pattern
+    assert extract_fields(texts[1], template)['m2_construccion'].confidence == 1.0
+
+
+def test_matcher_handles_patterns_without_literal_prefix():
+    # Arrange: una alternativa que empieza con una clase no se puede anclar por prefijo
+    template = _compile_template('prueba', {'fields': {
+        'recamaras': {'patterns': [r'[Rr]ecámaras:\s*(\d+)', r'Cuartos:\s*(\d+)'], 'type': 'number'},
+    }})
+
+    # Act
+    fields = extract_fields("Cuartos: 4", template)
+
+    # Assert
+    assert len(template.matcher.residual) == 1
+    assert fields['recamaras'].value == 4
+    assert fields['recamaras'].confidence == pytest.approx(1.0 - ALTERNATIVE_PENALTY)
+
+
+def test_extract_from_pdf_reads_only_the_pages_it_needs(tmp_path, fake_fitz):
+    # Arrange: los datos están en la página 3 de 20; las pistas aprenden dónde encontrarlos
+    pages = ["relleno " * 200] * 20
+    pages[3] = BROCHURE_TEXT
+    first, second = fake_fitz.add_document(pages), fake_fitz.add_document(pages)
+    hints = PageHints(str(tmp_path / 'hints.json'), save_interval=0)
+    template = get_template()
+
+    # Act
+    fields = extract_from_pdf('a.pdf', ['precio', 'recamaras'], template=template, hints=hints)
+    again = extract_from_pdf('b.pdf', ['recamaras'], template=template, hints=hints)
+
+    # Assert
+    assert fields['precio'].value == 3250000.0 and fields['recamaras'].value == 3
+    assert first.text_reads == [0, 1, 2, 3]  # Pista fija de la plantilla: página 0; luego en orden
+    assert second.text_reads == [3]  # La pista aprendida lleva directo a la página correcta
+    assert again['recamaras'].value == 3
+    assert first.ocr_reads == [] and second.ocr_reads == []
+    assert PageHints(str(tmp_path / 'hints.json')).counts['template_standard']['recamaras'] == {3: 2}
+
+
+def test_page_hints_from_several_processes_are_merged_on_save(tmp_path):
+    # Arrange: dos procesos del pool cargan el mismo archivo y aprenden por separado
+    path = str(tmp_path / 'hints.json')
+    first, second = PageHints(path), PageHints(path)
+    first.record('template_standard', 'recamaras', 3)
+    second.record('template_standard', 'recamaras', 3)
+    second.record('template_standard', 'precio', 0)
+
+    # Act
+    first.save(force=True)
+    second.save(force=True)
+    second.save(force=True)  # Sin conteos nuevos no suma de nuevo
+
+    # Assert
+    assert PageHints(path).counts['template_standard'] == {'recamaras': {3: 2}, 'precio': {0: 1}}
+    assert second.counts['template_standard']['recamaras'] == {3: 2}
+
+
+def test_extract_from_pdf_uses_ocr_only_for_fields_that_allow_it(fake_fitz):
+    # Arrange
+    template = _compile_template('escaneada', {'fields': {
+        'precio': {'patterns': [r'Precio:\s*(\$[\d,]+)'], 'type': 'currency', 'ocr': True},
+        'recamaras': {'patterns': [r'Recámaras:\s*(\d+)'], 'type': 'number'},
+    }})
+    document = fake_fitz.add_document(["Recámaras: 3", "sin texto"], ocr_texts={1: "Precio: $990,000"})
+
+    # Act
+    without_ocr = extract_from_pdf('a.pdf', ['recamaras'], template=template, hints=PageHints(None))
+    fake_fitz.documents.append(document)  # Se vuelve a abrir el mismo documento
+    with_ocr = extract_from_pdf('a.pdf', ['precio'], template=template, hints=PageHints(None))
+
+    # Assert
+    assert without_ocr['recamaras'].value == 3
+    assert with_ocr['precio'].value == 990000.0
+    assert document.ocr_reads == [0, 1]  # Sólo en la segunda llamada, que pidió un campo con OCR
+
+
+def test_extract_pdf_text_without_pymupdf_raises(tmp_path):
+    with patch('src.data_processing.pdf_extraction.fitz', None):
+        with pytest.raises(PdfExtractionError):
+            extract_pdf_text(str(tmp_path / 'x.pdf'))
+
+
+def test_template_index_selects_template_by_layout_fingerprint(tmp_path):
+    # Arrange
+    templates = {
+        'standard': _compile_template('standard', {'fingerprints': [{'anchors': ['Ficha técnica']}], 'fields': {}}),
+        'remax': _compile_template('remax', {'fingerprints': [
+            {'producer': 'Adobe PDF Library 15.0', 'page_size': [595.28, 841.89], 'anchors': ['RE/MAX', 'Ficha técnica']},
+        ], 'fields': {}}),
+    }
+    index = TemplateIndex(templates, default='standard')
+    unknown = UnknownLayouts(str(tmp_path / 'unknown.json'), save_interval=0)
+
+    # Act
+    remax = select_template('Adobe PDF Library 17.0', (595.0, 842.0), "RE/MAX Polanco\nFICHA TECNICA",
+                            index=index, unknown=unknown)
+    standard = select_template('Microsoft Word', (612, 792), "Ficha técnica\nPrecio: $1", index=index, unknown=unknown)
+    fallback = select_template('Canva', (1080, 1920), "Casa en venta", 'a.pdf', index=index, unknown=unknown)
+    select_template('Canva 2.1', (1080, 1920), "Casa en venta", 'b.pdf', index=index, unknown=unknown)
+    unknown.save()
+
+    # Assert
+    assert remax.name == 'remax'  # Otra versión del productor y tamaño A4 redondeado
+    assert standard.name == 'standard'  # Sin productor ni tamaño en la plantilla: cualquiera
+    assert fallback.name == 'standard'
+    assert UnknownLayouts(str(tmp_path / 'unknown.json')).load() == {
+        'canva|1080x1920|': {'producer': 'canva', 'page_size': [1080, 1920], 'anchors': [],
+                             'count': 2, 'examples': ['a.pdf', 'b.pdf']},
+    }
+
+
+def test_extract_from_pdf_without_template_uses_layout_fingerprint(fake_fitz, unknown_layouts):
+    # Arrange
+    fake_fitz.add_document([BROCHURE_TEXT])
+    fake_fitz.add_document(["Folleto sin anclas\nRecámaras: 2"], producer='Canva')
+
+    # Act
+    known = extract_from_pdf('a.pdf', ['recamaras'], hints=PageHints(None))
+    unknown = extract_from_pdf('b.pdf', ['recamaras'], hints=PageHints(None))
+
+    # Assert: ambos con la plantilla estándar, pero sólo el segundo queda registrado
+    assert known['recamaras'].value == 3 and unknown['recamaras'].value == 2
+    assert list(unknown_layouts._pending) == ['canva|610x790|']
@@ -0,0 +1,83 @@
+import os
+import dataclasses
+
+from src.data_processing.pdf_extraction import extract_from_pdf, extract_pdf_text, get_template, PageHints
+from src.data_processing.pdf_extraction_cache import ExtractionCache
+
+PAGES = ["Recámaras: 3\nBaños: 2", "Precio: $1,500,000"]
+
+
+def test_repeat_extraction_is_served_from_cache(tmp_path, fake_fitz):
+    # Arrange
+    pdf_path = tmp_path / '123.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 folleto')
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite3'))
+    hints = PageHints(None)
+    first_document = fake_fitz.add_document(PAGES)
+
+    # Act
+    first = extract_from_pdf(str(pdf_path), ['recamaras', 'estacionamientos'], hints=hints, cache=cache)
+    repeat = extract_from_pdf(str(pdf_path), ['recamaras', 'estacionamientos'], hints=hints, cache=cache)
+    other_columns = extract_from_pdf(str(pdf_path), ['banos_totales'], hints=hints, cache=cache)
+
+    # Assert
+    assert first == repeat == {'recamaras': first['recamaras']}
+    assert other_columns['banos_totales'].value == 2
+    assert len(fake_fitz.opened) == 1  # La repetición y la otra columna no abrieron el PDF
+    assert first_document.text_reads == [0, 1]  # 'estacionamientos' no existe: se leyó todo una vez
+    assert cache.get_layout(cache.content_hash(str(pdf_path))) == (None, (612, 792), PAGES[0])
+    cache.close()
+
+
+def test_cache_invalidates_on_file_or_template_change(tmp_path, fake_fitz):
+    # Arrange
+    pdf_path = tmp_path / '123.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 folleto')
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite3'))
+    hints = PageHints(None)
+    template = get_template()
+    fake_fitz.add_document(PAGES)
+    extract_from_pdf(str(pdf_path), ['precio'], hints=hints, cache=cache)
+
+    # Act: el folleto cambia en disco
+    pdf_path.write_bytes(b'%PDF-1.4 folleto actualizado')
+    os.utime(pdf_path, ns=(1, 1))
+    fake_fitz.add_document(["Precio: $1,450,000"])
+    updated = extract_from_pdf(str(pdf_path), ['precio'], hints=hints, cache=cache)
+    # y luego cambia la plantilla (el texto de las páginas se reutiliza, los campos no)
+    edited_template = dataclasses.replace(template, digest='otra-version')
+    reextracted = extract_from_pdf(str(pdf_path), ['precio'], template=edited_template, hints=hints, cache=cache)
+
+    # Assert
+    assert updated['precio'].value == 1450000.0
+    assert reextracted['precio'].value == 1450000.0
+    assert len(fake_fitz.opened) == 2
+    cache.close()
+
+
+def test_full_text_reuses_cached_pages(tmp_path, fake_fitz):
+    # Arrange: la extracción de campos sólo leyó la página 0
+    pdf_path = tmp_path / '123.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4 folleto')
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite3'))
+    fake_fitz.add_document(PAGES)
+    extract_from_pdf(str(pdf_path), ['recamaras'], template=get_template(), hints=PageHints(None), cache=cache)
+    document = fake_fitz.add_document(PAGES)
+
+    # Act
+    text = extract_pdf_text(str(pdf_path), cache=cache)
+    repeat = extract_pdf_text(str(pdf_path), cache=cache)
+
+    # Assert
+    assert text == repeat == '\n'.join(PAGES)
+    assert document.text_reads == [1]  # La página 0 no se volvió a leer
+    assert len(fake_fitz.opened) == 2  # La repetición no abrió el PDF
+    cache.close()
+
+
+def test_store_blobs_are_not_rehashed(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite3'))
+    sha = 'ab' * 32
+
+    assert cache.content_hash(str(tmp_path / 'ab' / 'ab' / f"{sha}.pdf")) == sha
+    cache.close()
@@ -0,0 +1,121 @@
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.data_processing.pdf_images import (
+    is_photo, thumbnail_path, resolution_score, sharpness_score, brightness_score, auto_score,
+    perceptual_hash, extract_images, write_thumbnail, load_thumbnail_gray, THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_BYTES,
+)
+
+
+def test_is_photo_filters_logos_and_banners():
+    assert is_photo(1200, 800)
+    assert not is_photo(150, 150)  # Logo
+    assert not is_photo(2400, 300)  # Banda decorativa
+
+
+def test_scores_reward_sharp_well_exposed_high_resolution_photos():
+    # Arrange
+    rng = np.random.default_rng(7)
+    detailed = rng.integers(60, 200, size=(300, 400)).astype(np.float32)
+    blurred = np.full((300, 400), 130, dtype=np.float32)
+    dark = np.full((300, 400), 10, dtype=np.float32)
+
+    # Act / Assert
+    assert resolution_score(1920, 1080) == 1.0 and resolution_score(480, 270) == pytest.approx(0.25)
+    assert sharpness_score(detailed) == 1.0 and sharpness_score(blurred) == 0.0
+    assert brightness_score(blurred) > 0.9 and brightness_score(dark) < 0.1
+    assert auto_score(1.0, 1.0, 1.0) == 10.0 and auto_score(0.0, 0.0, 0.0) == 1.0
+
+
+def test_perceptual_hash_tolerates_rescaling_and_brightness():
+    # Arrange
+    rng = np.random.default_rng(3)
+    photo = np.kron(rng.integers(0, 255, size=(30, 40)), np.ones((8, 8))).astype(np.float32)
+    half_size = photo[::2, ::2]
+    brighter = np.clip(photo * 1.1 + 10, 0, 255)
+    other = rng.integers(0, 255, size=(240, 320)).astype(np.float32)
+
+    def distance(a, b):
+        return (int(perceptual_hash(a), 16) ^ int(perceptual_hash(b), 16)).bit_count()
+
+    # Act / Assert
+    assert len(perceptual_hash(photo)) == 16
+    assert distance(photo, half_size) <= 4 and distance(photo, brighter) <= 4
+    assert distance(photo, other) > 16
+    assert perceptual_hash(np.zeros((4, 4), dtype=np.float32)) is None
+
+
+def test_thumbnail_path_is_content_addressed(tmp_path):
+    sha = 'abcd' + '0' * 60
+
+    assert thumbnail_path(sha, str(tmp_path)) == str(tmp_path / 'ab' / 'cd' / f"{sha}.webp")
+
+
+class _FakeImageDocument:
+    def __init__(self, pages, images):
+        self.pages, self.images = pages, images
+        self.extracted = []
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, number):
+        return SimpleNamespace(get_images=lambda full=False: self.pages[number])
+
+    def extract_image(self, xref):
+        self.extracted.append(xref)
+        return {'image': self.images[xref]}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def test_extract_images_skips_logos_repeats_and_cached_thumbnails(tmp_path):
+    # Arrange: un logo en cada página, una foto repetida (mismo xref y mismo contenido) y una foto ya en caché
+    logo, photo, cached = (1, 0, 120, 60), (2, 0, 1600, 1200), (4, 0, 1024, 768)
+    document = _FakeImageDocument(
+        pages=[[logo, photo], [logo, photo, (3, 0, 1600, 1200)], [cached]],
+        images={2: b'foto', 3: b'foto', 4: b'en cache'},
+    )
+    cached_sha = hashlib.sha256(b'en cache').hexdigest()
+    cached_path = thumbnail_path(cached_sha, str(tmp_path))
+    gray = np.full((10, 10), 140, dtype=np.float32)
+
+    with patch('src.data_processing.pdf_images.fitz', SimpleNamespace(open=lambda path: document)), \
+         patch('src.data_processing.pdf_images.Image', object()), \
+         patch('src.data_processing.pdf_images.os.path.exists', side_effect=lambda path: path == cached_path), \
+         patch('src.data_processing.pdf_images.write_thumbnail', return_value=gray) as mock_write, \
+         patch('src.data_processing.pdf_images.load_thumbnail_gray', return_value=gray) as mock_load:
+        # Act
+        images = extract_images('folleto.pdf', str(tmp_path))
+
+    # Assert
+    assert [(image.page, image.width) for image in images] == [(0, 1600), (2, 1024)]
+    assert images[0].image_sha256 == hashlib.sha256(b'foto').hexdigest()
+    assert document.extracted == [2, 3, 4]  # El logo nunca se extrajo
+    mock_write.assert_called_once()
+    mock_load.assert_called_once_with(cached_path)
+
+
+def test_write_thumbnail_is_bounded_webp(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    import io
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.default_rng(3).integers(0, 255, (1500, 2000, 3), dtype=np.uint8)).save(buffer, 'JPEG')
+    path = str(tmp_path / 'ab' / 'cd' / 'x.webp')
+
+    gray = write_thumbnail(buffer.getvalue(), path)
+    cached = load_thumbnail_gray(path)
+
+    with Image.open(path) as thumbnail:
+        assert thumbnail.format == 'WEBP' and max(thumbnail.size) == THUMBNAIL_MAX_SIDE
+    assert gray.shape == (360, 480)
+    np.testing.assert_array_equal(gray, cached)  # Primera vez y caché califican los mismos píxeles
+    assert (tmp_path / 'ab' / 'cd' / 'x.webp').stat().st_size <= THUMBNAIL_MAX_BYTES
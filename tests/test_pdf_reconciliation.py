@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.pdf_reconciliation import extraction_frame, reconcile, DISCREPANCY_COLUMNS
+
+
+def test_reconcile_ranks_largest_price_mismatch_first():
+    # Arrange
+    db_values = pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'precio': [3250000.0, 1000000.0, 2000000.0, None],
+        'recamaras': [3, 2, 4, 2],
+        'm2_terreno': [200.0, 150.0, 300.0, 100.0],
+    })
+    results = {
+        '1': {'property_id': '1', 'status': 'done',
+              'fields': {'precio': [3250000.0, 1.0], 'recamaras': [3, 1.0], 'm2_terreno': [202.0, 0.8]}},
+        '2': {'property_id': '2', 'status': 'done',
+              'fields': {'precio': [1200000.0, 1.0], 'recamaras': [3, 1.0]}},
+        '3': {'property_id': '3', 'status': 'done',
+              'fields': {'precio': [2900000.0, 0.9], 'm2_terreno': [150.0, 0.9]}},
+        '4': {'property_id': '4', 'status': 'done', 'fields': {'precio': [500000.0, 1.0]}},
+        '5': {'property_id': '5', 'status': 'failed', 'error': 'PDF dañado'},
+    }
+
+    # Act
+    discrepancies = reconcile(extraction_frame(results), db_values)
+
+    # Assert: la 1 está dentro de tolerancia y la 4 no tiene precio en la base (la llena el auto-llenado)
+    assert list(discrepancies.columns) == DISCREPANCY_COLUMNS
+    assert discrepancies[['property_id', 'field_name']].values.tolist() == [
+        ['3', 'precio'], ['3', 'm2_terreno'], ['2', 'precio'], ['2', 'recamaras'],
+    ]
+    assert discrepancies['price_gap'].tolist() == [900000.0, 900000.0, 200000.0, 200000.0]
+    assert discrepancies['rel_diff'].iloc[1] == pytest.approx(0.5)
+
+
+def test_reconcile_compares_text_after_normalization_and_filters_confidence():
+    # Arrange
+    db_values = pd.DataFrame({'id': ['1', '2'], 'colonia': ['Del Valle', 'Centro'], 'recamaras': [3, 2]})
+    extracted = pd.DataFrame({
+        'property_id': ['1', '2', '2'],
+        'field_name': ['colonia', 'colonia', 'recamaras'],
+        'pdf_value': ['DEL VALLE.', 'Peñasco', 5],
+        'confidence': [1.0, 1.0, 0.3],
+    })
+
+    # Act
+    discrepancies = reconcile(extracted, db_values, min_confidence=0.5)
+
+    # Assert
+    assert discrepancies[['property_id', 'field_name', 'pdf_value']].values.tolist() == [['2', 'colonia', 'Peñasco']]
+    assert np.isnan(discrepancies['abs_diff'].iloc[0])
+
+
+def test_reconcile_without_comparable_fields_returns_empty_table():
+    extracted = pd.DataFrame(columns=['property_id', 'field_name', 'pdf_value', 'confidence'])
+
+    result = reconcile(extracted, pd.DataFrame({'id': ['1']}))
+
+    assert result.empty and list(result.columns) == DISCREPANCY_COLUMNS
@@ -0,0 +1,183 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.data_collection.pdf_store import (
+    PdfStore, RetryableError, FETCH_DOWNLOADED, FETCH_RESUMED, FETCH_NOT_MODIFIED,
+    load_pdf_paths, load_available_pdf_ids, resolve_pdf_path,
+)
+
+
+class PdfHandler(BaseHTTPRequestHandler):
+    """Servidor mínimo con ETag, GET condicional, Range/If-Range y cortes de conexión simulados."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body, etag = server.content, server.etag
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') == etag:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body) - start))
+        self.end_headers()
+        payload = body[start:]
+        if server.cut_after is not None:
+            self.wfile.write(payload[:server.cut_after])
+            server.cut_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def pdf_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PdfHandler)
+    server.content = b'%PDF-1.4\n' + bytes(range(256)) * 400
+    server.etag = '"v1"'
+    server.cut_after = None
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/ft/1/DTF/273/40120"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_then_conditional_revalidation(tmp_path, pdf_server):
+    # Arrange
+    server, url = pdf_server
+    store = PdfStore(str(tmp_path))
+
+    # Act
+    first = store.fetch('1', url=url)
+    second = store.fetch('1', url=url)
+
+    # Assert
+    assert first.status == FETCH_DOWNLOADED
+    assert first.bytes_transferred == len(server.content)
+    record = store.index.get('1')
+    assert record.etag == '"v1"'
+    assert record.size == len(server.content)
+    assert record.sha256 == hashlib.sha256(server.content).hexdigest()
+    assert second.status == FETCH_NOT_MODIFIED and second.bytes_transferred == 0
+    assert server.requests[-1]['If-None-Match'] == '"v1"'
+    assert open(store.path_for('1'), 'rb').read() == server.content
+    store.close()
+
+
+def test_interrupted_download_resumes_with_range(tmp_path, pdf_server):
+    # Arrange
+    server, url = pdf_server
+    store = PdfStore(str(tmp_path))
+    server.cut_after = 80_000
+
+    # Act
+    with pytest.raises(RetryableError):
+        store.fetch('1', url=url)
+    partial_size = (tmp_path / 'partial' / '1.part').stat().st_size
+    published_before_resume = store.has('1')
+    resumed = store.fetch('1', url=url)
+
+    # Assert
+    assert not published_before_resume  # El archivo incompleto nunca se publica como PDF
+    assert 0 < partial_size <= 80_000  # Se conservan los bloques completos recibidos antes del corte
+    assert resumed.status == FETCH_RESUMED
+    assert resumed.bytes_transferred == len(server.content) - partial_size
+    assert server.requests[-1]['Range'] == f"bytes={partial_size}-"
+    assert open(store.path_for('1'), 'rb').read() == server.content
+    assert not (tmp_path / 'partial' / '1.part').exists()
+    assert store.index.get('1').sha256 == hashlib.sha256(server.content).hexdigest()
+    store.close()
+
+
+def test_changed_file_restarts_partial_and_refreshes(tmp_path, pdf_server):
+    # Arrange
+    server, url = pdf_server
+    store = PdfStore(str(tmp_path))
+    store.fetch('1', url=url)
+    server.content = b'%PDF-1.5\n' + b'nuevo folleto' * 1000
+    server.etag = '"v2"'
+
+    # Act
+    refreshed = store.fetch('1', url=url)
+    server.cut_after = 80_000
+    server.content, server.etag = b'%PDF-1.6\n' + b'otra version' * 10_000, '"v3"'
+    with pytest.raises(RetryableError):
+        store.fetch('1', url=url)
+    assert (tmp_path / 'partial' / '1.part').stat().st_size > 0
+    server.etag = '"v4"'  # El archivo cambió entre el corte y la reanudación: If-Range no coincide
+    restarted = store.fetch('1', url=url)
+
+    # Assert
+    assert refreshed.status == FETCH_DOWNLOADED
+    assert open(store.path_for('1'), 'rb').read() == server.content
+    assert restarted.status == FETCH_DOWNLOADED
+    assert restarted.bytes_transferred == len(server.content)
+    assert store.index.get('1').etag == '"v4"'
+    store.close()
+
+
+def test_store_is_sharded_deduplicated_and_imports_flat_files(tmp_path, pdf_server):
+    # Arrange: un PDF del formato plano anterior y dos propiedades con el mismo folleto
+    server, url = pdf_server
+    (tmp_path / 'legacy.pdf').write_bytes(b'%PDF-1.3 folleto anterior')
+
+    # Act
+    store = PdfStore(str(tmp_path))
+    store.fetch('1', url=url)
+    store.fetch('2', url=url)
+    server.content, server.etag = b'%PDF-1.7 nueva version', '"v9"'
+    store.fetch('2', url=url)
+    removed = store.prune_unreferenced_blobs()
+    paths = store.paths()
+
+    # Assert
+    assert not (tmp_path / 'legacy.pdf').exists()
+    assert open(store.path_for('legacy'), 'rb').read() == b'%PDF-1.3 folleto anterior'
+    sha = store.index.get('1').sha256
+    assert store.path_for('1') == str(tmp_path / 'blobs' / sha[:2] / sha[2:4] / f"{sha}.pdf")
+    assert set(paths) == {'legacy', '1', '2'}
+    assert paths['1'] != paths['2']
+    assert removed == 0  # El blob original sigue referenciado por la propiedad 1
+    assert len(list((tmp_path / 'blobs').rglob('*.pdf'))) == 3
+    store.close()
+
+
+def test_read_helpers_query_the_index_without_touching_the_store(tmp_path):
+    # Arrange: un PDF ya en el almacén y otro del formato plano todavía sin importar
+    source = tmp_path / 'uno.tmp'
+    source.write_bytes(b'%PDF-1.4 uno')
+    store = PdfStore(str(tmp_path))
+    store.add_file('1', str(source))
+    expected = store.path_for('1')
+    store.close()
+    (tmp_path / '2.pdf').write_bytes(b'%PDF-1.4 dos')
+
+    # Act
+    paths = load_pdf_paths(str(tmp_path))
+    available = load_available_pdf_ids(str(tmp_path))
+
+    # Assert
+    assert paths == {'1': expected}
+    assert available == {'1'}
+    assert resolve_pdf_path('1', str(tmp_path)) == expected
+    assert resolve_pdf_path('2', str(tmp_path)) is None
+    assert (tmp_path / '2.pdf').exists()  # La importación queda para el código de descarga
+    assert load_pdf_paths(str(tmp_path / 'sin_almacen')) == {}
+    assert not (tmp_path / 'sin_almacen').exists()
@@ -0,0 +1,101 @@
+import random
+
+import pandas as pd
+
+from src.data_processing.photo_index import (
+    BKTree, PhotoIndex, hamming, load_photo_index, cluster_shared_photos,
+)
+
+BASE = 0x0F0F0F0F0F0F0F0F
+FAR = 0x3C3CC3C35A5AA5A5
+
+
+def _hex(value):
+    return f"{value:016x}"
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=['property_id', 'image_sha256', 'phash'])
+
+
+def test_bk_tree_search_matches_linear_scan():
+    # Arrange
+    rng = random.Random(11)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    values += [values[0] ^ (1 << bit) for bit in range(0, 64, 9)]  # Vecinos cercanos de values[0]
+    tree = BKTree()
+    for value in values:
+        tree.add(value)
+
+    # Act
+    found = sorted(tree.search(values[0], 8))
+
+    # Assert
+    expected = sorted({(value, hamming(values[0], value)) for value in values if hamming(values[0], value) <= 8})
+    assert found == expected
+    assert len(tree) == len(set(values))
+    assert tree.add(values[0]) is False
+
+
+def test_shared_photos_finds_near_identical_photos_in_other_properties():
+    # Arrange: la propiedad 2 reutiliza una foto recomprimida de la 1
+    index = PhotoIndex.from_frame(_frame([
+        ('1', 'a' * 64, _hex(BASE)),
+        ('1', 'b' * 64, _hex(FAR)),
+        ('2', 'c' * 64, _hex(BASE ^ 0b101)),
+        ('3', 'd' * 64, _hex(FAR ^ ((1 << 64) - 1) ^ 0xFF)),  # Muy distinta
+        ('4', 'e' * 64, '0000000000000000'),  # Imagen lisa: no se indexa
+        ('5', 'f' * 64, None),
+    ]))
+
+    # Act
+    shared = index.shared_photos('1')
+
+    # Assert
+    assert shared.values.tolist() == [['2', 1, 2]]
+    assert index.shared_photos('3').empty
+    assert index.property_count == 3
+
+
+def test_replace_property_drops_photos_of_the_previous_pdf():
+    # Arrange
+    index = PhotoIndex.from_frame(_frame([('1', 'a' * 64, _hex(BASE)), ('2', 'c' * 64, _hex(BASE ^ 1))]))
+
+    # Act: el PDF de la propiedad 2 cambió y ya no trae la foto repetida
+    index.replace_property('2', _frame([(None, 'd' * 64, _hex(FAR))]))
+
+    # Assert
+    assert index.shared_photos('1').empty
+    assert [match[0] for match in index.similar(_hex(FAR))] == ['2']
+
+
+def test_cluster_shared_photos_joins_chains_and_skips_stock_photos():
+    # Arrange: 1-2 comparten una foto y 2-3 otra; la foto de la oficina aparece en 4 propiedades
+    stock = 0x00FF00FF00FF00FF
+    index = PhotoIndex.from_frame(_frame([
+        ('1', 'a' * 64, _hex(BASE)),
+        ('2', 'b' * 64, _hex(BASE ^ 0b11)),
+        ('2', 'c' * 64, _hex(FAR)),
+        ('3', 'd' * 64, _hex(FAR)),
+    ] + [(str(property_id), f"{property_id}" * 64, _hex(stock)) for property_id in (6, 7, 8, 9)]))
+
+    # Act
+    clusters = cluster_shared_photos(index, max_properties=3)
+
+    # Assert
+    assert clusters.values.tolist() == [['1', '1', 1], ['1', '2', 2], ['1', '3', 1]]
+
+
+def test_load_photo_index_rebuilds_when_the_saved_index_is_missing(tmp_path):
+    # Arrange
+    path = str(tmp_path / 'photo_index.pkl')
+    images = _frame([('1', 'a' * 64, _hex(BASE)), ('2', 'b' * 64, _hex(BASE))])
+
+    # Act
+    rebuilt = load_photo_index(lambda: images, path)
+    rebuilt.save(path)
+    loaded = load_photo_index(lambda: None, path)
+
+    # Assert
+    assert loaded.shared_photos('2').values.tolist() == [['1', 1, 0]]
+    assert load_photo_index(lambda: None, str(tmp_path / 'otro.pkl')) is None
@@ -0,0 +1,133 @@
+import threading
+import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock
+from src.pipeline.dag import Dag, Stage, CheckpointStore, PipelineError, STATUS_DONE, STATUS_FAILED
+from src.pipeline.ingestion import IngestionOptions, run_ingestion
+
+def test_dag_runs_stages_in_dependency_order(tmp_path):
+    # Arrange
+    calls = []
+    def record(name, value):
+        def func(inputs):
+            calls.append(name)
+            return value + sum(inputs.values())
+        return func
+    dag = Dag([
+        Stage('c', record('c', 100), depends_on=('a', 'b')),
+        Stage('a', record('a', 1)),
+        Stage('b', record('b', 10), depends_on=('a',)),
+    ])
+    store = CheckpointStore(str(tmp_path), 'run1')
+
+    # Act
+    outputs = dag.run(store)
+
+    # Assert
+    assert calls == ['a', 'b', 'c']
+    assert outputs == {'a': 1, 'b': 11, 'c': 112}
+    assert all(store.status(name) == STATUS_DONE for name in ('a', 'b', 'c'))
+
+def test_dag_runs_independent_stages_concurrently(tmp_path):
+    # Arrange: 'left' y 'right' sólo terminan si ambas están corriendo a la vez
+    barrier = threading.Barrier(2, timeout=5)
+    dag = Dag([
+        Stage('root', lambda inputs: 0),
+        Stage('left', lambda inputs: barrier.wait() is not None, depends_on=('root',)),
+        Stage('right', lambda inputs: barrier.wait() is not None, depends_on=('root',)),
+    ])
+
+    # Act
+    outputs = dag.run(CheckpointStore(str(tmp_path), 'run1'), max_workers=2)
+
+    # Assert
+    assert outputs['left'] and outputs['right']
+
+def test_dag_stops_on_failure_and_resumes_from_checkpoint(tmp_path):
+    # Arrange
+    first = MagicMock(return_value=pd.DataFrame({'id': [1, 2]}))
+    flaky = MagicMock(side_effect=[RuntimeError("db down"), 'loaded'])
+    after = MagicMock(return_value='done')
+    dag = Dag([
+        Stage('clean', first),
+        Stage('load', flaky, depends_on=('clean',)),
+        Stage('report', after, depends_on=('load',)),
+    ])
+
+    # Act / Assert: la primera ejecución falla en 'load'
+    with pytest.raises(PipelineError):
+        dag.run(CheckpointStore(str(tmp_path), 'run1'))
+    store = CheckpointStore(str(tmp_path), 'run1')
+    assert store.status('clean') == STATUS_DONE
+    assert store.status('load') == STATUS_FAILED
+    after.assert_not_called()
+
+    # Act: reanudar la misma ejecución
+    outputs = dag.run(store)
+
+    # Assert: 'clean' no se vuelve a ejecutar y su salida viene del checkpoint
+    assert first.call_count == 1
+    assert outputs['load'] == 'loaded'
+    assert outputs['report'] == 'done'
+    pd.testing.assert_frame_equal(flaky.call_args[0][0]['clean'], pd.DataFrame({'id': [1, 2]}))
+    assert CheckpointStore.latest_run_id(str(tmp_path)) == 'run1'
+
+def test_dag_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError):
+        Dag([Stage('a', lambda i: 1, depends_on=('b',)), Stage('b', lambda i: 1, depends_on=('a',))])
+    with pytest.raises(ValueError):
+        Dag([Stage('a', lambda i: 1, depends_on=('missing',))])
+
+def test_invalidate_downstream_reruns_stages(tmp_path):
+    # Arrange
+    counter = MagicMock(side_effect=[1, 2])
+    dag = Dag([Stage('a', lambda i: 'x'), Stage('b', counter, depends_on=('a',))])
+    store = CheckpointStore(str(tmp_path), 'run1')
+    dag.run(store)
+
+    # Act
+    store.invalidate(dag.downstream_of('b'))
+    outputs = dag.run(store)
+
+    # Assert
+    assert outputs['b'] == 2
+    assert dag.downstream_of('a') == ['a', 'b']
+
+@patch('src.pipeline.ingestion.save_snapshot')
+@patch('src.pipeline.ingestion.load_snapshot', return_value=None)
+@patch('src.pipeline.ingestion.PropertyRepository')
+@patch('src.pipeline.ingestion.validate_and_report_missing_data')
+@patch('src.pipeline.ingestion.merge_inventories')
+@patch('src.pipeline.ingestion.clean_inventory_files')
+@patch('src.pipeline.ingestion.find_inventory_files', return_value=['inv.xlsx'])
+@patch('src.pipeline.ingestion.download_inventory_process')
+def test_run_ingestion_pauses_on_gaps_and_resumes(mock_download, mock_find, mock_clean, mock_merge,
+                                                   mock_validate, mock_repo_cls, mock_load_snapshot,
+                                                   mock_save_snapshot, tmp_path):
+    # Arrange
+    cleaned = pd.DataFrame({'id': ['1', '2'], 'precio': [1.0, 2.0]})
+    mock_merge.return_value = cleaned
+    mock_validate.side_effect = lambda df: df.assign(has_critical_gaps=[True, False])
+    mock_repo_cls.return_value.load_inventory_changes.return_value = True
+    options = IngestionOptions(skip_download=True, pause_on_gaps=0.25)
+
+    # Act / Assert: 50% de gaps críticos supera el umbral y detiene la carga
+    with patch('src.pipeline.ingestion.PipelineRun') as mock_run:
+        mock_run.return_value.__enter__.return_value.run_id = 'run1'
+        with pytest.raises(PipelineError):
+            run_ingestion(options, runs_dir=str(tmp_path))
+        mock_repo_cls.return_value.load_inventory_changes.assert_not_called()
+
+        # Act: reanudar sin umbral
+        options.pause_on_gaps = None
+        outputs = run_ingestion(options, resume='latest', runs_dir=str(tmp_path))
+
+    # Assert
+    mock_download.assert_not_called()
+    assert mock_clean.call_count == 1
+    # Sin snapshot anterior: carga completa y ninguna entrada de auditoría de altas
+    assert outputs['load'] == {'upserted': 2}
+    rows, _, audit_entries = mock_repo_cls.return_value.load_inventory_changes.call_args[0][:3]
+    assert rows['id'].tolist() == ['1', '2']
+    assert audit_entries.empty
+    mock_save_snapshot.assert_called_once()
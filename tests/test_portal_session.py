@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.data_collection import portal_session
+from src.data_collection.portal_session import (
+    SessionCache, PortalSession, SessionExpiredError, harvest_session, download_inventory_export,
+)
+from src.data_collection.download_watcher import DownloadError, OLE2_SIGNATURE
+
+pytest.importorskip('cryptography')
+
+
+def _state(**overrides):
+    state = {
+        'cookies': [{'name': 'PHPSESSID', 'value': 'abc', 'domain': 'plus.21onlinemx.com', 'path': '/'}],
+        'csrf_token': 'tok',
+        'user_agent': 'Mozilla/5.0 test',
+        'inventory_export_url': 'https://plus.21onlinemx.com/propiedades/exportar',
+        'created_at': time.time(),
+    }
+    state.update(overrides)
+    return state
+
+
+def _response(status=200, url='https://plus.21onlinemx.com/propiedades/exportar', chunks=(), history=()):
+    response = MagicMock()
+    response.status_code = status
+    response.url = url
+    response.history = list(history)
+    response.iter_content.return_value = list(chunks)
+    response.__enter__.return_value = response
+    return response
+
+
+def test_session_cache_roundtrip_is_encrypted(tmp_path):
+    # Arrange
+    path = str(tmp_path / 'session' / 'portal_session.enc')
+    cache = SessionCache(path=path, secret='s3cret')
+    state = _state()
+
+    # Act
+    saved = cache.save(state)
+    loaded = cache.load()
+
+    # Assert
+    assert saved is True
+    assert loaded == state
+    with open(path, encoding='utf-8') as f:
+        raw = f.read()
+    assert 'PHPSESSID' not in raw and 'abc' not in json.loads(raw)['token']
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert SessionCache(path=path, secret='otra-clave').load() is None
+
+    cache.save(_state(created_at=time.time() - portal_session.SESSION_MAX_AGE_SECONDS - 1))
+    assert cache.load() is None
+
+    cache.clear()
+    assert not os.path.exists(path)
+
+
+def test_harvest_session_reads_cookies_and_user_agent():
+    # Arrange
+    driver = MagicMock()
+    driver.get_cookies.return_value = [
+        {'name': 'PHPSESSID', 'value': 'abc', 'domain': 'plus.21onlinemx.com', 'path': '/', 'httpOnly': True},
+    ]
+    driver.execute_script.return_value = 'Mozilla/5.0 headless'
+
+    # Act
+    state = harvest_session(driver, csrf_token='tok', inventory_export_url='https://x/export')
+
+    # Assert
+    assert state['cookies'] == [{'name': 'PHPSESSID', 'value': 'abc', 'domain': 'plus.21onlinemx.com', 'path': '/'}]
+    assert state['user_agent'] == 'Mozilla/5.0 headless'
+    assert state['inventory_export_url'] == 'https://x/export'
+
+    session = PortalSession(state)
+    assert session.http.cookies.get('PHPSESSID') == 'abc'
+    assert session.http.headers['X-CSRF-Token'] == 'tok'
+
+
+@pytest.mark.parametrize('response', [
+    _response(status=403),
+    _response(url='https://plus.21onlinemx.com/login2',
+              history=[MagicMock(headers={'Location': 'https://plus.21onlinemx.com/login2'})]),
+])
+def test_portal_session_detects_expired_session(response):
+    # Arrange
+    session = PortalSession(_state())
+
+    # Act / Assert
+    with patch.object(session.http, 'get', return_value=response):
+        with pytest.raises(SessionExpiredError):
+            session.get('https://plus.21onlinemx.com/propiedades/exportar')
+    response.close.assert_called_once()
+
+
+def test_download_inventory_export_writes_verified_workbook(tmp_path):
+    # Arrange
+    destination = str(tmp_path / 'downloads' / 'inventario.xls')
+    session = PortalSession(_state())
+
+    # Act
+    with patch.object(session.http, 'get', return_value=_response(chunks=[OLE2_SIGNATURE, b'\x00' * 512])):
+        path = download_inventory_export(session, destination)
+
+    # Assert
+    assert path == destination
+    assert open(destination, 'rb').read().startswith(OLE2_SIGNATURE)
+
+    with patch.object(session.http, 'get', return_value=_response(chunks=[b'<html>Iniciar sesion</html>'])):
+        with pytest.raises(DownloadError):
+            download_inventory_export(session, destination)
+    assert not os.path.exists(destination + '.part')
+
+
+def test_browserless_download_falls_back_to_browser_when_session_expired(tmp_path):
+    from src.data_collection import download_inventory
+
+    # Arrange
+    cache = SessionCache(path=str(tmp_path / 'portal_session.enc'), secret='s3cret')
+    cache.save(_state())
+
+    with patch.dict(os.environ, {'C21_USERNAME': 'user', 'C21_PSW': 'pw'}), \
+         patch.object(download_inventory, 'SessionCache', return_value=cache), \
+         patch.object(download_inventory, 'DOWNLOAD_DIR', str(tmp_path)), \
+         patch.object(download_inventory, 'SCREENSHOT_DIR', str(tmp_path)), \
+         patch.object(download_inventory, 'download_inventory_export',
+                      side_effect=SessionExpiredError("expirada")) as mock_export, \
+         patch.object(download_inventory, 'setup_webdriver', side_effect=download_inventory.WebDriverException("sin navegador")) as mock_setup:
+
+        # Act
+        result = download_inventory.download_inventory_process(browserless=True)
+
+    # Assert
+    assert result is False
+    mock_export.assert_called_once()
+    mock_setup.assert_called_once()
+    assert not os.path.exists(cache.path)
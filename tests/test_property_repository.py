@@ -172,3 +172,166 @@ def test_load_properties_error_handling(property_repo, mock_db_connection):
 
     mock_conn.rollback.assert_called_once()
     mock_conn.close.assert_called_once()
+
+def test_log_audit_entries_bulk_insert(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange
+    entries = pd.DataFrame({
+        'property_id': ['1', '2'],
+        'field_name': ['precio', '__listing__'],
+        'old_value': ['100.0', None],
+        'new_value': ['110.0', 'added']
+    })
+
+    # Act
+    result = property_repo.log_audit_entries(entries, changed_by='system', change_source='snapshot_diff')
+
+    # Assert
+    assert result is True
+    mock_execute_values.assert_called_once()
+    records = mock_execute_values.call_args[0][2]
+    assert records == [
+        ('1', 'precio', '100.0', '110.0', 'system', 'snapshot_diff'),
+        ('2', '__listing__', None, 'added', 'system', 'snapshot_diff')
+    ]
+    mock_conn.commit.assert_called_once()
+    mock_conn.close.assert_called_once()
+
+def test_get_properties_from_db_compact(property_repo, mock_db_connection):
+    # Arrange
+    db_df = pd.DataFrame({
+        'id': ['1', '2'],
+        'status': ['enPromocion', 'vendidas'],
+        'comision': [3.5, 4.0]
+    })
+    with patch('pandas.read_sql', return_value=db_df):
+        # Act
+        result_df = property_repo.get_properties_from_db(compact=True)
+
+    # Assert
+    assert isinstance(result_df['status'].dtype, pd.CategoricalDtype)
+    assert str(result_df['comision'].dtype) == 'float32'
+    assert result_df['id'].tolist() == ['1', '2']
+
+def test_save_duplicate_clusters_replaces_table(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange
+    clusters = pd.DataFrame({
+        'cluster_id': ['A1', 'A1'],
+        'property_id': ['A1', 'B7'],
+        'clave_oficina': ['OF1', 'OF2'],
+        'score': [0.91, 0.91]
+    })
+
+    # Act
+    result = property_repo.save_duplicate_clusters(clusters)
+
+    # Assert
+    assert result is True
+    mock_cursor.execute.assert_called_once_with("DELETE FROM duplicate_clusters")
+    assert mock_execute_values.call_args[0][2] == [('A1', 'A1', 'OF1', 0.91), ('A1', 'B7', 'OF2', 0.91)]
+    mock_conn.commit.assert_called_once()
+
+def test_load_inventory_changes_commits_rows_audit_and_clusters_together(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange
+    rows = pd.DataFrame({'id': ['1'], 'precio': [100.0]})
+    entries = pd.DataFrame({'property_id': ['1'], 'field_name': ['precio'], 'old_value': ['90.0'], 'new_value': ['100.0']})
+    clusters = pd.DataFrame({'cluster_id': ['1'], 'property_id': ['1'], 'clave_oficina': ['OF1'], 'score': [0.9]})
+
+    # Act
+    result = property_repo.load_inventory_changes(rows, ['id', 'precio'], entries, clusters, 'system', 'snapshot_diff')
+
+    # Assert
+    assert result is True
+    assert mock_execute_values.call_count == 3
+    assert mock_execute_values.call_args_list[1][0][2] == [('1', 'precio', '90.0', '100.0', 'system', 'snapshot_diff')]
+    mock_cursor.execute.assert_called_once_with("DELETE FROM duplicate_clusters")
+    mock_conn.commit.assert_called_once()
+
+def test_load_inventory_changes_rolls_back_everything_on_error(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange: falla el reemplazo de los clusters, después del upsert y la auditoría
+    rows = pd.DataFrame({'id': ['1'], 'precio': [100.0]})
+    entries = pd.DataFrame({'property_id': ['1'], 'field_name': ['__listing__'], 'old_value': [None], 'new_value': ['added']})
+    clusters = pd.DataFrame(columns=['cluster_id', 'property_id', 'clave_oficina', 'score'])
+    mock_cursor.execute.side_effect = psycopg2.Error("relation does not exist")
+
+    # Act
+    result = property_repo.load_inventory_changes(rows, ['id', 'precio'], entries, clusters, 'system', 'snapshot_diff')
+
+    # Assert
+    assert result is False
+    mock_conn.commit.assert_not_called()
+    mock_conn.rollback.assert_called_once()
+    mock_conn.close.assert_called_once()
+
+def test_apply_field_updates_writes_only_empty_fields_and_audits_them(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange: la propiedad 2 ya tenía precio en la base de datos (no lo devuelve el RETURNING)
+    updates = pd.DataFrame({
+        'property_id': ['1', '2', '1'],
+        'field_name': ['precio', 'precio', 'recamaras'],
+        'old_value': [None, None, None],
+        'new_value': [3250000.0, 990000.0, 3]
+    })
+    mock_execute_values.side_effect = [[('1',)], [('1',)], None]
+
+    # Act
+    applied = property_repo.apply_field_updates(updates, 'Sistema', 'pdf_autofill')
+
+    # Assert
+    assert applied[['property_id', 'field_name']].values.tolist() == [['1', 'precio'], ['1', 'recamaras']]
+    assert mock_execute_values.call_args_list[0][0][2] == [('1', 3250000.0), ('2', 990000.0)]
+    assert mock_execute_values.call_args_list[2][0][2] == [
+        ('1', 'precio', None, 3250000.0, 'Sistema', 'pdf_autofill'),
+        ('1', 'recamaras', None, 3, 'Sistema', 'pdf_autofill')
+    ]
+    mock_cursor.execute.assert_not_called()  # Sólo UPDATE ... FROM (VALUES) y la auditoría
+    mock_conn.commit.assert_called_once()
+    mock_conn.close.assert_called_once()
+
+def test_get_property_columns_reads_projection_in_one_query(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange
+    db_df = pd.DataFrame({'id': ['1', '2'], 'precio': [100.0, 200.0]})
+    with patch('pandas.read_sql', return_value=db_df) as mock_read_sql:
+        # Act
+        result_df = property_repo.get_property_columns(['precio'], property_ids=[1, '2'])
+        unknown = property_repo.get_property_columns(['precio; DROP TABLE properties'])
+
+    # Assert
+    query = mock_read_sql.call_args[0][0]
+    assert query == "SELECT id, precio FROM properties WHERE id = ANY(%(property_ids)s)"
+    assert mock_read_sql.call_args[1]['params'] == {'property_ids': ['1', '2']}
+    assert result_df is db_df
+    assert unknown is None
+    mock_read_sql.assert_called_once()
+
+def test_save_property_images_upserts_and_prunes_in_one_transaction(property_repo, mock_db_connection):
+    mock_conn, mock_cursor, mock_psycopg2_conn_module, mock_extras_module, mock_execute_values = mock_db_connection
+
+    # Arrange: la propiedad 2 ya no tiene fotos en su PDF
+    sources = pd.DataFrame({'property_id': ['1', '2'], 'pdf_sha256': ['a' * 64, 'b' * 64], 'image_count': [1, 0]})
+    images = pd.DataFrame({
+        'property_id': ['1'], 'image_sha256': ['f' * 64], 'page': [0], 'width': [1600], 'height': [1200],
+        'resolution_score': [0.73], 'sharpness_score': [0.9], 'brightness_score': [0.8], 'auto_score': [8.0],
+        'phash': ['0f0f0f0f0f0f0f0f']
+    })
+
+    # Act
+    result = property_repo.save_property_images(sources, images)
+
+    # Assert
+    assert result is True
+    assert mock_execute_values.call_count == 2
+    assert 'ON CONFLICT (property_id, image_sha256)' in mock_execute_values.call_args_list[0][0][1]
+    assert mock_cursor.execute.call_args[0][1] == (['1', '2'], [f"1:{'f' * 64}"])
+    assert mock_execute_values.call_args_list[1][0][2] == [('1', 'a' * 64, 1), ('2', 'b' * 64, 0)]
+    mock_conn.commit.assert_called_once()
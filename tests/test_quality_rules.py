@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from src.data_processing.quality_rules import (
+    evaluate_rules, range_rule, compare_rule, regex_rule, allowed_values_rule, DEFAULT_RULES,
+    SEVERITY_ERROR, SEVERITY_WARNING,
+)
+
+def _properties():
+    return pd.DataFrame({
+        'id': ['p1', 'p2', 'p3', 'p4', 'p5'],
+        'status': ['enPromocion', 'vendidas', 'borrador', 'enPromocion', None],
+        'latitud': [28.63, 0.0, 28.70, None, 28.65],
+        'longitud': [-106.07, 0.0, -106.10, -106.05, -106.08],
+        'precio': [2_500_000.0, 1.0, 1_800_000.0, 3_000_000.0, 950_000.0],
+        'm2_construccion': [120.0, 90.0, 400.0, 150.0, 80.0],
+        'm2_terreno': [160.0, 120.0, 100.0, 75.0, 90.0],
+        'niveles_construidos': [1, 1, 1, 2, 1],
+        'banos_totales': [2.5, 1.0, 25.0, 2.0, 1.0],
+        'codigo_postal': ['31000', '3100', '31125', '', None],
+    })
+
+def test_default_rules_flag_present_but_invalid_values():
+    # Act
+    report = evaluate_rules(_properties())
+
+    # Assert
+    counts = report.summary.set_index('rule')['violations']
+    assert counts['latitud_mexico'] == 1          # latitud 0
+    assert counts['precio_minimo'] == 1           # precio de 1 peso
+    assert counts['banos_totales_maximo'] == 1    # 25 baños
+    assert counts['status_allowed'] == 1          # 'borrador'; el nulo no cuenta
+    assert counts['codigo_postal_formato'] == 1   # '3100'; vacío y nulo no cuentan
+    # p3 excede el terreno; p4 tiene 2 niveles y cabe en 75 x 2
+    assert counts['construccion_vs_terreno'] == 1
+    samples = report.summary.set_index('rule')['sample_ids']
+    assert samples['latitud_mexico'] == ['p2']
+    assert samples['construccion_vs_terreno'] == ['p3']
+
+def test_row_mask_by_severity_and_skipped_rules():
+    # Arrange
+    df = pd.DataFrame({'id': ['a', 'b', 'c'], 'x': [1.0, 50.0, np.nan], 'y': [2.0, 10.0, 1.0]})
+    rules = [
+        range_rule('x_max', 'x', max_value=10),
+        compare_rule('x_le_y', 'x', '<=', 'y', severity=SEVERITY_WARNING),
+        regex_rule('z_fmt', 'z', r'\d+'),
+        allowed_values_rule('y_ref', 'y', {1.0, 2.0, 10.0}),
+    ]
+
+    # Act
+    report = evaluate_rules(df, rules)
+
+    # Assert
+    assert report.skipped == ['z_fmt']
+    assert report.row_mask(SEVERITY_ERROR).tolist() == [False, True, False]
+    assert report.row_mask().tolist() == [False, True, False]
+    assert report.total_violations == 2
+
+def test_evaluate_rules_scales_to_large_frames():
+    # Arrange: 200k filas; las reglas deben evaluarse sin iterar por fila
+    n = 200_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'id': np.arange(n).astype(str),
+        'latitud': rng.uniform(10, 35, n),
+        'precio': rng.uniform(0, 5_000_000, n),
+        'm2_construccion': rng.uniform(0, 500, n),
+        'm2_terreno': rng.uniform(0, 500, n),
+        'banos_totales': rng.integers(0, 30, n).astype(float),
+    })
+
+    # Act
+    report = evaluate_rules(df, DEFAULT_RULES * 10)
+
+    # Assert
+    latitud = report.summary[report.summary['rule'] == 'latitud_mexico'].iloc[0]
+    assert latitud['violations'] == int(((df['latitud'] < 14) | (df['latitud'] > 33)).sum())
+    assert len(latitud['sample_ids']) == 5
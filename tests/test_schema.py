@@ -0,0 +1,69 @@
+import pandas as pd
+from src.utils.schema import (
+    PROPERTY_SCHEMA, PERSISTED_COLUMNS, build_table_ddl, coerce_frame, encode_records, column_priority
+)
+from src.utils.constants import DB_COLUMNS
+
+def test_db_columns_are_generated_from_schema():
+    assert DB_COLUMNS == PERSISTED_COLUMNS
+    assert 'banos' not in DB_COLUMNS
+    assert 'banos_totales' in DB_COLUMNS
+
+def test_build_table_ddl_contains_constraints():
+    ddl = build_table_ddl()
+    assert "id VARCHAR(255) PRIMARY KEY" in ddl
+    assert "precio DECIMAL(18, 2) NOT NULL CHECK (precio >= 0)" in ddl
+    assert "status VARCHAR(50) NOT NULL CHECK (status IN ('enPromocion', 'conIntencion', 'vendidas'))" in ddl
+    assert "updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP" in ddl
+    assert " banos " not in ddl
+
+def test_coerce_frame_resolves_aliases_and_types():
+    # Arrange
+    raw_df = pd.DataFrame({
+        'id': ['A1', 'A2', 'A3'],
+        'm2C': ['1,200', '80', None],
+        'recamaras': [3.0, None, 2.0],
+        'enInternet': ['Si', 'No', None],
+        'cocina': ['si', 'NO', 1],
+        'codigoPostal': ['01234', None, '44100'],
+        'fechaAlta': ['2024-01-01', 'no es fecha', None],
+        'numeroLlaves': [1, 2, 3]
+    })
+
+    # Act
+    df = coerce_frame(raw_df)
+
+    # Assert
+    assert list(df.columns) == [spec.name for spec in PROPERTY_SCHEMA if spec.name != 'banos_totales']
+    assert df['m2_construccion'].tolist()[:2] == [1200.0, 80.0]
+    assert pd.isna(df['m2_construccion'].iloc[2])
+    assert str(df['recamaras'].dtype) == 'Int64'
+    assert df['en_internet'].tolist() == [True, False, False]
+    assert df['cocina'].tolist() == [True, False, True]
+    assert df['codigo_postal'].tolist() == ['01234', '', '44100']
+    assert pd.isna(df['fecha_alta'].iloc[1])
+    assert df['banos'].tolist() == [0.0, 0.0, 0.0]
+    assert 'numeroLlaves' not in df.columns
+
+def test_encode_records_returns_native_python_types():
+    # Arrange
+    df = pd.DataFrame({
+        'id': ['A1', 'A2'],
+        'recamaras': pd.Series([3, None], dtype='Int64'),
+        'cocina': [True, False],
+        'precio': [100.0, float('nan')]
+    })
+
+    # Act
+    records = encode_records(df, ['id', 'recamaras', 'cocina', 'precio'])
+
+    # Assert
+    assert records == [('A1', 3, True, 100.0), ('A2', None, False, None)]
+    assert type(records[0][1]) is int
+    assert type(records[0][2]) is bool
+
+def test_column_priority_has_no_duplicates():
+    priority = column_priority()
+    all_columns = [col for cols in priority.values() for col in cols]
+    assert len(all_columns) == len(set(all_columns))
+    assert 'precio' in priority['critical']
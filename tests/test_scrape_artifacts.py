@@ -0,0 +1,49 @@
+import os
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from src.data_collection.scrape_artifacts import ScrapeRecorder, prune_artifacts
+
+
+def _touch(path, age_days):
+    path.write_bytes(b'x')
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_artifacts_applies_age_and_count_limits(tmp_path):
+    # Arrange
+    _touch(tmp_path / 'old.png', age_days=10)
+    for i in range(5):
+        _touch(tmp_path / f'recent_{i}.html', age_days=i * 0.1)
+    _touch(tmp_path / 'keep.log', age_days=30)  # No es un artefacto del scraper
+
+    # Act
+    removed = prune_artifacts(str(tmp_path), retention_days=7, max_files=3)
+
+    # Assert
+    assert removed == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['keep.log', 'recent_0.html', 'recent_1.html', 'recent_2.html']
+
+
+def test_fast_recorder_only_captures_failures_and_times_steps(tmp_path):
+    # Arrange
+    driver = MagicMock()
+    driver.get_screenshot_as_png.return_value = b'\x89PNG'
+    driver.page_source = '<html>error</html>'
+    recorder = ScrapeRecorder(str(tmp_path), capture_steps=False)
+
+    # Act
+    with recorder.step('login', driver):
+        recorder.screenshot(driver, '1_initial_login_page')
+    with pytest.raises(TimeoutError):
+        with recorder.step('download', driver):
+            raise TimeoutError("menu")
+    recorder.close()
+
+    # Assert
+    names = sorted(p.name.split('_', 1)[1] for p in tmp_path.iterdir())
+    assert names == ['download_failed.png', 'download_failed_page_source.html']
+    assert driver.get_screenshot_as_png.call_count == 1
+    assert set(recorder.timings) == {'login', 'download'}
@@ -0,0 +1,66 @@
+import pandas as pd
+from src.data_processing.snapshot_diff import diff_snapshots, save_snapshot, load_snapshot, LISTING_FIELD
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=['id', 'precio', 'recamaras', 'colonia'])
+    df['recamaras'] = df['recamaras'].astype('Int64')
+    return df
+
+def test_diff_snapshots_classifies_rows():
+    # Arrange
+    previous = _frame([
+        ['1', 100.0, 3, 'Centro'],
+        ['2', 200.0, 2, 'Norte'],
+        ['3', 300.0, None, 'Sur'],
+    ])
+    current = _frame([
+        ['1', 100.0, 3, 'Centro'],      # sin cambios
+        ['2', 210.0, 2, 'Poniente'],    # re-precio y cambio de colonia
+        ['4', 400.0, 4, 'Oriente'],     # alta
+    ])
+
+    # Act
+    change_set = diff_snapshots(previous, current, columns=['id', 'precio', 'recamaras', 'colonia'])
+
+    # Assert
+    assert change_set.summary() == {'added': 1, 'removed': 1, 'modified': 1, 'unchanged': 1}
+    assert change_set.added['id'].tolist() == ['4']
+    assert change_set.removed['id'].tolist() == ['3']
+    assert change_set.modified['changed_columns'].tolist() == [['precio', 'colonia']]
+    changes = change_set.changes.set_index('field_name')
+    assert changes.loc['precio', 'old_value'] == '200.0'
+    assert changes.loc['precio', 'new_value'] == '210.0'
+
+    upsert = change_set.rows_to_upsert()
+    assert sorted(upsert['id']) == ['2', '4']
+    assert 'changed_columns' not in upsert.columns
+
+    audit = change_set.audit_entries()
+    assert len(audit) == 4
+    assert set(audit.loc[audit['field_name'] == LISTING_FIELD, 'new_value']) == {'added', 'removed'}
+
+def test_diff_snapshots_treats_nulls_as_equal():
+    previous = _frame([['1', None, None, None]])
+    current = _frame([['1', None, None, None]])
+
+    change_set = diff_snapshots(previous, current, columns=['id', 'precio', 'recamaras', 'colonia'])
+
+    assert change_set.is_empty
+    assert change_set.unchanged_count == 1
+
+def test_diff_snapshots_without_previous_snapshot():
+    current = _frame([['1', 100.0, 3, 'Centro'], ['2', 200.0, 2, 'Norte']])
+
+    change_set = diff_snapshots(None, current)
+
+    assert change_set.summary() == {'added': 2, 'removed': 0, 'modified': 0, 'unchanged': 0}
+    assert len(change_set.rows_to_upsert()) == 2
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "snapshot.pkl")
+    df = _frame([['1', 100.0, 3, 'Centro']])
+
+    save_snapshot(df, path)
+
+    pd.testing.assert_frame_equal(load_snapshot(path), df)
+    assert load_snapshot(str(tmp_path / "missing.pkl")) is None